@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: fork-per-hook vs hook daemon
+
+Runs each PreToolUse hook with a representative payload, first the way
+settings.json used to invoke it (`python3 <hook>.py`), then through
+`python3 -S hook-client.py` with a warm daemon, and prints per-call
+latency.
+
+Usage:
+    python3 hooks/bench/bench-daemon.py [--iterations N]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HOOKS_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+CLIENT = os.path.join(HOOKS_DIR, 'hook-client.py')
+
+CASES = [
+    ('auto-approve-reads.py', {"tool_name": "Read", "tool_input": {"file_path": "/app/docs/setup.md"}}),
+    ('destructive-bash-blocker.py', {"tool_name": "Bash", "tool_input": {"command": "git status && npm run build"}}),
+    ('pre-commit-gate.py', {"tool_name": "Bash", "tool_input": {"command": "php artisan test --filter=ItemTest"}}),
+    ('file-protection.py', {"tool_name": "Edit", "tool_input": {"file_path": "/app/app/Services/MetrcApi.php"}}),
+]
+
+
+def time_calls(command: list[str], payload: bytes, iterations: int, env: dict[str, str]) -> list[float]:
+    """Run `command` `iterations` times, returning wall-clock ms per call."""
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        subprocess.run(command, input=payload, capture_output=True, env=env, check=False)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(timings: list[float]) -> str:
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"mean {statistics.mean(timings):7.2f}ms  p50 {statistics.median(timings):7.2f}ms  p95 {p95:7.2f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault('CLAUDE_PROJECT_DIR', os.getcwd())
+
+    # Warm the daemon so its one-off startup isn't measured
+    subprocess.run([sys.executable, '-S', CLIENT, CASES[0][0]], input=json.dumps(CASES[0][1]).encode(),
+                   capture_output=True, env=env, check=False)
+    time.sleep(0.5)
+
+    totals = {'fork': [], 'daemon': []}
+    for script, payload in CASES:
+        data = json.dumps(payload).encode()
+        fork = time_calls([sys.executable, os.path.join(HOOKS_DIR, script)], data, args.iterations, env)
+        daemon = time_calls([sys.executable, '-S', CLIENT, script], data, args.iterations, env)
+        totals['fork'].extend(fork)
+        totals['daemon'].extend(daemon)
+
+        print(script)
+        print(f"  fork-per-hook  {summarize(fork)}")
+        print(f"  daemon         {summarize(daemon)}")
+
+    speedup = statistics.mean(totals['fork']) / statistics.mean(totals['daemon'])
+    print()
+    print(f"All hooks: fork-per-hook {summarize(totals['fork'])}")
+    print(f"           daemon        {summarize(totals['daemon'])}")
+    print(f"           speedup       {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
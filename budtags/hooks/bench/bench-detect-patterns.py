@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Benchmark: run-plan pattern detection, grep scripts vs. single-pass scanner
+
+Generates a synthetic resources/js + app tree (--files files, mostly clean
+components plus pages with stubs, react-hook-form imports, axios mutations,
+Button type= and the usual edge cases: CRLF lines, backslashes, `catch (e:
+any)`, one file above the mmap threshold), then runs detect-stubs.sh and
+detect-wrong-patterns.sh --dir over it twice:
+
+- grep:    BUDTAGS_DETECT_PYTHON=0, the original per-rule grep loop
+- python:  the default, detect-patterns.py
+
+and checks that stdout and the exit code are identical before reporting
+wall times. --files-list also runs both with an explicit file list (the
+way run-plan calls them), which is the path without find.
+
+Usage:
+    python3 hooks/bench/bench-detect-patterns.py [--files 2000] [--runs 3] [--jobs N] [--files-list 20] [--keep DIR]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+SCRIPTS_DIR = os.path.join(PLUGIN_DIR, 'skills', 'run-plan', 'scripts')
+SCRIPTS = ('detect-stubs.sh', 'detect-wrong-patterns.sh')
+
+CLEAN_COMPONENT = '''import {{ useForm }} from '@inertiajs/react';
+import Button from '@/Components/Button';
+
+interface Props {{
+    item: Item{n};
+    onClose: () => void;
+}}
+
+export default function Edit{n}Modal({{ item, onClose }}: Props) {{
+    const {{ data, setData, put, processing }} = useForm({{ name: item.name }});
+
+    const submit = (e: React.FormEvent) => {{
+        e.preventDefault();
+        put(route('items.update', item.id), {{ onSuccess: () => onClose() }});
+    }};
+
+    return (
+        <Modal show onClose={{onClose}}>
+            <form onSubmit={{submit}}>
+                <input value={{data.name}} onChange={{(e) => setData('name', e.target.value)}} />
+                <Button variant="primary" disabled={{processing}}>Save</Button>
+            </form>
+        </Modal>
+    );
+}}
+'''
+
+UTILITY = '''export function format{n}(value: number): string {{
+    return new Intl.NumberFormat('en-US').format(value);
+}}
+
+export const PAGE_SIZE_{n} = {n};
+'''
+
+STUBBED_PAGE = '''import {{ useForm }} from 'react-hook-form';
+import axios from 'axios';
+
+export default function Page{n}({{ rows }}: {{ rows: any[] }}) {{
+    // TODO: wire up filters
+    const handleSubmit = () => {{}};
+    const onSave = async (payload: any) => {{
+        await axios.post('/api/items', payload);
+    }};
+    try {{
+        load();
+    }} catch (e: any) {{
+        console.error(e);
+    }}
+    const pattern = /\\d+\\.\\d+/;  // placeholder regex, see \\c below
+    {{/* TODO remove */}}
+    return (
+        <Form>
+            <Button type="submit" onClick={{onSave}}>Save</Button>
+            <EditModal formData={{rows}} setFormData={{() => {{}}}} />
+        </Form>
+    );
+}}
+'''
+
+CONTROLLER = '''<?php
+
+namespace App\\Http\\Controllers;
+
+class Item{n}Controller extends Controller
+{{
+    public function index(): Response
+    {{
+        return Inertia::render('Items/Index', ['items' => Item::all()]);
+    }}
+}}
+'''
+
+STUBBED_CONTROLLER = '''<?php
+
+namespace App\\Http\\Controllers;
+
+class Stub{n}Controller extends Controller
+{{
+    public function store(Request $request) {{ }}
+
+    public function update(Request $request): RedirectResponse
+    {{
+        // TODO: validate
+        throw new \\RuntimeException('Not implemented');
+    }}
+
+    public function destroy() {{
+        // ...
+    }}
+}}
+'''
+
+
+def generate(root: str, count: int, seed: int) -> None:
+    rng = random.Random(seed)
+    for n in range(count):
+        roll = rng.random()
+        if roll < 0.45:
+            path, text = f"resources/js/Components/Group{n % 40}/Edit{n}Modal.tsx", CLEAN_COMPONENT
+        elif roll < 0.7:
+            path, text = f"resources/js/utils/format{n}.ts", UTILITY
+        elif roll < 0.75:
+            path, text = f"resources/js/Pages/Area{n % 12}/Page{n}.tsx", STUBBED_PAGE
+        elif roll < 0.95:
+            path, text = f"app/Http/Controllers/Item{n}Controller.php", CONTROLLER
+        else:
+            path, text = f"app/Http/Controllers/Stub{n}Controller.php", STUBBED_CONTROLLER
+        text = text.format(n=n)
+        if n % 97 == 0:
+            text = text.replace('\n', '\r\n')
+        full = os.path.join(root, path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+    # One bundle-sized file so the mmap path is exercised
+    with open(os.path.join(root, 'resources/js/vendor.bundle.js'), 'w', encoding='utf-8') as f:
+        f.write(UTILITY.format(n=0) * 20000)
+
+
+def run(script: str, args: list[str], python: bool, jobs: int | None) -> tuple[float, int, bytes]:
+    env = dict(os.environ, BUDTAGS_DETECT_PYTHON='1' if python else '0')
+    if jobs is not None and python:
+        # The wrapper passes everything through, so --jobs goes first
+        args = ['--jobs', str(jobs)] + args
+    began = time.perf_counter()
+    result = subprocess.run([os.path.join(SCRIPTS_DIR, script)] + args, env=env, capture_output=True)
+    return time.perf_counter() - began, result.returncode, result.stdout
+
+
+def compare(label: str, script: str, args: list[str], runs: int, jobs: int | None) -> bool:
+    grep_time, grep_code, grep_out = min(run(script, args, False, None) for _ in range(runs))
+    python_time, python_code, python_out = min(run(script, args, True, jobs) for _ in range(runs))
+    same = grep_code == python_code and grep_out == python_out
+    print(f"  {script:<26} {label:<10} grep {grep_time:>7.2f}s  python {python_time:>6.3f}s  "
+          f"{grep_time / python_time:>6.0f}x  exit {grep_code}/{python_code}  "
+          f"{'identical' if same else 'DIFFERENT'} ({len(grep_out)} bytes)")
+    return same
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--jobs', type=int, help='process pool size for the python scanner (default: CPU count)')
+    parser.add_argument('--files-list', type=int, default=20, help='also run with this many explicit files')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--keep', help='generate the tree here and keep it')
+    args = parser.parse_args()
+
+    root = args.keep or tempfile.mkdtemp(prefix='detect-bench-')
+    try:
+        generate(root, args.files, args.seed)
+        print(f"{args.files + 1} files under {root}, best of {args.runs}")
+        ok = True
+        for script in SCRIPTS:
+            ok &= compare('--dir', script, ['--dir', root], args.runs, args.jobs)
+        if args.files_list:
+            files = sorted(os.path.join(dirpath, name) for dirpath, _, names in os.walk(root) for name in names)
+            picked = random.Random(args.seed).sample(files, min(args.files_list, len(files)))
+            for script in SCRIPTS:
+                ok &= compare(f"{len(picked)} files", script, picked, args.runs, args.jobs)
+        if not ok:
+            sys.exit(1)
+    finally:
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
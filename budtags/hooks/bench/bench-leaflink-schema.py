@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark: LeafLink OpenAPI specs, cold parse vs. compiled validator cache
+
+Times, best of --runs:
+
+- parse:  json.load of the nine skills/leaflink/schemas/openapi-*.json specs
+- build:  parse + $ref resolution + validator codegen + compile
+- cached: hooklib.leaflinkschema.load() from .claude/cache/leaflink-validators.bin
+
+then validates --payloads order payloads (orders-received_create) and
+product list pages (products_list, response 200) through validate_many,
+built from the specs' own examples with every fourth payload mutated to be
+invalid, and reports payloads per second and error counts. The
+products_list example itself disagrees with its schema (see `examples`),
+so every product page reports errors.
+
+Usage:
+    python3 hooks/bench/bench-leaflink-schema.py [--runs 5] [--payloads 10000] [--root budtags]
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import tempfile
+import time
+
+HOOKS_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, HOOKS_DIR)
+
+from hooklib import leaflinkschema  # noqa: E402
+from hooklib.skillrouter import plugin_root  # noqa: E402
+
+
+def best_of(runs: int, fn) -> tuple[float, object]:
+    best, result = float('inf'), None
+    for _ in range(runs):
+        began = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - began)
+    return best, result
+
+
+def parse(files: list[str]) -> list[dict]:
+    documents = []
+    for path in files:
+        with open(path, 'r', encoding='utf-8') as f:
+            documents.append(json.load(f))
+    return documents
+
+
+def order_payloads(example: dict, count: int) -> list[dict]:
+    payloads = []
+    for i in range(count):
+        payload = copy.deepcopy(example)
+        payload['external_id_seller'] = f"INV-{i}"
+        payload['ext_acct_id'] = str(i)
+        for item in payload['line_items']:
+            item['product'] = str(2000 + i % 97)
+            item['quantity'] = 1 + i % 50
+        if i % 4 == 3:
+            payload['status'] = 'Shipped-ish'
+            payload['line_items'][0]['quantity'] = 'ten'
+        payloads.append(payload)
+    return payloads
+
+
+def product_pages(example: dict, count: int) -> list[dict]:
+    pages = []
+    for i in range(count):
+        page = copy.deepcopy(example)
+        page['count'] = i
+        if i % 4 == 3:
+            page['results'] = 'not a list'
+        pages.append(page)
+    return pages
+
+
+def throughput(validators, operation: str, payloads: list, response: str | None) -> tuple[float, int]:
+    began = time.perf_counter()
+    results = validators.validate_many(operation, payloads, response)
+    elapsed = time.perf_counter() - began
+    return len(payloads) / elapsed, sum(1 for errors in results if errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--payloads', type=int, default=10000)
+    parser.add_argument('--root', help='directory containing skills/leaflink (default: the plugin root)')
+    args = parser.parse_args()
+
+    root = args.root or plugin_root()
+    files = leaflinkschema.spec_files(root)
+    size = sum(os.path.getsize(path) for path in files)
+    print(f"{len(files)} specs, {size / 1024:.0f} KB")
+
+    parse_time, _ = best_of(args.runs, lambda: parse(files))
+    build_time, (code, operations, unresolved) = best_of(args.runs, lambda: leaflinkschema.build(files))
+    with tempfile.TemporaryDirectory() as project:
+        leaflinkschema.load(project, root)
+        cache_size = os.path.getsize(os.path.join(project, leaflinkschema.CACHE_FILE))
+        cached_time, (validators, rebuilt) = best_of(args.runs, lambda: leaflinkschema.load(project, root))
+    assert not rebuilt
+
+    print(f"{len(operations)} operations, {len(validators.namespace)} names in the compiled module, "
+          f"{len(unresolved)} dangling $refs, cache {cache_size / 1024:.0f} KB")
+    print(f"  {'parse (json.load)':<22} {parse_time * 1000:>8.2f}ms")
+    print(f"  {'build (cold)':<22} {build_time * 1000:>8.2f}ms")
+    print(f"  {'load (cached)':<22} {cached_time * 1000:>8.2f}ms  ({build_time / cached_time:.0f}x faster than build)")
+
+    orders = order_payloads(validators.by_id['orders-received_create']['example'], args.payloads)
+    pages = product_pages(validators.by_id['products_list']['response_examples']['200'], args.payloads)
+    print(f"\nvalidate_many, {args.payloads} payloads each (every fourth invalid)")
+    for label, operation, payloads, response in (
+            ('orders-received_create', 'orders-received_create', orders, None),
+            ('products_list [200]', 'products_list', pages, '200')):
+        rate, invalid = throughput(validators, operation, payloads, response)
+        print(f"  {label:<24} {rate:>10,.0f}/s  {invalid} with errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Benchmark: package sync strategies against the mock Metrc server
+
+Starts hooklib.metrcmock in-process with the TEST_FINDINGS.md facilities
+(90 to 30,262 packages), then fetches each facility's packages from the
+last two years the ways MetrcApi does:
+
+- bulk:        probe, then every 20-item page of the whole window
+- day-by-day:  one unpaginated 24-hour window per day
+- hybrid:      probe, scan the last 5 pages for the oldest LastModified,
+               then bulk if total_pages <= total_days, else day-by-day
+               (fetch_packages_with_progress)
+- threshold:   probe, bulk at or below BULK_FETCH_THRESHOLD records, else
+               today only (all_active_packages after WU-01)
+- no-window:   every page of /active without lastModifiedStart/End (the
+               bug TEST_FINDINGS.md describes)
+
+For each it reports requests, 429 responses, packages fetched, coverage of
+the packages modified in the window, wall time, and the time the same
+requests take against real Metrc at RATE_LIMIT_DELAY (200ms) per call.
+Server rate limit and client delay are both divided by --speedup.
+
+Usage:
+    python3 hooks/bench/bench-package-sync.py [--speedup 50] [--facility LICENSE:PACKAGES:DAYS ...]
+                                              [--strategy hybrid ...] [--delay-ms N] [--latency-ms 0]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+
+HOOKS_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, HOOKS_DIR)
+
+from hooklib import metrcindex, metrcmock  # noqa: E402
+
+# MetrcApi constants (PACKAGE_CACHE_REFACTOR.md)
+BULK_FETCH_THRESHOLD = 5000
+RATE_LIMIT_DELAY = 0.2
+PAGE_SIZE = 20
+HISTORY_DAYS = 730
+SCAN_LAST_PAGES = 5
+
+DAY = 86400
+
+
+class Client:
+    """Keep-alive Metrc client that sleeps `delay` between calls and retries 429s."""
+
+    def __init__(self, port: int, delay: float):
+        self.connection = http.client.HTTPConnection('127.0.0.1', port)
+        self.delay = delay
+        self.requests = 0
+        self.throttled = 0
+
+    def get(self, path: str, **params) -> object:
+        while True:
+            if self.requests:
+                time.sleep(self.delay)
+            self.requests += 1
+            self.connection.request('GET', f"{path}?{urlencode(params)}", headers={'Authorization': 'Basic bench'})
+            response = self.connection.getresponse()
+            body = json.loads(response.read() or b'null')
+            if response.status == 429:
+                self.throttled += 1
+                time.sleep(float(response.getheader('X-Retry-After-Ms', '1000')) / 1000)
+                continue
+            if response.status != 200:
+                raise RuntimeError(f"GET {path} -> {response.status}: {body}")
+            return body
+
+    def close(self):
+        self.connection.close()
+
+
+def day_start(timestamp: float) -> float:
+    return timestamp - timestamp % DAY
+
+
+def page(client: Client, license: str, start: float, end: float, number: int) -> dict:
+    return client.get('/packages/v2/active', licenseNumber=license,
+                      lastModifiedStart=metrcmock.format_time(start), lastModifiedEnd=metrcmock.format_time(end),
+                      pageNumber=number, pageSize=PAGE_SIZE)
+
+
+def fetch_bulk(client: Client, license: str, start: float, end: float, first: dict | None = None) -> set[str]:
+    labels = set()
+    number = 1
+    body = first or page(client, license, start, end, 1)
+    while True:
+        labels.update(package['Label'] for package in body['Data'])
+        if number >= body['TotalPages']:
+            return labels
+        number += 1
+        body = page(client, license, start, end, number)
+
+
+def fetch_day_by_day(client: Client, license: str, start: float, end: float) -> set[str]:
+    labels = set()
+    day = day_start(start)
+    while day < end:
+        body = client.get('/packages/v2/active', licenseNumber=license, lastModifiedStart=metrcmock.format_time(day),
+                          lastModifiedEnd=metrcmock.format_time(min(day + DAY, end)))
+        labels.update(package['Label'] for package in body['Data'])
+        day += DAY
+    return labels
+
+
+def strategy_bulk(client, license, start, end):
+    return fetch_bulk(client, license, start, end)
+
+
+def strategy_day_by_day(client, license, start, end):
+    return fetch_day_by_day(client, license, start, end)
+
+
+def strategy_hybrid(client, license, start, end):
+    probe = page(client, license, start, end, 1)
+    total_pages = probe['TotalPages']
+    earliest = end
+    for number in range(max(1, total_pages - SCAN_LAST_PAGES + 1), total_pages + 1):
+        body = probe if number == 1 else page(client, license, start, end, number)
+        for package in body['Data']:
+            earliest = min(earliest, metrcmock.parse_time(package['LastModified']).timestamp())
+    optimized_start = day_start(earliest)
+    total_days = int((end - optimized_start) // DAY) + 1
+    if total_pages <= total_days:
+        return fetch_bulk(client, license, optimized_start, end)
+    return fetch_day_by_day(client, license, optimized_start, end)
+
+
+def strategy_threshold(client, license, start, end):
+    probe = page(client, license, start, end, 1)
+    if probe['TotalRecords'] > BULK_FETCH_THRESHOLD:
+        return fetch_day_by_day(client, license, day_start(end), end)
+    return fetch_bulk(client, license, start, end, probe)
+
+
+def strategy_no_window(client, license, start, end):
+    labels = set()
+    number = 1
+    while True:
+        body = client.get('/packages/v2/active', licenseNumber=license, pageNumber=number, pageSize=PAGE_SIZE)
+        labels.update(package['Label'] for package in body['Data'])
+        if number >= body['TotalPages']:
+            return labels
+        number += 1
+
+
+STRATEGIES = {
+    'bulk': strategy_bulk,
+    'day-by-day': strategy_day_by_day,
+    'hybrid': strategy_hybrid,
+    'threshold': strategy_threshold,
+    'no-window': strategy_no_window,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--speedup', type=float, default=50.0, help='divide the rate limit interval and client delay by this')
+    parser.add_argument('--facility', action='append', type=metrcmock.parse_facility, metavar='LICENSE:PACKAGES:DAYS')
+    parser.add_argument('--strategy', action='append', choices=sorted(STRATEGIES))
+    parser.add_argument('--delay-ms', type=float, help='client delay between calls (default: 200ms / speedup; 0 to hit the rate limit)')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='server latency per request (not scaled)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    now = int(time.time())
+    facilities = [metrcmock.Facility(license, packages, days, args.seed, now)
+                  for license, packages, days in args.facility or metrcmock.DEFAULT_FACILITIES]
+    with tempfile.TemporaryDirectory() as project:
+        endpoints, _ = metrcindex.load(project)
+    app = metrcmock.MockMetrc(endpoints, facilities, rate=metrcmock.DEFAULT_RATE * args.speedup,
+                              burst=metrcmock.DEFAULT_BURST, latency=args.latency_ms / 1000)
+    server = metrcmock.make_server(app, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+
+    start = now - HISTORY_DAYS * DAY
+    delay = RATE_LIMIT_DELAY / args.speedup if args.delay_ms is None else args.delay_ms / 1000
+    print(f"Mock Metrc on port {port}: rate {metrcmock.DEFAULT_RATE * args.speedup:g}/s, "
+          f"client delay {delay * 1000:.1f}ms (speedup {args.speedup:g}x)")
+    try:
+        for facility in facilities:
+            expected = facility.expected(start, now)
+            print(f"\n{facility.license}: {len(facility.ids)} packages, {len(expected)} modified in the last "
+                  f"{HISTORY_DAYS} days, {sum(facility.active)} active")
+            print(f"  {'strategy':<11} {'requests':>8} {'429s':>5} {'packages':>8} {'coverage':>8} {'wall':>8} "
+                  f"{'at 200ms/call':>13}")
+            for name in args.strategy or list(STRATEGIES):
+                client = Client(port, delay)
+                began = time.perf_counter()
+                labels = STRATEGIES[name](client, facility.license, start, now)
+                wall = time.perf_counter() - began
+                client.close()
+                coverage = len(labels & expected) / len(expected) if expected else 1.0
+                projected = client.requests * RATE_LIMIT_DELAY
+                print(f"  {name:<11} {client.requests:>8} {client.throttled:>5} {len(labels):>8} {coverage:>8.1%} "
+                      f"{wall:>7.2f}s {projected / 60:>11.1f}min")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
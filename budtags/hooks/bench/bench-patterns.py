@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: path index vs PatternTable vs per-pattern re.search loops
+
+Classifies ~10k synthetic Laravel/Inertia project paths with the
+auto-approve-reads and file-protection checks: with the original
+loop-over-patterns logic, through hooklib.patterns.PatternTable (no path
+index) and through a hooklib.pathindex index built over a scratch git
+project holding those paths. Checks all three give identical answers and
+prints the timings.
+
+Usage:
+    python3 hooks/bench/bench-patterns.py [--paths N] [--repeat N]
+"""
+
+import argparse
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+HOOKS_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, HOOKS_DIR)
+
+from hooklib import pathindex  # noqa: E402
+from hooklib.loader import HookModuleCache  # noqa: E402
+
+DIRECTORIES = [
+    'app/Http/Controllers', 'app/Http/Controllers/Api', 'app/Services', 'app/Models', 'app/Jobs',
+    'app/Providers', 'app/Console', 'app/Http', 'app/Exceptions', 'config', 'routes', 'bootstrap',
+    'database/migrations', 'database/factories', 'tests/Unit/Services', 'tests/Feature',
+    'resources/js/Pages/Packages', 'resources/js/Components', 'resources/js/hooks', 'docs',
+    'docs/api', '.claude', '.claude/skills/metrc-api', 'storage/logs', 'storage/app',
+    'vendor/laravel/framework/src', 'node_modules/@tanstack/react-query/build', 'public/build',
+]
+NAMES = ['Package', 'Item', 'Metrc', 'LeafLink', 'QuickBooks', 'Facility', 'Harvest', 'Label', 'Strain', 'Order']
+SUFFIXES = ['.php', 'Controller.php', 'Test.php', '.tsx', '.ts', '.md', '.json', '.yml', '.txt', '.log', '.neon']
+ROOT_FILES = [
+    '.env', '.env.local', '.env.testing', 'composer.json', 'composer.lock', 'package.json', 'package-lock.json',
+    'yarn.lock', 'pnpm-lock.yaml', 'tsconfig.json', 'tsconfig.node.json', 'phpunit.xml', 'phpstan.neon',
+    'vite.config.ts', 'tailwind.config.js', 'eslint.config.js', 'README.md', 'CLAUDE.md', '.gitignore',
+    '.editorconfig', 'storage/oauth-private.key', 'certs/server.pem', 'credentials.json', 'secrets.json',
+]
+
+
+def generate_paths(count: int, seed: int = 1, root: str = '/home/dev/budtags') -> list[str]:
+    rng = random.Random(seed)
+    paths = []
+    for _ in range(count):
+        if rng.random() < 0.1:
+            relative = rng.choice(ROOT_FILES)
+        else:
+            relative = f"{rng.choice(DIRECTORIES)}/{rng.choice(NAMES)}{rng.choice(SUFFIXES)}"
+        paths.append(f"{root}/{relative}")
+    return paths
+
+
+def legacy_is_safe_read(module, file_path: str) -> tuple[bool, str]:
+    """The original auto-approve-reads logic, driven by the same tables."""
+    for pattern in module.BLOCK_PATTERNS:
+        if re.search(pattern, file_path, re.IGNORECASE):
+            return False, f"Sensitive file pattern: {pattern}"
+    for entry in module.SAFE_PATTERNS:
+        if re.search(entry["pattern"], file_path, re.IGNORECASE):
+            return True, entry["reason"]
+    return False, "No safe pattern match"
+
+
+def legacy_check_protected_file(module, file_path: str) -> tuple[bool, str, str]:
+    """The original file-protection logic."""
+    for entry in module.PROTECTED_PATTERNS:
+        if re.search(entry["pattern"], file_path, re.IGNORECASE):
+            return True, entry["message"], entry["context"]
+    return False, "", ""
+
+
+def make_project(root: str, paths: list[str]) -> None:
+    """Create every path as an empty untracked file in a fresh git repository."""
+    subprocess.run(['git', 'init', '-q', root], check=True)
+    for path in set(paths):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'w').close()
+
+
+def measure(func, paths: list[str], repeat: int) -> tuple[float, list]:
+    best = float('inf')
+    results = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [func(path) for path in paths]
+        best = min(best, time.perf_counter() - start)
+    return best, results
+
+
+def report(label: str, seconds: float, count: int) -> None:
+    print(f"  {label:<14} {seconds * 1000:8.2f}ms total  {seconds / count * 1e6:6.2f}us/path")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--paths', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    project = tempfile.TemporaryDirectory()
+    root = os.path.realpath(project.name)
+    os.environ['CLAUDE_PROJECT_DIR'] = root
+    modules = HookModuleCache(HOOKS_DIR)
+    reads = modules.get('auto-approve-reads.py')
+    protection = modules.get('file-protection.py')
+    paths = generate_paths(args.paths, root=root)
+    make_project(root, paths)
+
+    cases = [
+        ('auto-approve-reads', lambda p: legacy_is_safe_read(reads, p), reads.is_safe_read),
+        ('file-protection', lambda p: legacy_check_protected_file(protection, p), protection.check_protected_file),
+    ]
+    # No index file yet: every lookup misses and the check runs its PatternTable
+    tables = [measure(check, paths, args.repeat) for _name, _legacy, check in cases]
+
+    built = pathindex.refresh(root, HOOKS_DIR, [reads, protection])
+    print(f"path index: {built['paths']} paths, {built['classified']} classifications "
+          f"in {built['seconds'] * 1000:.1f}ms")
+
+    failed = False
+    for (name, legacy, check), (table_time, table_results) in zip(cases, tables):
+        legacy_time, legacy_results = measure(legacy, paths, args.repeat)
+        index_time, index_results = measure(check, paths, args.repeat)
+        print(f"{name} ({len(paths)} paths)")
+        report('re.search loop', legacy_time, len(paths))
+        report('PatternTable', table_time, len(paths))
+        report('path index', index_time, len(paths))
+        print(f"  speedup        {legacy_time / table_time:.2f}x table, {legacy_time / index_time:.2f}x index")
+
+        for label, results in (('PatternTable', table_results), ('path index', index_results)):
+            mismatches = [p for p, a, b in zip(paths, legacy_results, results) if a != b]
+            if mismatches:
+                failed = True
+                print(f"  ❌ {label}: {len(mismatches)} paths classified differently, e.g. {mismatches[0]}")
+
+    project.cleanup()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
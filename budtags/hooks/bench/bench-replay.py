@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+Replay benchmark: recorded hook payloads through both hook trees
+
+Replays a corpus of real stdin payloads (hooklib/corpus.py: record with
+BUDTAGS_HOOK_RECORD=1, then `python3 -m hooklib.corpus <project> pack`)
+through every hook registered for the payload's event and tool, in both
+trees: hooks/ as settings.json runs it and hooks/scripts/ as hooks.json
+runs it. Each check the dispatcher routes to is also replayed on its own,
+so a slow check shows up under its own name.
+
+For every tree and hook it reports throughput, p50/p99/max latency, the
+peak RSS of the hook process and the decisions made, then the decision
+diffs:
+
+- between the two trees (they have diverged: scripts/ has no bash blocker)
+- against the decisions recorded with the corpus
+- against another version: --against REV (a git revision) or DIR (a
+  plugin checkout), replayed the same way, or --baseline FILE (a run
+  saved with --save)
+
+A hook regresses when its p99 or peak RSS grows, or its throughput drops,
+by more than --threshold percent against the other version; p99 changes
+under --min-ms are noise. Any regression exits 1, and so does any
+decision diff between versions with --fail-on-diff.
+
+--via direct (default) runs `python3 <script>` per payload, so latency and
+RSS are the hook's own; --via client runs it through hook-client.py and the
+daemon, as Claude Code does, and RSS is then only the client's.
+
+Replaying PostToolUse payloads runs post-edit-tests.py for real (tests,
+type-checks) in --project; use --events to leave them out. SubagentStop
+payloads are judged from their transcripts only, never escalated to the
+evaluator. Without a corpus a few built-in payloads are replayed instead.
+
+Usage:
+    python3 hooks/bench/bench-replay.py [--corpus FILE] [--project DIR] [--repeat 3]
+        [--via direct|client] [--events PreToolUse,UserPromptSubmit] [--hooks dispatch.py,...]
+        [--against HEAD~1 | --baseline run.json] [--save run.json] [--threshold 25] [--fail-on-diff]
+"""
+
+import argparse
+import io
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+HOOKS_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+PLUGIN_DIR = os.path.dirname(HOOKS_DIR)
+sys.path.insert(0, HOOKS_DIR)
+
+from hooklib import corpus, subagentcheck, trace  # noqa: E402
+
+DEFAULT_EVENTS = 'PreToolUse,PostToolUse,UserPromptSubmit,SubagentStop'
+
+# A hook command in settings.json / hooks.json: the script after hooks/,
+# or after hook-client.py
+HOOK_COMMAND = re.compile(r'hooks/([\w./-]+\.py)"?(.*)$')
+
+# Dispatcher checks, as listed in dispatch.py's HANDLERS
+DISPATCH_HANDLER = re.compile(r'"matcher":\s*r?"([^"]+)",\s*"script":\s*"([^"]+)"')
+
+# Runs a script as `python3 <script>` would, then writes the process's peak
+# RSS in KB to the file named by argv[1]. wait4's ru_maxrss can't be used:
+# a child inherits the benchmark's own RSS as its high-water mark until exec.
+PEAK_RSS_SHIM = """
+import atexit, os, runpy, sys
+report, script = sys.argv[1], sys.argv[2]
+def write_peak_rss():
+    try:
+        with open('/proc/self/status') as f:
+            kb = next(int(line.split()[1]) for line in f if line.startswith('VmHWM:'))
+    except (OSError, StopIteration):
+        import resource
+        kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == 'darwin' else 1)
+    with open(report, 'w') as f:
+        f.write(str(kb))
+atexit.register(write_peak_rss)
+sys.argv = sys.argv[2:]
+sys.path[0] = os.path.dirname(os.path.abspath(script))
+runpy.run_path(script, run_name='__main__')
+"""
+
+
+def sample_payloads(project_dir: str) -> list[dict]:
+    """Stand-in corpus for when nothing has been recorded."""
+    def entry(number: int, event: str, tool: str | None, payload: dict) -> dict:
+        payload = {'hook_event_name': event, 'cwd': project_dir, **({'tool_name': tool} if tool else {}), **payload}
+        return {'id': f"sample-{number}", 'event': event, 'tool': tool, 'count': 1, 'recorded': {},
+                'payload': json.dumps(payload)}
+
+    def path(relative: str) -> str:
+        return os.path.join(project_dir, relative)
+
+    return [
+        entry(1, 'PreToolUse', 'Read', {'tool_input': {'file_path': path('docs/setup.md')}}),
+        entry(2, 'PreToolUse', 'Read', {'tool_input': {'file_path': path('.env')}}),
+        entry(3, 'PreToolUse', 'Bash', {'tool_input': {'command': 'git status && npm run build'}}),
+        entry(4, 'PreToolUse', 'Bash', {'tool_input': {'command': 'rm -rf storage/framework/cache'}}),
+        entry(5, 'PreToolUse', 'Bash', {'tool_input': {'command': "git add -A && git commit -m 'Fix label totals'"}}),
+        entry(6, 'PreToolUse', 'Edit', {'tool_input': {'file_path': path('app/Services/Api/MetrcApi.php'),
+                                                       'old_string': 'a', 'new_string': 'b'}}),
+        entry(7, 'PreToolUse', 'Write', {'tool_input': {'file_path': path('resources/js/Pages/Labels.tsx'),
+                                                        'content': 'export default function Labels() {}\n'}}),
+        entry(8, 'PostToolUse', 'Edit', {'tool_input': {'file_path': path('docs/setup.md')}}),
+        entry(9, 'UserPromptSubmit', None, {'prompt': 'Add a modal to create Metrc packages from a LeafLink order'}),
+        entry(10, 'UserPromptSubmit', None, {'prompt': 'What does this function return?'}),
+    ]
+
+
+def hook_units(hooks_dir: str, config_path: str, tree: str, events: set[str]) -> list[dict]:
+    """
+    The hooks a tree runs: every command hook in its config, plus each check its dispatcher routes to.
+
+    Returns:
+        one dict per hook: tree, hook (script name), command (as recorded in
+        the corpus), script, argv, event, matcher, hooks_dir
+    """
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f).get('hooks', {})
+    except (OSError, ValueError):
+        return []
+
+    units = []
+    for event, groups in config.items():
+        if event not in events:
+            continue
+        for group in groups:
+            matcher = group.get('matcher') or None
+            for hook in group.get('hooks', []):
+                match = HOOK_COMMAND.search(hook.get('command', '')) if hook.get('type') == 'command' else None
+                if match is None:
+                    continue
+                script, argv = match.group(1), shlex.split(match.group(2))
+                if script == 'hook-client.py':
+                    if not argv:
+                        continue
+                    script, argv = argv[0], argv[1:]
+                if not os.path.isfile(os.path.join(hooks_dir, script)):
+                    continue
+                units.append({'tree': tree, 'hook': os.path.basename(script), 'command': ' '.join([script, *argv]),
+                              'script': script, 'argv': argv, 'event': event, 'matcher': matcher,
+                              'hooks_dir': hooks_dir})
+
+    for unit in [unit for unit in units if unit['hook'] == 'dispatch.py']:
+        subdir = unit['argv'][unit['argv'].index('--dir') + 1] if '--dir' in unit['argv'][:-1] else ''
+        try:
+            with open(os.path.join(hooks_dir, unit['script']), 'r', encoding='utf-8') as f:
+                handlers = DISPATCH_HANDLER.findall(f.read())
+        except OSError:
+            continue
+        for matcher, name in handlers:
+            script = os.path.join(subdir, name)
+            if any(other['script'] == script for other in units) or not os.path.isfile(os.path.join(hooks_dir, script)):
+                continue
+            units.append({'tree': tree, 'hook': name, 'command': script, 'script': script, 'argv': [],
+                          'event': unit['event'], 'matcher': matcher, 'hooks_dir': hooks_dir})
+    return units
+
+
+def version_units(hooks_dir: str, events: set[str]) -> list[dict]:
+    """Both trees of one version of the plugin."""
+    return (hook_units(hooks_dir, os.path.join(os.path.dirname(hooks_dir), 'settings.json'), 'hooks', events)
+            + hook_units(hooks_dir, os.path.join(hooks_dir, 'hooks.json'), 'scripts', events))
+
+
+def applies(unit: dict, entry: dict) -> bool:
+    if unit['event'] != entry.get('event'):
+        return False
+    matcher = unit['matcher']
+    return matcher in (None, '*') or re.fullmatch(matcher, entry.get('tool') or '') is not None
+
+
+def run_hook(unit: dict, payload: bytes, cwd: str, env: dict[str, str], via: str, report: str) -> tuple[float, int, int, str]:
+    """
+    Run a hook once with `payload` on stdin.
+
+    Returns:
+        (wall-clock ms, peak RSS in KB, exit code, stdout)
+    """
+    if via == 'client':
+        command = [sys.executable, '-S', '-c', PEAK_RSS_SHIM, report, os.path.join(unit['hooks_dir'], 'hook-client.py'),
+                   unit['script'], *unit['argv']]
+    else:
+        command = [sys.executable, '-c', PEAK_RSS_SHIM, report, os.path.join(unit['hooks_dir'], unit['script']),
+                   *unit['argv']]
+
+    with tempfile.TemporaryFile() as stdin:
+        stdin.write(payload)
+        stdin.seek(0)
+        began = time.perf_counter()
+        process = subprocess.run(command, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                 cwd=cwd, env=env, check=False)
+        elapsed = (time.perf_counter() - began) * 1000
+    try:
+        with open(report, 'r', encoding='utf-8') as f:
+            rss = int(f.read() or 0)
+        os.remove(report)
+    except (OSError, ValueError):
+        rss = 0
+    return elapsed, rss, process.returncode, process.stdout.decode('utf-8', 'replace')
+
+
+def replay(versions: list[list[dict]], entries: list[dict], args) -> list[dict[str, dict]]:
+    """
+    Replay every entry through every hook that applies to it, --repeat times.
+
+    With several versions, each hook's runs alternate between them, so load
+    on the machine skews them all alike.
+
+    Returns:
+        per version, per "tree/hook": runs, calls_per_s, p50_ms, p99_ms,
+        max_ms, peak_rss_mb, and decisions (entry id -> [exit code, decision])
+    """
+    env = {key: value for key, value in os.environ.items() if key != corpus.RECORD_ENV_FLAG}
+    env[trace.TRACE_ENV_FLAG] = '0'
+    # Time the transcript check, not a headless evaluator session
+    env[subagentcheck.ESCALATE_ENV] = '0'
+    report = os.path.join(tempfile.gettempdir(), f"bench-replay-rss-{os.getpid()}")
+
+    keyed: dict[str, list[dict | None]] = {}
+    for number, units in enumerate(versions):
+        for unit in units:
+            keyed.setdefault(f"{unit['tree']}/{unit['hook']}", [None] * len(versions))[number] = unit
+
+    results: list[dict[str, dict]] = [{} for _ in versions]
+    for key, units in keyed.items():
+        runs = []
+        for unit in units:
+            matching = [entry for entry in entries if applies(unit, entry)] if unit else []
+            runs.append((unit, matching, [], [0], {}))
+        for index in range(-args.warmup, max(len(matching) for _, matching, *_ in runs) * args.repeat):
+            for unit, matching, latencies, peak_rss, decisions in runs:
+                if not matching or index >= len(matching) * args.repeat:
+                    continue
+                entry = matching[max(index, 0) % len(matching)]
+                payload = entry['payload'].encode('utf-8', 'surrogateescape')
+                cwd = args.project or entry.get('cwd') or os.getcwd()
+                env['CLAUDE_PROJECT_DIR'] = cwd
+                elapsed, rss, exit_code, stdout = run_hook(unit, payload, cwd, env, args.via, report)
+                if index < 0:
+                    continue
+                latencies.append(elapsed)
+                peak_rss[0] = max(peak_rss[0], rss)
+                decisions[entry['id']] = [exit_code, trace.decision_of(exit_code, stdout)]
+        for number, (unit, matching, latencies, peak_rss, decisions) in enumerate(runs):
+            if not latencies:
+                continue
+            latencies.sort()
+            results[number][key] = {
+                'command': unit['command'],
+                'runs': len(latencies),
+                'calls_per_s': round(len(latencies) / (sum(latencies) / 1000), 2),
+                'p50_ms': round(trace.percentile(latencies, 0.50), 3),
+                'p99_ms': round(trace.percentile(latencies, 0.99), 3),
+                'max_ms': round(latencies[-1], 3),
+                'peak_rss_mb': round(peak_rss[0] / 1024, 1),
+                'decisions': decisions,
+            }
+    return results
+
+
+def print_results(title: str, results: dict[str, dict]) -> None:
+    print(f"\n{title}")
+    width = max((len(key) for key in results), default=10)
+    print(f"  {'':<{width}} {'runs':>6} {'calls/s':>8} {'p50':>9} {'p99':>9} {'max':>9} {'peak RSS':>9}  decisions")
+    for key, stats in results.items():
+        counts: dict[str, int] = {}
+        for _, decision in stats['decisions'].values():
+            counts[decision or 'none'] = counts.get(decision or 'none', 0) + 1
+        decisions = ' '.join(f"{name}={count}" for name, count in sorted(counts.items()))
+        print(f"  {key:<{width}} {stats['runs']:>6} {stats['calls_per_s']:>8.1f} {trace.format_ms(stats['p50_ms']):>9} "
+              f"{trace.format_ms(stats['p99_ms']):>9} {trace.format_ms(stats['max_ms']):>9} "
+              f"{stats['peak_rss_mb']:>7.1f}MB  {decisions}")
+
+
+def describe(entry: dict | None) -> str:
+    """One line identifying a payload: its tool and command, path or prompt."""
+    if entry is None:
+        return '?'
+    try:
+        payload = json.loads(entry['payload'])
+    except ValueError:
+        return entry['payload'][:60]
+    tool_input = payload.get('tool_input') or {}
+    detail = tool_input.get('command') or tool_input.get('file_path') or payload.get('prompt') or ''
+    detail = ' '.join(str(detail).split())
+    return f"{entry.get('tool') or entry.get('event')}: {detail[:70]}"
+
+
+def diff_decisions(title: str, pairs: list[tuple[str, dict, dict]], entries: dict[str, dict], show: int) -> int:
+    """
+    Print payloads two runs decided differently, per hook.
+
+    Returns:
+        the number of differing decisions
+    """
+    total, lines = 0, []
+    for key, ours, theirs in pairs:
+        differing = [entry_id for entry_id, decision in ours.items()
+                     if entry_id in theirs and list(theirs[entry_id]) != list(decision)]
+        total += len(differing)
+        if differing:
+            lines.append(f"  {key}: {len(differing)} of {len(ours)} payloads")
+        for entry_id in differing[:show]:
+            (our_exit, our_decision), (their_exit, their_decision) = ours[entry_id], theirs[entry_id]
+            lines.append(f"    {our_decision or 'none'} (exit {our_exit}) vs {their_decision or 'none'} "
+                         f"(exit {their_exit})  {describe(entries.get(entry_id))}")
+    print(f"\n{title}: {total} differing" if total else f"\n{title}: none")
+    for line in lines:
+        print(line)
+    return total
+
+
+def regressions(results: dict[str, dict], baseline: dict[str, dict], threshold: float, min_ms: float) -> list[str]:
+    """Hooks whose p99, throughput or peak RSS got worse than the baseline by more than `threshold` percent."""
+    limit = threshold / 100
+    found = []
+    width = max((len(key) for key in results), default=10)
+    print(f"  {'':<{width}}  {'p99 ms':^24}  {'calls/s':^24}  {'peak RSS MB':^24}")
+    for key, stats in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        checks = [
+            ('p99', stats['p99_ms'], base['p99_ms'],
+             stats['p99_ms'] > base['p99_ms'] * (1 + limit) and stats['p99_ms'] - base['p99_ms'] > min_ms),
+            ('calls/s', stats['calls_per_s'], base['calls_per_s'], stats['calls_per_s'] < base['calls_per_s'] * (1 - limit)),
+            ('peak RSS', stats['peak_rss_mb'], base['peak_rss_mb'], stats['peak_rss_mb'] > base['peak_rss_mb'] * (1 + limit)),
+        ]
+        cells = []
+        for name, value, old, regressed in checks:
+            change = (value - old) / old if old else 0.0
+            cells.append(f"{old:>7.1f} -> {value:<7.1f}{change:>+5.0%}{'!' if regressed else ' '}")
+            if regressed:
+                found.append(f"{key}: {name} {old:.1f} -> {value:.1f} ({change:+.0%})")
+        print(f"  {key:<{width}}  {'  '.join(cells)}")
+    return found
+
+
+def extract_revision(revision: str, directory: str) -> str:
+    """
+    Check the plugin out at a git revision into `directory`.
+
+    Returns:
+        the revision's hooks directory
+    """
+    toplevel, prefix = subprocess.run(['git', '-C', PLUGIN_DIR, 'rev-parse', '--show-toplevel', '--show-prefix'],
+                                      capture_output=True, text=True, check=True).stdout.split('\n')[:2]
+    # From the top level: git archive refuses to run in a subdirectory
+    archive = subprocess.run(['git', '-C', toplevel, 'archive', '--format=tar',
+                              f"{revision}:{prefix.rstrip('/')}" if prefix else revision],
+                             capture_output=True, check=False)
+    if archive.returncode != 0:
+        sys.exit(f"Can't check out {revision}: {archive.stderr.decode().strip()}")
+    with tarfile.open(fileobj=io.BytesIO(archive.stdout)) as tar:
+        if hasattr(tarfile, 'data_filter'):
+            tar.extractall(directory, filter='data')
+        else:
+            tar.extractall(directory)
+    return os.path.join(directory, 'hooks')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--corpus', help='packed corpus or recording log (default: the project\'s, packed or not)')
+    parser.add_argument('--project', help='project dir to run the hooks in (default: each payload\'s cwd)')
+    parser.add_argument('--repeat', type=int, default=3, help='replays of each payload per hook')
+    parser.add_argument('--warmup', type=int, default=1, help='unmeasured runs per hook first')
+    parser.add_argument('--via', choices=('direct', 'client'), default='direct')
+    parser.add_argument('--events', default=DEFAULT_EVENTS, help='comma-separated hook events to replay')
+    parser.add_argument('--hooks', help='comma-separated hook scripts to replay (default: all)')
+    versus = parser.add_mutually_exclusive_group()
+    versus.add_argument('--against', help='git revision or plugin directory to replay alongside and compare with')
+    versus.add_argument('--baseline', help='results saved by an earlier --save to compare with')
+    parser.add_argument('--save', help='write this run\'s results as JSON')
+    parser.add_argument('--threshold', type=float, default=25.0, help='percent worse that counts as a regression')
+    parser.add_argument('--min-ms', type=float, default=2.0, help='ignore p99 changes smaller than this')
+    parser.add_argument('--fail-on-diff', action='store_true', help='also fail on decision diffs between versions')
+    parser.add_argument('--show', type=int, default=3, help='example payloads per differing hook')
+    args = parser.parse_args()
+    if args.project:
+        args.project = os.path.abspath(args.project)
+
+    project_dir = args.project or os.environ.get('CLAUDE_PROJECT_DIR', os.getcwd())
+    corpus_path = args.corpus
+    if corpus_path is None:
+        for name in (corpus.PACKED_FILE, corpus.CORPUS_FILE):
+            if os.path.isfile(os.path.join(project_dir, name)):
+                corpus_path = os.path.join(project_dir, name)
+                break
+    if corpus_path:
+        entries = corpus.load(corpus_path)
+        for entry in entries:
+            try:
+                cwd = json.loads(entry['payload']).get('cwd')
+            except (ValueError, AttributeError):
+                cwd = None
+            entry['cwd'] = cwd if isinstance(cwd, str) and os.path.isdir(cwd) else None
+        source = f"{corpus_path}: {len(entries)} payloads ({sum(entry.get('count', 1) for entry in entries)} recorded runs)"
+    else:
+        entries = sample_payloads(project_dir)
+        source = f"no corpus in {project_dir}, {len(entries)} built-in payloads"
+
+    events = set(args.events.split(','))
+    wanted = set(args.hooks.split(',')) if args.hooks else None
+
+    def select(units: list[dict]) -> list[dict]:
+        return [unit for unit in units if wanted is None or unit['hook'] in wanted]
+
+    baseline, baseline_name = None, None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        baseline_name = args.baseline
+
+    print(f"Replaying {source}, x{args.repeat}, via {args.via}")
+    with tempfile.TemporaryDirectory(prefix='bench-replay-') as directory:
+        versions = [select(version_units(HOOKS_DIR, events))]
+        if args.against:
+            if os.path.isdir(args.against):
+                against = os.path.realpath(args.against)
+                hooks_dir = os.path.join(against, 'hooks') if os.path.isdir(os.path.join(against, 'hooks')) else against
+            else:
+                hooks_dir = extract_revision(args.against, directory)
+            versions.append(select(version_units(hooks_dir, events)))
+        results, *other = replay(versions, entries, args)
+    print_results(f"This version ({HOOKS_DIR})", results)
+    if other:
+        baseline, baseline_name = other[0], args.against
+        print_results(f"Other version ({args.against})", baseline)
+
+    by_id = {entry['id']: entry for entry in entries}
+    pairs = [(f"hooks vs scripts {key.split('/', 1)[1]}", stats['decisions'],
+              results[f"scripts/{key.split('/', 1)[1]}"]['decisions'])
+             for key, stats in results.items()
+             if key.startswith('hooks/') and f"scripts/{key.split('/', 1)[1]}" in results]
+    diff_decisions("Decision diffs between the trees", pairs, by_id, args.show)
+
+    recorded = []
+    for key, stats in results.items():
+        decisions = {entry_id: by_id[entry_id]['recorded'][stats['command']] for entry_id in stats['decisions']
+                     if stats['command'] in by_id[entry_id].get('recorded', {})}
+        if decisions:
+            recorded.append((key, stats['decisions'], decisions))
+    if recorded:
+        diff_decisions("Decision diffs against the recorded ones", recorded, by_id, args.show)
+
+    failures = []
+    if baseline is not None:
+        diffs = diff_decisions(f"Decision diffs against {baseline_name}",
+                               [(key, stats['decisions'], baseline[key]['decisions'])
+                                for key, stats in results.items() if key in baseline], by_id, args.show)
+        print(f"\nAgainst {baseline_name} (regression: {args.threshold:.0f}% worse, p99 by over {args.min_ms}ms)")
+        failures = regressions(results, baseline, args.threshold, args.min_ms)
+        if args.fail_on_diff and diffs:
+            failures.append(f"{diffs} decisions differ from {baseline_name}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'corpus': source, 'via': args.via, 'repeat': args.repeat, 'results': results}, f, indent=1)
+        print(f"\nSaved results to {args.save}")
+
+    if failures:
+        print("\nRegressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Fuzz benchmark: Bash hook command analysis on pathological inputs
+
+Times destructive-bash-blocker.py and pre-commit-gate.py's commit detection
+(one hooklib.shell tokenization shared by both) against the regexes they
+used to run, on generated inputs that grow from 256 bytes to --max-size:
+
+- spaces:    `git` followed by a long run of spaces (`\\bgit\\s+.*\\s+commit\\b`)
+- checkout:  `git checkout`, spaces, then a path (`checkout\\s+(--)?\\s*\\.`)
+- rm-flags:  `rm -rrrr...` (`-[a-zA-Z]*r[a-zA-Z]*f`)
+- heredoc:   `git commit -F - <<'EOF'` with a body full of git/rm words
+- nesting:   deeply nested `$(` and `(`, unterminated quotes
+- random:    shell metacharacters, quotes, operators and words at random
+
+The regexes only run up to --legacy-max bytes: `\s+.*\s+commit` is cubic
+on a run of spaces (seconds at 1 KB). The tokenizer's time per KB should not grow from 16 KB up.
+A seeded random fuzz pass then checks it never raises and reports its
+worst latency, and a table of commands checks the decisions themselves.
+
+Usage:
+    python3 hooks/bench/bench-shell.py [--max-size 1048576] [--legacy-max 1024] [--fuzz 2000] [--seed 1]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+HOOKS_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, HOOKS_DIR)
+
+from hooklib import shell  # noqa: E402
+from hooklib.loader import HookModuleCache  # noqa: E402
+
+# The patterns the hooks ran over the raw command before hooklib.shell
+LEGACY_DANGEROUS = [
+    r"\bgit\s+clean\b",
+    r"\bgit\s+reset\s+--hard\b",
+    r"\bgit\s+checkout\s+(--)?\s*\.\s*$",
+    r"\brm\s+-[a-zA-Z]*r[a-zA-Z]*f",
+    r"\bgit\s+checkout\s+--\s+\S",
+    r"\bphp\s+-r\b",
+]
+LEGACY_COMMIT = [r'\bgit\s+commit\b', r'\bgit\s+.*\s+commit\b']
+
+# command, expected blocker decision, expected commit detection
+EXPECTED = [
+    ("git status && npm run build", False, False),
+    ("rm -fr build", True, False),
+    ("rm -r -f build", True, False),
+    ("(cd app && rm -rf build) || true", True, False),
+    ("ls | xargs rm -rf", True, False),
+    ("bash -c 'git reset --hard HEAD~1'", True, False),
+    ("git checkout . && npm test", True, False),
+    ("echo 'rm -rf /tmp/x'", False, False),
+    ("git commit -m 'Stop rm -rf in deploy script'", False, True),
+    ("git commit -F - <<'EOF'\nRevert git reset --hard usage\nEOF", False, True),
+    ("git -C /srv/app -c user.name=ci commit -m x", False, True),
+    ("git log --grep commit", False, False),
+    ("cat <<EOF | bash\nrm -rf /\nEOF", True, False),
+    ("cat <<'EOF' > notes.txt\nrm -rf /\nEOF", False, False),
+    ('sh <<< "rm -rf x"', True, False),
+    ('grep x <<< "rm -rf x"', False, False),
+    ("watch rm -rf x", True, False),
+    ("watch -n 5 'git clean -fd'", True, False),
+    ("RM -RF x", True, False),
+    ("echo git is about to commit", False, False),
+]
+
+
+def spaces(size: int) -> str:
+    return 'git' + ' ' * size
+
+
+def checkout(size: int) -> str:
+    return 'git checkout' + ' ' * size + 'x'
+
+
+def rm_flags(size: int) -> str:
+    return 'rm -' + 'r' * size
+
+
+def heredoc(size: int) -> str:
+    line = 'git add app && rm -r build; git checkout -- x\n'
+    body = line * (size // len(line) + 1)
+    return f"git commit -F - <<'EOF'\n{body}EOF\n"
+
+
+def nesting(size: int) -> str:
+    depth = size // 8
+    return '$(' * depth + 'echo "a' + ' (x' * depth + "'"
+
+
+def random_command(size: int, rng: random.Random) -> str:
+    tokens = ['git', 'commit', 'rm', '-rf', 'php', '-r', 'bash', '-c', 'xargs', 'sudo', 'env', 'A=1', 'find',
+              '-exec', ';', '&&', '||', '|', '&', '(', ')', '{', '}', '$(', '`', "'", '"', '\\', '<<', "<<'EOF'",
+              '<<-EOF', 'EOF', '\n', '\t', '#', '2>&1', '>', '<(', '$\'', '${x}', '.', '--', ' ', ' ', ' ', 'x']
+    parts, length = [], 0
+    while length < size:
+        token = rng.choice(tokens)
+        parts.append(token)
+        length += len(token)
+    return ''.join(parts)
+
+
+GENERATORS = [('spaces', spaces), ('checkout', checkout), ('rm-flags', rm_flags), ('heredoc', heredoc),
+              ('nesting', nesting), ('random', lambda size: random_command(size, random.Random(1)))]
+
+
+def legacy(command: str) -> tuple[bool, bool]:
+    dangerous = any(re.search(pattern, command, re.IGNORECASE) for pattern in LEGACY_DANGEROUS)
+    commit = any(re.search(pattern, command, re.IGNORECASE) for pattern in LEGACY_COMMIT)
+    return dangerous, commit
+
+
+def analyze(blocker, gate, command: str) -> tuple[bool, bool]:
+    # Each run tokenizes from scratch, as a new hook event would
+    shell._commands.cache_clear()
+    dangerous = blocker.evaluate({'tool_input': {'command': command}}) is not None
+    commit = gate.is_git_commit_command(command)
+    if commit:
+        gate.stages_before_commit(command)
+    return dangerous, commit
+
+
+def timed(function, *args) -> float:
+    began = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - began
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--max-size', type=int, default=1 << 20)
+    parser.add_argument('--legacy-max', type=int, default=1 << 10, help='largest input to run the old regexes on')
+    parser.add_argument('--fuzz', type=int, default=2000, help='random commands in the fuzz pass')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    modules = HookModuleCache(HOOKS_DIR)
+    blocker = modules.get('destructive-bash-blocker.py')
+    gate = modules.get('pre-commit-gate.py')
+
+    sizes = []
+    size = 1 << 8
+    while size <= args.max_size:
+        sizes.append(size)
+        size <<= 2
+
+    print(f"{'input':<10} {'bytes':>9} {'tokenizer':>11} {'us/KB':>7} {'regexes':>11}")
+    ok = True
+    for name, generate in GENERATORS:
+        per_kb = []
+        for size in sizes:
+            command = generate(size)
+            elapsed = min(timed(analyze, blocker, gate, command) for _ in range(3))
+            per_kb.append(elapsed / len(command) * 1024 * 1e6)
+            legacy_time = f"{timed(legacy, command) * 1000:>9.1f}ms" if size <= args.legacy_max else f"{'-':>11}"
+            print(f"{name:<10} {len(command):>9} {elapsed * 1000:>9.2f}ms {per_kb[-1]:>7.1f} {legacy_time}")
+        # Below 16 KB the fixed per-call cost dominates
+        steady = [kb for size, kb in zip(sizes, per_kb) if size >= 1 << 14] or per_kb
+        growth = steady[-1] / min(steady)
+        print(f"{name:<10} time per KB at {sizes[-1] >> 10} KB is {growth:.1f}x the best from 16 KB up")
+        ok &= growth < 4
+
+    rng = random.Random(args.seed)
+    worst, worst_size = 0.0, 0
+    for _ in range(args.fuzz):
+        command = random_command(rng.randint(1, 4096), rng)
+        elapsed = timed(analyze, blocker, gate, command)
+        if elapsed > worst:
+            worst, worst_size = elapsed, len(command)
+    print(f"fuzz: {args.fuzz} random commands up to 4 KB, worst {worst * 1000:.2f}ms ({worst_size} bytes)")
+
+    print("decisions (tokenizer / old regexes):")
+    for command, dangerous, commit in EXPECTED:
+        got = analyze(blocker, gate, command)
+        old = legacy(command)
+        marker = 'ok  ' if got == (dangerous, commit) else 'FAIL'
+        ok &= got == (dangerous, commit)
+        print(f"  {marker} ask={got[0]!s:<5} commit={got[1]!s:<5}  old ask={old[0]!s:<5} commit={old[1]!s:<5}  "
+              f"{command.splitlines()[0][:50]}")
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
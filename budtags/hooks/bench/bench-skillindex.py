@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark: skill corpus index (hooklib.skillindex) over the full skills/ tree
+
+Builds the index from scratch in a temporary project, then times a no-op
+refresh, a one-file incremental reindex (on a copy of the corpus), and
+top-k queries against a grep-style baseline that scans every markdown file
+for the query words. Also compares how many bytes an agent reads: the
+returned sections versus the whole files they come from.
+
+Usage:
+    python3 hooks/bench/bench-skillindex.py [--repeat N] [-k N]
+"""
+
+import argparse
+import os
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+HOOKS_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, HOOKS_DIR)
+
+from hooklib import skillindex  # noqa: E402
+from hooklib.skillrouter import plugin_root  # noqa: E402
+
+QUERIES = [
+    'create packages from harvest',
+    'finish harvest waste',
+    'transfer manifest template',
+    'lab test results upload',
+    'plant batch split',
+    'sales receipt retail',
+    'leaflink order line items',
+    'leaflink pagination offset',
+    'quickbooks invoice sync token',
+    'quickbooks oauth refresh',
+    'redis cache tags ttl',
+    'redis atomic counter lock',
+    'useInfiniteQuery pagination',
+    'useMutation optimistic update rollback',
+    'column filtering sorting table',
+    'virtualizer dynamic row height',
+    'inertia deferred props',
+    'useForm validation errors',
+    'zpl barcode font size',
+    'labelary image conversion',
+    'mock metrc api in tests',
+    'organization scoping active org',
+]
+
+
+def timed(func, repeat: int) -> tuple[float, object]:
+    """(best seconds, last result) over `repeat` runs."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def grep_baseline(root: str, query: str) -> list[str]:
+    """Files containing every query word, by scanning each markdown file (what Grep over skills/ does)."""
+    words = [re.compile(re.escape(word), re.IGNORECASE) for word in skillindex.query_words(query)]
+    matches = []
+    for directory, _dirs, files in os.walk(os.path.join(root, 'skills')):
+        for name in files:
+            if not name.endswith('.md'):
+                continue
+            path = os.path.join(directory, name)
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                text = f.read()
+            if all(word.search(text) for word in words):
+                matches.append(path)
+    return matches
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('-k', type=int, default=skillindex.DEFAULT_LIMIT)
+    args = parser.parse_args()
+
+    root = plugin_root()
+    with tempfile.TemporaryDirectory() as scratch:
+        project = os.path.join(scratch, 'project')
+        corpus = os.path.join(scratch, 'corpus')
+        shutil.copytree(os.path.join(root, 'skills'), os.path.join(corpus, 'skills'))
+
+        index = skillindex.SkillIndex(project, corpus)
+        start = time.perf_counter()
+        built = index.refresh()
+        build_time = time.perf_counter() - start
+        stats = index.stats()
+        print(f"Corpus: {stats['documents']} files, {stats['corpus_bytes'] / 1e6:.1f} MB -> "
+              f"{stats['sections']} sections, index {stats['index_bytes'] / 1e6:.1f} MB")
+        print(f"  full build         {build_time * 1000:8.1f}ms ({built['changed']} files)")
+
+        noop_time, _ = timed(index.refresh, args.repeat)
+        print(f"  no-op refresh      {noop_time * 1000:8.1f}ms")
+
+        target = os.path.join(corpus, 'skills', 'metrc-api', 'SKILL.md')
+
+        def edit_one():
+            with open(target, 'a') as f:
+                f.write('\n## Bench section\nappended by bench-skillindex\n')
+            return index.refresh()
+
+        edit_time, edited = timed(edit_one, args.repeat)
+        print(f"  one-file reindex   {edit_time * 1000:8.1f}ms ({edited['changed']} file, {edited['sections']} sections)")
+
+        print(f"\nQueries ({len(QUERIES)} x {args.repeat}, top {args.k})")
+        index_times = []
+        grep_times = []
+        section_bytes = 0
+        file_bytes = 0
+        for query in QUERIES:
+            seconds, results = timed(lambda: index.search(query, args.k), args.repeat)
+            index_times.append(seconds)
+            grep_seconds, _ = timed(lambda: grep_baseline(corpus, query), max(1, args.repeat // 2))
+            grep_times.append(grep_seconds)
+            section_bytes += sum(r['byte_end'] - r['byte_start'] for r in results)
+            file_bytes += sum(os.path.getsize(os.path.join(corpus, path)) for path in {r['path'] for r in results})
+
+        for label, times in (('index search', index_times), ('grep baseline', grep_times)):
+            print(f"  {label:<14} p50 {percentile(times, 0.5) * 1000:7.2f}ms  p95 {percentile(times, 0.95) * 1000:7.2f}ms  "
+                  f"mean {statistics.mean(times) * 1000:7.2f}ms")
+        print(f"  speedup        {statistics.mean(grep_times) / statistics.mean(index_times):.1f}x (mean)")
+        print(f"  bytes to read  {section_bytes / len(QUERIES) / 1024:.1f} KB of sections vs "
+              f"{file_bytes / len(QUERIES) / 1024:.1f} KB of whole files per query")
+
+
+if __name__ == "__main__":
+    main()
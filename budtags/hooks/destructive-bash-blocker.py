@@ -4,61 +4,87 @@ PreToolUse Hook: Destructive Bash Command Protection
 
 Requires explicit user confirmation before running commands that
 can destroy uncommitted work, untracked files, or project data.
+Each simple command in the line is classified on its own
+(hooklib/shell.py), so quoted text and heredoc bodies never trigger it.
 """
 
 import json
 import re
 import sys
 
-DANGEROUS_PATTERNS = [
-    {
-        "pattern": r"\bgit\s+clean\b",
-        "message": "git clean deletes untracked files permanently",
-    },
-    {
-        "pattern": r"\bgit\s+reset\s+--hard\b",
-        "message": "git reset --hard discards all uncommitted changes",
-    },
-    {
-        "pattern": r"\bgit\s+checkout\s+(--)?\s*\.\s*$",
-        "message": "git checkout . discards all unstaged changes",
-    },
-    {
-        "pattern": r"\brm\s+-[a-zA-Z]*r[a-zA-Z]*f",
-        "message": "rm -rf permanently deletes files and directories",
-    },
-    {
-        "pattern": r"\bgit\s+checkout\s+--\s+\S",
-        "message": "git checkout -- <file> discards unstaged changes to specific files",
-    },
-    {
-        "pattern": r"\bphp\s+-r\b",
-        "message": "php -r executes arbitrary PHP code inline",
-    },
-]
+from hooklib import shell
 
+GIT_CLEAN = "git clean deletes untracked files permanently"
+GIT_RESET_HARD = "git reset --hard discards all uncommitted changes"
+GIT_CHECKOUT_ALL = "git checkout . discards all unstaged changes"
+RM_RF = "rm -rf permanently deletes files and directories"
+GIT_CHECKOUT_FILES = "git checkout -- <file> discards unstaged changes to specific files"
+PHP_R = "php -r executes arbitrary PHP code inline"
+
+# php options that take a separate value (php stops at the first script argument)
+PHP_VALUE_OPTIONS = {'-c', '-d', '-z', '-t', '-S', '-f', '-F', '-B', '-R', '-E', '--rf', '--rc', '--re', '--rz', '--ri'}
+
+PHP_BINARY = re.compile(r'php[0-9.]*')
+
+
+def destructive_message(argv: list[str]) -> str | None:
+    """Classify one simple command (see hooklib/shell.py); the message for a destructive one, else None."""
+    # Case-insensitive like the regexes this replaced (`RM -RF`, `git RESET --HARD`)
+    argv = [arg.lower() for arg in argv]
+    git = shell.git_subcommand(argv)
+    if git:
+        subcommand, args = git
+        if subcommand == 'clean':
+            return GIT_CLEAN
+        if subcommand == 'reset' and '--hard' in args:
+            return GIT_RESET_HARD
+        if subcommand == 'checkout':
+            paths = args[args.index('--') + 1:] if '--' in args else [arg for arg in args if arg == '.']
+            if '.' in paths:
+                return GIT_CHECKOUT_ALL
+            if paths:
+                return GIT_CHECKOUT_FILES
+        return None
+
+    name = shell.command_name(argv)
+    if name == 'rm':
+        flags = shell.options(argv[1:])
+        if flags & {'-r', '-R', '--recursive'} and flags & {'-f', '--force'}:
+            return RM_RF
+    elif PHP_BINARY.fullmatch(name) and '-r' in shell.options(argv[1:], PHP_VALUE_OPTIONS, stop_at_operand=True):
+        return PHP_R
+    return None
 
-def main():
-    try:
-        input_data = json.load(sys.stdin)
-    except json.JSONDecodeError:
-        return
 
+def evaluate(input_data: dict) -> dict | None:
+    """Return an "ask" decision for destructive commands, None otherwise."""
     command = input_data.get("tool_input", {}).get("command", "")
     if not command:
-        return
+        return None
 
-    for entry in DANGEROUS_PATTERNS:
-        if re.search(entry["pattern"], command, re.IGNORECASE):
-            result = {
+    for argv in shell.commands(command):
+        message = destructive_message(argv)
+        if message:
+            return {
                 "hookSpecificOutput": {
                     "hookEventName": "PreToolUse",
                     "permissionDecision": "ask",
-                    "permissionDecisionReason": f"⚠️ Destructive command: {entry['message']}",
+                    "permissionDecisionReason": f"⚠️ Destructive command: {message}",
                 }
             }
-            print(json.dumps(result))
-            return
+
+    return None
+
+
+def main():
+    try:
+        input_data = json.load(sys.stdin)
+    except json.JSONDecodeError:
+        return
+
+    result = evaluate(input_data)
+    if result:
+        print(json.dumps(result))
 
 
 if __name__ == "__main__":
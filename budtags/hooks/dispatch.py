@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+PreToolUse Hook: Combined Dispatcher
+
+Reads the tool event once and runs every registered check that matches
+the tool in-process, instead of one interpreter launch and JSON parse per
+hook. Decisions are merged with a fixed precedence: deny > ask > allow.
+
+Each registered script exposes `evaluate(input_data) -> dict | None`.
+
+Usage:
+    python3 dispatch.py                # hooks in this directory
+    python3 dispatch.py --dir scripts  # hooks in the plugin copy
+"""
+
+import json
+import os
+import re
+import sys
+import time
+import traceback
+
+from hooklib import trace
+from hooklib.loader import HookModuleCache
+
+HOOKS_DIR = os.path.dirname(os.path.realpath(__file__))
+
+# Handlers keyed by tool matcher, in evaluation order. Scripts missing
+# from the selected directory are skipped.
+HANDLERS = [
+    {"matcher": r"Read", "script": "auto-approve-reads.py"},
+    {"matcher": r"Bash", "script": "destructive-bash-blocker.py"},
+    {"matcher": r"Bash", "script": "pre-commit-gate.py"},
+    {"matcher": r"Edit|Write", "script": "file-protection.py"},
+]
+
+# Higher wins when handlers disagree
+DECISION_PRECEDENCE = {"allow": 1, "ask": 2, "deny": 3}
+
+_modules = HookModuleCache(HOOKS_DIR)
+
+
+def warm() -> None:
+    """Load (or reload changed) handler modules and warm them; the daemon calls this before forking."""
+    for hooks_subdir in ('', 'scripts'):
+        for entry in HANDLERS:
+            module = _modules.get(os.path.join(hooks_subdir, entry["script"]))
+            if hasattr(module, 'warm'):
+                module.warm()
+
+
+def handlers_for(tool_name: str, hooks_subdir: str = '') -> list[tuple[dict, object]]:
+    """Return (HANDLERS entry, loaded hook module) for each check registered for `tool_name`."""
+    modules = []
+    for entry in HANDLERS:
+        if not re.fullmatch(entry["matcher"], tool_name):
+            continue
+        module = _modules.get(os.path.join(hooks_subdir, entry["script"]))
+        if module is not None:
+            modules.append((entry, module))
+    return modules
+
+
+def merge_decisions(results: list[dict]) -> dict | None:
+    """
+    Merge handler outputs into one PreToolUse decision.
+
+    The strongest decision wins; reasons and additional context from every
+    handler that reached that decision are kept.
+    """
+    outputs = [r.get("hookSpecificOutput", {}) for r in results if r]
+    outputs = [o for o in outputs if o.get("permissionDecision") in DECISION_PRECEDENCE]
+    if not outputs:
+        return None
+
+    strongest = max(DECISION_PRECEDENCE[o["permissionDecision"]] for o in outputs)
+    winners = [o for o in outputs if DECISION_PRECEDENCE[o["permissionDecision"]] == strongest]
+
+    merged = {
+        "hookEventName": "PreToolUse",
+        "permissionDecision": winners[0]["permissionDecision"],
+        "permissionDecisionReason": "\n".join(o["permissionDecisionReason"] for o in winners if o.get("permissionDecisionReason")),
+    }
+    context = "\n\n".join(o["additionalContext"] for o in winners if o.get("additionalContext"))
+    if context:
+        merged["additionalContext"] = context
+
+    return {"hookSpecificOutput": merged}
+
+
+def dispatch(input_data: dict, hooks_subdir: str = '') -> dict | None:
+    """Run every handler registered for the event's tool and merge the results."""
+    tool_name = input_data.get('tool_name', '')
+
+    results = []
+    for entry, module in handlers_for(tool_name, hooks_subdir):
+        started, mark = time.perf_counter(), trace.subprocess_mark()
+        result = None
+        try:
+            result = module.evaluate(input_data)
+            results.append(result)
+        except Exception:
+            # One broken check must not silence the others - surface it
+            # the way a failing standalone hook would
+            traceback.print_exc()
+        trace.handler(entry["script"], entry["matcher"], time.perf_counter() - started, result, mark)
+
+    return merge_decisions(results)
+
+
+def main():
+    hooks_subdir = ''
+    if len(sys.argv) > 2 and sys.argv[1] == '--dir':
+        hooks_subdir = sys.argv[2]
+
+    # Read tool input from stdin
+    try:
+        input_data = json.load(sys.stdin)
+    except json.JSONDecodeError:
+        return
+
+    result = dispatch(input_data, hooks_subdir)
+    if result:
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""
+Shared support code for the BudTags hook scripts.
+
+The hook scripts themselves stay standalone executables (hyphenated file
+names, invoked directly by Claude Code). Anything they need to share lives
+in this package so the project copy (.claude/hooks/) and the plugin copy
+(hooks/scripts/) run the same code.
+
+Keep this module import-light: it is loaded on every hook invocation.
+"""
+
+import os
+
+# Directory holding the hook scripts and this package
+HOOKS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_project_dir() -> str:
+    """Return the project root Claude Code is running against."""
+    return os.environ.get('CLAUDE_PROJECT_DIR', os.getcwd())
+
+
+def relative_to_project(file_path: str, project_dir: str) -> str:
+    """Strip the project directory prefix from a path, if present."""
+    if file_path.startswith(project_dir):
+        return file_path[len(project_dir):].lstrip('/')
+    return file_path
@@ -0,0 +1,121 @@
+"""
+Aho-Corasick multi-keyword matcher.
+
+Finds every occurrence of every keyword in one pass over the text, however
+many keywords there are, instead of one substring scan (or one grep
+alternation) per keyword. Matching is case-insensitive and keywords that
+start or end with a word character only match at word boundaries, so
+"mock" does not fire inside "mockup".
+
+The automaton is plain lists and dicts, so it round-trips through JSON and
+can be cached on disk by whoever builds it (see hooklib/skillrouter.py).
+"""
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+class Automaton:
+    """Keyword automaton. Add keywords, build() once, then search() any number of texts."""
+
+    def __init__(self):
+        # Per state: char -> next state (trie edges; misses follow self.fail)
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        # Per state: indexes into self.keywords ending here
+        self.output: list[list[int]] = [[]]
+        # Lowercased keywords, and as given (reported in matches)
+        self.keywords: list[str] = []
+        self.labels: list[str] = []
+        self.values: list[object] = []
+        self.built = False
+
+    def add(self, keyword: str, value=None) -> None:
+        """Add a keyword (matched case-insensitively) with a value returned on each match."""
+        label = keyword.strip()
+        keyword = label.lower()
+        if not keyword:
+            return
+        state = 0
+        for char in keyword:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        self.output[state].append(len(self.keywords))
+        self.keywords.append(keyword)
+        self.labels.append(label)
+        self.values.append(value)
+        self.built = False
+
+    def build(self) -> 'Automaton':
+        """Compute failure links breadth-first and merge each state's outputs with its fallback's."""
+        queue = list(self.goto[0].values())
+        for state in queue:
+            self.fail[state] = 0
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+        self.built = True
+        return self
+
+    def _step(self, state: int, char: str) -> int:
+        while state and char not in self.goto[state]:
+            state = self.fail[state]
+        return self.goto[state].get(char, 0)
+
+    def search(self, text: str) -> list[tuple[int, str, object]]:
+        """
+        Every keyword occurrence in `text`.
+
+        Returns:
+            [(start offset, keyword as added, value)] in the order the matches end
+        """
+        if not self.built:
+            self.build()
+        text = text.lower()
+        matches = []
+        state = 0
+        for end, char in enumerate(text, 1):
+            state = self._step(state, char)
+            for index in self.output[state]:
+                keyword = self.keywords[index]
+                start = end - len(keyword)
+                if _is_word_char(keyword[0]) and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if _is_word_char(keyword[-1]) and end < len(text) and _is_word_char(text[end]):
+                    continue
+                matches.append((start, self.labels[index], self.values[index]))
+        return matches
+
+    def to_dict(self) -> dict:
+        if not self.built:
+            self.build()
+        return {'goto': self.goto, 'fail': self.fail, 'output': self.output,
+                'keywords': self.keywords, 'labels': self.labels, 'values': self.values}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Automaton':
+        automaton = cls()
+        automaton.goto = data['goto']
+        automaton.fail = data['fail']
+        automaton.output = data['output']
+        automaton.keywords = data['keywords']
+        automaton.labels = data['labels']
+        automaton.values = data['values']
+        automaton.built = True
+        return automaton
@@ -0,0 +1,453 @@
+"""
+Cross-session job broker for heavy post-edit validations.
+
+Parallel subagents (or several sessions) editing one checkout each start
+their own post-edit-tests, and each would launch `php artisan test` shards
+or a full `npx tsc` at once. Coalescer (hooklib/coalesce.py) merges a burst
+of edits to one key within a process group; the broker sits under it and
+schedules the runs themselves, across every session on the project:
+
+- A validation is submitted as a job under its key to a queue in
+  .claude/cache/jobs.db (SQLite). A job that is still pending absorbs any
+  identical submission: the newcomer waits for it and gets the same
+  result. A running job doesn't, since it may have read the files before
+  the newcomer's edit.
+- Jobs start in submission order, each once it holds one slot of the
+  budget: flock'd files in .claude/cache/jobs/, which the kernel releases
+  if the holder dies. A job that can use more processes (test shards)
+  also takes free slots while no job is queued behind it.
+- A job is handed the tokens of the slots it holds (slot-0.lock is token
+  1). No other job holds the same tokens while it runs, so test shards use
+  them as TEST_TOKEN and get test databases of their own.
+- A waiter takes the job over when its owner dies or gives up (because a
+  newer edit superseded it), so nobody waits on a run that never finishes.
+
+The budget defaults to the CPU count; set BUDTAGS_JOB_BUDGET=N to change
+it, or 0 to run every validation straight away without the broker.
+
+    python3 -m hooklib.broker <project_dir> stats
+    python3 -m hooklib.broker <project_dir> list
+    python3 -m hooklib.broker <project_dir> clear
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from hooklib import coalesce, trace
+
+DB_FILE = os.path.join('.claude', 'cache', 'jobs.db')
+SLOT_DIR = os.path.join('.claude', 'cache', 'jobs')
+
+# Set BUDTAGS_JOB_BUDGET=N to cap concurrent heavy processes (0 disables the broker)
+BUDGET_ENV = 'BUDTAGS_JOB_BUDGET'
+
+POLL_INTERVAL = 0.05
+
+# Seconds between sweeps for jobs whose owner and waiters are all gone
+SWEEP_INTERVAL = 1.0
+
+# Finished jobs are kept this long, for `list` and `stats`
+KEEP_FINISHED = 60 * 60
+
+# Slot files tried for tokens when a job runs outside the budget
+MAX_TOKENS = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    state TEXT NOT NULL,
+    owner INTEGER NOT NULL,
+    want INTEGER NOT NULL,
+    slots INTEGER NOT NULL DEFAULT 0,
+    joined INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    result TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_pending_key ON jobs (key) WHERE state = 'pending';
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id);
+CREATE TABLE IF NOT EXISTS waiters (
+    job INTEGER NOT NULL,
+    pid INTEGER NOT NULL,
+    PRIMARY KEY (job, pid)
+);
+"""
+
+
+def budget() -> int:
+    """Concurrent heavy processes across the project: BUDTAGS_JOB_BUDGET, else the CPU count."""
+    try:
+        slots = int(os.environ.get(BUDGET_ENV, -1))
+    except ValueError:
+        slots = -1
+    return slots if slots >= 0 else (os.cpu_count() or 1)
+
+
+def alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Slots:
+    """Budget slots held by this process, one flock'd file each."""
+
+    def __init__(self, directory: str, count: int):
+        self.paths = [os.path.join(directory, f"slot-{number}.lock") for number in range(count)]
+        self.held: dict[str, object] = {}
+
+    def take(self, count: int) -> int:
+        """Lock free slots until `count` are held. Returns how many are held."""
+        for path in self.paths:
+            if len(self.held) >= count:
+                break
+            if path in self.held:
+                continue
+            slot = open(path, 'a')
+            try:
+                fcntl.flock(slot, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                slot.close()
+                continue
+            self.held[path] = slot
+        return len(self.held)
+
+    def tokens(self) -> list[int]:
+        """The held slots as 1-based tokens, lowest first."""
+        return sorted(self.paths.index(path) + 1 for path in self.held)
+
+    def release(self) -> None:
+        for slot in self.held.values():
+            slot.close()
+        self.held = {}
+
+    def busy(self) -> int:
+        """How many slots other processes hold right now."""
+        taken = 0
+        for path in self.paths:
+            with open(path, 'a') as slot:
+                try:
+                    fcntl.flock(slot, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    taken += 1
+        return taken
+
+
+class Broker:
+    """The job queue of one project."""
+
+    def __init__(self, project_dir: str, slots: int | None = None):
+        self.project_dir = project_dir
+        self.path = os.path.join(project_dir, DB_FILE)
+        self.slot_dir = os.path.join(project_dir, SLOT_DIR)
+        os.makedirs(self.slot_dir, exist_ok=True)
+        self.budget = budget() if slots is None else slots
+        self.db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(SCHEMA)
+        self.swept = 0.0
+
+    @contextmanager
+    def _transaction(self):
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+        self.db.execute('COMMIT')
+
+    def _sweep(self) -> None:
+        """Drop old finished jobs, and unfinished ones nobody alive is waiting on. Call in a transaction."""
+        self.swept = time.monotonic()
+        self.db.execute("DELETE FROM jobs WHERE state IN ('done', 'failed') AND finished < ?",
+                        (time.time() - KEEP_FINISHED,))
+        for job, owner in self.db.execute("SELECT id, owner FROM jobs WHERE state IN ('pending', 'running')").fetchall():
+            if alive(owner):
+                continue
+            waiters = [pid for (pid,) in self.db.execute('SELECT pid FROM waiters WHERE job = ?', (job,))]
+            self.db.executemany('DELETE FROM waiters WHERE job = ? AND pid = ?',
+                                [(job, pid) for pid in waiters if not alive(pid)])
+            if not any(alive(pid) for pid in waiters):
+                self.db.execute('DELETE FROM jobs WHERE id = ?', (job,))
+        self.db.execute("DELETE FROM waiters WHERE job NOT IN (SELECT id FROM jobs WHERE state IN ('pending', 'running'))")
+
+    def submit(self, key: str, want: int) -> tuple[int, bool]:
+        """
+        Queue a job for `key`, or join the pending one.
+
+        Returns:
+            (job id, True if this process owns the job)
+        """
+        with self._transaction():
+            self._sweep()
+            row = self.db.execute("SELECT id FROM jobs WHERE key = ? AND state = 'pending'", (key,)).fetchone()
+            if row:
+                self.db.execute('UPDATE jobs SET joined = joined + 1, want = MAX(want, ?) WHERE id = ?', (want, row[0]))
+                self.db.execute('INSERT OR IGNORE INTO waiters VALUES (?, ?)', (row[0], os.getpid()))
+                return row[0], False
+            cursor = self.db.execute("INSERT INTO jobs (key, state, owner, want, created) VALUES (?, 'pending', ?, ?, ?)",
+                                     (key, os.getpid(), want, time.time()))
+            return cursor.lastrowid, True
+
+    def _hand_off(self, job: int) -> None:
+        """
+        Give up a job this process owned: its waiters move to the newer
+        pending job for the same key, or one of them takes it over. Never
+        raises; a job left behind is swept once its owner is gone.
+        """
+        try:
+            self._transfer(job)
+        except sqlite3.Error:
+            pass
+
+    def _transfer(self, job: int) -> None:
+        with self._transaction():
+            row = self.db.execute('SELECT key FROM jobs WHERE id = ?', (job,)).fetchone()
+            if row is None:
+                return
+            newer = self.db.execute("SELECT id FROM jobs WHERE key = ? AND state = 'pending' AND id != ?",
+                                    (row[0], job)).fetchone()
+            if newer:
+                self.db.execute('UPDATE OR IGNORE waiters SET job = ? WHERE job = ?', (newer[0], job))
+            waiting = self.db.execute('SELECT COUNT(*) FROM waiters WHERE job = ?', (job,)).fetchone()[0]
+            if newer or not waiting:
+                self.db.execute('DELETE FROM waiters WHERE job = ?', (job,))
+                self.db.execute('DELETE FROM jobs WHERE id = ?', (job,))
+            else:
+                self.db.execute("UPDATE jobs SET state = 'pending', owner = 0, slots = 0, started = NULL WHERE id = ?",
+                                (job,))
+
+    def _claim(self, job: int) -> tuple[int, bool] | None:
+        """
+        Take over a job whose owner is gone.
+
+        Returns:
+            (job id, True) if this process now owns it, (newer job id, False)
+            if it was merged into a newer pending job for its key, or None if
+            its owner is still alive
+        """
+        with self._transaction():
+            row = self.db.execute("SELECT key, owner FROM jobs WHERE id = ? AND state IN ('pending', 'running')",
+                                  (job,)).fetchone()
+            if row is None or alive(row[1]):
+                return None
+            newer = self.db.execute("SELECT id FROM jobs WHERE key = ? AND state = 'pending' AND id != ?",
+                                    (row[0], job)).fetchone()
+            if newer:
+                self.db.execute('UPDATE OR IGNORE waiters SET job = ? WHERE job = ?', (newer[0], job))
+                self.db.execute('DELETE FROM waiters WHERE job = ?', (job,))
+                self.db.execute('DELETE FROM jobs WHERE id = ?', (job,))
+                return newer[0], False
+            self.db.execute('DELETE FROM waiters WHERE job = ? AND pid = ?', (job, os.getpid()))
+            self.db.execute("UPDATE jobs SET state = 'pending', owner = ?, slots = 0, started = NULL WHERE id = ?",
+                            (os.getpid(), job))
+            return job, True
+
+    def _wait(self, job: int, cancelled: threading.Event) -> tuple[str, object]:
+        """
+        Wait on another process's job.
+
+        Returns:
+            ('done', result), or ('lead', job id) / ('follow', job id) when
+            the job changed hands
+        """
+        while True:
+            row = self.db.execute('SELECT state, owner, result FROM jobs WHERE id = ?', (job,)).fetchone()
+            if row is None:
+                # Swept while we weren't looking; queue again
+                return 'lost', None
+            state, owner, result = row
+            if state == 'done':
+                return 'done', json.loads(result)
+            if state == 'failed':
+                raise RuntimeError(f"Shared validation run failed: {result}")
+            if cancelled.is_set():
+                # Our waiter row goes once this process has exited, if not now
+                try:
+                    with self._transaction():
+                        self.db.execute('DELETE FROM waiters WHERE job = ? AND pid = ?', (job, os.getpid()))
+                except sqlite3.Error:
+                    pass
+                raise coalesce.Cancelled()
+            if not alive(owner):
+                claimed = self._claim(job)
+                if claimed is not None:
+                    return ('lead' if claimed[1] else 'follow'), claimed[0]
+            time.sleep(POLL_INTERVAL)
+
+    def _lead(self, job: int, work, want: int, cancelled: threading.Event):
+        """Wait for this job's turn and a slot, run it, and publish the result to its waiters."""
+        slots = Slots(self.slot_dir, self.budget)
+        try:
+            while True:
+                if cancelled.is_set():
+                    self._hand_off(job)
+                    raise coalesce.Cancelled()
+                head = self.db.execute("SELECT MIN(id) FROM jobs WHERE state = 'pending'").fetchone()[0]
+                if head == job and slots.take(1):
+                    break
+                if time.monotonic() - self.swept > SWEEP_INTERVAL:
+                    with self._transaction():
+                        self._sweep()
+                time.sleep(POLL_INTERVAL)
+
+            with self._transaction():
+                queued = self.db.execute("SELECT COUNT(*) FROM jobs WHERE state = 'pending' AND id != ?",
+                                         (job,)).fetchone()[0]
+                want = max(want, self.db.execute('SELECT want FROM jobs WHERE id = ?', (job,)).fetchone()[0])
+                if not queued:
+                    slots.take(min(want, self.budget))
+                self.db.execute("UPDATE jobs SET state = 'running', started = ?, slots = ? WHERE id = ?",
+                                (time.time(), len(slots.held), job))
+
+            try:
+                result = work(slots.tokens())
+            except coalesce.Cancelled:
+                self._hand_off(job)
+                raise
+            except Exception as e:
+                self._publish(job, 'failed', f"{type(e).__name__}: {e}")
+                raise
+            self._publish(job, 'done', json.dumps(result))
+            return result
+        finally:
+            slots.release()
+
+    def _publish(self, job: int, state: str, result: str) -> None:
+        try:
+            with self._transaction():
+                self.db.execute('UPDATE jobs SET state = ?, finished = ?, result = ? WHERE id = ?',
+                                (state, time.time(), result, job))
+                self.db.execute('DELETE FROM waiters WHERE job = ?', (job,))
+        except sqlite3.Error:
+            pass
+
+    def run(self, key: str, work, cancelled: threading.Event, want: int = 1):
+        """Run `work(tokens)` as the job for `key`, or share the result of an identical pending job."""
+        job, owner = self.submit(key, want)
+        trace.cache('broker', not owner)
+        while not owner:
+            outcome, value = self._wait(job, cancelled)
+            if outcome == 'done':
+                return value
+            if outcome == 'lost':
+                job, owner = self.submit(key, want)
+            else:
+                job, owner = value, outcome == 'lead'
+        return self._lead(job, work, want, cancelled)
+
+    def stats(self) -> dict:
+        states = dict(self.db.execute('SELECT state, COUNT(*) FROM jobs GROUP BY state').fetchall())
+        joined, waited, ran = self.db.execute(
+            "SELECT COALESCE(SUM(joined), 0), AVG(started - created), AVG(finished - started) FROM jobs "
+            "WHERE state = 'done'").fetchone()
+        return {'states': states, 'joined': joined, 'queued': waited or 0.0, 'ran': ran or 0.0,
+                'budget': self.budget, 'busy': Slots(self.slot_dir, self.budget).busy(), 'path': self.path}
+
+    def jobs(self) -> list[tuple]:
+        """[(id, state, key, owner, slots, joined, created, started, finished)], newest first."""
+        return self.db.execute('SELECT id, state, key, owner, slots, joined, created, started, finished FROM jobs '
+                               'ORDER BY id DESC').fetchall()
+
+    def clear(self) -> int:
+        with self._transaction():
+            count = self.db.execute('DELETE FROM jobs').rowcount
+            self.db.execute('DELETE FROM waiters')
+        return count
+
+
+def run_unbrokered(project_dir: str, work, want: int):
+    """Run `work` straight away, outside the budget, on tokens no other job holds."""
+    try:
+        directory = os.path.join(project_dir, SLOT_DIR)
+        os.makedirs(directory, exist_ok=True)
+        slots = Slots(directory, MAX_TOKENS)
+        slots.take(want)
+    except OSError:
+        # No slot files (e.g. read-only checkout): tokens are only unique within this job
+        return work(list(range(1, want + 1)))
+    try:
+        return work(slots.tokens() or list(range(MAX_TOKENS + 1, MAX_TOKENS + 1 + want)))
+    finally:
+        slots.release()
+
+
+def run(project_dir: str, key: str, work, cancelled: threading.Event | None = None, want: int = 1):
+    """
+    Run a heavy validation through the project's job broker.
+
+    `work(tokens)` runs the validation using at most len(tokens) concurrent
+    processes (at least 1, at most `want`) and returns something
+    JSON-serializable. The tokens (distinct, 1-based) are held by this job
+    alone while it runs. It should raise coalesce.Cancelled once
+    `cancelled` is set. Without a usable broker (disabled, read-only
+    checkout) it runs straight away with `want` tokens.
+
+    Returns:
+        the result of `work`, from this process or from the run it was merged into
+    """
+    cancelled = cancelled or threading.Event()
+    if budget() == 0:
+        return run_unbrokered(project_dir, work, want)
+
+    started = []
+
+    def tracked(tokens: list[int]):
+        started.append(tokens)
+        return work(tokens)
+
+    try:
+        return Broker(project_dir).run(key, tracked, cancelled, want)
+    except (OSError, sqlite3.Error):
+        if started:
+            raise
+        # The queue is unusable (e.g. read-only checkout); never block the edit on it
+        return run_unbrokered(project_dir, work, want)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python3 -m hooklib.broker', description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('project_dir')
+    parser.add_argument('command', choices=('stats', 'list', 'clear'))
+    args = parser.parse_args()
+
+    broker = Broker(args.project_dir)
+    if args.command == 'stats':
+        stats = broker.stats()
+        states = ', '.join(f"{count} {state}" for state, count in sorted(stats['states'].items())) or 'none'
+        print(f"Queue:         {stats['path']}")
+        print(f"Jobs:          {states}")
+        print(f"Slots in use:  {stats['busy']} / {stats['budget']}")
+        print(f"Merged:        {stats['joined']} submissions shared another job's run")
+        print(f"Average:       {stats['queued']:.2f}s queued, {stats['ran']:.2f}s running")
+    elif args.command == 'list':
+        for job, state, key, owner, slots, joined, created, started, finished in broker.jobs():
+            when = time.strftime('%H:%M:%S', time.localtime(created))
+            queued = f"{(started or time.time()) - created:.1f}s" if state != 'pending' or started else '-'
+            took = f"{finished - started:.1f}s" if finished and started else '-'
+            label = key.replace('\n', ', ')
+            print(f"{when} #{job:<5} {state:<8} pid {owner:<7} {slots} slot(s) +{joined:<3} queued {queued:>6} "
+                  f"ran {took:>6}  {label[:80]}")
+    else:
+        print(f"Cleared {broker.clear()} job(s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
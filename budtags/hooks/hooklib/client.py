@@ -0,0 +1,198 @@
+"""
+Client side of the hook daemon.
+
+Deliberately imports only what is needed to talk to the daemon socket so
+the per-call cost of `hook-client.py` stays close to bare interpreter
+startup. Everything heavier (json, re, the hook modules themselves) is
+loaded once by the daemon.
+
+Wire format (one request per connection):
+
+    request:  b"<header length>\\n" + header + payload
+              header = NUL-joined fields:
+              version, script, cwd, argc, *argv, *environ ("KEY=VALUE")
+    response: b"<exit code> <stdout length>\\n" + stdout + stderr
+
+The request carries the caller's whole environment (API keys included), so
+sockets live in a per-user 0700 directory (runtime_dir()) and connect()
+refuses a socket, or on Linux a listening process, owned by another uid.
+"""
+
+import os
+import stat
+import sys
+import zlib
+
+# The C module directly: `socket` pulls in enum/selectors, which costs as
+# much as the json/re imports the daemon is there to avoid
+import _socket
+
+PROTOCOL_VERSION = '1'
+
+# Set BUDTAGS_HOOK_DAEMON=0 to always run hooks in-process
+DAEMON_ENV_FLAG = 'BUDTAGS_HOOK_DAEMON'
+
+
+def runtime_dir() -> str:
+    """
+    This user's private directory for service sockets and their lock files.
+
+    Created 0700 under $XDG_RUNTIME_DIR (or /tmp). mkdir fails rather than
+    reuse an existing path, and an existing directory must be a real
+    directory owned by this uid and closed to everyone else: in a shared
+    /tmp another user could otherwise create it first.
+
+    Raises PermissionError when it exists but can't be trusted.
+    """
+    uid = os.getuid()
+    path = os.path.join(os.environ.get('XDG_RUNTIME_DIR') or '/tmp', f"budtags-{uid}")
+    try:
+        info = os.lstat(path)
+    except FileNotFoundError:
+        try:
+            os.mkdir(path, 0o700)
+        except FileExistsError:
+            pass
+        info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != uid or info.st_mode & 0o077:
+        raise PermissionError(f"{path} is not a private directory owned by uid {uid}")
+    return path
+
+
+def socket_path(key: str, service: str = 'hooks') -> str:
+    """
+    Socket location for a per-user background service.
+
+    `key` scopes the service (the hooks directory for the hook daemon, the
+    project directory for the test pool). Kept out of the project tree
+    because AF_UNIX paths are limited to ~100 bytes.
+
+    Raises PermissionError if the runtime directory can't be trusted.
+    """
+    digest = zlib.crc32(key.encode()) & 0xFFFFFFFF
+    return os.path.join(runtime_dir(), f"{service}-{digest:08x}.sock")
+
+
+def connect(sock, path: str) -> None:
+    """
+    Connect `sock` to a service socket this user owns.
+
+    Raises PermissionError if the socket file, or on Linux the process
+    listening on it (SO_PEERCRED), belongs to another uid; OSError if
+    there is nothing to connect to.
+    """
+    uid = os.getuid()
+    info = os.lstat(path)
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != uid:
+        raise PermissionError(f"{path} is not a socket owned by uid {uid}")
+    sock.connect(path)
+    if hasattr(_socket, 'SO_PEERCRED'):
+        # struct ucred: pid, uid, gid as C ints
+        credentials = sock.getsockopt(_socket.SOL_SOCKET, _socket.SO_PEERCRED, 12)
+        if int.from_bytes(credentials[4:8], sys.byteorder) != uid:
+            raise PermissionError(f"{path} is served by another user")
+
+
+def encode_request(script: str, argv: list[str], payload: bytes) -> bytes:
+    """Frame a hook invocation for the daemon."""
+    fields = [PROTOCOL_VERSION, script, os.getcwd(), str(len(argv)), *argv]
+    fields.extend(f"{key}={value}" for key, value in os.environ.items())
+    header = '\0'.join(fields).encode('utf-8', 'surrogateescape')
+    return b"%d\n" % len(header) + header + payload
+
+
+def call(hooks_dir: str, script: str, argv: list[str], payload: bytes) -> tuple[int, bytes, bytes] | None:
+    """
+    Run a hook through the daemon.
+
+    Returns (exit_code, stdout, stderr), or None if no daemon is listening.
+    """
+    sock = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    try:
+        connect(sock, socket_path(hooks_dir))
+    except OSError:
+        sock.close()
+        return None
+
+    try:
+        sock.sendall(encode_request(script, argv, payload))
+        sock.shutdown(_socket.SHUT_WR)
+
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    except OSError:
+        return None
+    finally:
+        sock.close()
+
+    response = b''.join(chunks)
+    status, _, body = response.partition(b"\n")
+    try:
+        exit_code, stdout_len = (int(part) for part in status.split())
+    except ValueError:
+        # Daemon died mid-request - let the caller fall back
+        return None
+
+    return exit_code, body[:stdout_len], body[stdout_len:]
+
+
+def spawn_daemon(hooks_dir: str) -> None:
+    """Start a detached daemon for `hooks_dir`; it exits on its own when idle."""
+    import subprocess
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = hooks_dir
+    try:
+        subprocess.Popen(
+            [sys.executable, '-m', 'hooklib.daemon', hooks_dir],
+            cwd=hooks_dir,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        # Can't spawn - the in-process path still works
+        pass
+
+
+def run_in_process(script_path: str, argv: list[str], payload: bytes) -> int:
+    """Fallback: execute the hook script in this interpreter, as if run directly."""
+    import io
+    import runpy
+
+    from hooklib import corpus, trace
+
+    sys.argv = [script_path, *argv]
+    sys.path[0] = os.path.dirname(script_path)
+    sys.stdin = io.TextIOWrapper(io.BytesIO(payload), encoding='utf-8')
+    # Held back until the hook ends so the trace can read its decision
+    stdout = sys.stdout = io.StringIO()
+    span = trace.begin(script_path, payload, 'in-process')
+    exit_code = 0
+    try:
+        runpy.run_path(script_path, run_name='__main__')
+    except SystemExit as e:
+        exit_code = exit_status(e)
+    finally:
+        sys.stdout = sys.__stdout__
+        sys.stdout.write(stdout.getvalue())
+        sys.stdout.flush()
+    trace.finish(span, exit_code, stdout.getvalue())
+    corpus.record(script_path, argv, payload, exit_code, stdout.getvalue())
+    return exit_code
+
+
+def exit_status(exc: SystemExit) -> int:
+    """Translate a SystemExit into the process exit code the interpreter would use."""
+    if exc.code is None:
+        return 0
+    if isinstance(exc.code, int):
+        return exc.code
+    print(exc.code, file=sys.stderr)
+    return 1
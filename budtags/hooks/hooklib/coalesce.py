@@ -0,0 +1,182 @@
+"""
+Edit coalescing for PostToolUse validation.
+
+A burst of edits (parallel Edit calls, or several edits to one controller)
+starts one post-edit-tests process per edit, and each would run the same
+test files or the same type-check. Coalescer makes them share one run per
+validation key:
+
+- Each edit registers under a key (the selected test files, or "tsc") and
+  waits the coalescing window for more edits to the same key.
+- The most recent edit for the key runs the validation, against the files
+  as they are by then; earlier edits wait for its result.
+- An edit that registers while a run is in flight makes that run stale: it
+  is cancelled and the newer edit's run covers everyone.
+- Every process still prints its own decision, naming the edits the run
+  covered, so a block is attributed to the edit that triggered it.
+
+State lives in .claude/cache/coalesce/<key hash>.json, guarded by flock.
+The window defaults to COALESCE_WINDOW seconds; set BUDTAGS_COALESCE_WINDOW
+(seconds, 0 disables coalescing) to change it.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+STATE_DIR = os.path.join('.claude', 'cache', 'coalesce')
+
+# Seconds an edit waits for more edits to the same key
+COALESCE_WINDOW = 0.25
+WINDOW_ENV = 'BUDTAGS_COALESCE_WINDOW'
+
+POLL_INTERVAL = 0.05
+
+# A waiting edit runs the validation itself if nobody has for this long
+# after the window of the newest edit closed (e.g. that process died)
+TAKEOVER_GRACE = 1.0
+
+# Edits remembered per key (only the ones since the last run are reported)
+MAX_EDITS = 50
+
+
+class Cancelled(Exception):
+    """Raised by a validation whose run was superseded by a newer edit."""
+
+
+def coalesce_window() -> float:
+    try:
+        return max(0.0, float(os.environ.get(WINDOW_ENV, COALESCE_WINDOW)))
+    except ValueError:
+        return COALESCE_WINDOW
+
+
+class Coalescer:
+    """Shares one validation run between the edits registered under a key."""
+
+    def __init__(self, project_dir: str, key: str, window: float | None = None):
+        digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+        base = os.path.join(project_dir, STATE_DIR, digest)
+        self.state_path = base + '.json'
+        self.lock_path = base + '.lock'
+        self.run_lock_path = base + '.run'
+        self.window = coalesce_window() if window is None else window
+
+    @contextmanager
+    def _locked(self):
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _read(self) -> dict:
+        try:
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'generation': 0, 'updated': 0.0, 'edits': [], 'result': None}
+
+    def _write(self, state: dict) -> None:
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def register(self, edit: str) -> int:
+        """Record an edit for this key. Returns its generation."""
+        with self._locked():
+            state = self._read()
+            state['generation'] += 1
+            state['updated'] = time.time()
+            state['edits'] = (state['edits'] + [[state['generation'], edit]])[-MAX_EDITS:]
+            self._write(state)
+            return state['generation']
+
+    def _finish(self, generation: int, data) -> list[str]:
+        """Publish a run's result. Returns the edits it covered."""
+        with self._locked():
+            state = self._read()
+            previous = state['result']['generation'] if state['result'] else 0
+            covered = [edit for number, edit in state['edits'] if previous < number <= generation]
+            state['result'] = {'generation': generation, 'edits': covered, 'data': data}
+            self._write(state)
+            return covered
+
+    def _lead(self, validate, blocking: bool) -> tuple[object, list[str]] | None:
+        """
+        Run the validation for the newest generation.
+
+        Returns:
+            (result, covered edits), or None if another process is running
+            it or a newer edit made this run stale
+        """
+        with open(self.run_lock_path, 'a') as run_lock:
+            try:
+                fcntl.flock(run_lock, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except OSError:
+                return None
+
+            state = self._read()
+            generation = state['generation']
+            if state['result'] and state['result']['generation'] >= generation:
+                return state['result']['data'], state['result']['edits']
+
+            cancelled = threading.Event()
+            outcome = {}
+
+            def target():
+                try:
+                    outcome['data'] = validate(cancelled)
+                except BaseException as e:
+                    outcome['error'] = e
+
+            worker = threading.Thread(target=target, daemon=True)
+            worker.start()
+            while worker.is_alive():
+                worker.join(POLL_INTERVAL * 2)
+                if self._read()['generation'] != generation:
+                    # Superseded; the newer edit's run covers this one
+                    cancelled.set()
+                    return None
+
+            if isinstance(outcome.get('error'), Cancelled):
+                return None
+            if 'error' in outcome:
+                raise outcome['error']
+            return outcome['data'], self._finish(generation, outcome['data'])
+
+    def run(self, edit: str, validate) -> tuple[object, list[str]]:
+        """
+        Run `validate(cancelled)` once for a burst of edits to this key.
+
+        `validate` must return something JSON-serializable and should stop
+        early (raising Cancelled) once the threading.Event it is passed is set.
+
+        Returns:
+            (result, edits): the result of the run that covered `edit`, and
+            every edit that run covered
+        """
+        if self.window <= 0:
+            return validate(threading.Event()), [edit]
+
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        generation = self.register(edit)
+        time.sleep(self.window)
+
+        while True:
+            state = self._read()
+            result = state['result']
+            if result and result['generation'] >= generation:
+                return result['data'], result['edits']
+
+            newest = state['generation'] == generation
+            abandoned = time.time() - state['updated'] > self.window + TAKEOVER_GRACE
+            if newest or abandoned:
+                outcome = self._lead(validate, blocking=newest)
+                if outcome is not None:
+                    return outcome
+
+            time.sleep(POLL_INTERVAL)
@@ -0,0 +1,202 @@
+"""
+Recorded hook payloads, for replaying through the hooks (bench/bench-replay.py).
+
+With BUDTAGS_HOOK_RECORD=1 in the environment, every hook run through
+hook-client.py (in the daemon or in-process) appends its stdin payload to
+.claude/logs/hook-corpus.jsonl in the project, together with the script,
+its arguments and what it decided:
+
+    {"ts": 1760000000.1, "script": "dispatch.py", "argv": [], "event": "PreToolUse",
+     "tool": "Bash", "exit": 0, "decision": "ask", "payload": "{\\"tool_name\\": ...}"}
+
+Recording is off by default: payloads hold prompts and file contents. The
+log rotates like the trace log, at MAX_BYTES, keeping one old file.
+
+`pack` turns the log into a compact corpus, one gzip'd JSON line per
+distinct payload. session_id and transcript_path are ignored when deciding
+what counts as distinct. Each entry keeps how often the payload was seen
+and every recorded decision for it:
+
+    {"id": "3f2a9c01b7e4", "event": "PreToolUse", "tool": "Bash", "count": 14,
+     "recorded": {"dispatch.py": [0, "ask"]}, "payload": "..."}
+
+    python3 -m hooklib.corpus <project_dir> stats
+    python3 -m hooklib.corpus <project_dir> pack [-o corpus.jsonl.gz]
+    python3 -m hooklib.corpus <project_dir> clear
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+
+from hooklib import HOOKS_DIR, trace
+
+CORPUS_FILE = os.path.join('.claude', 'logs', 'hook-corpus.jsonl')
+PACKED_FILE = os.path.join('.claude', 'logs', 'hook-corpus.jsonl.gz')
+
+# Rotate past this size, keeping one old file
+MAX_BYTES = 16 << 20
+
+# Payloads larger than this (a Write of a bundle, say) are not recorded
+MAX_PAYLOAD_BYTES = 1 << 20
+
+# Set BUDTAGS_HOOK_RECORD=1 to record payloads
+RECORD_ENV_FLAG = 'BUDTAGS_HOOK_RECORD'
+
+# Payload fields that differ between otherwise identical events
+VOLATILE_FIELDS = ('session_id', 'transcript_path')
+
+
+def enabled() -> bool:
+    return os.environ.get(RECORD_ENV_FLAG) == '1'
+
+
+def script_name(script: str) -> str:
+    """A hook script as hook-client.py is given it: relative to the hooks dir."""
+    if os.path.isabs(script):
+        return os.path.relpath(os.path.realpath(script), os.path.realpath(HOOKS_DIR))
+    return script
+
+
+def record(script: str, argv: list[str], payload: bytes, exit_code: int, stdout: str) -> None:
+    """Append one hook run to the project's corpus log when recording is on. Never raises."""
+    if not enabled() or len(payload) > MAX_PAYLOAD_BYTES:
+        return
+    try:
+        fields = {name.decode(): value.decode('utf-8', 'replace')
+                  for name, value in trace.PAYLOAD_FIELD.findall(payload[:4096])}
+        project_dir = os.environ.get('CLAUDE_PROJECT_DIR', os.getcwd())
+        trace.append(os.path.join(project_dir, CORPUS_FILE), {
+            'ts': round(time.time(), 3),
+            'script': script_name(script),
+            'argv': argv,
+            'event': fields.get('hook_event_name'),
+            'tool': fields.get('tool_name'),
+            'exit': exit_code,
+            'decision': trace.decision_of(exit_code, stdout),
+            'payload': payload.decode('utf-8', 'surrogateescape'),
+        }, MAX_BYTES)
+    except (OSError, ValueError, TypeError):
+        pass
+
+
+def payload_key(payload: str) -> str:
+    """Identity of a payload, ignoring VOLATILE_FIELDS."""
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        for field in VOLATILE_FIELDS:
+            data.pop(field, None)
+        payload = json.dumps(data, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8', 'surrogateescape')).hexdigest()[:12]
+
+
+def read_log(project_dir: str) -> list[dict]:
+    """Every recorded run, oldest first (the rotated file, then the current one)."""
+    path = os.path.join(project_dir, CORPUS_FILE)
+    records = []
+    for name in (path + '.1', path):
+        try:
+            with open(name, 'r', encoding='utf-8', errors='surrogateescape') as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except OSError:
+            continue
+    return records
+
+
+def pack(records: list[dict]) -> list[dict]:
+    """One entry per distinct payload, in first-seen order; later decisions win."""
+    entries: dict[str, dict] = {}
+    for run in records:
+        if not isinstance(run.get('payload'), str):
+            continue
+        key = payload_key(run['payload'])
+        entry = entries.get(key)
+        if entry is None:
+            entry = entries[key] = {'id': key, 'event': run.get('event'), 'tool': run.get('tool'),
+                                    'count': 0, 'recorded': {}, 'payload': run['payload']}
+        entry['count'] += 1
+        command = ' '.join([run.get('script', '?'), *run.get('argv', [])])
+        entry['recorded'][command] = [run.get('exit'), run.get('decision')]
+    return list(entries.values())
+
+
+def load(path: str) -> list[dict]:
+    """
+    A corpus to replay: a packed .jsonl.gz file, or a recording log (packed on the fly).
+
+    Returns:
+        the corpus entries
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', errors='surrogateescape') as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    if rows and 'id' not in rows[0]:
+        rows = pack(rows)
+    return rows
+
+
+def write(path: str, entries: list[dict]) -> None:
+    """Write a packed corpus atomically."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(tmp_path, 'wt', encoding='utf-8', errors='surrogateescape') as f:
+        for entry in entries:
+            f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python3 -m hooklib.corpus', description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('project_dir')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('stats', help='recorded runs and distinct payloads per event and tool')
+    pack_parser = commands.add_parser('pack', help='write the distinct payloads as a gzip corpus')
+    pack_parser.add_argument('-o', '--output', help=f"default: <project_dir>/{PACKED_FILE}")
+    commands.add_parser('clear', help='delete the recording log')
+    args = parser.parse_args()
+
+    log_path = os.path.join(args.project_dir, CORPUS_FILE)
+    if args.command == 'clear':
+        for name in (log_path, log_path + '.1'):
+            if os.path.exists(name):
+                os.remove(name)
+        print(f"Cleared {log_path}")
+        return 0
+
+    records = read_log(args.project_dir)
+    if not records:
+        print(f"Nothing recorded in {log_path} (set {RECORD_ENV_FLAG}=1 to record)", file=sys.stderr)
+        return 1
+    entries = pack(records)
+
+    if args.command == 'stats':
+        print(f"{len(records)} recorded runs, {len(entries)} distinct payloads")
+        groups: dict[str, list[int]] = {}
+        for entry in entries:
+            counts = groups.setdefault(f"{entry['event']} {entry['tool'] or ''}".strip(), [0, 0])
+            counts[0] += entry['count']
+            counts[1] += 1
+        for name, (runs, distinct) in sorted(groups.items()):
+            print(f"  {name:<28} {runs:>6} runs {distinct:>6} distinct")
+    elif args.command == 'pack':
+        output = args.output or os.path.join(args.project_dir, PACKED_FILE)
+        write(output, entries)
+        raw = sum(os.path.getsize(name) for name in (log_path, log_path + '.1') if os.path.exists(name))
+        print(f"Packed {len(records)} runs into {len(entries)} payloads: {raw} -> {os.path.getsize(output)} bytes "
+              f"-> {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
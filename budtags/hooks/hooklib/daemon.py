@@ -0,0 +1,239 @@
+"""
+Hook daemon: a long-lived Unix-socket server that keeps every hook module
+loaded so tool calls stop paying interpreter startup and pattern
+compilation.
+
+Each request is served in a forked child of the preloaded parent, so hooks
+run with their own cwd/environment/stdin exactly as if launched directly,
+long-running hooks (post-edit-tests) don't block the quick ones, and hook
+module state never leaks between calls.
+
+Hook scripts are reloaded when they change. A change to any hooklib/
+module re-executes the daemon instead, since every loaded hook holds
+references into the old library; the request that noticed the change is
+dropped, and hook-client.py runs it in-process.
+
+Started on demand by hook-client.py; exits after IDLE_TIMEOUT seconds
+without requests. Usage:
+
+    python3 -m hooklib.daemon <hooks_dir>
+"""
+
+import fcntl
+import gc
+import io
+import os
+import socketserver
+import sys
+import time
+import traceback
+
+from hooklib import client, corpus, trace
+from hooklib.loader import HookModuleCache
+
+# Shut down after this many seconds without a request
+IDLE_TIMEOUT = 30 * 60
+
+# Directories (relative to the hooks dir) whose *.py files are hook scripts
+HOOK_SCRIPT_DIRS = ['', 'scripts']
+
+# Never load these into the daemon
+EXCLUDED_SCRIPTS = {'hook-client.py'}
+
+LIBRARY_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def library_fingerprint() -> dict[str, int]:
+    """mtime of every hooklib module (a stat per file), to notice library edits."""
+    fingerprint = {}
+    try:
+        with os.scandir(LIBRARY_DIR) as entries:
+            for entry in entries:
+                if entry.name.endswith('.py'):
+                    try:
+                        fingerprint[entry.name] = entry.stat().st_mtime_ns
+                    except OSError:
+                        continue
+    except OSError:
+        pass
+    return fingerprint
+
+
+class DaemonModuleCache(HookModuleCache):
+    """Module cache that also discovers every hook script up front."""
+
+    def refresh(self) -> None:
+        """Load new hook scripts and reload changed ones (a stat per file)."""
+        for subdir in HOOK_SCRIPT_DIRS:
+            directory = os.path.join(self.hooks_dir, subdir)
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                continue
+            for name in names:
+                if not name.endswith('.py') or name in EXCLUDED_SCRIPTS:
+                    continue
+                try:
+                    module = self.get(os.path.join(subdir, name))
+                    # Hooks that load other hooks (dispatch.py) warm them here,
+                    # in the parent, so children inherit them too
+                    if hasattr(module, 'warm'):
+                        module.warm()
+                except Exception:
+                    # A broken hook must not take the others down; it will
+                    # report its own error when it is actually called
+                    pass
+
+
+def parse_request(data: bytes) -> tuple[str, str, list[str], dict[str, str], bytes]:
+    """Decode a framed request into (script, cwd, argv, environ, payload)."""
+    length, _, rest = data.partition(b"\n")
+    header, payload = rest[:int(length)], rest[int(length):]
+    fields = header.decode('utf-8', 'surrogateescape').split('\0')
+
+    version, script, cwd, argc = fields[:4]
+    if version != client.PROTOCOL_VERSION:
+        raise ValueError(f"Unsupported protocol version {version}")
+
+    argv = fields[4:4 + int(argc)]
+    environ = dict(item.split('=', 1) for item in fields[4 + int(argc):] if '=' in item)
+    return script, cwd, argv, environ, payload
+
+
+def run_hook(module, script: str, cwd: str, argv: list[str], environ: dict[str, str], payload: bytes) -> tuple[int, bytes, bytes]:
+    """Run a preloaded hook's main() with the caller's process context. Only call in a forked child."""
+    os.chdir(cwd)
+    os.environ.clear()
+    os.environ.update(environ)
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    sys.argv = [script, *argv]
+    sys.stdin = io.TextIOWrapper(io.BytesIO(payload), encoding='utf-8')
+    sys.stdout, sys.stderr = stdout, stderr
+
+    span = trace.begin(script, payload, 'daemon')
+    exit_code = 0
+    try:
+        module.main()
+    except SystemExit as e:
+        exit_code = client.exit_status(e)
+    except Exception:
+        traceback.print_exc()
+        exit_code = 1
+    finally:
+        sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+    trace.finish(span, exit_code, stdout.getvalue())
+    corpus.record(script, argv, payload, exit_code, stdout.getvalue())
+
+    return exit_code, stdout.getvalue().encode(), stderr.getvalue().encode()
+
+
+class HookRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        chunks = []
+        while True:
+            chunk = self.request.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+        try:
+            script, cwd, argv, environ, payload = parse_request(b''.join(chunks))
+            module = self.server.modules.get(script)
+            if module is None:
+                result = (1, b'', f"Unknown hook script: {script}\n".encode())
+            else:
+                result = run_hook(module, script, cwd, argv, environ, payload)
+        except Exception:
+            result = (1, b'', traceback.format_exc().encode())
+
+        exit_code, stdout, stderr = result
+        self.request.sendall(b"%d %d\n" % (exit_code, len(stdout)) + stdout + stderr)
+
+
+class HookServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    # handle_request() poll interval, so the idle check runs regularly
+    timeout = 1.0
+    block_on_close = False
+
+    def __init__(self, hooks_dir: str):
+        self.modules = DaemonModuleCache(hooks_dir)
+        self.last_request = time.monotonic()
+        self.library = library_fingerprint()
+        self.stale = False
+        super().__init__(client.socket_path(hooks_dir), HookRequestHandler)
+
+    def library_changed(self) -> bool:
+        if not self.stale and library_fingerprint() != self.library:
+            self.stale = True
+        return self.stale
+
+    def process_request(self, request, client_address):
+        self.last_request = time.monotonic()
+        if self.library_changed():
+            # Closing without a reply makes the client run the hook in-process,
+            # against the edited library
+            self.shutdown_request(request)
+            return
+        # (Re)load in the parent so every forked child inherits warm modules
+        self.modules.refresh()
+        super().process_request(request, client_address)
+
+    def reap(self) -> None:
+        """Collect finished children, including any forked before a re-exec."""
+        self.collect_children()
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if self.active_children:
+                self.active_children.discard(pid)
+
+
+def serve(hooks_dir: str) -> None:
+    hooks_dir = os.path.realpath(hooks_dir)
+    # Before anything (the socket, its lock file) is created
+    os.umask(0o077)
+    try:
+        path = client.socket_path(hooks_dir)
+    except OSError:
+        # The runtime dir can't be trusted (see client.runtime_dir)
+        return
+
+    # Only one daemon per socket; concurrent spawns lose the race and exit
+    lock_file = open(path + '.lock', 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return
+
+    if os.path.exists(path):
+        os.unlink(path)
+
+    server = HookServer(hooks_dir)
+    server.modules.refresh()
+
+    # Keep the preloaded heap out of GC passes so forked children don't
+    # copy-on-write it page by page
+    gc.freeze()
+
+    try:
+        while time.monotonic() - server.last_request < IDLE_TIMEOUT and not server.library_changed():
+            server.handle_request()
+            server.reap()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+    if server.stale:
+        # The lock is close-on-exec, so the new image can take it again.
+        # Children still running are reaped by the new image.
+        os.execv(sys.executable, [sys.executable, '-m', 'hooklib.daemon', hooks_dir])
+
+
+if __name__ == '__main__':
+    serve(sys.argv[1] if len(sys.argv) > 1 else os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
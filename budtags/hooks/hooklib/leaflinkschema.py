@@ -0,0 +1,596 @@
+"""
+Compiled validators for the LeafLink OpenAPI specs.
+
+skills/leaflink/schemas/openapi-*.json are nine OpenAPI 3.0 specs (~470 KB,
+openapi-orders.json alone 135 KB) that share parameters and schemas through
+cross-file $refs. Re-parsing and walking them for every lookup or payload
+check is slow, so this module compiles them once:
+
+- every $ref (local or ./openapi-shared.json#/...) is resolved at build time
+- each schema becomes a generated Python function that checks type,
+  nullable, enum, required, length, range, pattern and format, and each
+  operation's request body and JSON responses point at one of them
+- the generated module is compiled, and its code object is marshalled to
+  .claude/cache/leaflink-validators.bin together with the operation table
+  (method, path, parameters, validators, request example)
+
+A cached load is one marshal.loads and one exec, and the cache is rebuilt
+only when a spec file changes (by mtime and size) or the Python version
+does. Validation runs the generated code straight through, so batches of
+thousands of order and product payloads validate in a fraction of a
+second.
+
+Requests are checked the way the API treats them: readOnly properties are
+ignored, and PATCH (partial_update) bodies skip `required`. Decimal fields
+accept a number or a decimal string whatever their declared type, as the
+API itself returns both.
+
+    python3 -m hooklib.leaflinkschema <project_dir> build|stats
+    python3 -m hooklib.leaflinkschema <project_dir> ops [text]
+    python3 -m hooklib.leaflinkschema <project_dir> validate <operationId | METHOD /path/> <file.json | -> [--response 200] [--jsonl]
+    python3 -m hooklib.leaflinkschema <project_dir> examples
+    python3 -m hooklib.leaflinkschema <project_dir> source
+"""
+
+import argparse
+import json
+import marshal
+import os
+import sys
+import time
+
+from hooklib.skillrouter import plugin_root
+
+CACHE_FILE = os.path.join('.claude', 'cache', 'leaflink-validators.bin')
+CACHE_VERSION = 1
+
+SCHEMA_DIR = os.path.join('skills', 'leaflink', 'schemas')
+
+HTTP_METHODS = ('get', 'post', 'put', 'patch', 'delete')
+
+# How a schema is checked: request bodies skip readOnly properties, partial
+# (PATCH) bodies also skip `required`, responses check everything
+REQUEST, PARTIAL, RESPONSE = 'request', 'partial', 'response'
+
+PYTHON_TYPES = {
+    'string': ('type({v}) is not str', 'string'),
+    'integer': ('type({v}) is not int', 'integer'),
+    'number': ('type({v}) is not int and type({v}) is not float', 'number'),
+    'boolean': ('type({v}) is not bool', 'boolean'),
+    'array': ('type({v}) is not list', 'array'),
+    'object': ('type({v}) is not dict', 'object'),
+}
+
+FORMAT_PATTERNS = {
+    'date-time': '_DATETIME',
+    'date': '_DATE',
+    'uuid': '_UUID',
+    'email': '_EMAIL',
+}
+
+PRELUDE = r'''
+import re
+
+_MISSING = object()
+_DATETIME = re.compile(r'^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:?\d{2})?$')
+_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_UUID = re.compile(r'^[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}$')
+_EMAIL = re.compile(r'^[^@\s]+@[^@\s]+$')
+_DECIMAL = re.compile(r'^-?\d+(\.\d+)?$')
+
+
+def _kind(value):
+    return {str: 'string', int: 'integer', float: 'number', bool: 'boolean', list: 'array', dict: 'object'}.get(
+        type(value), type(value).__name__)
+
+
+def _decimal(value):
+    return type(value) is int or type(value) is float or (type(value) is str and _DECIMAL.match(value) is not None)
+
+
+def _any(v, p, e):
+    pass
+
+
+def _unique(items):
+    try:
+        keys = [repr(item) for item in items]
+    except Exception:
+        return True
+    return len(set(keys)) == len(keys)
+'''
+
+
+class Compiler:
+    """Generates one validator function per (schema, mode) reached from the operations."""
+
+    def __init__(self, documents: dict[str, dict]):
+        self.documents = documents
+        self.constants: list[str] = []
+        self.functions: list[str] = []
+        self.names: dict[tuple, str] = {}
+        self.queue: list[tuple] = []
+        self.local = 0
+        # $refs with no target, accepted as any value
+        self.unresolved: set[str] = set()
+
+    # $refs
+
+    def _lookup(self, file: str, pointer: str):
+        node = self.documents.get(file)
+        for part in pointer.strip('/').split('/'):
+            if part:
+                if not isinstance(node, dict):
+                    return None
+                node = node.get(part.replace('~1', '/').replace('~0', '~'))
+        return node
+
+    def resolve(self, node, file: str) -> tuple[object, str, str | None]:
+        """
+        Returns:
+            (schema, file it lives in, 'file#pointer' of the last $ref
+            followed or None); the schema is None for a dangling $ref
+        """
+        key = None
+        for _ in range(64):
+            if not (isinstance(node, dict) and '$ref' in node):
+                return node, file, key
+            target, _, pointer = node['$ref'].partition('#')
+            file = os.path.basename(target) if target else file
+            key = f"{file}#{pointer}"
+            found = self._lookup(file, pointer)
+            if found is None and pointer.startswith('/components/requestBodies/'):
+                # The split specs dropped components/requestBodies; each one
+                # wrapped the component schema of the same name
+                name = pointer.rsplit('/', 1)[1]
+                if self._lookup(file, f"/components/schemas/{name}") is not None:
+                    found = {'required': True, 'content': {'application/json': {
+                        'schema': {'$ref': f"#/components/schemas/{name}"}}}}
+            if found is None:
+                self.unresolved.add(key)
+                return None, file, key
+            node = found
+        raise ValueError(f"$ref chain too deep at {key}")
+
+    # Code generation
+
+    def constant(self, value) -> str:
+        name = f"_C{len(self.constants)}"
+        self.constants.append(f"{name} = {value}")
+        return name
+
+    def function(self, schema, file: str, mode: str) -> str:
+        """Name of the function validating `schema` (generated later from the queue)."""
+        resolved, file, ref = self.resolve(schema, file)
+        if resolved is None:
+            return '_any'
+        key = (ref or id(resolved), mode)
+        name = self.names.get(key)
+        if name is None:
+            name = f"_v{len(self.names)}"
+            self.names[key] = name
+            self.queue.append((name, resolved, file, mode, ref))
+        return name
+
+    def generate(self) -> None:
+        while self.queue:
+            name, schema, file, mode, ref = self.queue.pop()
+            body: list[str] = []
+            self.checks(schema, file, mode, 'v', 'p', body, 1)
+            comment = f"  # {ref} ({mode})" if ref else ''
+            self.functions.append('\n'.join([f"def {name}(v, p, e):{comment}"] + (body or ['    pass'])))
+
+    def checks(self, schema, file: str, mode: str, var: str, path: str, out: list[str], depth: int) -> None:
+        """Append statements checking `var` (at path expression `path`) against `schema`."""
+        pad = '    ' * depth
+        if isinstance(schema, dict) and '$ref' in schema:
+            name = self.function(schema, file, mode)
+            if name != '_any':
+                out.append(f"{pad}{name}({var}, {path}, e)")
+            return
+        if not isinstance(schema, dict):
+            return
+
+        nullable = schema.get('nullable') or schema.get('x-nullable')
+        schema_type = schema.get('type')
+        if schema.get('format') == 'decimal' and schema_type in ('string', 'number', None):
+            type_test, expected = '(not _decimal({v}))', 'decimal'
+        elif schema_type in PYTHON_TYPES:
+            type_test, expected = PYTHON_TYPES[schema_type]
+        else:
+            type_test, expected = None, None
+
+        inner: list[str] = []
+        self.value_checks(schema, file, mode, var, path, inner, depth + 1)
+        for part in schema.get('allOf') or []:
+            self.checks(part, file, mode, var, path, inner, depth + 1)
+
+        out.append(f"{pad}if {var} is None:")
+        out.append(f"{pad}    pass" if nullable else f"{pad}    e.append({path} + ': must not be null')")
+        if type_test:
+            out.append(f"{pad}elif {type_test.format(v=var)}:")
+            out.append(f"{pad}    e.append({path} + ': expected {expected}, got ' + _kind({var}))")
+        if inner:
+            out.append(f"{pad}else:")
+            out.extend(inner)
+
+    def value_checks(self, schema: dict, file: str, mode: str, var: str, path: str, out: list[str], depth: int) -> None:
+        pad = '    ' * depth
+        schema_type = schema.get('type')
+
+        if 'enum' in schema:
+            values = [v for v in schema['enum'] if v is not None]
+            allowed = self.constant(repr(frozenset(values)))
+            out.append(f"{pad}if {var} not in {allowed}:")
+            out.append(f"{pad}    e.append({path} + ': ' + repr({var}) + ' is not one of ' + {repr(', '.join(map(str, values)))})")
+
+        if schema_type == 'string' and schema.get('format') != 'decimal':
+            if 'minLength' in schema:
+                out.append(f"{pad}if len({var}) < {int(schema['minLength'])}:")
+                out.append(f"{pad}    e.append({path} + ': shorter than {int(schema['minLength'])}')")
+            if 'maxLength' in schema:
+                out.append(f"{pad}if len({var}) > {int(schema['maxLength'])}:")
+                out.append(f"{pad}    e.append({path} + ': longer than {int(schema['maxLength'])}')")
+            if 'pattern' in schema:
+                pattern = self.constant(f"re.compile({schema['pattern']!r})")
+                out.append(f"{pad}if {pattern}.search({var}) is None:")
+                out.append(f"{pad}    e.append({path} + ': does not match ' + {schema['pattern']!r})")
+            format_pattern = FORMAT_PATTERNS.get(schema.get('format'))
+            if format_pattern:
+                out.append(f"{pad}if {format_pattern}.match({var}) is None:")
+                out.append(f"{pad}    e.append({path} + ': not a valid {schema['format']}')")
+
+        if schema_type in ('integer', 'number'):
+            for key, op, word in (('minimum', '<', 'below'), ('maximum', '>', 'above')):
+                if key in schema:
+                    out.append(f"{pad}if {var} {op} {schema[key]!r}:")
+                    out.append(f"{pad}    e.append({path} + ': {word} {schema[key]}')")
+
+        if schema_type == 'array' or 'items' in schema:
+            items = schema.get('items')
+            if schema.get('uniqueItems'):
+                out.append(f"{pad}if not _unique({var}):")
+                out.append(f"{pad}    e.append({path} + ': items are not unique')")
+            if items:
+                self.local += 1
+                index, item = f"i{self.local}", f"x{self.local}"
+                body: list[str] = []
+                self.checks(items, file, mode, item, f"{path} + '[' + str({index}) + ']'", body, depth + 1)
+                if body:
+                    out.append(f"{pad}for {index}, {item} in enumerate({var}):")
+                    out.extend(body)
+
+        if schema_type == 'object' or 'properties' in schema:
+            properties = schema.get('properties') or {}
+            read_only = {name for name, sub in properties.items()
+                         if (self.resolve(sub, file)[0] or {}).get('readOnly')} if mode != RESPONSE else set()
+            if mode != PARTIAL:
+                for name in schema.get('required') or []:
+                    if name not in read_only:
+                        out.append(f"{pad}if {name!r} not in {var}:")
+                        out.append(f"{pad}    e.append({path} + {'.' + name!r} + ': required')")
+            for name, sub in properties.items():
+                if name in read_only:
+                    continue
+                self.local += 1
+                value = f"x{self.local}"
+                body: list[str] = []
+                self.checks(sub, file, mode, value, f"{path} + {'.' + name!r}", body, depth + 1)
+                if body:
+                    out.append(f"{pad}{value} = {var}.get({name!r}, _MISSING)")
+                    out.append(f"{pad}if {value} is not _MISSING:")
+                    out.extend(body)
+
+    def source(self) -> str:
+        return '\n'.join([PRELUDE] + self.constants + [''] + ['\n\n' + f for f in self.functions]) + '\n'
+
+
+def spec_files(root: str) -> list[str]:
+    directory = os.path.join(root, SCHEMA_DIR)
+    try:
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                if name.startswith('openapi-') and name.endswith('.json')]
+    except OSError:
+        return []
+
+
+def signature(files: list[str]) -> list:
+    entries: list = [CACHE_VERSION, sys.implementation.cache_tag]
+    for path in files:
+        try:
+            stat = os.stat(path)
+            entries.append([os.path.basename(path), stat.st_mtime_ns, stat.st_size])
+        except OSError:
+            pass
+    return entries
+
+
+def _json_schema(content: dict) -> tuple[dict | None, object]:
+    """(schema, example) of a content map's application/json entry."""
+    media = (content or {}).get('application/json')
+    if not isinstance(media, dict):
+        return None, None
+    schema = media.get('schema')
+    example = media.get('example')
+    if example is None and isinstance(schema, dict):
+        example = schema.get('example')
+    return schema, example
+
+
+def _parameters(compiler: Compiler, node: list, file: str) -> list[tuple]:
+    params = []
+    for param in node or []:
+        param = compiler.resolve(param, file)[0] or {}
+        schema = compiler.resolve(param.get('schema') or {}, file)[0] or {}
+        params.append((param.get('name', ''), param.get('in', 'query'), bool(param.get('required')),
+                       schema.get('type', ''), tuple(schema.get('enum') or ())))
+    return params
+
+
+def compile_specs(files: list[str]) -> tuple[str, list[dict], list[str]]:
+    """
+    Returns:
+        (generated validator module source, operations, dangling $refs)
+    """
+    documents = {}
+    for path in files:
+        with open(path, 'r', encoding='utf-8') as f:
+            documents[os.path.basename(path)] = json.load(f)
+    compiler = Compiler(documents)
+
+    operations = []
+    for file, document in documents.items():
+        for path, item in (document.get('paths') or {}).items():
+            shared = _parameters(compiler, item.get('parameters'), file)
+            for method in HTTP_METHODS:
+                operation = item.get(method)
+                if not isinstance(operation, dict):
+                    continue
+                own = _parameters(compiler, operation.get('parameters'), file)
+                names = {(p[0], p[1]) for p in own}
+                request_body = compiler.resolve(operation.get('requestBody') or {}, file)[0] or {}
+                body_schema, example = _json_schema(request_body.get('content'))
+                mode = PARTIAL if method == 'patch' else REQUEST
+                responses = {}
+                response_examples = {}
+                for status, response in (operation.get('responses') or {}).items():
+                    response = compiler.resolve(response, file)[0] or {}
+                    schema, response_example = _json_schema(response.get('content'))
+                    if schema is not None:
+                        responses[str(status)] = compiler.function(schema, file, RESPONSE)
+                        if response_example is not None:
+                            response_examples[str(status)] = response_example
+                operations.append({
+                    'id': operation.get('operationId') or f"{method}:{path}",
+                    'method': method.upper(),
+                    'path': path,
+                    'spec': file,
+                    'summary': operation.get('summary', ''),
+                    'params': [p for p in shared if (p[0], p[1]) not in names] + own,
+                    'body': compiler.function(body_schema, file, mode) if body_schema is not None else None,
+                    'body_required': bool(request_body.get('required')),
+                    'media': sorted((request_body.get('content') or {}).keys()),
+                    'responses': responses,
+                    'example': example,
+                    'response_examples': response_examples,
+                })
+    compiler.generate()
+    return compiler.source(), operations, sorted(compiler.unresolved)
+
+
+class Validators:
+    """The compiled validators and the operation table."""
+
+    def __init__(self, operations: list[dict], namespace: dict, unresolved: list[str]):
+        self.operations = operations
+        self.unresolved = unresolved
+        self.by_id = {operation['id']: operation for operation in operations}
+        self.namespace = namespace
+
+    def find(self, key: str, path: str | None = None) -> dict | None:
+        """An operation by operationId, or by method and a concrete or template path."""
+        if path is None:
+            return self.by_id.get(key)
+        method = key.upper()
+        segments = path.split('?', 1)[0].strip('/').split('/')
+        best, best_literal = None, -1
+        for operation in self.operations:
+            if operation['method'] != method:
+                continue
+            template = operation['path'].strip('/').split('/')
+            if len(template) != len(segments):
+                continue
+            literal = 0
+            for expected, actual in zip(template, segments):
+                if expected.startswith('{'):
+                    continue
+                if expected != actual:
+                    break
+                literal += 1
+            else:
+                if literal > best_literal:
+                    best, best_literal = operation, literal
+        return best
+
+    def _validator(self, operation: dict, response: str | None):
+        name = operation['responses'].get(response) if response else operation['body']
+        return self.namespace[name] if name else None
+
+    def validate(self, operation: dict | str, payload, response: str | None = None) -> list[str]:
+        """Errors for a request body (or, with `response`, a response body for that status)."""
+        return self.validate_many(operation, [payload], response)[0]
+
+    def validate_many(self, operation: dict | str, payloads, response: str | None = None) -> list[list[str]]:
+        """Errors per payload, looking the validator up once for the whole batch."""
+        if isinstance(operation, str):
+            found = self.by_id.get(operation)
+            if found is None:
+                raise KeyError(f"Unknown operation {operation}")
+            operation = found
+        validator = self._validator(operation, response)
+        root = f"response[{response}]" if response else 'body'
+        if validator is None:
+            if response:
+                raise KeyError(f"{operation['id']} has no JSON response for {response}")
+            return [[] if payload is None else [f"{root}: {operation['id']} takes no JSON body"] for payload in payloads]
+        results = []
+        for payload in payloads:
+            errors: list[str] = []
+            validator(payload, root, errors)
+            results.append(errors)
+        return results
+
+    def validate_params(self, operation: dict | str, params: dict[str, str]) -> list[str]:
+        """Errors for query/path parameters given as strings."""
+        operation = self.by_id[operation] if isinstance(operation, str) else operation
+        errors = []
+        for name, location, required, param_type, allowed in operation['params']:
+            value = params.get(name)
+            if value is None:
+                if required:
+                    errors.append(f"{location}.{name}: required")
+                continue
+            try:
+                if param_type == 'integer':
+                    int(value)
+                elif param_type == 'number':
+                    float(value)
+                elif param_type == 'boolean' and str(value).lower() not in ('true', 'false', '1', '0'):
+                    raise ValueError
+            except ValueError:
+                errors.append(f"{location}.{name}: expected {param_type}, got {value!r}")
+                continue
+            if allowed and value not in allowed:
+                errors.append(f"{location}.{name}: {value!r} is not one of {', '.join(map(str, allowed))}")
+        return errors
+
+
+def build(files: list[str]) -> tuple[object, list[dict], list[str]]:
+    """(compiled code object, operations, dangling $refs)"""
+    source, operations, unresolved = compile_specs(files)
+    return compile(source, '<leaflink-validators>', 'exec'), operations, unresolved
+
+
+def load(project_dir: str, root: str | None = None) -> tuple[Validators, bool]:
+    """
+    The validators, from the cache when no spec changed.
+
+    Returns:
+        (validators, whether they were rebuilt)
+    """
+    files = spec_files(root or plugin_root())
+    current = signature(files)
+    cache_path = os.path.join(project_dir, CACHE_FILE)
+    code = operations = unresolved = None
+    rebuilt = False
+    try:
+        with open(cache_path, 'rb') as f:
+            cached_signature, code, operations, unresolved = marshal.loads(f.read())
+        if cached_signature != current:
+            code = None
+    except (OSError, EOFError, ValueError, TypeError):
+        code = None
+
+    if code is None:
+        code, operations, unresolved = build(files)
+        rebuilt = True
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(marshal.dumps((current, code, operations, unresolved)))
+            os.replace(tmp_path, cache_path)
+        except (OSError, ValueError):
+            pass
+
+    namespace: dict = {}
+    exec(code, namespace)
+    return Validators(operations, namespace, unresolved), rebuilt
+
+
+def _read_payloads(source: str, jsonl: bool) -> list:
+    text = sys.stdin.read() if source == '-' else open(source, 'r', encoding='utf-8').read()
+    if jsonl:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    return [json.loads(text)]
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python3 -m hooklib.leaflinkschema', description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('project_dir')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('build', help='recompile if a spec changed')
+    commands.add_parser('stats', help='operation and validator counts, load time')
+    ops = commands.add_parser('ops', help='list operations')
+    ops.add_argument('text', nargs='?', default='', help='filter by operationId or path')
+    check = commands.add_parser('validate', help='validate a payload (or JSON lines) for an operation')
+    check.add_argument('operation', nargs='+', help='operationId, or METHOD /path/')
+    check.add_argument('file', help='JSON file, or - for stdin')
+    check.add_argument('--response', help='validate as the response for this status instead of the request body')
+    check.add_argument('--jsonl', action='store_true', help='one payload per line')
+    commands.add_parser('examples', help='validate the examples embedded in the specs')
+    commands.add_parser('source', help='print the generated validator module')
+    args = parser.parse_args()
+
+    if args.command == 'source':
+        print(compile_specs(spec_files(plugin_root()))[0])
+        return
+
+    start = time.perf_counter()
+    validators, rebuilt = load(args.project_dir)
+    elapsed = time.perf_counter() - start
+
+    if args.command == 'build':
+        print(f"{'Rebuilt' if rebuilt else 'Up to date'}: {len(validators.operations)} operations "
+              f"({os.path.join(args.project_dir, CACHE_FILE)})")
+    elif args.command == 'stats':
+        functions = sum(1 for name in validators.namespace if name.startswith('_v'))
+        with_body = sum(1 for o in validators.operations if o['body'])
+        print(f"Operations: {len(validators.operations)} ({with_body} with JSON request bodies)")
+        print(f"Validators: {functions} generated functions")
+        if validators.unresolved:
+            print(f"Unresolved: {', '.join(validators.unresolved)} (not checked)")
+        print(f"Load:       {elapsed * 1000:.2f}ms ({'rebuilt' if rebuilt else 'cached'})")
+    elif args.command == 'ops':
+        for operation in validators.operations:
+            if args.text.lower() in operation['id'].lower() or args.text in operation['path']:
+                body = ' body' if operation['body'] else ''
+                print(f"{operation['method']:<6} {operation['path']:<48} {operation['id']}{body}  "
+                      f"({operation['spec']})")
+    elif args.command == 'validate':
+        key = args.operation
+        operation = validators.find(key[0], key[1] if len(key) > 1 else None)
+        if operation is None:
+            print(f"No operation {' '.join(key)}", file=sys.stderr)
+            sys.exit(2)
+        payloads = _read_payloads(args.file, args.jsonl)
+        results = validators.validate_many(operation, payloads, args.response)
+        failed = 0
+        for number, errors in enumerate(results, 1):
+            if errors:
+                failed += 1
+                label = f"#{number} " if len(results) > 1 else ''
+                for error in errors:
+                    print(f"{label}{error}")
+        print(f"{operation['id']}: {len(results) - failed}/{len(results)} valid")
+        sys.exit(1 if failed else 0)
+    else:
+        failed = 0
+        checked = 0
+        for operation in validators.operations:
+            examples = [(None, operation['example'])] if operation['example'] is not None and operation['body'] else []
+            examples += list(operation['response_examples'].items())
+            for status, example in examples:
+                checked += 1
+                errors = validators.validate(operation, example, status)
+                if errors:
+                    failed += 1
+                    where = f"response {status}" if status else 'request'
+                    print(f"{operation['id']} ({where} example):")
+                    for error in errors[:10]:
+                        print(f"  {error}")
+        print(f"{checked - failed}/{checked} examples valid")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Load hook scripts (hyphenated, not importable by name) as modules.
+
+Shared by the daemon and the dispatcher so both pick up edits to a hook
+script without a restart.
+"""
+
+import importlib.util
+import os
+
+
+class HookModuleCache:
+    """Hook modules keyed by script path, reloaded when the file changes on disk."""
+
+    def __init__(self, hooks_dir: str):
+        self.hooks_dir = os.path.realpath(hooks_dir)
+        self.modules: dict[str, tuple[float, object]] = {}
+
+    def resolve(self, script: str) -> str | None:
+        """Resolve a script name relative to the hooks dir, refusing anything outside it."""
+        path = os.path.realpath(os.path.join(self.hooks_dir, script))
+        if not path.startswith(self.hooks_dir + os.sep):
+            return None
+        if not path.endswith('.py') or not os.path.isfile(path):
+            return None
+        return path
+
+    def get(self, script: str):
+        """Return the loaded module for `script`, or None if there is no such hook."""
+        path = self.resolve(script)
+        if path is None:
+            return None
+
+        mtime = os.path.getmtime(path)
+        cached = self.modules.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        relative = os.path.relpath(path, self.hooks_dir)
+        name = '_budtags_hook_' + ''.join(c if c.isalnum() else '_' for c in relative)
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        self.modules[path] = (mtime, module)
+        return module
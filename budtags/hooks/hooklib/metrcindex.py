@@ -0,0 +1,345 @@
+"""
+Offline Metrc v2 endpoint index.
+
+skills/metrc-api/collections/*.postman_collection.json (one per category,
+~270 requests) and categories/*.md describe every endpoint, but finding
+one meant grepping or reading them all. This module compiles them into a
+flat table of Endpoint rows:
+
+- method and path template (`/packages/v2/{id}/source/harvests`)
+- query parameters, the required ones (licenseNumber, plus any the
+  category doc marks "(required)"), and whether the endpoint is paginated
+  (pageNumber/pageSize)
+- the license types the category allows (C, P, R, L), from the category
+  doc's "License Compatibility" line
+- the request body's shape and top-level fields from the collection example
+
+The table is serialized with marshal to .claude/cache/metrc-endpoints.bin,
+which loads in well under a millisecond, and rebuilt only when a
+collection or category doc changes (by mtime and size).
+
+    python3 -m hooklib.metrcindex <project_dir> query [/path/prefix] [--method GET] [--param lastModifiedStart]
+                                                      [--license C|AU-C-000001] [--paginated] [--category plants] [--json]
+    python3 -m hooklib.metrcindex <project_dir> match GET /packages/v2/1234
+    python3 -m hooklib.metrcindex <project_dir> build|stats
+"""
+
+import argparse
+import json
+import marshal
+import os
+import re
+import sys
+import time
+from typing import NamedTuple
+
+from hooklib.skillrouter import plugin_root
+
+CACHE_FILE = os.path.join('.claude', 'cache', 'metrc-endpoints.bin')
+CACHE_VERSION = 1
+
+SKILL_DIR = os.path.join('skills', 'metrc-api')
+
+LICENSE_TYPES = 'CPRL'
+LICENSE_NAMES = {'C': 'Cultivation', 'P': 'Processing', 'R': 'Retail', 'L': 'Testing Lab'}
+
+ALWAYS_REQUIRED = ('licenseNumber',)
+PAGINATION_PARAMS = ('pageNumber', 'pageSize')
+
+POSTMAN_VARIABLE = re.compile(r'\{\{(\w+)\}\}')
+REQUIRED_PARAM = re.compile(r'`(\w+)` \(required\)')
+LICENSE_LINE = re.compile(r'^\*\*License Compatibility\*\*:\s*(.+)$', re.MULTILINE)
+
+
+class Endpoint(NamedTuple):
+    method: str
+    path: str
+    name: str
+    category: str
+    params: tuple
+    required: tuple
+    paginated: bool
+    licenses: str
+    body: str
+    body_fields: tuple
+
+
+def license_types(text: str) -> str:
+    """'CPRL'-style letters allowed by a category doc's License Compatibility line."""
+    lowered = text.lower()
+    if 'all licen' in lowered or 'varies' in lowered or 'testing environment' in lowered:
+        return LICENSE_TYPES
+    letters = ''
+    for letter, word in (('C', 'cultivation'), ('P', 'processing'), ('R', 'retail'), ('L', 'testing lab')):
+        if word in lowered:
+            letters += letter
+    return letters or LICENSE_TYPES
+
+
+def license_letter(value: str) -> str:
+    """'C' from 'C', 'cultivation' or a license number like 'AU-C-000001'."""
+    value = value.strip()
+    parts = value.split('-')
+    if len(parts) >= 3:
+        return parts[1][:1].upper()
+    for letter, name in LICENSE_NAMES.items():
+        if value.lower() == name.lower() or value.upper() == letter:
+            return letter
+    return value[:1].upper()
+
+
+def _body(raw: str) -> tuple[str, tuple]:
+    """('array' | 'object' | 'raw' | '', top-level field names) of a Postman example body."""
+    raw = raw.strip()
+    if not raw:
+        return '', ()
+    try:
+        example = json.loads(raw)
+    except ValueError:
+        return 'raw', ()
+    if isinstance(example, list):
+        first = example[0] if example else None
+        return 'array', tuple(first) if isinstance(first, dict) else ()
+    if isinstance(example, dict):
+        return 'object', tuple(example)
+    return 'raw', ()
+
+
+def _category_doc(path: str) -> tuple[str, set[str]]:
+    """(license letters, names marked required) from a categories/*.md file."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+    except OSError:
+        return LICENSE_TYPES, set()
+    line = LICENSE_LINE.search(text)
+    return license_types(line.group(1)) if line else LICENSE_TYPES, set(REQUIRED_PARAM.findall(text))
+
+
+def _requests(items: list):
+    for item in items:
+        if 'item' in item:
+            yield from _requests(item['item'])
+        elif isinstance(item.get('request'), dict):
+            yield item
+
+
+def parse_collection(path: str, category: str, licenses: str, documented_required: set[str]) -> list[Endpoint]:
+    with open(path, 'r', encoding='utf-8') as f:
+        collection = json.load(f)
+    endpoints = []
+    for item in _requests(collection.get('item', [])):
+        request = item['request']
+        url = request.get('url') or {}
+        if isinstance(url, str):
+            url = {'raw': url}
+        host = ''.join(url.get('host') or [])
+        base = host.split('}}', 1)[1] if host.startswith('{{') else host
+        segments = [s for s in url.get('path') or [] if s]
+        path_template = POSTMAN_VARIABLE.sub(r'{\1}', '/'.join([base.rstrip('/')] + segments))
+        params = tuple(q['key'] for q in url.get('query') or [] if q.get('key'))
+        required = tuple(p for p in params if p in ALWAYS_REQUIRED or p in documented_required)
+        body = request.get('body') or {}
+        kind, fields = _body(body.get('raw') or '') if body.get('mode') == 'raw' else ('', ())
+        endpoints.append(Endpoint(
+            method=request.get('method', 'GET').upper(),
+            path=path_template,
+            name=item.get('name', ''),
+            category=category,
+            params=params,
+            required=required,
+            paginated=all(p in params for p in PAGINATION_PARAMS),
+            licenses=licenses,
+            body=kind,
+            body_fields=fields,
+        ))
+    return endpoints
+
+
+def _listdir(directory: str, suffix: str) -> list[str]:
+    try:
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name.endswith(suffix)]
+    except OSError:
+        return []
+
+
+def source_files(root: str) -> tuple[list[str], list[str]]:
+    """(collection files, category docs)"""
+    skill = os.path.join(root, SKILL_DIR)
+    return (_listdir(os.path.join(skill, 'collections'), '.postman_collection.json'),
+            _listdir(os.path.join(skill, 'categories'), '.md'))
+
+
+def _shared_rows(endpoints: list[Endpoint]) -> list[tuple]:
+    """Rows with equal strings and tuples folded into one object, which marshal then writes once."""
+    pool: dict = {}
+
+    def share(value):
+        if isinstance(value, tuple):
+            value = tuple(share(v) for v in value)
+        return pool.setdefault(value, value) if isinstance(value, (str, tuple)) else value
+
+    return [share(tuple(endpoint)) for endpoint in endpoints]
+
+
+def signature(files: list[str]) -> list:
+    entries: list = [CACHE_VERSION, list(sys.version_info[:2])]
+    for path in files:
+        try:
+            stat = os.stat(path)
+            entries.append([os.path.basename(path), stat.st_mtime_ns, stat.st_size])
+        except OSError:
+            pass
+    return entries
+
+
+def build(root: str) -> list[Endpoint]:
+    collections, docs = source_files(root)
+    docs_by_category = {os.path.basename(path)[:-3]: path for path in docs}
+    endpoints = []
+    for path in collections:
+        category = os.path.basename(path).split('.')[0].removeprefix('metrc-')
+        licenses, required = _category_doc(docs_by_category.get(category, ''))
+        endpoints.extend(parse_collection(path, category, licenses, required))
+    return endpoints
+
+
+def load(project_dir: str, root: str | None = None) -> tuple[list[Endpoint], bool]:
+    """
+    The endpoint table, from the cache when no source file changed.
+
+    Returns:
+        (endpoints, whether the table was rebuilt)
+    """
+    root = root or plugin_root()
+    collections, docs = source_files(root)
+    current = signature(collections + docs)
+    cache_path = os.path.join(project_dir, CACHE_FILE)
+    try:
+        with open(cache_path, 'rb') as f:
+            cached_signature, rows = marshal.loads(f.read())
+        if cached_signature == current:
+            return [Endpoint(*row) for row in rows], False
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    endpoints = build(root)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(marshal.dumps((current, _shared_rows(endpoints))))
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+    return endpoints, True
+
+
+def query(endpoints: list[Endpoint], prefix: str = '', method: str = '', param: str = '',
+          license: str = '', paginated: bool = False, category: str = '') -> list[Endpoint]:
+    """Endpoints matching every given filter (path prefix is case-insensitive, leading slash optional)."""
+    prefix = ('/' + prefix.lstrip('/')).lower() if prefix else ''
+    letter = license_letter(license) if license else ''
+    return [e for e in endpoints
+            if (not prefix or e.path.lower().startswith(prefix))
+            and (not method or e.method == method.upper())
+            and (not param or param in e.params)
+            and (not letter or letter in e.licenses)
+            and (not paginated or e.paginated)
+            and (not category or e.category == category)]
+
+
+def match(endpoints: list[Endpoint], method: str, path: str) -> list[Endpoint]:
+    """
+    Endpoints whose template matches a concrete request path.
+
+    Returns:
+        The matches with the most literal segments, so /packages/v2/active
+        hits GetActive rather than GetPackageById; several only where the
+        collections themselves are ambiguous (/packages/v2/{id} and {label})
+    """
+    segments = path.split('?', 1)[0].strip('/').split('/')
+    matches = []
+    for endpoint in endpoints:
+        if endpoint.method != method.upper():
+            continue
+        template = endpoint.path.strip('/').split('/')
+        if len(template) != len(segments):
+            continue
+        literal = 0
+        for expected, actual in zip(template, segments):
+            if expected.startswith('{') and expected.endswith('}'):
+                if not actual:
+                    break
+            elif expected.lower() != actual.lower():
+                break
+            else:
+                literal += 1
+        else:
+            matches.append((literal, endpoint))
+    best = max((literal for literal, _ in matches), default=0)
+    return [endpoint for literal, endpoint in matches if literal == best]
+
+
+def describe(endpoint: Endpoint) -> str:
+    params = ' '.join(p + ('*' if p in endpoint.required else '') for p in endpoint.params)
+    flags = ' [paged]' if endpoint.paginated else ''
+    body = f" body={endpoint.body}" if endpoint.body else ''
+    return (f"{endpoint.method:<6} {endpoint.path:<48} {params}{flags}{body}  "
+            f"[{endpoint.licenses}] ({endpoint.category}: {endpoint.name})")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python3 -m hooklib.metrcindex', description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('project_dir')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('build', help='rebuild the table if a collection or category doc changed')
+    commands.add_parser('stats', help='endpoint counts and load time')
+    find = commands.add_parser('query', help='endpoints matching all filters')
+    find.add_argument('prefix', nargs='?', default='', help='path prefix, e.g. /packages/v2')
+    find.add_argument('--method', default='')
+    find.add_argument('--param', default='', help='takes this query parameter')
+    find.add_argument('--license', default='', help='license type letter (C/P/R/L) or a license number')
+    find.add_argument('--paginated', action='store_true')
+    find.add_argument('--category', default='')
+    find.add_argument('--json', action='store_true', help='machine-readable output')
+    resolve = commands.add_parser('match', help='the endpoint a concrete request path hits')
+    resolve.add_argument('method')
+    resolve.add_argument('path')
+    resolve.add_argument('--json', action='store_true', help='machine-readable output')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    endpoints, rebuilt = load(args.project_dir)
+    elapsed = time.perf_counter() - start
+
+    if args.command == 'build':
+        print(f"{'Rebuilt' if rebuilt else 'Up to date'}: {len(endpoints)} endpoints "
+              f"({os.path.join(args.project_dir, CACHE_FILE)})")
+        return
+    if args.command == 'stats':
+        methods: dict[str, int] = {}
+        for endpoint in endpoints:
+            methods[endpoint.method] = methods.get(endpoint.method, 0) + 1
+        print(f"Endpoints:  {len(endpoints)} in {len({e.category for e in endpoints})} categories "
+              f"({', '.join(f'{m} {n}' for m, n in sorted(methods.items()))})")
+        print(f"Paginated:  {sum(e.paginated for e in endpoints)}")
+        print(f"Load:       {elapsed * 1000:.2f}ms ({'rebuilt' if rebuilt else 'cached'})")
+        return
+
+    if args.command == 'query':
+        results = query(endpoints, args.prefix, args.method, args.param, args.license, args.paginated, args.category)
+    else:
+        results = match(endpoints, args.method, args.path)
+    if args.json:
+        print(json.dumps([e._asdict() for e in results], indent=1))
+        return
+    for endpoint in results:
+        print(describe(endpoint))
+    if not results:
+        print("No matching endpoints")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
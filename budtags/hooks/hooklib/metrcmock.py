@@ -0,0 +1,414 @@
+"""
+Local Metrc v2 stand-in for exercising package sync strategies offline.
+
+Routes every request through the endpoint index (hooklib/metrcindex.py),
+so the server knows exactly the endpoints the Postman collections define:
+unknown paths are 404, known paths with another method 405, and each
+endpoint's required query parameters and license types are enforced the
+way Metrc does (400 / 401).
+
+Synthetic facilities carry tens of thousands of packages (defaults follow
+the facilities measured in TEST_FINDINGS.md, up to 30,262 packages over
+551 days). Package endpoints reproduce the behaviour the sync code
+depends on:
+
+- results are ordered by Id descending (creation order), not LastModified
+- /packages/v2/active without lastModifiedStart/End returns only packages
+  active right now; with them, every package modified in the window,
+  including finished ones
+- paginated responses use Metrc's envelope (Data, Total, TotalRecords,
+  PageSize, RecordsOnPage, CurrentPage, TotalPages) with pageSize capped
+  at MAX_PAGE_SIZE; without pageNumber/pageSize the whole result comes
+  back in one response, but then the date window may span at most
+  MAX_UNPAGED_WINDOW
+- lastModifiedStart and lastModifiedEnd must be given together, in order
+- write bodies are arrays of at most MAX_OBJECTS objects (413 above that)
+- a token bucket per API key and license enforces the rate limit, with
+  429 and Retry-After once it is exhausted
+
+Other list endpoints return empty results, and writes are accepted
+without being applied.
+
+    python3 -m hooklib.metrcmock <project_dir> [--port 8765] [--facility AU-P-000001:30262:551 ...]
+                                               [--rate 5] [--burst 5] [--latency-ms 0] [--seed 1]
+"""
+
+import argparse
+import bisect
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from hooklib import metrcindex
+
+MAX_PAGE_SIZE = 20
+MAX_UNPAGED_WINDOW = timedelta(hours=24)
+MAX_OBJECTS = 10
+
+DEFAULT_PORT = 8765
+# Requests per second per API key and license (RATE_LIMIT_DELAY in MetrcApi is 200ms)
+DEFAULT_RATE = 5.0
+DEFAULT_BURST = 5
+
+# (license, packages, days of history): the facilities in TEST_FINDINGS.md
+DEFAULT_FACILITIES = [
+    ('AU-C-000101', 90, 150),
+    ('AU-R-000102', 776, 330),
+    ('AU-P-000103', 1263, 461),
+    ('AU-P-000104', 30262, 551),
+]
+
+# Share of packages still active (~30 of 30k in TEST_FINDINGS.md); the rest are finished
+ACTIVE_RATIO = 0.001
+# Share of packages modified again long after creation, so the oldest
+# LastModified is near the last page rather than on it
+REMODIFIED_RATIO = 0.3
+
+ITEMS = [('Buds', 'Flower'), ('Shake/Trim', 'Shake/Trim'), ('Pre-Roll 1g', 'Pre-Roll Flower'),
+         ('Vape Cart 0.5g', 'Vape Cartridge'), ('Gummies 100mg', 'Edible')]
+
+RESULT_CACHE_SIZE = 256
+
+
+def parse_time(value: str) -> datetime:
+    """An ISO 8601 date or datetime as an aware UTC datetime (naive values are taken as UTC)."""
+    parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00').replace(' ', '+'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def format_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S+00:00')
+
+
+class Facility:
+    """A license's synthetic packages, stored as parallel lists in Id order."""
+
+    def __init__(self, license: str, packages: int, days: int, seed: int = 1, now: float | None = None):
+        self.license = license
+        # Whole seconds throughout, as in Metrc's LastModified
+        self.now = int(now if now is not None else time.time())
+        rng = random.Random(f"{seed}:{license}")
+        first = self.now - days * 86400
+        span = days * 86400
+        self.ids: list[int] = []
+        self.created: list[float] = []
+        self.modified: list[float] = []
+        self.active: list[bool] = []
+        self.items: list[int] = []
+        base_id = 100000 + int(license.rsplit('-', 1)[-1]) * 1000000
+        for i in range(packages):
+            created = first + span * (i + rng.random()) / max(packages, 1)
+            if rng.random() < REMODIFIED_RATIO:
+                modified = rng.uniform(created, self.now)
+            else:
+                modified = min(self.now, created + rng.uniform(0, 6 * 3600))
+            self.ids.append(base_id + i)
+            self.created.append(float(int(created)))
+            self.modified.append(float(int(modified)))
+            self.active.append(rng.random() < ACTIVE_RATIO)
+            self.items.append(rng.randrange(len(ITEMS)))
+        # Positions sorted by LastModified, for window queries by bisection
+        self.by_modified = sorted(range(packages), key=self.modified.__getitem__)
+        self.modified_keys = [self.modified[i] for i in self.by_modified]
+        self.by_id = {package_id: i for i, package_id in enumerate(self.ids)}
+        self.by_label = {self.label(i): i for i in range(packages)}
+        self._results: dict[tuple, list[int]] = {}
+        self._lock = threading.Lock()
+
+    def label(self, i: int) -> str:
+        return f"1A40{self.license[-6:]}{self.ids[i]:014d}"
+
+    def package(self, i: int) -> dict:
+        item, category = ITEMS[self.items[i]]
+        finished = None if self.active[i] else format_time(self.modified[i])[:10]
+        return {
+            'Id': self.ids[i],
+            'Label': self.label(i),
+            'PackageType': 'Product',
+            'LocationName': 'Vault',
+            'Quantity': 0.0 if finished else 28.0,
+            'UnitOfMeasureName': 'Grams',
+            'UnitOfMeasureAbbreviation': 'g',
+            'Item': {'Name': item, 'ProductCategoryName': category},
+            'PackagedDate': format_time(self.created[i])[:10],
+            'IsOnHold': False,
+            'FinishedDate': finished,
+            'LastModified': format_time(self.modified[i]),
+        }
+
+    def select(self, kind: str, start: float | None, end: float | None) -> list[int]:
+        """Package positions for an active/inactive query, Id descending."""
+        key = (kind, start, end)
+        with self._lock:
+            cached = self._results.get(key)
+        if cached is not None:
+            return cached
+        if start is None:
+            # No window: only the current state
+            positions = [i for i in range(len(self.ids)) if self.active[i] == (kind == 'active')]
+        else:
+            low = bisect.bisect_left(self.modified_keys, start)
+            high = bisect.bisect_right(self.modified_keys, end)
+            window = self.by_modified[low:high]
+            # With a window, /active returns everything modified in it (TEST_FINDINGS.md)
+            positions = window if kind == 'active' else [i for i in window if not self.active[i]]
+        positions = sorted(positions, reverse=True)
+        with self._lock:
+            if len(self._results) >= RESULT_CACHE_SIZE:
+                self._results.pop(next(iter(self._results)))
+            self._results[key] = positions
+        return positions
+
+    def expected(self, start: float, end: float) -> set[str]:
+        """Labels of every package modified in [start, end], what a complete sync must end up with."""
+        low = bisect.bisect_left(self.modified_keys, start)
+        high = bisect.bisect_right(self.modified_keys, end)
+        return {self.label(i) for i in self.by_modified[low:high]}
+
+
+class RateLimiter:
+    """Token bucket per key."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.buckets: dict[str, tuple[float, float]] = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, key: str) -> float:
+        """0 if the request may proceed, else the seconds until it could."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.get(key, (float(self.burst), now))
+            tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                self.buckets[key] = (tokens - 1, now)
+                return 0.0
+            self.buckets[key] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str, headers: dict | None = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class MockMetrc:
+    """Request handling, independent of the HTTP server around it."""
+
+    def __init__(self, endpoints: list[metrcindex.Endpoint], facilities: list[Facility],
+                 rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST, latency: float = 0.0):
+        self.endpoints = endpoints
+        self.facilities = {facility.license: facility for facility in facilities}
+        self.limiter = RateLimiter(rate, burst)
+        self.latency = latency
+        self.counts: dict[str, int] = {}
+        self.counts_lock = threading.Lock()
+
+    def count(self, key: str) -> None:
+        with self.counts_lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def handle(self, method: str, target: str, api_key: str, body: bytes) -> tuple[int, object, dict]:
+        """(status, JSON-able response, extra headers)"""
+        self.count('requests')
+        try:
+            return 200, self._dispatch(method, target, api_key, body), {}
+        except ApiError as e:
+            self.count(str(e.status))
+            return e.status, {'Message': str(e)}, e.headers
+
+    def _dispatch(self, method: str, target: str, api_key: str, body: bytes):
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query, keep_blank_values=True).items()}
+
+        matches = metrcindex.match(self.endpoints, method, url.path)
+        if not matches:
+            if any(metrcindex.match(self.endpoints, other, url.path) for other in ('GET', 'POST', 'PUT', 'DELETE') if other != method):
+                raise ApiError(405, f"The requested resource does not support http method '{method}'.")
+            raise ApiError(404, f"No HTTP resource was found that matches the request URI '{url.path}'.")
+        endpoint = matches[0]
+
+        if not api_key:
+            raise ApiError(401, 'Authorization has been denied for this request.')
+        missing = [param for param in endpoint.required if not query.get(param)]
+        if missing:
+            raise ApiError(400, f"{', '.join(missing)} is required.")
+
+        license = query.get('licenseNumber', '')
+        facility = self.facilities.get(license) if license else None
+        if license:
+            if facility is None or metrcindex.license_letter(license) not in endpoint.licenses:
+                raise ApiError(401, f"Facility {license} is not authorized for this request.")
+
+        wait = self.limiter.acquire(f"{api_key}|{license}")
+        if wait:
+            raise ApiError(429, 'Too many requests.', {'Retry-After': f"{max(1, round(wait))}",
+                                                       'X-Retry-After-Ms': f"{wait * 1000:.0f}"})
+        if self.latency:
+            time.sleep(self.latency)
+
+        if method == 'GET':
+            return self._get(endpoint, url.path, query, facility)
+        return self._write(endpoint, body)
+
+    def _window(self, query: dict, paged: bool) -> tuple[float | None, float | None]:
+        start, end = query.get('lastModifiedStart'), query.get('lastModifiedEnd')
+        if not start and not end:
+            return None, None
+        if not start or not end:
+            raise ApiError(400, 'lastModifiedStart and lastModifiedEnd must be provided together.')
+        try:
+            start_time, end_time = parse_time(start), parse_time(end)
+        except ValueError:
+            raise ApiError(400, 'lastModifiedStart and lastModifiedEnd must be ISO 8601 dates.')
+        if end_time < start_time:
+            raise ApiError(400, 'lastModifiedEnd must be after lastModifiedStart.')
+        if not paged and end_time - start_time > MAX_UNPAGED_WINDOW:
+            raise ApiError(400, 'The time span between lastModifiedStart and lastModifiedEnd cannot exceed 24 hours '
+                                'unless the request is paginated.')
+        return start_time.timestamp(), end_time.timestamp()
+
+    def _page(self, query: dict) -> tuple[int, int] | None:
+        if 'pageNumber' not in query and 'pageSize' not in query:
+            return None
+        try:
+            number = int(query.get('pageNumber', '1'))
+            size = int(query.get('pageSize', str(MAX_PAGE_SIZE)))
+        except ValueError:
+            raise ApiError(400, 'pageNumber and pageSize must be integers.')
+        if number < 1:
+            raise ApiError(400, 'pageNumber must be 1 or greater.')
+        if not 1 <= size <= MAX_PAGE_SIZE:
+            raise ApiError(400, f"pageSize must be between 1 and {MAX_PAGE_SIZE}.")
+        return number, size
+
+    def _get(self, endpoint: metrcindex.Endpoint, path: str, query: dict, facility: Facility | None):
+        page = self._page(query) if endpoint.paginated else None
+        start, end = self._window(query, page is not None) if 'lastModifiedStart' in endpoint.params else (None, None)
+
+        if endpoint.category == 'facilities':
+            return [{'Id': i + 1, 'Name': f"Facility {f.license}", 'License': {'Number': f.license}}
+                    for i, f in enumerate(self.facilities.values())]
+
+        if endpoint.category == 'packages' and facility is not None:
+            tail = path.rstrip('/').rsplit('/', 1)[-1]
+            if tail in ('active', 'inactive'):
+                positions = facility.select(tail, start, end)
+                return self._envelope([facility.package(i) for i in self._slice(positions, page)], len(positions), page)
+            if endpoint.path.endswith(('{id}', '{label}')) and endpoint.path.count('/') == 3:
+                position = facility.by_id.get(int(tail)) if tail.isdigit() else facility.by_label.get(tail)
+                if position is None:
+                    raise ApiError(404, f"Package {tail} was not found.")
+                return facility.package(position)
+
+        return self._envelope([], 0, page) if endpoint.paginated else []
+
+    @staticmethod
+    def _slice(positions: list[int], page: tuple[int, int] | None) -> list[int]:
+        if page is None:
+            return positions
+        number, size = page
+        return positions[(number - 1) * size:number * size]
+
+    @staticmethod
+    def _envelope(data: list, total: int, page: tuple[int, int] | None) -> dict:
+        number, size = page if page else (1, max(total, 1))
+        return {'Data': data, 'Total': total, 'TotalRecords': total, 'PageSize': size,
+                'RecordsOnPage': len(data), 'CurrentPage': number, 'TotalPages': -(-total // size)}
+
+    def _write(self, endpoint: metrcindex.Endpoint, body: bytes):
+        if endpoint.body:
+            try:
+                payload = json.loads(body or b'null')
+            except ValueError:
+                raise ApiError(400, 'The request body is not valid JSON.')
+            if endpoint.body == 'array':
+                if not isinstance(payload, list) or not payload:
+                    raise ApiError(400, 'The request body must be a non-empty array.')
+                if len(payload) > MAX_OBJECTS:
+                    raise ApiError(413, f"A maximum of {MAX_OBJECTS} objects may be submitted per request.")
+        return None
+
+
+def make_server(app: MockMetrc, host: str = '127.0.0.1', port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """An HTTP server for `app`; port 0 picks a free one (server.server_address)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out in separate writes; without this each
+        # keep-alive response waits on the client's delayed ACK (~40ms)
+        disable_nagle_algorithm = True
+
+        def _respond(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length) if length else b''
+            status, payload, headers = app.handle(self.command, self.path, self.headers.get('Authorization', ''), body)
+            data = b'' if payload is None else json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def parse_facility(value: str) -> tuple[str, int, int]:
+    """'AU-P-000001:30262:551' -> (license, packages, days)"""
+    license, packages, days = value.split(':')
+    return license, int(packages), int(days)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python3 -m hooklib.metrcmock', description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('project_dir', help='where the endpoint index is cached')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--facility', action='append', type=parse_facility, metavar='LICENSE:PACKAGES:DAYS',
+                        help='synthetic facility (repeatable; default: the TEST_FINDINGS.md facilities)')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help='requests/second per key and license (0: unlimited)')
+    parser.add_argument('--burst', type=int, default=DEFAULT_BURST)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='added to every accepted request')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    endpoints, _ = metrcindex.load(args.project_dir)
+    now = time.time()
+    facilities = [Facility(license, packages, days, args.seed, now)
+                  for license, packages, days in args.facility or DEFAULT_FACILITIES]
+    app = MockMetrc(endpoints, facilities, args.rate, args.burst, args.latency_ms / 1000)
+    server = make_server(app, args.host, args.port)
+    print(f"Mock Metrc on http://{args.host}:{server.server_address[1]} ({len(endpoints)} endpoints, "
+          f"rate {args.rate:g}/s burst {args.burst})")
+    for facility in facilities:
+        print(f"  {facility.license}: {len(facility.ids)} packages, {sum(facility.active)} active")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
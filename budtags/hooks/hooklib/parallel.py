@@ -0,0 +1,90 @@
+"""
+Concurrent validation tasks for post-edit-tests.
+
+An edit can select several test files (Unit and Feature tests of the
+edited class, plus everything the dependency index ranks). Instead of one
+serial `php artisan test` over all of them, the files are split into
+shards that run at the same time, bounded by the CPU count, and the
+results are folded into one pass/block decision with per-task timing.
+
+Test shards run with LARAVEL_PARALLEL_TESTING=1 and a TEST_TOKEN, the same
+isolation `php artisan test --parallel` uses (separate test databases per
+token), so shards don't trample each other's data. Tokens come from the
+caller, which must not hand one out that another test process on the
+project (another edit's shards, another session's) is using.
+
+Set BUDTAGS_PARALLEL_JOBS=N to cap the number of concurrent tasks (1 runs
+everything as a single serial task).
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+JOBS_ENV = 'BUDTAGS_PARALLEL_JOBS'
+
+
+def max_jobs() -> int:
+    """Concurrent task limit: BUDTAGS_PARALLEL_JOBS, else the CPU count."""
+    try:
+        jobs = int(os.environ.get(JOBS_ENV, 0))
+    except ValueError:
+        jobs = 0
+    return jobs if jobs > 0 else (os.cpu_count() or 1)
+
+
+def shard(items: list, count: int) -> list[list]:
+    """Split `items` round-robin into at most `count` non-empty shards, keeping rank order within each."""
+    count = max(1, min(count, len(items)))
+    return [items[i::count] for i in range(count)]
+
+
+def test_env(token: int | None) -> dict[str, str] | None:
+    """Extra environment for a test run holding `token` (1-based), or None to use the default test database."""
+    if token is None:
+        return None
+    return {'LARAVEL_PARALLEL_TESTING': '1', 'TEST_TOKEN': str(token)}
+
+
+def run_tasks(tasks: list[tuple[str, object]], jobs: int | None = None) -> dict:
+    """
+    Run (name, func) tasks concurrently. Each func returns (return_code, output, timing).
+
+    Exceptions (e.g. coalesce.Cancelled) propagate once every task has stopped.
+
+    Returns:
+        {"returncode": 0 if every task passed else 1, "wall": seconds,
+         "tasks": [{"name", "returncode", "output", "timing"}, ...]} in task order
+    """
+    start = time.monotonic()
+    workers = max(1, min(jobs or max_jobs(), len(tasks)))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(func) for _name, func in tasks]
+        results = []
+        for (name, _func), future in zip(tasks, futures):
+            return_code, output, timing = future.result()
+            results.append({'name': name, 'returncode': return_code, 'output': output, 'timing': timing})
+
+    return {
+        'returncode': 1 if any(task['returncode'] != 0 for task in results) else 0,
+        'wall': time.monotonic() - start,
+        'tasks': results,
+    }
+
+
+def describe_timing(result: dict) -> str:
+    """"warm pool, 0.84s" for one task, else the wall-clock total plus per-task timings."""
+    tasks = result['tasks']
+    if len(tasks) == 1:
+        return tasks[0]['timing']
+    per_task = '; '.join(f"{task['name']}: {task['timing']}" for task in tasks)
+    return f"{len(tasks)} parallel runs, {result['wall']:.2f}s wall - {per_task}"
+
+
+def failure_output(result: dict) -> str:
+    """Output of the failed tasks, each under its own header when there are several tasks."""
+    failed = [task for task in result['tasks'] if task['returncode'] != 0]
+    if len(result['tasks']) == 1:
+        return '\n'.join(task['output'] for task in failed)
+    return '\n\n'.join(f"--- {task['name']} ---\n{task['output']}" for task in failed)
@@ -0,0 +1,389 @@
+"""
+Pre-classified path index for the Read and Edit/Write checks.
+
+auto-approve-reads.py and file-protection.py classify a path by running it
+through their pattern tables. The answer depends only on the path string
+and the table, and a project's paths barely change within a session, so
+the SessionStart hook (path-index.py) classifies every path from
+`git ls-files --cached --others --exclude-standard` once and writes the
+results to .claude/cache/path-index-<hooks dir>.bin: an open-addressing
+hash table the checks mmap and probe with one crc32.
+
+    header | slots: crc32, key offset, key length, one code per check | keys
+
+Keys are absolute paths under $CLAUDE_PROJECT_DIR, the form the tools
+pass. Each check that opts in owns one value column and defines:
+
+    PATH_INDEX_COLUMN   column name
+    PATH_INDEX_RULES    rules_signature(__file__): its script's path, mtime and size
+    classify_path(path) -> int code (0 = no pattern matched)
+    warm()              compile its tables and map the index (the daemon
+                        calls it before forking; elsewhere tables compile
+                        on the first miss)
+
+A column whose signature no longer matches the check's script is ignored
+until the next refresh. A refresh is skipped while .git/index and every
+signature are unchanged. Otherwise it re-lists the project, reuses the
+codes of paths it already had and classifies only new ones.
+
+A miss (a new file, a path outside the project, a relative path) returns
+None and the check falls back to its pattern table, so the index changes
+how fast a check answers, never what it answers. Set BUDTAGS_PATH_INDEX=0
+to skip the SessionStart build; with no index file every path is a miss.
+
+    python3 -m hooklib.pathindex <project_dir> build|stats
+    python3 -m hooklib.pathindex <project_dir> lookup <path>
+"""
+
+import functools
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+
+from hooklib import HOOKS_DIR, trace
+
+CACHE_DIR = os.path.join('.claude', 'cache')
+INDEX_ENV_FLAG = 'BUDTAGS_PATH_INDEX'
+INDEX_VERSION = 1
+MAGIC = b'BTPI'
+
+# Hook scripts (relative to the hooks dir) whose classifications are indexed
+INDEXED_CHECKS = ['auto-approve-reads.py', 'file-protection.py']
+
+# magic, version, slot count, entry count, column count, git index mtime_ns, header json length
+HEADER = struct.Struct('<4sIIIIqI')
+# A slot is crc32, key offset, key length, then one u16 code per column
+PROBE = struct.Struct('<IIH')
+CODE = struct.Struct('<H')
+EMPTY = 0xFFFFFFFF
+
+# How long open_index() trusts its mapping before checking for a rewrite
+RECHECK_SECONDS = 1.0
+
+# (project dir, hooks dir) -> (checked at, (inode, mtime_ns, size), index)
+_opened: dict[tuple[str, str], tuple] = {}
+
+
+@functools.lru_cache(maxsize=8)
+def index_path(project_dir: str, hooks_dir: str) -> str:
+    """The index file for one hooks directory (project and plugin copies may differ)."""
+    digest = zlib.crc32(os.path.realpath(hooks_dir).encode()) & 0xFFFFFFFF
+    return os.path.join(project_dir, CACHE_DIR, f"path-index-{digest:08x}.bin")
+
+
+def rules_signature(script: str) -> str:
+    """A check's rules version: its script's path, mtime and size."""
+    path = os.path.realpath(script)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return path
+    return f"{path}:{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def _encode(path: str) -> bytes:
+    return path.encode('utf-8', 'surrogateescape')
+
+
+class PathIndex:
+    """A read-only, memory-mapped index file."""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.slots, self.entries, columns, self.git_mtime, header_len = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"{path}: not a version {INDEX_VERSION} path index")
+        header = json.loads(self.data[HEADER.size:HEADER.size + header_len])
+        self.project = header['project']
+        self.prefix = self.project + '/'
+        self.columns = {name: (position, signature) for position, (name, signature) in enumerate(header['columns'])}
+        self.slot = struct.Struct(f"<IIH{columns}H")
+        self.slot_base = HEADER.size + header_len
+        self.mask = self.slots - 1
+        self.key_base = self.slot_base + self.slots * self.slot.size
+
+    def column(self, name: str, signature: str) -> int | None:
+        """The position of a column still valid for `signature`, or None."""
+        found = self.columns.get(name)
+        if found is None or found[1] != signature:
+            return None
+        return found[0]
+
+    def codes(self, path: str) -> tuple[int, ...] | None:
+        """Every column's code for `path`, or None if it isn't indexed."""
+        key = _encode(path)
+        digest = zlib.crc32(key)
+        mask = self.slots - 1
+        position = digest & mask
+        data, slot, key_base = self.data, self.slot, self.key_base
+        for _ in range(self.slots):
+            row = slot.unpack_from(data, self.slot_base + position * slot.size)
+            if row[1] == EMPTY:
+                return None
+            if row[0] == digest and row[2] == len(key) and data[key_base + row[1]:key_base + row[1] + row[2]] == key:
+                return row[3:]
+            position = (position + 1) & mask
+        return None
+
+    def code(self, path: str, position: int) -> int | None:
+        """One column's code for `path` (codes() without building the row tuple), or None."""
+        key = path.encode('utf-8', 'surrogateescape')
+        digest = zlib.crc32(key)
+        data, mask, size, slot_base = self.data, self.mask, self.slot.size, self.slot_base
+        slot = digest & mask
+        while True:
+            offset = slot_base + slot * size
+            crc, start, length = PROBE.unpack_from(data, offset)
+            if start == EMPTY:
+                return None
+            if crc == digest and length == len(key):
+                start += self.key_base
+                if data[start:start + length] == key:
+                    return CODE.unpack_from(data, offset + PROBE.size + CODE.size * position)[0]
+            # write_index keeps the table at most half full, so an empty slot always ends the probe
+            slot = (slot + 1) & mask
+
+    def items(self):
+        """(path, codes) for every entry."""
+        for position in range(self.slots):
+            row = self.slot.unpack_from(self.data, self.slot_base + position * self.slot.size)
+            if row[1] != EMPTY:
+                yield self.data[self.key_base + row[1]:self.key_base + row[1] + row[2]].decode('utf-8', 'surrogateescape'), row[3:]
+
+
+def open_index(project_dir: str, hooks_dir: str) -> PathIndex | None:
+    """
+    The index for a hooks directory, mapped once per process.
+
+    The file is re-stat'ed at most every RECHECK_SECONDS and remapped when
+    it was rewritten. Serving an older mapping in between is safe: codes are
+    a pure function of the path and the rules, so it can only cover fewer
+    paths, never answer differently.
+    """
+    key = (project_dir, hooks_dir)
+    now = time.monotonic()
+    cached = _opened.get(key)
+    if cached is not None and now - cached[0] < RECHECK_SECONDS:
+        return cached[2]
+    path = index_path(project_dir, hooks_dir)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        _opened[key] = (now, None, None)
+        return None
+    identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    if cached is not None and cached[1] == identity:
+        _opened[key] = (now, identity, cached[2])
+        return cached[2]
+    try:
+        index = PathIndex(path)
+    except (OSError, ValueError, KeyError, struct.error):
+        index = None
+    _opened[key] = (now, identity, index)
+    return index
+
+
+def lookup(project_dir: str, hooks_dir: str, column: str, signature: str, path: str) -> int | None:
+    """
+    A check's code for `path` from the index.
+
+    Returns:
+        the code, or None when the path (or a current column) isn't indexed
+        and the check should classify it itself
+    """
+    index = open_index(project_dir, hooks_dir)
+    if index is None or not path.startswith(index.prefix):
+        return None
+    position = index.column(column, signature)
+    code = index.code(path, position) if position is not None else None
+    trace.cache('pathindex', code is not None)
+    return code
+
+
+def load_checks(hooks_dir: str) -> list:
+    """The loaded INDEXED_CHECKS modules that define an index column."""
+    from hooklib.loader import HookModuleCache
+
+    modules = HookModuleCache(hooks_dir)
+    checks = []
+    for script in INDEXED_CHECKS:
+        module = modules.get(script)
+        if module is not None and hasattr(module, 'PATH_INDEX_COLUMN'):
+            checks.append(module)
+    return checks
+
+
+def git_index_mtime(project_dir: str) -> int:
+    """mtime_ns of the git index, which moves whenever the set of tracked paths can change."""
+    git_dir = os.path.join(project_dir, '.git')
+    if os.path.isfile(git_dir):
+        # A worktree or submodule: .git is a "gitdir: <path>" pointer
+        try:
+            with open(git_dir, 'r') as f:
+                pointer = f.read().strip()
+            git_dir = os.path.join(project_dir, pointer.split(':', 1)[1].strip())
+        except (OSError, IndexError):
+            return 0
+    try:
+        return os.stat(os.path.join(git_dir, 'index')).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def project_paths(project_dir: str) -> list[str] | None:
+    """Absolute paths of tracked and untracked, non-ignored files (None outside a git repo)."""
+    # Only the SessionStart build lists paths; the checks just import lookup()
+    import subprocess
+
+    try:
+        with trace.subprocess_timer():
+            result = subprocess.run(['git', '-C', project_dir, 'ls-files', '-z', '--cached', '--others', '--exclude-standard'],
+                                    capture_output=True, timeout=60)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    prefix = project_dir + '/'
+    names = result.stdout.decode('utf-8', 'surrogateescape').split('\0')
+    return [prefix + name for name in dict.fromkeys(names) if name]
+
+
+def write_index(path: str, project_dir: str, git_mtime: int, columns: list[tuple[str, str]],
+                entries: dict[str, tuple[int, ...]]) -> None:
+    """Write the hash table atomically."""
+    header = json.dumps({'project': project_dir, 'columns': columns}).encode()
+    slots = 1 << max(4, (2 * len(entries) - 1).bit_length())
+    slot = struct.Struct(f"<IIH{len(columns)}H")
+    table = bytearray(slot.size * slots)
+    empty = slot.pack(0, EMPTY, 0, *([0] * len(columns)))
+    for position in range(slots):
+        table[position * slot.size:(position + 1) * slot.size] = empty
+
+    keys = bytearray()
+    mask = slots - 1
+    for name, codes in entries.items():
+        key = _encode(name)
+        if len(key) > 0xFFFF:
+            continue
+        position = zlib.crc32(key) & mask
+        while table[position * slot.size + 4:position * slot.size + 8] != b'\xff\xff\xff\xff':
+            position = (position + 1) & mask
+        slot.pack_into(table, position * slot.size, zlib.crc32(key), len(keys), len(key), *codes)
+        keys += key
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, INDEX_VERSION, slots, len(entries), len(columns), git_mtime, len(header)))
+        f.write(header)
+        f.write(table)
+        f.write(keys)
+    os.replace(tmp_path, path)
+
+
+def refresh(project_dir: str, hooks_dir: str = HOOKS_DIR, checks: list | None = None, force: bool = False) -> dict:
+    """
+    Bring the index up to date with the project's paths and the checks' rules.
+
+    Returns:
+        {"status": "current" | "rebuilt" | "unavailable", "paths", "classified", "seconds"}
+    """
+    started = time.perf_counter()
+    project_dir = os.path.abspath(project_dir).rstrip('/') or '/'
+    checks = load_checks(hooks_dir) if checks is None else checks
+    columns = [(check.PATH_INDEX_COLUMN, check.PATH_INDEX_RULES) for check in checks]
+    git_mtime = git_index_mtime(project_dir)
+    old = open_index(project_dir, hooks_dir)
+
+    if (not force and old is not None and old.project == project_dir and old.git_mtime == git_mtime
+            and [(name, old.columns[name][1]) for name in old.columns] == columns):
+        return {'status': 'current', 'paths': old.entries, 'classified': 0, 'seconds': time.perf_counter() - started}
+
+    paths = project_paths(project_dir) if columns else None
+    if paths is None:
+        return {'status': 'unavailable', 'paths': 0, 'classified': 0, 'seconds': time.perf_counter() - started}
+
+    # Reuse codes from columns whose rules haven't changed
+    reusable = []
+    if old is not None and old.project == project_dir:
+        reusable = [old.column(name, signature) for name, signature in columns]
+    reuse = old is not None and any(position is not None for position in reusable)
+
+    entries = {}
+    classified = 0
+    for path in paths:
+        previous = old.codes(path) if reuse else None
+        codes = []
+        for check, position in zip(checks, reusable or [None] * len(checks)):
+            if previous is not None and position is not None:
+                codes.append(previous[position])
+            else:
+                codes.append(check.classify_path(path))
+                classified += 1
+        entries[path] = tuple(codes)
+
+    path = index_path(project_dir, hooks_dir)
+    write_index(path, project_dir, git_mtime, columns, entries)
+    _opened.pop((project_dir, hooks_dir), None)
+    return {'status': 'rebuilt', 'paths': len(entries), 'classified': classified, 'seconds': time.perf_counter() - started}
+
+
+def main():
+    # Only the command line needs argparse; keep it out of the checks' imports
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python3 -m hooklib.pathindex', description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('project_dir')
+    parser.add_argument('--hooks-dir', default=HOOKS_DIR, help='the hooks directory whose checks are indexed')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('build', help='rebuild the index from scratch')
+    commands.add_parser('stats', help='refresh if needed, then time lookups against the pattern tables')
+    lookup_parser = commands.add_parser('lookup', help="every check's code for a path")
+    lookup_parser.add_argument('path')
+    args = parser.parse_args()
+
+    project_dir = os.path.abspath(args.project_dir)
+    checks = load_checks(args.hooks_dir)
+    result = refresh(project_dir, args.hooks_dir, checks, force=args.command == 'build')
+    if result['status'] == 'unavailable':
+        print(f"No index: {project_dir} is not a git work tree (or git failed)", file=sys.stderr)
+        return 1
+    print(f"{result['status'].capitalize()}: {result['paths']} paths, {result['classified']} classifications "
+          f"in {result['seconds'] * 1000:.1f}ms -> {index_path(project_dir, args.hooks_dir)}")
+
+    index = open_index(project_dir, args.hooks_dir)
+    if args.command == 'lookup':
+        path = os.path.abspath(args.path)
+        codes = index.codes(path)
+        for check in checks:
+            indexed = index.column(check.PATH_INDEX_COLUMN, check.PATH_INDEX_RULES)
+            code = codes[indexed] if codes is not None and indexed is not None else None
+            print(f"{check.PATH_INDEX_COLUMN:<6} indexed {code if code is not None else '-':<6} "
+                  f"classified {check.classify_path(path)}")
+    elif args.command == 'stats':
+        paths = [path for path, _codes in index.items()]
+        for check in checks:
+            # Time warm lookups and classifications, as the daemon serves them
+            check.warm()
+            began = time.perf_counter()
+            for path in paths:
+                check.classify_path(path)
+            regex = time.perf_counter() - began
+            began = time.perf_counter()
+            for path in paths:
+                lookup(project_dir, args.hooks_dir, check.PATH_INDEX_COLUMN, check.PATH_INDEX_RULES, path)
+            indexed = time.perf_counter() - began
+            matched = sum(1 for _path, codes in index.items() if codes[index.columns[check.PATH_INDEX_COLUMN][0]])
+            per = max(len(paths), 1)
+            print(f"{check.PATH_INDEX_COLUMN:<6} {matched} of {len(paths)} paths matched; "
+                  f"pattern table {regex / per * 1e6:.2f}us/path, index {indexed / per * 1e6:.2f}us/path")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
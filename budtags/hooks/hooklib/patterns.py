@@ -0,0 +1,134 @@
+"""
+Precompiled pattern tables.
+
+Hook pattern tables are lists of entries like
+
+    {"pattern": r"\\.env", "message": "...", "context": "..."}
+
+and the hooks want "the first entry, in table order, whose pattern matches
+anywhere in the text", plus that entry's metadata.
+
+Looping `re.search(pattern_string, ...)` pays a trip through the re module
+cache and a full regex scan per entry. PatternTable compiles every entry
+once, on first use, and extracts the literal text each pattern cannot
+match without (`\\.md$` -> ".md", `app/Providers/` -> "app/providers/").
+A miss is then a plain substring test, and the regex only runs for entries
+whose literal is present. Patterns with no usable literal always fall back
+to the regex.
+
+A single alternation regex was measured and rejected: alternations defeat
+sre's literal-prefix scan, so it was slower than the loop whenever most
+paths match something (the auto-approve-reads case). Compiled patterns are
+not cached on disk either: pickling an `re.Pattern` only stores its source
+and recompiles on load.
+"""
+
+import re
+
+# Characters with special meaning outside a character class
+_METACHARACTERS = set('.^$*+?{}[]()|')
+
+
+def required_literal(pattern: str) -> str:
+    """
+    Return the longest literal run every match of `pattern` must contain.
+
+    Conservative: anything optional, repeated, grouped or alternated ends the
+    run, and patterns with a top-level alternation get no literal at all.
+    """
+    if '|' in pattern:
+        return ''
+
+    best, current = '', ''
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        literal = None
+        step = 1
+
+        if char == '\\' and i + 1 < len(pattern):
+            escaped = pattern[i + 1]
+            # \b, \d, \s, \w ... are classes/assertions, not literals
+            literal = None if escaped.isalnum() else escaped
+            step = 2
+        elif char == '[':
+            end = pattern.find(']', i + 2)
+            step = (end - i + 1) if end != -1 else len(pattern) - i
+        elif char == '{':
+            # A {m,n} quantifier body (already applied to the atom before it)
+            # is never literal text; a stray '{' is, but dropping it is safe
+            end = pattern.find('}', i + 1)
+            step = (end - i + 1) if end != -1 else 1
+        elif char == '(':
+            depth, j = 0, i
+            while j < len(pattern):
+                if pattern[j] == '\\':
+                    j += 2
+                    continue
+                depth += {'(': 1, ')': -1}.get(pattern[j], 0)
+                j += 1
+                if depth == 0:
+                    break
+            step = j - i
+        elif char not in _METACHARACTERS:
+            literal = char
+
+        # A quantifier after the atom makes it optional or repeated
+        following = pattern[i + step] if i + step < len(pattern) else ''
+        if following in ('?', '*', '+', '{'):
+            literal = None
+
+        if literal is None:
+            best = max(best, current, key=len)
+            current = ''
+        else:
+            current += literal
+        i += step
+
+    return max(best, current, key=len)
+
+
+class PatternTable:
+    """An ordered list of pattern entries, compiled once with literal prefilters."""
+
+    def __init__(self, entries: list[dict], flags: int = 0):
+        self.entries = list(entries)
+        self.flags = flags
+        self.ignore_case = bool(flags & re.IGNORECASE)
+        # Built by compile() on first use, so a hook that answers from the
+        # path index (hooklib/pathindex.py) never pays for the regexes
+        self._compiled = None
+
+    def compile(self) -> list[tuple[int, str, re.Pattern]]:
+        """Compile every entry (once) into (position, literal prefilter, regex)."""
+        if self._compiled is None:
+            compiled = []
+            for position, entry in enumerate(self.entries):
+                literal = required_literal(entry["pattern"])
+                if self.ignore_case:
+                    literal = literal.lower()
+                if not literal.isascii():
+                    # str.lower() and re's case folding disagree outside ASCII
+                    literal = ''
+                compiled.append((position, literal, re.compile(entry["pattern"], self.flags)))
+            self._compiled = compiled
+        return self._compiled
+
+    def index(self, text: str) -> int:
+        """Return the position of the first entry whose pattern matches anywhere in `text`, or -1."""
+        haystack = text.lower() if self.ignore_case else text
+        # Literal prefilters are only exact for ASCII text (see compile)
+        prefilter = text.isascii()
+
+        for position, literal, regex in self._compiled or self.compile():
+            if prefilter and literal and literal not in haystack:
+                continue
+            if regex.search(text):
+                return position
+
+        return -1
+
+    def match(self, text: str) -> dict | None:
+        """Return the first entry whose pattern matches anywhere in `text`, or None."""
+        position = self.index(text)
+        return self.entries[position] if position >= 0 else None
@@ -0,0 +1,255 @@
+"""
+Parallel, fail-fast static analysis for /pre-commit.
+
+/pre-commit used to run Pint, PHPStan and tsc one after another from the
+command's instructions. This runner starts them together, each as its own
+process, bounded by parallel.max_jobs():
+
+- pint: `pint --test` over the changed PHP files (formatting; a failure is
+  reported as a warning and does not stop the run)
+- phpstan: `phpstan analyse` restricted to the changed PHP files
+- tsc: an incremental `tsc --noEmit`, failing on errors in changed TS files
+
+The first hard failure (a blocking stage that fails, crashes or times out)
+cancels the stages still running. Progress is printed as each stage starts
+and finishes, and the structured result - per-stage status, summary,
+output and timing, plus the blob hash of every file checked - is written
+to the pre-commit manifest (hooklib/precommit.py) as its last run, which
+`precommit record` then turns into validated blobs.
+
+Used from /pre-commit (run from the project root):
+
+    PYTHONPATH=.claude/hooks python3 -m hooklib.pipeline [file ...]
+
+Without files it checks hooklib.precommit's `changed` list. Exits 0 when
+every blocking stage passed, 1 otherwise.
+"""
+
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, NamedTuple
+
+from hooklib import parallel, precommit, streaming, tscwatch
+from hooklib.coalesce import Cancelled
+
+STAGE_TIMEOUT = 300
+
+# Output lines kept per stage in the result
+OUTPUT_LINES = 60
+
+PINT = os.path.join('vendor', 'bin', 'pint')
+PHPSTAN = os.path.join('vendor', 'bin', 'phpstan')
+
+# --error-format=raw prints one "path:line:message" line per error
+PHPSTAN_ERROR = re.compile(r'^.+?:\d+:')
+
+STATUS_ICONS = {'passed': '✅', 'failed': '❌', 'warning': '⚠️', 'error': '❌', 'cancelled': '⏹', 'skipped': '⏭'}
+
+
+class Stage(NamedTuple):
+    """One tool run over the changed files."""
+    name: str
+    command: list[str]
+    # Whether a failure fails the pipeline and cancels the other stages
+    blocking: bool
+    # Streaming collector for the command's output
+    collector: object
+    # (return_code) -> (status, summary, output)
+    verdict: Callable[[int], tuple[str, str, str]]
+
+
+def php_files(files: list[str]) -> list[str]:
+    return [f for f in files if f.endswith('.php')]
+
+
+def ts_files(files: list[str]) -> list[str]:
+    return [f for f in files if f.endswith(('.ts', '.tsx'))]
+
+
+def pint_stage(files: list[str]) -> Stage:
+    output = streaming.LineOutput(OUTPUT_LINES)
+
+    def verdict(return_code: int) -> tuple[str, str, str]:
+        if return_code == 0:
+            return 'passed', 'clean', ''
+        return 'warning', f"formatting issues (fix with ./vendor/bin/pint {' '.join(files)})", output.text()
+
+    return Stage('pint', [PINT, '--test', *files], False, output, verdict)
+
+
+def phpstan_stage(files: list[str]) -> Stage:
+    output = streaming.LineOutput(OUTPUT_LINES)
+
+    def verdict(return_code: int) -> tuple[str, str, str]:
+        if return_code == 0:
+            return 'passed', 'no errors', ''
+        errors = sum(1 for line in output.lines if PHPSTAN_ERROR.match(line))
+        more = '+' if output.total > len(output.lines) else ''
+        return 'failed', f"{errors}{more} error(s)" if errors else f"exited with {return_code}", output.text()
+
+    command = [PHPSTAN, 'analyse', *files, '--memory-limit=512M', '--no-progress', '--error-format=raw']
+    return Stage('phpstan', command, True, output, verdict)
+
+
+def tsc_stage(files: list[str]) -> Stage:
+    output = streaming.TscOutput()
+
+    def verdict(return_code: int) -> tuple[str, str, str]:
+        errors = output.errors_by_file()
+        relevant = [f for f in files if f in errors]
+        if not relevant:
+            other = f" ({len(errors)} other file(s) with existing errors)" if errors else ''
+            return 'passed', f"no errors in changed files{other}", ''
+        lines = [line for f in relevant for line in errors[f]]
+        return 'failed', f"errors in {len(relevant)} changed file(s)", '\n'.join(lines)
+
+    return Stage('tsc', tscwatch.TSC_COMMAND, True, output, verdict)
+
+
+def stages_for(project_dir: str, files: list[str]) -> tuple[list[Stage], list[dict]]:
+    """
+    The stages that apply to `files`.
+
+    Returns:
+        (stages to run, results for stages skipped because the tool isn't set up)
+    """
+    stages = []
+    skipped = []
+
+    php = php_files(files)
+    if php:
+        for binary, make in ((PINT, pint_stage), (PHPSTAN, phpstan_stage)):
+            stage = make(php)
+            if os.path.isfile(os.path.join(project_dir, binary)):
+                stages.append(stage)
+            else:
+                skipped.append(stage_result(stage, 'skipped', f"{binary} not found", '', 0.0, 0.0))
+
+    ts = ts_files(files)
+    if ts:
+        stage = tsc_stage(ts)
+        if os.path.isfile(os.path.join(project_dir, 'tsconfig.json')):
+            stages.append(stage)
+        else:
+            skipped.append(stage_result(stage, 'skipped', "no tsconfig.json", '', 0.0, 0.0))
+
+    return stages, skipped
+
+
+def stage_result(stage: Stage, status: str, summary: str, output: str, started: float, elapsed: float) -> dict:
+    return {
+        'name': stage.name,
+        'blocking': stage.blocking,
+        'status': status,
+        'summary': summary,
+        'output': output,
+        'started': round(started, 3),
+        'elapsed': round(elapsed, 3),
+    }
+
+
+def run_pipeline(project_dir: str, files: list[str], jobs: int | None = None,
+                 progress: Callable[[str], None] | None = None) -> dict:
+    """
+    Run every applicable stage over `files` concurrently, stopping at the first hard failure.
+
+    Returns:
+        {"passed", "started", "elapsed", "files", "blobs", "stages": [...]}
+        where each stage has name, blocking, status (passed, failed,
+        warning, error, cancelled, skipped), summary, output, and its start
+        offset and elapsed time in seconds
+    """
+    progress = progress or (lambda message: None)
+    blobs = precommit.worktree_blobs(project_dir, files)
+    stages, skipped = stages_for(project_dir, files)
+    cancelled = threading.Event()
+    started = time.time()
+    start = time.monotonic()
+
+    def run_stage(stage: Stage) -> dict:
+        offset = time.monotonic() - start
+        if cancelled.is_set():
+            return stage_result(stage, 'cancelled', 'not started after an earlier failure', '', offset, 0.0)
+
+        progress(f"▶ {stage.name} started")
+        try:
+            return_code = streaming.run_command(stage.command, project_dir, STAGE_TIMEOUT, stage.collector, cancelled)
+            status, summary, output = stage.verdict(return_code)
+        except Cancelled:
+            status, summary, output = 'cancelled', 'stopped after an earlier failure', ''
+        except subprocess.TimeoutExpired:
+            status, summary, output = 'error', f"timed out after {STAGE_TIMEOUT}s", ''
+        except OSError as e:
+            status, summary, output = 'error', f"could not run: {e}", ''
+
+        elapsed = time.monotonic() - start - offset
+        if stage.blocking and status in ('failed', 'error'):
+            cancelled.set()
+        progress(f"{STATUS_ICONS[status]} {stage.name}: {summary} ({elapsed:.2f}s)")
+        return stage_result(stage, status, summary, output, offset, elapsed)
+
+    results = []
+    if stages:
+        workers = max(1, min(jobs or parallel.max_jobs(), len(stages)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(run_stage, stages))
+
+    # A file edited while the tools ran may have been checked in either
+    # version; leave it out so `record` doesn't vouch for it
+    after = precommit.worktree_blobs(project_dir, files)
+    checked = {path: blob for path, blob in blobs.items() if after.get(path) == blob}
+
+    results += skipped
+    return {
+        'passed': not any(r['blocking'] and r['status'] in ('failed', 'error', 'cancelled') for r in results),
+        'started': started,
+        'elapsed': round(time.monotonic() - start, 3),
+        'files': files,
+        'blobs': checked,
+        'stages': results,
+    }
+
+
+def report(result: dict) -> str:
+    """Human-readable summary: one line per stage, then the output of stages that didn't pass."""
+    lines = [f"## Static Analysis ({result['elapsed']:.2f}s wall)", '']
+    for stage in result['stages']:
+        lines.append(f"- {STATUS_ICONS[stage['status']]} **{stage['name']}**: {stage['summary']} ({stage['elapsed']:.2f}s)")
+    for stage in result['stages']:
+        if stage['output']:
+            lines += ['', f"### {stage['name']}", '```', stage['output'], '```']
+    changed = sorted(set(result['files']) - set(result['blobs']))
+    if changed:
+        lines += ['', f"Changed while checking (re-run to validate): {', '.join(changed)}"]
+    return '\n'.join(lines)
+
+
+def main():
+    project_dir = os.environ.get('CLAUDE_PROJECT_DIR', os.getcwd())
+    try:
+        files = sys.argv[1:] or precommit.needing_validation(project_dir)
+        files = [f for f in files if precommit.is_validated_file(f)]
+
+        if not files:
+            print("✅ No code files to check.")
+            return
+
+        print(f"Checking {len(files)} file(s)", flush=True)
+        result = run_pipeline(project_dir, files, progress=lambda message: print(message, flush=True))
+    except precommit.GitError as e:
+        print(f"Could not read the project's files from git ({e})", file=sys.stderr)
+        sys.exit(1)
+    precommit.save_run(project_dir, result)
+
+    print()
+    print(report(result))
+    sys.exit(0 if result['passed'] else 1)
+
+
+if __name__ == '__main__':
+    main()
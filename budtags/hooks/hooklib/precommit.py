@@ -0,0 +1,256 @@
+"""
+Per-file pre-commit validation manifest.
+
+/pre-commit records the git blob hash of every code file it validated in
+.claude/cache/pre-commit-manifest.json. pre-commit-gate then allows a
+commit when every staged code file's blob is in the manifest, however long
+ago it was validated, and names exactly the files that still need a run.
+Revalidating after a fix only has to cover the files that changed since.
+
+The manifest also keeps the structured result of the last pipeline run
+(hooklib/pipeline.py: per-stage status and timing, and the blobs it
+checked). `record` records exactly what that run validated, and only if
+it passed: nothing else marks a file validated, so the gate can't be
+satisfied without a passing run.
+
+Blob hashes come from git itself (`git hash-object` for working-tree
+content, `git diff --cached --raw` for staged content), so "validated"
+means byte-for-byte the content git is about to commit.
+
+If git fails, the staged content is unknown: git() raises GitError and the
+gate denies the commit rather than letting it through unchecked.
+
+Used from /pre-commit (run from the project root, with PYTHONPATH set to
+the hooks directory: .claude/hooks, or $CLAUDE_PLUGIN_ROOT/hooks for a
+plugin install):
+
+    python3 -m hooklib.precommit changed
+    python3 -m hooklib.precommit record
+    python3 -m hooklib.precommit pending
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+from hooklib import trace
+
+MANIFEST_FILE = os.path.join('.claude', 'cache', 'pre-commit-manifest.json')
+MANIFEST_VERSION = 1
+
+# Files /pre-commit validates; anything else may be committed freely
+VALIDATED_SUFFIXES = ('.php', '.ts', '.tsx')
+
+# Validated blobs remembered per file (older ones are dropped first)
+MAX_BLOBS_PER_FILE = 5
+
+NULL_BLOB = '0' * 40
+
+
+class GitError(Exception):
+    """A git command failed or timed out."""
+
+
+def git(project_dir: str, *args: str, stdin: str | None = None, check: bool = True) -> str:
+    """
+    Run a git command in the project and return its stdout.
+
+    Raises GitError if git can't run, times out or exits non-zero, unless
+    `check` is False, in which case that returns ''.
+    """
+    try:
+        with trace.subprocess_timer():
+            result = subprocess.run(
+                ['git', '-C', project_dir, *args],
+                input=stdin,
+                capture_output=True,
+                text=True,
+                timeout=30,
+            )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        if not check:
+            return ''
+        raise GitError(f"git {args[0]}: {e}") from e
+    if result.returncode != 0:
+        if not check:
+            return ''
+        raise GitError(f"git {args[0]}: {result.stderr.strip() or f'exit code {result.returncode}'}")
+    return result.stdout
+
+
+def is_validated_file(path: str) -> bool:
+    return path.endswith(VALIDATED_SUFFIXES)
+
+
+def worktree_blobs(project_dir: str, paths: list[str]) -> dict[str, str]:
+    """{path: blob hash of the working-tree content} for files that exist."""
+    existing = [p for p in paths if os.path.isfile(os.path.join(project_dir, p))]
+    if not existing:
+        return {}
+    # --stdin-paths applies the same clean/eol filters `git add` would
+    hashes = git(project_dir, 'hash-object', '--stdin-paths', stdin='\n'.join(existing) + '\n').split()
+    return dict(zip(existing, hashes)) if len(hashes) == len(existing) else {}
+
+
+def staged_blobs(project_dir: str) -> dict[str, str]:
+    """{path: staged blob hash} for files added or modified in the index (deletions excluded)."""
+    blobs = {}
+    # ":100644 100644 <old> <new> M\0path\0"
+    fields = git(project_dir, 'diff', '--cached', '--raw', '--no-abbrev', '--no-renames', '-z').split('\0')
+    for header, path in zip(fields[0::2], fields[1::2]):
+        parts = header.split()
+        if len(parts) == 5 and parts[3] != NULL_BLOB:
+            blobs[path] = parts[3]
+    return blobs
+
+
+def changed_files(project_dir: str) -> list[str]:
+    """Files that differ from HEAD in the index or working tree, plus untracked files."""
+    paths = set()
+    # There is no HEAD before the first commit; the index diff covers that case
+    paths.update(git(project_dir, 'diff', '--name-only', '--no-renames', '-z', 'HEAD', check=False).split('\0'))
+    paths.update(git(project_dir, 'diff', '--cached', '--name-only', '--no-renames', '-z').split('\0'))
+    paths.update(git(project_dir, 'ls-files', '--others', '--exclude-standard', '-z').split('\0'))
+    paths.discard('')
+    return sorted(paths)
+
+
+class Manifest:
+    """The blobs /pre-commit has validated, per file."""
+
+    def __init__(self, project_dir: str):
+        self.project_dir = project_dir
+        self.path = os.path.join(project_dir, MANIFEST_FILE)
+        # path -> validated blob hashes, most recent last
+        self.files: dict[str, list[str]] = {}
+        self.updated = 0.0
+        # Result of the last hooklib.pipeline run, if any
+        self.last_run: dict | None = None
+
+    def load(self) -> None:
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == MANIFEST_VERSION:
+            self.files = data.get('files', {})
+            self.updated = data.get('updated', 0.0)
+            self.last_run = data.get('last_run')
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': MANIFEST_VERSION, 'updated': self.updated, 'files': self.files,
+                       'last_run': self.last_run}, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def record(self, blobs: dict[str, str]) -> None:
+        for path, blob in blobs.items():
+            history = [b for b in self.files.get(path, []) if b != blob]
+            self.files[path] = (history + [blob])[-MAX_BLOBS_PER_FILE:]
+        self.updated = time.time()
+
+    def is_validated(self, path: str, blob: str) -> bool:
+        return blob in self.files.get(path, ())
+
+    def unvalidated(self, blobs: dict[str, str]) -> list[str]:
+        """Code files among `blobs` whose content was never validated."""
+        return sorted(p for p, blob in blobs.items() if is_validated_file(p) and not self.is_validated(p, blob))
+
+
+def load_manifest(project_dir: str) -> Manifest:
+    manifest = Manifest(project_dir)
+    manifest.load()
+    return manifest
+
+
+def modified_tracked(project_dir: str) -> list[str]:
+    """Tracked files with unstaged working-tree changes (what `git commit -a` adds)."""
+    return [p for p in git(project_dir, 'diff', '--name-only', '--no-renames', '-z').split('\0') if p]
+
+
+def unvalidated_staged(project_dir: str, worktree_paths: list[str] = ()) -> list[str]:
+    """
+    Staged code files whose blobs /pre-commit has not validated.
+
+    `worktree_paths` are checked as they are on disk instead, for commands
+    that stage more before committing (`git commit -a`, `git add ... && git commit`).
+    """
+    blobs = staged_blobs(project_dir)
+    blobs.update(worktree_blobs(project_dir, list(worktree_paths)))
+    return load_manifest(project_dir).unvalidated(blobs)
+
+
+def needing_validation(project_dir: str) -> list[str]:
+    """Changed code files whose current content /pre-commit has not validated yet."""
+    candidates = [p for p in changed_files(project_dir) if is_validated_file(p)]
+    return load_manifest(project_dir).unvalidated(worktree_blobs(project_dir, candidates))
+
+
+def save_run(project_dir: str, result: dict) -> None:
+    """Store a pipeline result as the manifest's last run."""
+    manifest = load_manifest(project_dir)
+    manifest.last_run = result
+    manifest.save()
+
+
+def record_last_run(project_dir: str) -> dict[str, str] | None:
+    """
+    Record the blobs the last pipeline run checked, if it passed.
+
+    Returns:
+        the recorded blobs, or None if there is no passing run to record
+    """
+    manifest = load_manifest(project_dir)
+    run = manifest.last_run
+    if not run or not run.get('passed'):
+        return None
+    manifest.record(run.get('blobs', {}))
+    manifest.save()
+    return run.get('blobs', {})
+
+
+def last_run_failure(project_dir: str) -> str:
+    """"phpstan: 3 error(s)" for the blocking stages that failed the last pipeline run ('' if none)."""
+    run = load_manifest(project_dir).last_run
+    if not run or run.get('passed'):
+        return ''
+    return '; '.join(f"{stage['name']}: {stage['summary']}" for stage in run.get('stages', [])
+                     if stage.get('blocking') and stage.get('status') in ('failed', 'error'))
+
+
+def main():
+    project_dir = os.environ.get('CLAUDE_PROJECT_DIR', os.getcwd())
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+
+    try:
+        if command == 'changed':
+            # Step 1 of /pre-commit: only these files need checking
+            for path in needing_validation(project_dir):
+                print(path)
+        elif command == 'record' and not sys.argv[2:]:
+            # Only a passing pipeline run can vouch for files; there is no way to name them
+            blobs = record_last_run(project_dir)
+            if blobs is None:
+                print("No passing pipeline run to record; run hooklib.pipeline first", file=sys.stderr)
+                sys.exit(1)
+            print(f"Recorded {len(blobs)} validated file(s) in {MANIFEST_FILE}")
+        elif command == 'pending':
+            pending = unvalidated_staged(project_dir)
+            for path in pending:
+                print(path)
+            sys.exit(1 if pending else 0)
+        else:
+            print("Usage: python3 -m hooklib.precommit changed|record|pending", file=sys.stderr)
+            sys.exit(2)
+    except GitError as e:
+        print(f"Could not read the project's files from git ({e})", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
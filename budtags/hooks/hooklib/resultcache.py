@@ -0,0 +1,270 @@
+"""
+Content-hash result cache for post-edit validations.
+
+Undoing an edit, or rewriting a file with identical content, used to re-run
+the full PHPUnit or tsc pass. Passing results are now cached under a key
+built from content hashes:
+
+- the validation's selection (the test files it ran, or the edited TS file)
+- every source file the validation can depend on (CacheSpec.roots: the
+  edited file and test files included)
+- the relevant config files (composer.lock, phpunit.xml, tsconfig.json, ...)
+
+so a hit means "exactly this code and config already passed". Only passes
+are cached; failures always re-run.
+
+Hashing every source file is kept cheap by a (path, mtime, size) -> hash
+memo: only files whose stat changed are re-read. Entries live in
+.claude/cache/results.db (SQLite) and are evicted least-recently-used once
+their total size passes MAX_CACHE_BYTES.
+
+Inspect or clear from the command line:
+
+    python3 -m hooklib.resultcache <project_dir> stats
+    python3 -m hooklib.resultcache <project_dir> list
+    python3 -m hooklib.resultcache <project_dir> clear
+"""
+
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+from typing import NamedTuple
+
+from hooklib import trace
+
+CACHE_FILE = os.path.join('.claude', 'cache', 'results.db')
+
+# Evict least-recently-used results beyond this many stored bytes
+MAX_CACHE_BYTES = 4 * 1024 * 1024
+
+# Set BUDTAGS_RESULT_CACHE=0 to always re-run
+CACHE_ENV_FLAG = 'BUDTAGS_RESULT_CACHE'
+
+
+class CacheSpec(NamedTuple):
+    """What one kind of validation depends on."""
+    kind: str
+    # (directory, filename suffixes) trees whose contents are hashed
+    roots: list[tuple[str, tuple[str, ...]]]
+    # Project files hashed whether or not they exist
+    config: list[str]
+
+
+PHP_TESTS = CacheSpec(
+    'tests',
+    [('app', ('.php',)), ('tests', ('.php',)), ('database', ('.php',)), ('routes', ('.php',)), ('config', ('.php',))],
+    ['composer.lock', 'phpunit.xml', 'phpunit.xml.dist', '.env.testing'],
+)
+
+TYPECHECK = CacheSpec(
+    'tsc',
+    [('resources/js', ('.ts', '.tsx'))],
+    ['tsconfig.json', 'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml'],
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    label TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+"""
+
+
+class ResultCache:
+    """Passing validation results for one project, keyed by content hashes."""
+
+    def __init__(self, project_dir: str):
+        self.project_dir = project_dir
+        self.path = os.path.join(project_dir, CACHE_FILE)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=5)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(SCHEMA)
+
+    def _walk(self, directory: str, suffixes: tuple[str, ...]):
+        """Yield (relative path, stat) for matching files under `directory`."""
+        stack = [os.path.join(self.project_dir, directory)]
+        while stack:
+            try:
+                entries = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith(suffixes):
+                        yield os.path.relpath(entry.path, self.project_dir), entry.stat()
+
+    def key(self, spec: CacheSpec, selection: list[str]) -> str:
+        """Content-hash key for running `spec` over `selection` against the current files."""
+        memo = {path: (mtime, size, digest) for path, mtime, size, digest
+                in self.db.execute('SELECT path, mtime_ns, size, hash FROM file_hashes')}
+        updates = []
+
+        def file_hash(relative: str, stat: os.stat_result) -> str:
+            cached = memo.get(relative)
+            if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                return cached[2]
+            try:
+                with open(os.path.join(self.project_dir, relative), 'rb') as f:
+                    digest = hashlib.sha1(f.read()).hexdigest()
+            except OSError:
+                return '-'
+            updates.append((relative, stat.st_mtime_ns, stat.st_size, digest))
+            return digest
+
+        key = hashlib.sha1()
+        key.update('\0'.join([spec.kind, *sorted(selection)]).encode() + b'\0')
+
+        for name in spec.config:
+            try:
+                stat = os.stat(os.path.join(self.project_dir, name))
+                key.update(f"{name}={file_hash(name, stat)}\n".encode())
+            except OSError:
+                key.update(f"{name}=-\n".encode())
+
+        for directory, suffixes in spec.roots:
+            for relative, stat in sorted(self._walk(directory, suffixes)):
+                key.update(f"{relative}={file_hash(relative, stat)}\n".encode())
+
+        if updates:
+            with self.db:
+                self.db.executemany('INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?)', updates)
+        return key.hexdigest()
+
+    def lookup(self, key: str) -> bool:
+        """True if this key already passed (and mark it recently used)."""
+        with self.db:
+            cursor = self.db.execute(
+                'UPDATE results SET last_used = ?, hits = hits + 1 WHERE key = ?', (time.time(), key))
+        return cursor.rowcount > 0
+
+    def record_pass(self, spec: CacheSpec, selection: list[str], key: str, label: str) -> None:
+        """
+        Remember that `key` passed, unless files changed while it was running
+        (the run may then have seen a mix of old and new content).
+        """
+        if self.key(spec, selection) != key:
+            return
+        now = time.time()
+        with self.db:
+            self.db.execute(
+                'INSERT OR REPLACE INTO results (key, kind, label, size, created, last_used) VALUES (?, ?, ?, ?, ?, ?)',
+                (key, spec.kind, label, len(key) + len(label.encode()), now, now))
+        self.evict()
+
+    def evict(self, max_bytes: int = MAX_CACHE_BYTES) -> int:
+        """Drop least-recently-used results until the total size fits. Returns how many were dropped."""
+        total = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total <= max_bytes:
+            return 0
+
+        doomed = []
+        for key, size in self.db.execute('SELECT key, size FROM results ORDER BY last_used'):
+            if total <= max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        with self.db:
+            self.db.executemany('DELETE FROM results WHERE key = ?', doomed)
+        return len(doomed)
+
+    def stats(self) -> dict:
+        entries, size, hits = self.db.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM results').fetchone()
+        files = self.db.execute('SELECT COUNT(*) FROM file_hashes').fetchone()[0]
+        return {'entries': entries, 'bytes': size, 'hits': hits, 'hashed_files': files,
+                'max_bytes': MAX_CACHE_BYTES, 'path': self.path}
+
+    def entries(self) -> list[tuple]:
+        """[(kind, label, hits, last used)] most recently used first."""
+        return self.db.execute('SELECT kind, label, hits, last_used FROM results ORDER BY last_used DESC').fetchall()
+
+    def clear(self) -> int:
+        """Forget every result and file hash. Returns how many results were dropped."""
+        with self.db:
+            count = self.db.execute('DELETE FROM results').rowcount
+            self.db.execute('DELETE FROM file_hashes')
+        self.db.execute('VACUUM')
+        return count
+
+
+def open_cache(project_dir: str) -> ResultCache | None:
+    """The project's result cache, or None if disabled or unusable (e.g. read-only checkout)."""
+    if os.environ.get(CACHE_ENV_FLAG) == '0':
+        return None
+    try:
+        return ResultCache(project_dir)
+    except (OSError, sqlite3.Error):
+        return None
+
+
+def cached_pass(cache: ResultCache | None, spec: CacheSpec, selection: list[str]) -> tuple[bool, str | None]:
+    """
+    Check whether this validation already passed against the current files.
+
+    Returns:
+        (hit, key) where key is passed to remember_pass() after a fresh
+        pass (None when the cache is unavailable)
+    """
+    if cache is None:
+        return False, None
+    try:
+        key = cache.key(spec, selection)
+        hit = cache.lookup(key)
+    except (OSError, sqlite3.Error):
+        return False, None
+    trace.cache(f"resultcache:{spec.kind}", hit)
+    return hit, key
+
+
+def remember_pass(cache: ResultCache | None, spec: CacheSpec, selection: list[str],
+                  key: str | None, label: str) -> None:
+    """Record a fresh pass for a key from cached_pass(). Never raises."""
+    if cache is None or key is None:
+        return
+    try:
+        cache.record_pass(spec, selection, key, label)
+    except (OSError, sqlite3.Error):
+        pass
+
+
+def main():
+    if len(sys.argv) != 3 or sys.argv[2] not in ('stats', 'list', 'clear'):
+        print("Usage: python3 -m hooklib.resultcache <project_dir> stats|list|clear", file=sys.stderr)
+        sys.exit(1)
+
+    cache = ResultCache(sys.argv[1])
+    command = sys.argv[2]
+
+    if command == 'stats':
+        stats = cache.stats()
+        print(f"Cache:         {stats['path']}")
+        print(f"Results:       {stats['entries']} ({stats['bytes']} / {stats['max_bytes']} bytes)")
+        print(f"Hits:          {stats['hits']}")
+        print(f"Hashed files:  {stats['hashed_files']}")
+    elif command == 'list':
+        for kind, label, hits, last_used in cache.entries():
+            used = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_used))
+            print(f"{used}  {kind:<5} {hits:4d} hits  {label}")
+    else:
+        print(f"Cleared {cache.clear()} cached result(s)")
+
+
+if __name__ == '__main__':
+    main()
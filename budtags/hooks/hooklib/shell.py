@@ -0,0 +1,552 @@
+"""
+Single-pass shell command analysis for the Bash hooks.
+
+destructive-bash-blocker.py and pre-commit-gate.py used to run regexes over
+the raw command string. Patterns like `\\bgit\\s+.*\\s+commit\\b` backtrack
+quadratically on the multi-hundred-KB heredoc commands agents generate.
+They also match inside quoted text and heredoc bodies (a commit message
+mentioning `rm -rf`) and miss split flags (`rm -r -f`, `rm -fr`).
+
+commands() tokenizes a command line once, left to right, and returns every
+simple command it would run, each as an argv list with quotes removed:
+
+- `&&`, `||`, `;`, `|`, `&`, newlines, subshells and `{ }` groups split
+  commands; `$( )`, backticks and `<( )` are parsed as commands of their own
+- comments, redirections and their targets, leading `VAR=value` assignments
+  and reserved words (`if`, `then`, `do`, `!`, ...) are dropped
+- heredoc bodies and here-strings are data, except that unquoted heredocs
+  are scanned for command substitutions, and data that ends up in a shell
+  reading stdin is parsed as a script: `bash <<EOF`, `sh <<< '...'`, and
+  `cat <<EOF | bash` (any later command in the same pipeline)
+- wrappers are unwrapped to the command they run: sudo, env, nohup, time,
+  nice, timeout, xargs, command, exec, `find -exec ... ;`, watch (whose
+  arguments are an `sh -c` script), and the script of `bash -c` / `sh -c` /
+  `eval`, up to MAX_DEPTH levels deep
+
+Each character is handled once (runs of plain characters by one regex
+match), so the cost is linear in the command length. Strings re-parsed as
+scripts (`bash -c`, `eval`, heredocs and here-strings fed to a shell) are
+substrings of the command, so the total stays within MAX_DEPTH passes.
+
+git_subcommand() and options() classify the resulting argv.
+
+    python3 -m hooklib.shell '<command>'    # print its simple commands
+"""
+
+import argparse
+import functools
+import re
+import sys
+
+# How many levels of `bash -c`, `eval` and heredocs fed to a shell are re-parsed
+MAX_DEPTH = 8
+
+SHELLS = {'bash', 'sh', 'zsh', 'dash', 'ksh'}
+
+# Reserved words that can precede a command (or close a compound one)
+RESERVED = {'!', '{', '}', 'if', 'then', 'else', 'elif', 'fi', 'while', 'until', 'do', 'done', 'esac', 'function'}
+
+# Wrapper command -> its options that take a separate value
+WRAPPERS = {
+    'sudo': {'-u', '-g', '-h', '-p', '-C', '-U', '-r', '-t', '-T', '-D', '-R'},
+    'doas': {'-u', '-C'},
+    'env': {'-u', '-C', '-S', '--unset', '--chdir', '--split-string'},
+    'nohup': set(),
+    'time': {'-f', '-o', '--format', '--output'},
+    'nice': {'-n', '--adjustment'},
+    'ionice': {'-c', '-n', '-p', '-P', '-u', '--class', '--classdata'},
+    'stdbuf': {'-i', '-o', '-e', '--input', '--output', '--error'},
+    'timeout': {'-s', '-k', '--signal', '--kill-after'},
+    'xargs': {'-a', '-d', '-E', '-e', '-I', '-L', '-l', '-n', '-P', '-s', '--arg-file', '--delimiter',
+              '--eof', '--replace', '--max-lines', '--max-args', '--max-procs', '--max-chars',
+              '--process-slot-var'},
+    'command': set(),
+    'builtin': set(),
+    'exec': {'-a'},
+    'watch': {'-n', '-q', '--interval', '--equexit'},
+}
+
+# git options before the subcommand that take a separate value
+GIT_VALUE_OPTIONS = {'-C', '-c', '--git-dir', '--work-tree', '--namespace', '--super-prefix',
+                     '--config-env', '--exec-path', '--attr-source', '--list-cmds'}
+
+# What a command substitution leaves in the word containing it
+SUBSTITUTIONS = {'$(': '$(...)', '`': '`...`'}
+
+_PLAIN = re.compile(r'[^\s\'"\\$`;&|()<>]+')
+_DQ_PLAIN = re.compile(r'[^"\\$`]+')
+_BODY_PLAIN = re.compile(r'[^\\$`]+')
+_BLANKS = re.compile(r'[ \t\r\f\v]+')
+_ANSI_C = re.compile(r"(?:[^'\\]|\\.)*'?", re.DOTALL)
+_ASSIGNMENT = re.compile(r'[A-Za-z_][A-Za-z0-9_]*(?:\[[^\]]*\])?\+?=')
+_REDIRECTS = ('<<<', '<<-', '&>>', '<<', '<>', '<&', '>>', '>&', '>|', '&>', '<', '>')
+
+
+class _Frame:
+    """One nesting level: the whole script, a `$( )`, or a backtick substitution."""
+
+    __slots__ = ('kind', 'words', 'pieces', 'quoted', 'in_dq', 'parens', 'redirect', 'heredoc',
+                 'pipeline', 'piped', 'stdin')
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        # Finished words of the simple command in progress
+        self.words: list[str] = []
+        # Pieces of the word in progress (None between words)
+        self.pieces: list[str] | None = None
+        self.quoted = False
+        self.in_dq = False
+        # Unclosed subshell parentheses in this frame
+        self.parens = 0
+        # The next word is a redirection target (heredoc: its delimiter;
+        # here-string: its data). `heredoc` holds the operator
+        self.redirect = False
+        self.heredoc = ''
+        # Word lists of the commands in the pipeline so far, whether it
+        # ended in `|`, and the stdin data (here-strings, heredoc bodies)
+        # given to its commands: (data, words, scan substitutions)
+        self.pipeline: list[list[str]] = []
+        self.piped = False
+        self.stdin: list[tuple[str, list[str], bool]] = []
+
+
+class _Parser:
+    def __init__(self, commands: list[list[str]], depth: int):
+        self.commands = commands
+        self.depth = depth
+        # (delimiter, strip tabs, quoted, words of the command it feeds, its frame, its pipeline)
+        self.heredocs: list[tuple[str, bool, bool, list[str], _Frame, list[list[str]]]] = []
+
+    def parse(self, text: str, body: bool = False) -> None:
+        """Append every simple command in `text` (a heredoc body if `body`)."""
+        self.text = text
+        n = len(text)
+        top = _Frame('')
+        if body:
+            # Only substitutions count in a heredoc body: an open double quote without an end
+            top.in_dq = True
+            top.pieces = []
+        stack = [top]
+        i = 0
+
+        while i < n:
+            frame = stack[-1]
+            char = text[i]
+
+            if frame.in_dq:
+                match = (_BODY_PLAIN if body and frame is top else _DQ_PLAIN).match(text, i)
+                if match:
+                    frame.pieces.append(match.group())
+                    i = match.end()
+                elif char == '"':
+                    frame.in_dq = False
+                    i += 1
+                elif char == '\\':
+                    following = text[i + 1:i + 2]
+                    if following == '\n':
+                        pass
+                    elif following and following in '$`"\\':
+                        frame.pieces.append(following)
+                    else:
+                        frame.pieces.append('\\' + following)
+                    i += 2
+                else:
+                    i = self.substitution(stack, i)
+                continue
+
+            match = _PLAIN.match(text, i)
+            if match:
+                if frame.pieces is None:
+                    if char == '#':
+                        # Comment to end of line
+                        end = text.find('\n', i)
+                        i = n if end < 0 else end
+                        continue
+                    frame.pieces = []
+                frame.pieces.append(match.group())
+                i = match.end()
+            elif char == '\n':
+                # `a |` continues on the next line
+                self.end_command(frame, pipe=frame.piped and not frame.words and frame.pieces is None)
+                i += 1
+                if self.heredocs:
+                    i = self.read_heredocs(i)
+            elif char in ' \t\r\f\v':
+                self.end_word(frame)
+                i = _BLANKS.match(text, i).end()
+            elif char == "'":
+                end = text.find("'", i + 1)
+                end = n if end < 0 else end
+                self.start_word(frame, quoted=True).append(text[i + 1:end])
+                i = end + 1
+            elif char == '"':
+                self.start_word(frame, quoted=True)
+                frame.in_dq = True
+                i += 1
+            elif char == '\\':
+                following = text[i + 1:i + 2]
+                if following != '\n':
+                    self.start_word(frame, quoted=True).append(following)
+                i += 2
+            elif char in '$`':
+                i = self.substitution(stack, i)
+            elif char == '(':
+                self.end_command(frame, pipe=frame.piped)
+                frame.parens += 1
+                i += 1
+            elif char == ')':
+                self.end_command(frame)
+                if frame.parens:
+                    frame.parens -= 1
+                elif frame.kind == '$(':
+                    self.close(stack)
+                i += 1
+            elif char in '<>' and text.startswith('(', i + 1):
+                # Process substitution
+                self.start_word(frame, quoted=False)
+                stack.append(_Frame('$('))
+                i += 2
+            elif char in '<>' or text.startswith('&>', i):
+                i = self.redirection(frame, i)
+            else:
+                # ; & | and their two-character forms
+                operator = text[i:i + 2] if text[i:i + 2] in ('&&', '||', ';;', '|&', ';&') else char
+                self.end_command(frame, pipe=operator in ('|', '|&'))
+                i += len(operator)
+
+        while len(stack) > 1:
+            self.end_command(stack[-1])
+            self.close(stack)
+        if not body:
+            self.end_command(top)
+
+    def substitution(self, stack: list[_Frame], i: int) -> int:
+        """Handle `$...` or a backtick at `i`; returns the next position."""
+        text = self.text
+        frame = stack[-1]
+        if text[i] == '`':
+            if frame.kind == '`':
+                self.end_command(frame)
+                self.close(stack)
+            else:
+                self.start_word(frame, quoted=False)
+                stack.append(_Frame('`'))
+            return i + 1
+        following = text[i + 1:i + 2]
+        if following == '(':
+            self.start_word(frame, quoted=False)
+            stack.append(_Frame('$('))
+            return i + 2
+        if following == "'" and not frame.in_dq:
+            # $'...' (backslash escapes are kept as written)
+            end = _ANSI_C.match(text, i + 2).end()
+            self.start_word(frame, quoted=True).append(text[i + 2:end].removesuffix("'"))
+            return end
+        self.start_word(frame, quoted=False).append('$')
+        return i + 1
+
+    def redirection(self, frame: _Frame, i: int) -> int:
+        """Handle a redirection operator at `i`; its target is dropped from the command."""
+        pieces = frame.pieces
+        if pieces is not None and not frame.quoted and ''.join(pieces).isdigit():
+            # 2>&1: the digits are the file descriptor, not a word
+            frame.pieces = None
+        else:
+            self.end_word(frame)
+        operator = next(op for op in _REDIRECTS if self.text.startswith(op, i))
+        frame.redirect = True
+        if operator in ('<<', '<<-', '<<<'):
+            frame.heredoc = operator
+        return i + len(operator)
+
+    def start_word(self, frame: _Frame, quoted: bool) -> list[str]:
+        if frame.pieces is None:
+            frame.pieces = []
+        frame.quoted |= quoted
+        return frame.pieces
+
+    def end_word(self, frame: _Frame) -> None:
+        if frame.pieces is None:
+            return
+        word = ''.join(frame.pieces)
+        if frame.redirect:
+            if frame.heredoc == '<<<':
+                # Substitutions in it were tokenized with the word
+                frame.stdin.append((word, frame.words, False))
+            elif frame.heredoc:
+                self.heredocs.append((word, frame.heredoc == '<<-', frame.quoted, frame.words, frame, frame.pipeline))
+            frame.redirect = False
+            frame.heredoc = ''
+        else:
+            frame.words.append(word)
+        frame.pieces = None
+        frame.quoted = False
+
+    def end_command(self, frame: _Frame, pipe: bool = False) -> None:
+        """End the simple command in progress; unless `pipe`, its pipeline ends too."""
+        self.end_word(frame)
+        # A redirection missing its target doesn't carry over
+        frame.redirect = False
+        frame.heredoc = ''
+        if frame.words:
+            frame.pipeline.append(frame.words)
+            self.finish(frame.words)
+            # A pending heredoc keeps a reference to the old list
+            frame.words = []
+        frame.piped = pipe
+        if pipe:
+            return
+
+        stdin, frame.stdin = frame.stdin, []
+        for data, words, scan in stdin:
+            self.stdin_data(data, words, frame.pipeline, scan)
+        # Pending heredocs keep a reference to the old list too
+        frame.pipeline = []
+
+    def close(self, stack: list[_Frame]) -> None:
+        """Close the substitution on top of the stack; a placeholder takes its place in the enclosing word."""
+        frame = stack.pop()
+        # Not its source text: copying that into every enclosing level would be quadratic
+        self.start_word(stack[-1], quoted=False).append(SUBSTITUTIONS[frame.kind])
+
+    def read_heredocs(self, i: int) -> int:
+        """Consume the bodies of heredocs started on the line that just ended."""
+        pending, self.heredocs = self.heredocs, []
+        for delimiter, strip_tabs, quoted, words, frame, pipeline in pending:
+            body_end, next_line = self.heredoc_end(i, delimiter, strip_tabs)
+            if frame.pipeline is pipeline:
+                # `cat <<EOF |` goes on after the body: wait for the rest of the pipeline
+                frame.stdin.append((self.text[i:body_end], words, not quoted))
+            else:
+                self.stdin_data(self.text[i:body_end], words, pipeline, not quoted)
+            i = next_line
+        return i
+
+    def heredoc_end(self, i: int, delimiter: str, strip_tabs: bool) -> tuple[int, int]:
+        """Where the heredoc body starting at `i` ends, and where the line after its delimiter starts."""
+        text = self.text
+        n = len(text)
+        if strip_tabs:
+            # <<- allows leading tabs before the delimiter: check line by line
+            while i < n:
+                end = text.find('\n', i)
+                end = n if end < 0 else end
+                if text[i:end].lstrip('\t').rstrip('\r') == delimiter:
+                    return i, min(end + 1, n)
+                i = end + 1
+            return n, n
+
+        # Otherwise jump between occurrences of "\n<delimiter>" (the body starts after a newline)
+        needle = '\n' + delimiter
+        position = i - 1
+        while True:
+            found = text.find(needle, position)
+            if found < 0:
+                return n, n
+            after = found + len(needle)
+            if after < n and text[after] == '\r':
+                after += 1
+            if after >= n or text[after] == '\n':
+                return found + 1, min(after + 1, n)
+            position = found + 1
+
+    def stdin_data(self, data: str, words: list[str], pipeline: list[list[str]], scan: bool) -> None:
+        """Parse a heredoc body or here-string given to `words`: as a script if it reaches a shell."""
+        if self.depth >= MAX_DEPTH:
+            return
+        if feeds_shell(words, pipeline):
+            # bash <<EOF, cat <<EOF | sh, sh <<< '...': the data is the script
+            _Parser(self.commands, self.depth + 1).parse(data)
+        elif scan:
+            # An unquoted heredoc body still expands substitutions
+            _Parser(self.commands, self.depth + 1).parse(data, body=True)
+
+    def finish(self, words: list[str]) -> None:
+        """Record a simple command, unwrapped, and anything it runs as a script."""
+        argv = unwrap(strip_prefix(words))
+        if not argv:
+            return
+        name = command_name(argv)
+        if self.depth < MAX_DEPTH:
+            script = shell_script(argv) if name in SHELLS else ' '.join(argv[1:]) if name == 'eval' else None
+            if script:
+                _Parser(self.commands, self.depth + 1).parse(script)
+        if name == 'find':
+            for executed in find_exec(argv):
+                self.finish(executed)
+        self.commands.append(argv)
+
+
+def reads_script(words: list[str]) -> bool:
+    """Whether a command is a shell reading its script from stdin (`bash`, `sudo sh -s`)."""
+    argv = unwrap(strip_prefix(words))
+    return bool(argv) and command_name(argv) in SHELLS and shell_script(argv) is None
+
+
+def feeds_shell(words: list[str], pipeline: list[list[str]]) -> bool:
+    """Whether stdin data given to `words` reaches a shell: that command or a later one in its pipeline."""
+    position = next((k for k, command in enumerate(pipeline) if command is words), None)
+    if position is None:
+        return reads_script(words)
+    return any(reads_script(command) for command in pipeline[position:])
+
+
+def strip_prefix(words: list[str]) -> list[str]:
+    """Drop leading reserved words and VAR=value assignments."""
+    start = 0
+    while start < len(words) and (words[start] in RESERVED or _ASSIGNMENT.match(words[start])):
+        start += 1
+    return words[start:]
+
+
+def skip_options(args: list[str], value_options: set[str]) -> int:
+    """Index of the first argument after the leading options (and their values)."""
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == '--':
+            return i + 1
+        if not arg.startswith('-') or arg == '-':
+            return i
+        if arg in value_options:
+            i += 1
+        i += 1
+    return i
+
+
+def unwrap(argv: list[str]) -> list[str]:
+    """Strip wrapper commands (sudo, env, xargs, timeout ...) down to the command they run."""
+    while argv:
+        name = command_name(argv)
+        value_options = WRAPPERS.get(name)
+        if value_options is None:
+            return argv
+        start = 1 + skip_options(argv[1:], value_options)
+        if name == 'env':
+            while start < len(argv) and _ASSIGNMENT.match(argv[start]):
+                start += 1
+        elif name == 'timeout':
+            # The duration
+            start += 1
+        elif name == 'watch' and start < len(argv) and not options(argv[1:start], value_options) & {'-x', '--exec'}:
+            # watch runs its arguments joined as one `sh -c` script
+            return ['sh', '-c', ' '.join(argv[start:])]
+        argv = argv[start:]
+    return argv
+
+
+def shell_script(argv: list[str]) -> str | None:
+    """The script of `bash -c '<script>'`, or None if the shell reads a file or stdin."""
+    for i, arg in enumerate(argv[1:], 1):
+        if arg == '--' or not arg.startswith('-') and not arg.startswith('+'):
+            return None
+        if not arg.startswith('--') and 'c' in arg[1:]:
+            return argv[i + 1] if i + 1 < len(argv) else ''
+        if arg in ('-o', '+o', '-O', '+O', '--rcfile', '--init-file'):
+            return None if i + 1 >= len(argv) else shell_script([argv[0]] + argv[i + 2:])
+    return None
+
+
+def find_exec(argv: list[str]) -> list[list[str]]:
+    """The commands of `find ... -exec <command> ;` (and -execdir, -ok, -okdir)."""
+    executed = []
+    i = 1
+    while i < len(argv):
+        if argv[i] in ('-exec', '-execdir', '-ok', '-okdir'):
+            end = i + 1
+            while end < len(argv) and argv[end] not in (';', '+'):
+                end += 1
+            executed.append(argv[i + 1:end])
+            i = end
+        i += 1
+    return executed
+
+
+def command_name(argv: list[str]) -> str:
+    """The command's basename, lowercased (`/usr/bin/Git` -> "git")."""
+    return argv[0].rpartition('/')[2].lower() if argv else ''
+
+
+@functools.lru_cache(maxsize=4)
+def _commands(command: str) -> tuple[tuple[str, ...], ...]:
+    commands: list[list[str]] = []
+    _Parser(commands, 0).parse(command)
+    return tuple(tuple(argv) for argv in commands)
+
+
+def commands(command: str) -> list[list[str]]:
+    """
+    Every simple command `command` runs, in the order they finish.
+
+    Substitutions finish before the command that contains them, where they
+    appear as the placeholder `$(...)` (or `` `...` ``). Cached per
+    command string, so the Bash checks in one dispatch tokenize once.
+
+    Returns:
+        a list of argv lists
+    """
+    return [list(argv) for argv in _commands(command)]
+
+
+def git_subcommand(argv: list[str]) -> tuple[str, list[str]] | None:
+    """
+    Split a git invocation after its global options (`git -C dir -c k=v commit -m x`).
+
+    Returns:
+        (subcommand, its arguments), or None if `argv` is not a git subcommand
+    """
+    if command_name(argv) != 'git':
+        return None
+    start = 1 + skip_options(argv[1:], GIT_VALUE_OPTIONS)
+    if start >= len(argv) or argv[start - 1] == '--':
+        return None
+    return argv[start], argv[start + 1:]
+
+
+def options(args: list[str], value_options: set[str] = frozenset(), stop_at_operand: bool = False) -> set[str]:
+    """
+    The options present in `args`, normalized: `-rf` -> {"-r", "-f"}, `--force=yes` -> {"--force"}.
+
+    `value_options` are options that take a value: a short one ends its
+    cluster (`-ma` is -m with value "a") and a separate value is skipped.
+    Parsing stops at `--`, and at the first operand if `stop_at_operand`.
+    """
+    found = set()
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        i += 1
+        if arg == '--':
+            break
+        if arg.startswith('--'):
+            name = arg.split('=', 1)[0]
+            found.add(name)
+            if name in value_options and '=' not in arg:
+                i += 1
+        elif arg.startswith('-') and arg != '-':
+            flags = arg[1:]
+            # Only the first option taking a value matters; set() keeps long clusters linear
+            letters = set(flags)
+            ends = [flags.index(flag) for flag in letters if '-' + flag in value_options]
+            if ends:
+                end = min(ends)
+                letters = set(flags[:end + 1])
+                if end == len(flags) - 1:
+                    i += 1
+            found.update('-' + flag for flag in letters)
+        elif stop_at_operand:
+            break
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python3 -m hooklib.shell', description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('command', help='a Bash command line')
+    args = parser.parse_args()
+    for argv in commands(args.command):
+        print(argv)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""
+Skill token accounting and on-demand (lazy) skill loading.
+
+An agent's `skills:` frontmatter loads each skill's SKILL.md wholesale, and
+some are 23-29 KB (create-plan, budtags-testing, zpl) before any work
+starts. Using the section index (hooklib/skillindex.py), which stores an
+estimated token count per file and per section, this module:
+
+- reports what every skill and every agent costs to load eagerly, next to
+  the cost of the same skills as tables of contents
+- prints a skill's (or an agent's skills') TOC under a token budget: the
+  description, then SKILL.md headings as deep as the budget allows, each
+  with its line range and size, then the skill's other files
+- fetches a single section by file and line, so the rest is read lazily
+
+    python3 -m hooklib.skillbudget <project_dir> report [--budget N]
+    python3 -m hooklib.skillbudget <project_dir> toc <skill or agent> [--budget N]
+    python3 -m hooklib.skillbudget <project_dir> section <path>:<line>
+"""
+
+import argparse
+import os
+import sys
+
+from hooklib import skillindex
+from hooklib.skillrouter import read_frontmatter
+
+# Tokens per skill TOC
+DEFAULT_BUDGET = 1200
+
+FETCH_HINT = ("Load sections on demand: Read the file with offset/limit from a line range, or run "
+              "`PYTHONPATH=.claude/hooks python3 -m hooklib.skillbudget . section <path>:<line>`. "
+              "Search a skill with `PYTHONPATH=.claude/hooks python3 -m hooklib.skillindex . query \"<words>\" --skill <skill>`.")
+
+
+def skill_costs(index: skillindex.SkillIndex) -> dict[str, dict]:
+    """{skill: {"skill_md": tokens of SKILL.md, "total": tokens of all its docs, "files": count}}"""
+    costs: dict[str, dict] = {}
+    for skill, path, tokens in index.db.execute('SELECT skill, path, tokens FROM documents WHERE skill != ""'):
+        cost = costs.setdefault(skill, {'skill_md': 0, 'total': 0, 'files': 0})
+        cost['total'] += tokens
+        cost['files'] += 1
+        if os.path.basename(path) == 'SKILL.md':
+            cost['skill_md'] = tokens
+    return costs
+
+
+def agent_skills(root: str) -> dict[str, tuple[list[str], int]]:
+    """{agent: (skills its frontmatter auto-loads, tokens of the agent file)}"""
+    agents = {}
+    agents_dir = os.path.join(root, 'agents')
+    try:
+        names = sorted(name for name in os.listdir(agents_dir) if name.endswith('.md'))
+    except OSError:
+        return agents
+    for name in names:
+        path = os.path.join(agents_dir, name)
+        meta = read_frontmatter(path)
+        listed = meta.get('skills', '')
+        skills = [s.strip() for s in listed.split(',') if s.strip()] if isinstance(listed, str) else []
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                tokens = skillindex.estimate_tokens(f.read())
+        except OSError:
+            tokens = 0
+        agents[meta.get('name') if isinstance(meta.get('name'), str) else name[:-3]] = (skills, tokens)
+    return agents
+
+
+def skill_toc(index: skillindex.SkillIndex, project_dir: str, skill: str, budget: int = DEFAULT_BUDGET) -> str:
+    """A skill's description and table of contents, at most about `budget` tokens."""
+    skill_md = os.path.join('skills', skill, 'SKILL.md')
+    documents = index.db.execute(
+        'SELECT id, path, tokens FROM documents WHERE skill = ? ORDER BY path', (skill,)).fetchall()
+    if not documents:
+        return f"## {skill}\n(no indexed documents)"
+
+    main = next((d for d in documents if d[1] == skill_md), None)
+    others = [d for d in documents if d[1] != skill_md]
+    total = sum(d[2] for d in documents)
+    description = read_frontmatter(os.path.join(index.root, skill_md)).get('description', '')
+    header = [f"## {skill} (SKILL.md ~{main[2] if main else 0} tokens; {len(documents)} files ~{total} tokens)"]
+    if isinstance(description, str) and description:
+        header.append(' '.join(description.split()))
+
+    lines = list(header)
+    used = skillindex.estimate_tokens('\n'.join(lines))
+
+    if main:
+        sections = index.db.execute(
+            'SELECT heading, level, tokens, line_start, line_end FROM sections WHERE document = ? ORDER BY line_start',
+            (main[0],)).fetchall()
+        path_line = skillindex.display_path(project_dir, index.root, skill_md)
+        top = min((s[1] for s in sections if s[1]), default=1)
+
+        def render(depth: int) -> list[str]:
+            rendered = [path_line]
+            for heading, level, tokens, start, end in sections:
+                if level <= depth:
+                    indent = '  ' * max(0, level - top)
+                    rendered.append(f"{indent}- {heading} (L{start}-{end}, ~{tokens})")
+            return rendered
+
+        # Deepest heading level whose TOC still fits
+        chosen = render(0)
+        for depth in range(1, 7):
+            candidate = render(depth)
+            if used + skillindex.estimate_tokens('\n'.join(candidate)) > budget:
+                break
+            chosen = candidate
+        lines += chosen
+        used += skillindex.estimate_tokens('\n'.join(chosen))
+
+    listed = 0
+    for _id, path, tokens in others:
+        entry = f"- {skillindex.display_path(project_dir, index.root, path)} (~{tokens})"
+        cost = skillindex.estimate_tokens(entry)
+        if used + cost > budget:
+            break
+        if listed == 0:
+            lines.append("Other files:")
+        lines.append(entry)
+        used += cost
+        listed += 1
+    if listed < len(others):
+        lines.append(f"... {len(others) - listed} more file(s) (search with --skill {skill})")
+
+    return '\n'.join(lines)
+
+
+def agent_toc(index: skillindex.SkillIndex, project_dir: str, name: str, budget: int = DEFAULT_BUDGET) -> str | None:
+    """TOCs of an agent's skills (or of one skill), plus how to fetch sections. None if unknown."""
+    skills = [name] if name in skill_costs(index) else agent_skills(index.root).get(name, (None, 0))[0]
+    if skills is None:
+        return None
+    parts = [skill_toc(index, project_dir, skill, budget) for skill in skills]
+    return '\n\n'.join(parts + [FETCH_HINT])
+
+
+def section_at(index: skillindex.SkillIndex, path: str, line: int) -> str | None:
+    """The text of the indexed section of `path` (relative to the plugin root) containing `line`."""
+    row = index.db.execute(
+        'SELECT s.byte_start, s.byte_end FROM sections s JOIN documents d ON d.id = s.document '
+        'WHERE d.path = ? AND s.line_start <= ? AND s.line_end >= ? ORDER BY s.line_start DESC LIMIT 1',
+        (path, line, line)).fetchone()
+    if row is None:
+        return None
+    return index.read_section({'path': path, 'byte_start': row[0], 'byte_end': row[1]})
+
+
+def report(index: skillindex.SkillIndex, project_dir: str, budget: int = DEFAULT_BUDGET) -> str:
+    costs = skill_costs(index)
+    toc_cost = {skill: skillindex.estimate_tokens(skill_toc(index, project_dir, skill, budget)) for skill in costs}
+
+    lines = [f"{'Skill':<28} {'SKILL.md':>9} {'TOC':>6} {'all docs':>9} {'files':>6}"]
+    for skill, cost in sorted(costs.items(), key=lambda item: -item[1]['skill_md']):
+        lines.append(f"{skill:<28} {cost['skill_md']:>9} {toc_cost[skill]:>6} {cost['total']:>9} {cost['files']:>6}")
+
+    lines += ['', f"{'Agent':<28} {'eager':>7} {'lazy':>7}  skills (eager = agent + each SKILL.md; "
+                  f"lazy = agent + TOCs at {budget} tokens)"]
+    agents = agent_skills(index.root)
+    rows = []
+    for agent, (skills, agent_tokens) in agents.items():
+        eager = agent_tokens + sum(costs.get(s, {}).get('skill_md', 0) for s in skills)
+        lazy = agent_tokens + sum(toc_cost.get(s, 0) for s in skills)
+        rows.append((eager, agent, lazy, skills))
+    for eager, agent, lazy, skills in sorted(rows, reverse=True):
+        lines.append(f"{agent:<28} {eager:>7} {lazy:>7}  {', '.join(skills) or '-'}")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python3 -m hooklib.skillbudget', description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('project_dir')
+    commands = parser.add_subparsers(dest='command', required=True)
+    report_parser = commands.add_parser('report', help='eager vs lazy token cost per skill and per agent')
+    report_parser.add_argument('--budget', type=int, default=DEFAULT_BUDGET, help='tokens per skill TOC')
+    toc = commands.add_parser('toc', help="a skill's or an agent's skills' TOC under a token budget")
+    toc.add_argument('name')
+    toc.add_argument('--budget', type=int, default=DEFAULT_BUDGET, help='tokens per skill TOC')
+    section = commands.add_parser('section', help='print the section containing a line')
+    section.add_argument('location', help='path:line, e.g. .claude/skills/zpl/SKILL.md:120')
+    args = parser.parse_args()
+
+    try:
+        index = skillindex.SkillIndex(args.project_dir)
+    except Exception as e:
+        print(f"Skill index unavailable: {e}", file=sys.stderr)
+        sys.exit(1)
+    index.refresh()
+
+    if args.command == 'report':
+        print(report(index, args.project_dir, args.budget))
+    elif args.command == 'toc':
+        text = agent_toc(index, args.project_dir, args.name, args.budget)
+        if text is None:
+            print(f"No skill or agent named {args.name}", file=sys.stderr)
+            sys.exit(1)
+        print(text)
+    else:
+        path, _, line = args.location.rpartition(':')
+        full = os.path.realpath(os.path.join(args.project_dir, path))
+        relative = os.path.relpath(full, os.path.realpath(index.root))
+        text = section_at(index, relative, int(line)) if line.isdigit() else None
+        if text is None:
+            print(f"No indexed section at {args.location}", file=sys.stderr)
+            sys.exit(1)
+        print(text.rstrip('\n'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,430 @@
+"""
+Section-level search index over the skills/ corpus.
+
+The skill docs are a few hundred markdown files and several MB
+(metrc-api/categories, redis/docs, zpl/docs, leaflink, tanstack-*, ...),
+and agents read whole files to find one endpoint or pattern. This index
+splits every document into heading-level sections and indexes them in a
+SQLite FTS5 table, ranked with BM25 (headings weighted above body text),
+so a query returns the few sections worth reading, each with its line and
+byte range for a targeted Read (offset/limit).
+
+The index lives in .claude/cache/skill-index.db and stays small: the FTS5
+table is contentless with column-level postings, and sections are stored
+as byte ranges into the files themselves (snippets are read from there).
+
+Reindexing is incremental: files whose (mtime, size) changed are
+re-hashed, and only files whose content hash changed are re-split; deleted
+files are dropped. A contentless table cannot delete rows without their
+original text, so a replaced file's old postings are orphaned instead
+(never returned, since results join against live sections) and the index
+is rebuilt once orphans pass COMPACT_RATIO of the live sections. Queries
+refresh the index first, which costs one stat per file when nothing
+changed.
+
+Only markdown is indexed; the JSON collections and schemas next to it
+have their own tools.
+
+    python3 -m hooklib.skillindex <project_dir> build
+    python3 -m hooklib.skillindex <project_dir> query "create package from harvest" [-k 5] [--skill metrc-api] [--json]
+    python3 -m hooklib.skillindex <project_dir> stats
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+
+from hooklib.skillrouter import plugin_root
+
+INDEX_FILE = os.path.join('.claude', 'cache', 'skill-index.db')
+INDEX_VERSION = 4
+
+# Rebuild from scratch once orphaned postings exceed this share of live sections
+COMPACT_RATIO = 0.25
+
+SNIPPET_LENGTH = 160
+
+DEFAULT_LIMIT = 5
+
+# BM25 column weights: the section's own heading, the document title and
+# parent headings it sits under, and the section body
+HEADING_WEIGHT = 4.0
+CONTEXT_WEIGHT = 1.5
+BODY_WEIGHT = 1.0
+
+HEADING = re.compile(rb'^(#{1,6})[ \t]+(.+?)[ \t#]*$')
+FENCE = re.compile(rb'^[ \t]*(```|~~~)')
+WORD = re.compile(r'\w+')
+# Token estimate: BPE vocabularies split words into ~4-character pieces and
+# most punctuation into its own token
+TOKEN_PIECE = re.compile(r'\w+|[^\w\s]')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    skill TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    tokens INTEGER NOT NULL
+);
+-- AUTOINCREMENT: a section id must never reuse the rowid of orphaned postings
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    document INTEGER NOT NULL,
+    heading TEXT NOT NULL,
+    context TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    tokens INTEGER NOT NULL,
+    line_start INTEGER NOT NULL,
+    line_end INTEGER NOT NULL,
+    byte_start INTEGER NOT NULL,
+    byte_end INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sections_document ON sections (document);
+CREATE VIRTUAL TABLE IF NOT EXISTS section_text USING fts5(
+    heading, context, body, content='', tokenize='porter unicode61'
+);
+"""
+
+
+def split_sections(data: bytes, title: str) -> list[dict]:
+    """
+    Split a markdown document at its headings (outside fenced code blocks).
+
+    Sections with no body text (a heading directly followed by a
+    subheading) are left out; their heading is part of the subsections'
+    context.
+
+    Returns:
+        [{"heading", "context": "Title > Parent", "level" (0 before the
+          first heading), "body", "tokens" (estimated, heading included),
+          "line_start", "line_end" (1-based, inclusive), "byte_start",
+          "byte_end" (exclusive)}]
+    """
+    sections = []
+    stack: list[tuple[int, str]] = []
+    current = {'heading': title, 'context': '', 'level': 0, 'line_start': 1, 'byte_start': 0, 'lines': []}
+    in_fence = False
+    offset = 0
+
+    def close(end_line: int, end_byte: int) -> None:
+        body = b''.join(current['lines']).decode('utf-8', 'replace').strip()
+        if body:
+            sections.append({
+                'heading': current['heading'],
+                'context': current['context'],
+                'level': current['level'],
+                'body': body,
+                'tokens': estimate_tokens(current['heading']) + estimate_tokens(body),
+                'line_start': current['line_start'],
+                'line_end': end_line,
+                'byte_start': current['byte_start'],
+                'byte_end': end_byte,
+            })
+
+    lines = data.splitlines(keepends=True)
+    for number, line in enumerate(lines, 1):
+        if FENCE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else HEADING.match(line.rstrip(b'\r\n'))
+        if match:
+            close(number - 1, offset)
+            level = len(match.group(1))
+            text = match.group(2).decode('utf-8', 'replace')
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            context = ' > '.join([title] + [heading for _level, heading in stack])
+            stack.append((level, text))
+            current = {'heading': text, 'context': context, 'level': level,
+                       'line_start': number, 'byte_start': offset, 'lines': []}
+        else:
+            current['lines'].append(line)
+        offset += len(line)
+
+    close(len(lines), offset)
+    return sections
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate LLM token count, for budgeting rather than billing."""
+    return sum((len(piece) + 3) // 4 for piece in TOKEN_PIECE.findall(text))
+
+
+def query_words(text: str) -> list[str]:
+    return list(dict.fromkeys(WORD.findall(text.lower())))
+
+
+def fts_query(text: str) -> str:
+    """Free text -> an FTS5 query matching any of its words (BM25 ranks sections with more of them first)."""
+    return ' OR '.join(f'"{word}"' for word in query_words(text))
+
+
+def snippet(text: str, words: list[str], length: int = SNIPPET_LENGTH) -> str:
+    """About `length` characters of `text` around the first query word (or its stem-ish prefix)."""
+    flat = ' '.join(text.split())
+    lowered = flat.lower()
+    hits = [lowered.find(word[:5]) for word in words]
+    hits = [hit for hit in hits if hit >= 0]
+    start = max(0, min(hits) - length // 4) if hits else 0
+    excerpt = flat[start:start + length]
+    return ('... ' if start else '') + excerpt + (' ...' if start + length < len(flat) else '')
+
+
+class SkillIndex:
+    """The FTS5 section index for one skills/ tree."""
+
+    def __init__(self, project_dir: str, root: str | None = None):
+        self.root = root or plugin_root()
+        self.path = os.path.join(project_dir, INDEX_FILE)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=5)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+        if self._meta('version') != str(INDEX_VERSION):
+            # Built by another version: the table layout may differ too
+            self.db.executescript('DROP TABLE IF EXISTS documents; DROP TABLE IF EXISTS sections; '
+                                  'DROP TABLE IF EXISTS section_text;')
+        self.db.executescript(SCHEMA)
+        if self._meta('version') != str(INDEX_VERSION):
+            self.reset()
+
+    def _meta(self, key: str, default: str | None = None) -> str | None:
+        row = self.db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key: str, value) -> None:
+        self.db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, str(value)))
+
+    def reset(self) -> None:
+        """Drop everything; the next refresh reindexes every file."""
+        with self.db:
+            self.db.execute('DELETE FROM documents')
+            self.db.execute('DELETE FROM sections')
+            self.db.execute("INSERT INTO section_text (section_text) VALUES ('delete-all')")
+            self._set_meta('version', INDEX_VERSION)
+            self._set_meta('orphans', 0)
+
+    def _documents(self):
+        """Yield (path relative to the plugin root, stat) for every markdown file under skills/."""
+        stack = [os.path.join(self.root, 'skills')]
+        while stack:
+            try:
+                entries = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith('.md'):
+                        yield os.path.relpath(entry.path, self.root), entry.stat()
+
+    def _remove(self, document: int) -> int:
+        """Forget a document's sections (their postings become orphans). Returns how many."""
+        count = self.db.execute('DELETE FROM sections WHERE document = ?', (document,)).rowcount
+        self.db.execute('DELETE FROM documents WHERE id = ?', (document,))
+        return count
+
+    def _add(self, path: str, data: bytes, digest: str, stat: os.stat_result) -> int:
+        parts = path.split(os.sep)
+        skill = parts[1] if len(parts) > 2 else ''
+        title = f"{skill}: {os.path.splitext(parts[-1])[0]}" if skill else path
+        sections = split_sections(data, title)
+        document = self.db.execute(
+            'INSERT INTO documents (path, skill, hash, mtime_ns, size, tokens) VALUES (?, ?, ?, ?, ?, ?)',
+            (path, skill, digest, stat.st_mtime_ns, stat.st_size, estimate_tokens(data.decode('utf-8', 'replace')))
+        ).lastrowid
+
+        for section in sections:
+            cursor = self.db.execute(
+                'INSERT INTO sections (document, heading, context, level, tokens, line_start, line_end, byte_start, byte_end) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (document, section['heading'], section['context'], section['level'], section['tokens'],
+                 section['line_start'], section['line_end'], section['byte_start'], section['byte_end']))
+            self.db.execute('INSERT INTO section_text (rowid, heading, context, body) VALUES (?, ?, ?, ?)',
+                            (cursor.lastrowid, section['heading'], section['context'], section['body']))
+        return len(sections)
+
+    def refresh(self) -> dict:
+        """
+        Bring the index up to date with the skills/ tree.
+
+        Returns:
+            {"files", "changed", "removed", "sections", "compacted"} for this refresh
+        """
+        result = self._refresh()
+        orphans = int(self._meta('orphans', '0'))
+        live = self.db.execute('SELECT COUNT(*) FROM sections').fetchone()[0]
+        result['compacted'] = orphans > COMPACT_RATIO * max(live, 1)
+        if result['compacted']:
+            self.reset()
+            self._refresh()
+        return result
+
+    def _refresh(self) -> dict:
+        known = {path: (document, digest, mtime, size) for document, path, digest, mtime, size
+                 in self.db.execute('SELECT id, path, hash, mtime_ns, size FROM documents')}
+        seen = set()
+        changed = 0
+        added_sections = 0
+        orphaned = 0
+
+        with self.db:
+            for path, stat in self._documents():
+                seen.add(path)
+                previous = known.get(path)
+                if previous and previous[2] == stat.st_mtime_ns and previous[3] == stat.st_size:
+                    continue
+                try:
+                    with open(os.path.join(self.root, path), 'rb') as f:
+                        data = f.read()
+                except OSError:
+                    continue
+                digest = hashlib.sha1(data).hexdigest()
+                if previous and previous[1] == digest:
+                    # Touched but identical: just remember the new stat
+                    self.db.execute('UPDATE documents SET mtime_ns = ?, size = ? WHERE id = ?',
+                                    (stat.st_mtime_ns, stat.st_size, previous[0]))
+                    continue
+                if previous:
+                    orphaned += self._remove(previous[0])
+                added_sections += self._add(path, data, digest, stat)
+                changed += 1
+
+            removed = [path for path in known if path not in seen]
+            for path in removed:
+                orphaned += self._remove(known[path][0])
+            if orphaned:
+                self._set_meta('orphans', int(self._meta('orphans', '0')) + orphaned)
+
+        return {'files': len(seen), 'changed': changed, 'removed': len(removed), 'sections': added_sections}
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT, skill: str | None = None) -> list[dict]:
+        """
+        The best-matching sections, best first.
+
+        Returns:
+            [{"path", "heading", "context", "line_start", "line_end",
+              "byte_start", "byte_end", "score", "snippet"}] where path is relative to the
+            plugin (or .claude/) root and lower scores rank higher (BM25)
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        # Orphaned postings have no sections row, so the join drops them
+        sql = (f"SELECT d.path, s.heading, s.context, s.line_start, s.line_end, s.byte_start, s.byte_end, "
+               f"bm25(section_text, {HEADING_WEIGHT}, {CONTEXT_WEIGHT}, {BODY_WEIGHT}) AS score "
+               f"FROM section_text JOIN sections s ON s.id = section_text.rowid "
+               f"JOIN documents d ON d.id = s.document "
+               f"WHERE section_text MATCH ?")
+        params: list = [match]
+        if skill:
+            sql += " AND d.skill = ?"
+            params.append(skill)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+
+        keys = ('path', 'heading', 'context', 'line_start', 'line_end', 'byte_start', 'byte_end', 'score')
+        results = [dict(zip(keys, row)) for row in self.db.execute(sql, params)]
+        words = query_words(query)
+        for result in results:
+            text = self.read_section(result)
+            if text.startswith('#'):
+                # The heading is already in the result
+                text = text.partition('\n')[2]
+            result['snippet'] = snippet(text, words)
+        return results
+
+    def read_section(self, result: dict) -> str:
+        """A result's section text, read from its file by byte offset."""
+        try:
+            with open(os.path.join(self.root, result['path']), 'rb') as f:
+                f.seek(result['byte_start'])
+                return f.read(result['byte_end'] - result['byte_start']).decode('utf-8', 'replace')
+        except OSError:
+            return 
+
+    def stats(self) -> dict:
+        documents = self.db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM documents').fetchone()
+        sections = self.db.execute('SELECT COUNT(*) FROM sections').fetchone()[0]
+        index_bytes = 0
+        for suffix in ('', '-wal'):
+            try:
+                index_bytes += os.path.getsize(self.path + suffix)
+            except OSError:
+                pass
+        return {'documents': documents[0], 'corpus_bytes': documents[1], 'sections': sections,
+                'orphans': int(self._meta('orphans', '0')), 'index_bytes': index_bytes,
+                'path': self.path, 'root': self.root}
+
+
+def display_path(project_dir: str, root: str, path: str) -> str:
+    """An indexed path as the agent should Read it: relative to the project when inside it, else absolute."""
+    full = os.path.join(root, path)
+    relative = os.path.relpath(full, project_dir)
+    return full if relative.startswith('..') else relative
+
+
+def search(project_dir: str, query: str, limit: int = DEFAULT_LIMIT, skill: str | None = None) -> list[dict]:
+    """Refresh the project's skill index and query it (for hooks and other callers)."""
+    index = SkillIndex(project_dir)
+    index.refresh()
+    return index.search(query, limit, skill)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python3 -m hooklib.skillindex', description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('project_dir')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('build', help='index new and changed skill files')
+    commands.add_parser('stats', help='show index size')
+    query = commands.add_parser('query', help='top-k sections for a query')
+    query.add_argument('text')
+    query.add_argument('-k', type=int, default=DEFAULT_LIMIT, help='number of sections')
+    query.add_argument('--skill', help='only search this skill')
+    query.add_argument('--json', action='store_true', help='machine-readable output')
+    args = parser.parse_args()
+
+    try:
+        index = SkillIndex(args.project_dir)
+    except sqlite3.OperationalError as e:
+        # e.g. a Python build whose SQLite lacks FTS5
+        print(f"Skill index unavailable: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    refreshed = index.refresh()
+
+    if args.command == 'build':
+        compacted = ', rebuilt to drop orphans' if refreshed['compacted'] else ''
+        print(f"Indexed {refreshed['changed']} changed file(s), removed {refreshed['removed']}{compacted} "
+              f"({refreshed['files']} files in {os.path.join(index.root, 'skills')})")
+    elif args.command == 'stats':
+        stats = index.stats()
+        print(f"Index:     {stats['path']}")
+        print(f"Corpus:    {stats['documents']} files, {stats['corpus_bytes']} bytes ({stats['root']})")
+        print(f"Sections:  {stats['sections']} ({stats['orphans']} orphaned, rebuilt past {COMPACT_RATIO:.0%})")
+        print(f"Size:      {stats['index_bytes']} bytes")
+    else:
+        results = index.search(args.text, args.k, args.skill)
+        if args.json:
+            print(json.dumps(results, indent=1))
+            return
+        for result in results:
+            lines = result['line_end'] - result['line_start'] + 1
+            print(f"{display_path(args.project_dir, index.root, result['path'])}:{result['line_start']}-{result['line_end']} "
+                  f"(Read offset={result['line_start']} limit={lines}; bytes {result['byte_start']}-{result['byte_end']})")
+            print(f"  {' > '.join(filter(None, [result['context'], result['heading']]))}")
+            print(f"  {result['snippet']}")
+        if not results:
+            print("No matching sections")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,314 @@
+"""
+Keyword router for UserPromptSubmit.
+
+Instead of injecting the full domain routing table on every prompt, the
+router matches the prompt against one Aho-Corasick automaton
+(hooklib/ahocorasick.py) built from:
+
+- every skill's `auto_activate.keywords` in its SKILL.md frontmatter
+- DOMAIN_KEYWORDS, the indicators from the old routing table for skills and
+  agents whose frontmatter declares none
+- UI_KEYWORDS, the styling phrases that trigger the UI scope reminder
+
+Each keyword routes to a recommendation: the skill's specialist agent
+(its `agent:` frontmatter, else the agent whose `skills:` lists it) or the
+skill itself. Only the best MAX_RECOMMENDATIONS are printed, and nothing
+at all when no keyword matches.
+
+The compiled router is cached in .claude/cache/skill-router.json and
+rebuilt only when a SKILL.md or agent file changes (by mtime) or the
+built-in keyword lists do. Under the hook daemon it also stays in memory.
+"""
+
+import hashlib
+import json
+import os
+
+from hooklib import trace
+from hooklib.ahocorasick import Automaton
+
+CACHE_FILE = os.path.join('.claude', 'cache', 'skill-router.json')
+CACHE_VERSION = 1
+
+MAX_RECOMMENDATIONS = 2
+
+AGENT_PREFIX = 'budtags:'
+
+# Auto-loaded by most agents, so listing it says nothing about which agent a skill belongs to
+COMMON_SKILLS = ('verify-alignment',)
+
+# Routing-table indicators for skills (and skill-less agents) without frontmatter keywords
+DOMAIN_KEYWORDS = {
+    'metrc-api': ['plants', 'packages', 'harvests', 'transfers', 'sales receipts', 'lab tests', 'license types'],
+    'quickbooks': ['quickbooks', 'qbo', 'invoices', 'customers', 'payments', 'oauth', 'SyncToken'],
+    'leaflink': ['leaflink', 'wholesale', 'inventory sync', 'orders', 'products'],
+    'tanstack-query': ['useQuery', 'useMutation'],
+    'tanstack-table': ['useReactTable'],
+    'tanstack-virtual': ['useVirtualizer'],
+    'quill': ['quill', 'rich text editor'],
+    'zpl': ['zpl', 'zebra', 'label printing', 'print labels'],
+    'labelary-help': ['labelary', 'zpl preview'],
+    'tailwindcss-development': ['tailwind', 'tailwindcss'],
+    'skill-builder': ['new skill', 'create skill', 'SKILL.md'],
+    '@react-specialist': ['modal', 'modals', 'toast', 'toasts', 'tsx component', 'react component'],
+    '@php-developer': ['controller', 'migration', 'eloquent', 'artisan command', 'form request'],
+}
+
+UI_KEYWORDS = [
+    'restyle', 'redesign', 'update the look', 'update the ui', 'update the design', 'update the layout',
+    'update the style', 'change the layout', 'change the design', 'change the look', 'change the style',
+    'make it look', 'visual', 'visually', 'breakpoint', 'responsive', 'mobile view', 'dark mode', 'theme',
+    'new design', 'ui change', 'styling change', 'move the', 'reposition', 'realign',
+]
+
+UI_ROUTE = '@ui'
+
+UI_REMINDER = """UI SCOPE REMINDER: Before implementing UI changes, clarify:
+- Which specific components or pages are affected?
+- Which states should change (hover, active, empty, loading, error)?
+- Which breakpoints matter (mobile, tablet, desktop)?
+- Should this match an existing pattern in the codebase, or is it a new design?
+Ask the user if any of these are unclear from their request."""
+
+# (signature, router) of the last router loaded by this process
+_loaded: tuple[list, 'Router'] | None = None
+
+
+def plugin_root() -> str:
+    """The directory holding skills/ and agents/ next to this hooks/ tree."""
+    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+
+def _unquote(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+        return value[1:-1]
+    return value
+
+
+def read_frontmatter(path: str) -> dict:
+    """
+    The YAML frontmatter subset skills and agents use: top-level scalars and
+    one level of nested mappings of string lists (auto_activate.keywords).
+    """
+    data: dict = {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = [line.rstrip('\r\n') for line in f]
+    except OSError:
+        return data
+    if not lines or lines[0].strip() != '---':
+        return data
+
+    parent = None
+    current_list = None
+    for line in lines[1:]:
+        if line.strip() == '---':
+            break
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        stripped = line.strip()
+        indent = len(line) - len(line.lstrip())
+
+        if stripped.startswith('- '):
+            if current_list is not None:
+                current_list.append(_unquote(stripped[2:]))
+            continue
+
+        key, _, value = stripped.partition(':')
+        key, value = key.strip(), value.strip()
+        if indent == 0:
+            parent = key
+            current_list = None
+            if value and value not in ('>', '>-', '|', '|-'):
+                data[key] = _unquote(value)
+            elif not value:
+                data[key] = {}
+        elif isinstance(data.get(parent), dict):
+            if value:
+                data[parent][key] = _unquote(value)
+            else:
+                current_list = data[parent].setdefault(key, [])
+    return data
+
+
+def source_files(root: str) -> list[str]:
+    files = []
+    skills_dir = os.path.join(root, 'skills')
+    try:
+        for name in sorted(os.listdir(skills_dir)):
+            path = os.path.join(skills_dir, name, 'SKILL.md')
+            if os.path.isfile(path):
+                files.append(path)
+    except OSError:
+        pass
+    agents_dir = os.path.join(root, 'agents')
+    try:
+        files.extend(os.path.join(agents_dir, name) for name in sorted(os.listdir(agents_dir)) if name.endswith('.md'))
+    except OSError:
+        pass
+    return files
+
+
+def signature(files: list[str]) -> list:
+    """What the router was built from: each source file's mtime, plus the built-in keyword lists."""
+    builtin = hashlib.sha1(json.dumps([DOMAIN_KEYWORDS, UI_KEYWORDS], sort_keys=True).encode()).hexdigest()
+    entries: list = [CACHE_VERSION, builtin]
+    for path in files:
+        try:
+            entries.append([path, os.stat(path).st_mtime_ns])
+        except OSError:
+            pass
+    return entries
+
+
+class Router:
+    """Prompt keywords -> agent/skill recommendations."""
+
+    def __init__(self, automaton: Automaton, skills: dict[str, str | None], agents: dict[str, list[str]]):
+        # Keyword values are skill names, "@<agent>" for agent-only keywords, or UI_ROUTE
+        self.automaton = automaton
+        # skill -> the agent it routes to (None: recommend the skill itself)
+        self.skills = skills
+        # agent -> the skills its `skills:` frontmatter auto-loads
+        self.agents = agents
+
+    @classmethod
+    def build(cls, files: list[str]) -> 'Router':
+        skill_meta = {}
+        agents = {}
+        for path in files:
+            meta = read_frontmatter(path)
+            name = meta.get('name')
+            if not isinstance(name, str):
+                continue
+            if os.path.basename(path) == 'SKILL.md':
+                skill_meta[name] = meta
+            else:
+                listed = meta.get('skills', '')
+                agents[name] = [s.strip() for s in listed.split(',') if s.strip()] if isinstance(listed, str) else []
+
+        automaton = Automaton()
+        skills = {}
+        for name, meta in skill_meta.items():
+            agent = meta.get('agent') if isinstance(meta.get('agent'), str) else None
+            if agent is None:
+                # The agent that auto-loads this skill, if any does
+                agent = next((a for a, listed in agents.items() if name in listed and name not in COMMON_SKILLS), None)
+            skills[name] = agent
+
+            activate = meta.get('auto_activate')
+            keywords = activate.get('keywords', []) if isinstance(activate, dict) else []
+            for keyword in list(keywords) + DOMAIN_KEYWORDS.get(name, []):
+                automaton.add(keyword, name)
+
+        for key, keywords in DOMAIN_KEYWORDS.items():
+            if key.startswith('@') and key[1:] in agents:
+                for keyword in keywords:
+                    automaton.add(keyword, key)
+
+        for keyword in UI_KEYWORDS:
+            automaton.add(keyword, UI_ROUTE)
+
+        return cls(automaton.build(), skills, agents)
+
+    def to_dict(self) -> dict:
+        return {'automaton': self.automaton.to_dict(), 'skills': self.skills, 'agents': self.agents}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Router':
+        return cls(Automaton.from_dict(data['automaton']), data['skills'], data['agents'])
+
+    def match(self, prompt: str) -> tuple[list[dict], bool]:
+        """
+        Returns:
+            ([{"agent", "skills", "keywords"}] best first, at most
+            MAX_RECOMMENDATIONS, where agent is None for a plain skill
+            recommendation and skills are the matched skills; whether a UI
+            keyword matched)
+        """
+        ui = False
+        hits: dict[str, dict] = {}
+        for _start, keyword, value in self.automaton.search(prompt):
+            if value == UI_ROUTE:
+                ui = True
+                continue
+            if value.startswith('@'):
+                agent, skill = value[1:], None
+            else:
+                agent, skill = self.skills.get(value), value
+            hit = hits.setdefault('@' + agent if agent else skill, {'agent': agent, 'skills': [], 'keywords': []})
+            if skill and skill not in hit['skills']:
+                hit['skills'].append(skill)
+            if keyword not in hit['keywords']:
+                hit['keywords'].append(keyword)
+
+        ranked = sorted(hits.values(), key=lambda hit: (-len(hit['keywords']), -sum(map(len, hit['keywords']))))
+        return ranked[:MAX_RECOMMENDATIONS], ui
+
+    def describe(self, hit: dict) -> str:
+        """"`budtags:metrc-specialist` agent (auto-loads metrc-api; also read metrc-tinker)" or "`zpl` skill"."""
+        if hit['agent'] is None:
+            return f"`{hit['skills'][0]}` skill"
+        loaded = self.agents.get(hit['agent'], [])
+        notes = []
+        if loaded:
+            notes.append(f"auto-loads {', '.join(loaded)}")
+        extra = [s for s in hit['skills'] if s not in loaded]
+        if extra:
+            notes.append(f"also read the {', '.join(extra)} skill")
+        return f"`{AGENT_PREFIX}{hit['agent']}` agent" + (f" ({'; '.join(notes)})" if notes else '')
+
+
+def load_router(project_dir: str, root: str | None = None) -> Router:
+    """The compiled router, from memory or the disk cache when its sources are unchanged."""
+    global _loaded
+    files = source_files(root or plugin_root())
+    current = signature(files)
+    if _loaded is not None and _loaded[0] == current:
+        trace.cache('skillrouter', True)
+        return _loaded[1]
+
+    cache_path = os.path.join(project_dir, CACHE_FILE)
+    router = None
+    try:
+        with open(cache_path, 'r') as f:
+            cached = json.load(f)
+        if cached.get('signature') == current:
+            router = Router.from_dict(cached)
+    except (OSError, ValueError, KeyError):
+        pass
+
+    trace.cache('skillrouter', router is not None)
+    if router is None:
+        router = Router.build(files)
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'signature': current, **router.to_dict()}, f)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+
+    _loaded = (current, router)
+    return router
+
+
+def route_prompt(prompt: str, project_dir: str, root: str | None = None) -> str:
+    """The context to inject for a prompt ('' when nothing matches)."""
+    router = load_router(project_dir, root)
+    recommendations, ui = router.match(prompt)
+
+    sections = []
+    if recommendations:
+        lines = ["SKILL ROUTING: this prompt matches:"]
+        for hit in recommendations:
+            matched = ', '.join(f'"{k}"' for k in hit['keywords'][:4])
+            lines.append(f"- {router.describe(hit)} - matched {matched}")
+        lines.append("Spawn the matching specialist with the Task tool (it loads its skills itself), "
+                     "or read the skill before implementing.")
+        sections.append('\n'.join(lines))
+    if ui:
+        sections.append(UI_REMINDER)
+    return '\n\n'.join(sections)
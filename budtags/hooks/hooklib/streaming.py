@@ -0,0 +1,249 @@
+"""
+Streaming, bounded-memory capture of test and type-check output.
+
+A failing suite or a project-wide tsc error storm can print tens of MB.
+Buffering all of it with capture_output=True, splitting it into lines and
+then keeping 30 of them wastes memory and time, and whatever survives ends
+up in the block `reason`. Instead, run_command() reads the merged
+stdout/stderr line by line and feeds it to a collector that keeps only
+what the hook reports:
+
+- PhpUnitOutput: the first MAX_FAILURES failure blocks (capped per block)
+  plus a ring buffer of the last lines (the "Tests: 2 failed" summary).
+  Once one more failure starts, the run has clearly failed and is stopped.
+- TscOutput: diagnostics grouped by file, capped per file and in total
+  (past the total only the names of failing files are kept).
+- LineOutput: the first lines of any other tool's report (Pint, PHPStan).
+
+A collector is any object with `feed(line) -> bool`; returning False
+stops the command early.
+"""
+
+import os
+import re
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+
+from hooklib import trace
+from hooklib.coalesce import Cancelled
+
+POLL_INTERVAL = 0.05
+
+# Longer lines (minified bundles, serialized fixtures) are cut at this many bytes
+MAX_LINE_LENGTH = 4096
+
+# Failure blocks kept from PHPUnit output before the run is stopped
+MAX_FAILURES = 5
+LINES_PER_FAILURE = 40
+TAIL_LINES = 15
+
+# tsc diagnostic lines kept per file and overall
+TSC_LINES_PER_FILE = 30
+TSC_MAX_LINES = 2000
+
+# PHPUnit "1) Tests\Unit\FooTest::test_x", Collision "FAILED  Tests\Unit\FooTest > x"
+FAILURE_START = re.compile(r'^\s*(?:\d+\) |(?:FAILED|ERROR) |[⨯✕] )')
+# "resources/js/Pages/Foo.tsx(12,5): error TS2322: ..."
+TSC_DIAGNOSTIC = re.compile(r'^(.+?)\(\d+,\d+\): error TS\d+:')
+
+
+def read_lines(stream, max_length: int = MAX_LINE_LENGTH):
+    """Yield decoded lines from a binary stream, cutting any line longer than max_length bytes."""
+    while True:
+        chunk = stream.readline(max_length)
+        if not chunk:
+            return
+        if len(chunk) == max_length and not chunk.endswith(b'\n'):
+            # Skip the rest of an overlong line
+            while True:
+                rest = stream.readline(max_length)
+                if not rest or rest.endswith(b'\n'):
+                    break
+            chunk += b' ... [line truncated]'
+        yield chunk.decode('utf-8', 'replace').rstrip('\r\n')
+
+
+class PhpUnitOutput:
+    """The failing assertions and the summary of a PHPUnit / `artisan test` run."""
+
+    def __init__(self, max_failures: int = MAX_FAILURES, lines_per_failure: int = LINES_PER_FAILURE,
+                 tail_lines: int = TAIL_LINES):
+        self.max_failures = max_failures
+        self.lines_per_failure = lines_per_failure
+        self.failure_lines: list[tuple[int, str]] = []
+        self.tail: deque[tuple[int, str]] = deque(maxlen=tail_lines)
+        self.lines = 0
+        self.failures = 0
+        self.block_lines = 0
+        self.stopped_early = False
+
+    def feed(self, line: str) -> bool:
+        index = self.lines
+        self.lines += 1
+
+        if FAILURE_START.match(line):
+            self.failures += 1
+            self.block_lines = 0
+            if self.failures > self.max_failures:
+                self.stopped_early = True
+                return False
+
+        if self.failures:
+            self.block_lines += 1
+            if self.block_lines <= self.lines_per_failure:
+                self.failure_lines.append((index, line))
+
+        self.tail.append((index, line))
+        return True
+
+    def text(self) -> str:
+        """Kept lines in their original order, with gaps marked."""
+        kept = dict(self.failure_lines)
+        kept.update(self.tail)
+
+        output = []
+        previous = -1
+        for index in sorted(kept):
+            if index > previous + 1:
+                output.append(f"... ({index - previous - 1} lines omitted)")
+            output.append(kept[index])
+            previous = index
+
+        if self.stopped_early:
+            output.append(f"... (stopped after {self.max_failures} failures; remaining tests not run)")
+        return '\n'.join(output)
+
+
+class TscOutput:
+    """tsc diagnostics grouped by file, so each edit can pick out its own."""
+
+    def __init__(self, lines_per_file: int = TSC_LINES_PER_FILE, max_lines: int = TSC_MAX_LINES):
+        self.lines_per_file = lines_per_file
+        self.max_lines = max_lines
+        self.by_file: dict[str, list[str]] = {}
+        # Files with errors seen after max_lines was reached (names only)
+        self.overflow: set[str] = set()
+        self.kept = 0
+        self.current = None
+
+    def feed(self, line: str) -> bool:
+        match = TSC_DIAGNOSTIC.match(line)
+        if match:
+            path = match.group(1)
+            if path not in self.by_file and self.kept >= self.max_lines:
+                self.overflow.add(path)
+                self.current = None
+            else:
+                self.current = self.by_file.setdefault(path, [])
+        elif not line.startswith(' '):
+            # Summary or global error, not part of a file's diagnostic
+            self.current = None
+
+        if self.current is not None and len(self.current) < self.lines_per_file:
+            self.current.append(line)
+            self.kept += 1
+        # tsc reports everything at the end; reading on is cheap and keeps
+        # every file's verdict, so never stop early
+        return True
+
+    def errors_by_file(self) -> dict[str, list[str]]:
+        """{file: diagnostic lines}, with a placeholder line for files past the total cap."""
+        errors = dict(self.by_file)
+        for path in self.overflow:
+            errors[path] = [f"{path}: has type errors (details dropped; over {self.max_lines} diagnostic lines project-wide)"]
+        return errors
+
+
+class LineOutput:
+    """The first `max_lines` lines of a command's output, plus a count of the rest."""
+
+    def __init__(self, max_lines: int = LINES_PER_FAILURE):
+        self.max_lines = max_lines
+        self.lines: list[str] = []
+        self.total = 0
+
+    def feed(self, line: str) -> bool:
+        self.total += 1
+        if len(self.lines) < self.max_lines:
+            self.lines.append(line)
+        return True
+
+    def text(self) -> str:
+        output = list(self.lines)
+        if self.total > len(self.lines):
+            output.append(f"... ({self.total - len(self.lines)} more lines)")
+        return '\n'.join(output)
+
+
+def kill_group(process: subprocess.Popen) -> None:
+    """Kill a command and everything it started (npx -> node), so nothing keeps the output pipe open."""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        process.kill()
+
+
+def run_command(command: list[str], cwd: str, timeout: float, collector,
+                cancelled: threading.Event | None = None, env: dict[str, str] | None = None) -> int:
+    """
+    Run a command, streaming its merged stdout/stderr into `collector`.
+
+    The command and its children are killed once the collector has seen
+    enough, when `cancelled` is set, or after `timeout` seconds. `env` is
+    added to the inherited environment.
+
+    Returns:
+        the exit code (1 if the collector stopped a command that was still running)
+
+    Raises:
+        Cancelled: `cancelled` was set
+        subprocess.TimeoutExpired: the command ran longer than `timeout`
+    """
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        command,
+        cwd=cwd,
+        env={**os.environ, **env} if env else None,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + timeout
+    finished = threading.Event()
+    timed_out = threading.Event()
+
+    def watchdog():
+        while not finished.wait(POLL_INTERVAL):
+            if cancelled is not None and cancelled.is_set():
+                kill_group(process)
+                return
+            if time.monotonic() > deadline:
+                timed_out.set()
+                kill_group(process)
+                return
+
+    threading.Thread(target=watchdog, daemon=True).start()
+    stopped = False
+    try:
+        for line in read_lines(process.stdout):
+            if not collector.feed(line):
+                stopped = True
+                kill_group(process)
+                break
+        return_code = process.wait()
+    finally:
+        finished.set()
+        process.stdout.close()
+        trace.subprocess_time(time.perf_counter() - started)
+
+    if cancelled is not None and cancelled.is_set():
+        raise Cancelled()
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(command, timeout)
+    if stopped and return_code <= 0:
+        return 1
+    return return_code
@@ -0,0 +1,389 @@
+"""
+Deterministic pre-filter for the SubagentStop completion check.
+
+The SubagentStop hook used to be a `type: prompt` evaluation: every
+subagent completion waited (up to 30s) on an LLM judging whether the
+subagent finished its task. Most completions are not close calls, so the
+subagent's transcript is now read first, in one streaming pass:
+
+- the task it was given, its tool calls (by tool, and how many failed)
+  and its final answer
+- ok when it explored (at least one tool call) and gave a substantial
+  answer with no give-up phrasing
+- block, with a reason, when it ended without an answer, or gave up
+  ("I couldn't find ...") after fewer than MIN_TOOL_CALLS tool calls
+- ok when the stop hook already sent it back once (stop_hook_active), so
+  a subagent is never held in a loop
+
+Everything else is escalated to the same evaluator prompt the prompt hook
+used, run headless (BUDTAGS_SUBAGENT_ESCALATE, default `claude -p --model
+haiku`) with a digest of the transcript. An escalation that fails or
+times out lets the subagent stop, as a timed-out prompt hook did. Set
+BUDTAGS_SUBAGENT_ESCALATE=0 to never escalate, BUDTAGS_SUBAGENT_CHECK=0 to
+turn the check off.
+
+Every decision is logged to .claude/logs/subagent-check.jsonl:
+
+    python3 -m hooklib.subagentcheck <project_dir> stats
+    python3 -m hooklib.subagentcheck <project_dir> check <transcript.jsonl>
+"""
+
+import argparse
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import time
+
+from hooklib import trace
+
+LOG_FILE = os.path.join('.claude', 'logs', 'subagent-check.jsonl')
+
+# Set BUDTAGS_SUBAGENT_CHECK=0 to let every subagent stop unchecked
+CHECK_ENV_FLAG = 'BUDTAGS_SUBAGENT_CHECK'
+
+# Command that answers the evaluator prompt (read from stdin); 0 disables escalation
+ESCALATE_ENV = 'BUDTAGS_SUBAGENT_ESCALATE'
+ESCALATE_COMMAND = 'claude -p --model haiku'
+
+# Seconds an escalation may take; the hook itself times out at 30s
+ESCALATION_TIMEOUT = 25
+
+# A final answer at least this long, after some exploration, is a completion
+MIN_ANSWER_CHARS = 300
+
+# Giving up after fewer tool calls than this is giving up too early
+MIN_TOOL_CALLS = 3
+
+# Characters of the task and the final answer passed on to the evaluator
+DIGEST_CHARS = 4000
+
+# The prompt hook's instructions, unchanged; $ARGUMENTS becomes the hook
+# input plus the transcript digest
+EVALUATOR_PROMPT = """Evaluate if this subagent completed its assigned task.
+
+Subagent transcript: $ARGUMENTS
+
+Check:
+1. Did the subagent find what it was looking for?
+2. Did it explore enough files/patterns?
+3. Did it give up too early?
+4. Is the response comprehensive enough?
+
+Return {"ok": true} if complete, or {"ok": false, "reason": "explanation"} if the subagent should continue."""
+
+GIVE_UP = re.compile(
+    r"\b(?:I (?:could(?:n't| not)|was(?:n't| not) able to|am unable to|'m unable to|cannot|can't) "
+    r"(?:find|locate|determine|access|complete|identify|figure out)"
+    r"|unable to (?:find|locate|determine|complete)"
+    r"|no (?:matching |relevant )?(?:files|results|matches) (?:were )?found"
+    r"|(?:ran|running) out of"
+    r"|gave up|giving up"
+    r"|(?:need|would need) more (?:information|context)"
+    r"|let me know if you(?:'d| would) like me to (?:continue|keep|dig))",
+    re.IGNORECASE)
+
+SIDECHAIN = re.compile(r'"isSidechain"\s*:\s*true')
+
+VERDICT = re.compile(r'\{[^{}]*"ok"\s*:\s*(?:true|false)[^{}]*\}')
+
+
+def enabled() -> bool:
+    return os.environ.get(CHECK_ENV_FLAG) != '0'
+
+
+class Transcript:
+    """What a subagent did, accumulated one transcript entry at a time."""
+
+    __slots__ = ('agent', 'entries', 'task', 'tool_calls', 'tools', 'tool_errors', 'answer', 'ended_on_tool')
+
+    def __init__(self, agent: str | None = None):
+        self.agent = agent
+        self.entries = 0
+        self.task = ''
+        self.tool_calls = 0
+        self.tools: dict[str, int] = {}
+        self.tool_errors = 0
+        self.answer = ''
+        self.ended_on_tool = False
+
+    def feed(self, entry: dict) -> None:
+        message = entry.get('message')
+        if not isinstance(message, dict):
+            return
+        self.entries += 1
+        content = message.get('content')
+        if isinstance(content, str):
+            content = [{'type': 'text', 'text': content}]
+        if not isinstance(content, list):
+            return
+
+        if entry.get('type') == 'user':
+            for block in content:
+                if not isinstance(block, dict):
+                    continue
+                if block.get('type') == 'tool_result' and block.get('is_error'):
+                    self.tool_errors += 1
+                elif block.get('type') == 'text' and not self.task:
+                    self.task = block.get('text', '')
+        elif entry.get('type') == 'assistant':
+            text = '\n'.join(block.get('text', '') for block in content
+                             if isinstance(block, dict) and block.get('type') == 'text').strip()
+            calls = [block.get('name', '?') for block in content
+                     if isinstance(block, dict) and block.get('type') == 'tool_use']
+            for name in calls:
+                self.tools[name] = self.tools.get(name, 0) + 1
+            self.tool_calls += len(calls)
+            if text:
+                self.answer = text
+            self.ended_on_tool = bool(calls)
+
+    def digest(self) -> dict:
+        """The transcript in brief, for the evaluator."""
+        return {
+            'task': self.task[:DIGEST_CHARS],
+            'tool_calls': self.tool_calls,
+            'tools': self.tools,
+            'failed_tool_calls': self.tool_errors,
+            'final_answer': self.answer[-DIGEST_CHARS:],
+        }
+
+
+def read_transcript(path: str, sidechain_only: bool, agent: str | None = None) -> Transcript | None:
+    """
+    Stream a transcript file into a Transcript.
+
+    With `sidechain_only` (the session's own transcript), only subagent
+    entries count, summarized per agentId since parallel subagents
+    interleave: the summary is `agent`'s, or the last subagent's if no
+    agent is given.
+
+    Returns:
+        the summary, or None when the file can't be read
+    """
+    summary = Transcript(agent)
+    summaries = {agent: summary}
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                if sidechain_only and not SIDECHAIN.search(line):
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(entry, dict):
+                    continue
+                if sidechain_only:
+                    entry_agent = entry.get('agentId')
+                    if entry_agent not in summaries:
+                        summaries[entry_agent] = Transcript(entry_agent)
+                    if agent is None:
+                        summary = summaries[entry_agent]
+                    summaries[entry_agent].feed(entry)
+                else:
+                    summary.feed(entry)
+    except OSError:
+        return None
+    return summary
+
+
+def judge(summary: Transcript | None, stop_hook_active: bool = False) -> tuple[str, str]:
+    """
+    Decide a stop from the transcript alone.
+
+    Returns:
+        (verdict, reason) where verdict is 'ok', 'block' or 'escalate'
+    """
+    if stop_hook_active:
+        return 'ok', "already sent back once by this hook"
+    if summary is None or not summary.entries:
+        return 'escalate', "no transcript to read"
+
+    calls = f"{summary.tool_calls} tool call{'s' if summary.tool_calls != 1 else ''}"
+    if not summary.answer:
+        return 'block', (f"The subagent stopped after {calls} without a final answer. "
+                         "Report what you found, or continue the task.")
+
+    if summary.ended_on_tool:
+        return 'escalate', f"ended on a tool call after {calls}"
+
+    give_up = GIVE_UP.search(summary.answer)
+    if give_up and summary.tool_calls < MIN_TOOL_CALLS:
+        return 'block', (f"The subagent gave up after only {calls} (\"{give_up.group(0)}\"). "
+                         "Search other names, patterns and directories before concluding it doesn't exist.")
+    if give_up:
+        return 'escalate', f"gave up (\"{give_up.group(0)}\") after {calls}"
+    if summary.tool_calls and summary.tool_errors >= summary.tool_calls:
+        return 'escalate', f"all {calls} failed"
+    if summary.tool_calls and len(summary.answer) >= MIN_ANSWER_CHARS:
+        return 'ok', f"answered ({len(summary.answer)} chars) after {calls}"
+    if not summary.tool_calls:
+        return 'escalate', "answered without exploring"
+    return 'escalate', f"short answer ({len(summary.answer)} chars) after {calls}"
+
+
+def escalate(input_data: dict, summary: Transcript | None) -> tuple[bool | None, str]:
+    """
+    Ask the evaluator prompt about an ambiguous stop.
+
+    Returns:
+        (ok, reason), or (None, error) if the evaluator didn't answer
+    """
+    command = os.environ.get(ESCALATE_ENV, ESCALATE_COMMAND)
+    arguments = dict(input_data)
+    if summary is not None:
+        arguments['transcript_digest'] = summary.digest()
+    prompt = EVALUATOR_PROMPT.replace('$ARGUMENTS', json.dumps(arguments, indent=1))
+
+    # The evaluator's own session must not run this check again
+    env = dict(os.environ, **{CHECK_ENV_FLAG: '0'})
+    try:
+        with trace.subprocess_timer():
+            result = subprocess.run(shlex.split(command), input=prompt, capture_output=True, text=True,
+                                    timeout=ESCALATION_TIMEOUT, env=env, check=False)
+    except (OSError, ValueError, subprocess.TimeoutExpired) as e:
+        return None, f"{type(e).__name__}: {e}"
+
+    match = VERDICT.search(result.stdout)
+    if match is None:
+        return None, f"no verdict in the evaluator's output (exit {result.returncode})"
+    try:
+        verdict = json.loads(match.group(0))
+    except ValueError:
+        return None, "unparseable verdict"
+    return bool(verdict.get('ok')), str(verdict.get('reason', ''))
+
+
+def evaluate(input_data: dict, project_dir: str) -> dict | None:
+    """
+    Decide whether a subagent may stop.
+
+    Returns:
+        None to let it stop, or {"decision": "block", "reason": ...} to send it back
+    """
+    began = time.perf_counter()
+    agent_path = input_data.get('agent_transcript_path')
+    path = agent_path or input_data.get('transcript_path')
+    agent = input_data.get('agent_id')
+    summary = (read_transcript(path, sidechain_only=not agent_path, agent=agent if isinstance(agent, str) else None)
+               if isinstance(path, str) else None)
+    verdict, reason = judge(summary, bool(input_data.get('stop_hook_active')))
+    record = {'ts': round(time.time(), 3), 'verdict': verdict, 'reason': reason,
+              'ms': round((time.perf_counter() - began) * 1000, 3),
+              'tool_calls': summary.tool_calls if summary else None,
+              'answer_chars': len(summary.answer) if summary else None}
+
+    if verdict == 'escalate':
+        if os.environ.get(ESCALATE_ENV) == '0':
+            verdict, outcome = 'ok', 'skipped'
+        else:
+            asked = time.perf_counter()
+            ok, reason = escalate(input_data, summary)
+            record['escalation_ms'] = round((time.perf_counter() - asked) * 1000, 1)
+            outcome = 'error' if ok is None else ('ok' if ok else 'block')
+            verdict = 'block' if ok is False else 'ok'
+            record['evaluator_reason'] = reason
+        record['outcome'] = outcome
+
+    try:
+        trace.append(os.path.join(project_dir, LOG_FILE), record)
+    except OSError:
+        pass
+
+    if verdict == 'block':
+        return {'decision': 'block', 'reason': reason or "The subagent hasn't finished its task yet."}
+    return None
+
+
+def read_log(project_dir: str) -> list[dict]:
+    path = os.path.join(project_dir, LOG_FILE)
+    records = []
+    for name in (path + '.1', path):
+        try:
+            with open(name, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except OSError:
+            continue
+    return records
+
+
+def report(project_dir: str) -> int:
+    """Print how often stops were decided locally, and the time that saved."""
+    records = read_log(project_dir)
+    if not records:
+        print(f"No subagent stops logged in {os.path.join(project_dir, LOG_FILE)}")
+        return 1
+
+    total = len(records)
+    local = [record for record in records if record.get('verdict') != 'escalate']
+    escalated = [record for record in records if record.get('verdict') == 'escalate']
+
+    def counts(rows: list[dict], field: str) -> str:
+        tally: dict[str, int] = {}
+        for row in rows:
+            tally[row.get(field) or '?'] = tally.get(row.get(field) or '?', 0) + 1
+        return ', '.join(f"{count} {name}" for name, count in sorted(tally.items())) or '-'
+
+    local_ms = sorted(record.get('ms', 0.0) for record in records)
+    # Failed escalations return early; only answered ones say what the evaluator costs
+    asked_ms = sorted(record['escalation_ms'] for record in escalated
+                      if 'escalation_ms' in record and record.get('outcome') in ('ok', 'block'))
+    print(f"Subagent stops:   {total}")
+    print(f"Decided locally:  {len(local)} ({len(local) / total:.0%}): {counts(local, 'verdict')}")
+    print(f"Escalated:        {len(escalated)} ({len(escalated) / total:.0%}): {counts(escalated, 'outcome')}")
+    print(f"Transcript check: p50 {trace.format_ms(trace.percentile(local_ms, 0.5))}, "
+          f"p99 {trace.format_ms(trace.percentile(local_ms, 0.99))}")
+    if asked_ms:
+        typical = trace.percentile(asked_ms, 0.5)
+        print(f"Evaluator:        p50 {trace.format_ms(typical)}, p99 {trace.format_ms(trace.percentile(asked_ms, 0.99))}")
+        saved = len(local) * typical - sum(local_ms)
+        print(f"Time saved:       ~{trace.format_ms(saved)} ({len(local)} stops not sent to the evaluator, "
+              f"at its median {trace.format_ms(typical)})")
+    else:
+        print("Time saved:       unknown until an escalation has been timed")
+
+    reasons: dict[str, int] = {}
+    for record in escalated:
+        reason = re.sub(r'\d+', 'N', re.sub(r'\(".*?"\)', '(...)', record.get('reason', '')))
+        reasons[reason] = reasons.get(reason, 0) + 1
+    if reasons:
+        print("Escalated because:")
+        for reason, count in sorted(reasons.items(), key=lambda item: -item[1]):
+            print(f"  {count:>5}  {reason}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python3 -m hooklib.subagentcheck', description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('project_dir')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('stats', help='escalation rate and time saved')
+    check = commands.add_parser('check', help="judge a transcript without escalating")
+    check.add_argument('transcript')
+    check.add_argument('--session', action='store_true', help="it is a session transcript: judge its last subagent")
+    check.add_argument('--agent', help="with --session, judge this agentId's subagent instead")
+    args = parser.parse_args()
+
+    if args.command == 'stats':
+        return report(args.project_dir)
+
+    began = time.perf_counter()
+    summary = read_transcript(args.transcript, sidechain_only=args.session, agent=args.agent)
+    verdict, reason = judge(summary)
+    elapsed = (time.perf_counter() - began) * 1000
+    if summary is not None:
+        print(json.dumps({key: value for key, value in summary.digest().items() if key != 'final_answer'}
+                         | {'answer_chars': len(summary.answer)}, indent=1))
+    print(f"{verdict}: {reason} ({trace.format_ms(elapsed)})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""
+Test dependency index for post-edit-tests.
+
+Maps app classes to the test files that exercise them, so editing a shared
+service like app/Services/MetrcApi.php runs every test that references it,
+not just tests/Unit/Services/MetrcApiTest.php.
+
+The index is built by scanning `use` statements and class references:
+
+- tests/**/*Test.php  -> which App\\ classes each test references (and how often)
+- app/**/*.php        -> which App\\ classes each class references, so a test
+                         that exercises a controller also runs when a service
+                         that controller uses is edited (one hop)
+
+It is persisted to .claude/cache/test-index.db (SQLite, one row per file
+and class referenced). The SessionStart hook (test-index.py) brings the
+whole index up to date, re-parsing only files whose mtime/size changed
+(and whose content hash then differs). An edit re-indexes just the edited
+file, and a lookup is two indexed queries, not a walk of the tree.
+
+Debug from the command line:
+
+    python3 -m hooklib.testindex <project_dir> app/Services/MetrcApi.php
+    python3 -m hooklib.testindex <project_dir> --refresh
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import time
+
+INDEX_FILE = os.path.join('.claude', 'cache', 'test-index.db')
+INDEX_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refs (
+    class TEXT NOT NULL,
+    path TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (class, path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS refs_path ON refs (path);
+"""
+
+# Scanned trees: (directory, filename suffix)
+SCAN_ROOTS = [('tests', 'Test.php'), ('app', '.php')]
+
+# Tests reached through another app class count for this much of a direct reference
+TRANSITIVE_WEIGHT = 0.5
+
+# `use A\B\C;`, `use A\B\C as D;`, `use A\B\{C, D as E};`
+USE_STATEMENT = re.compile(r'^\s*use\s+([\w\\]+)\s*(?:\{([^}]*)\}|as\s+(\w+))?\s*;', re.MULTILINE)
+# Fully qualified inline references: \App\Services\MetrcApi::class, new \App\Models\Item
+QUALIFIED_REFERENCE = re.compile(r'\\?\b(App(?:\\\w+)+)')
+NAMESPACE_STATEMENT = re.compile(r'^\s*namespace\s+[\w\\]+\s*;', re.MULTILINE)
+IDENTIFIER = re.compile(r'\b[A-Z]\w*\b')
+
+
+def class_for_path(relative_path: str) -> str | None:
+    """Map app/Services/MetrcApi.php to App\\Services\\MetrcApi (PSR-4 default)."""
+    if not relative_path.startswith('app/') or not relative_path.endswith('.php'):
+        return None
+    return 'App\\' + relative_path[4:-4].replace('/', '\\')
+
+
+def parse_references(source: str) -> dict[str, int]:
+    """
+    Count references to App\\ classes in a PHP file.
+
+    Returns:
+        {fully qualified class: number of references}
+    """
+    aliases = {}
+    for match in USE_STATEMENT.finditer(source):
+        prefix, group, alias = match.group(1), match.group(2), match.group(3)
+        if group is not None:
+            for member in group.split(','):
+                parts = member.split()
+                if not parts:
+                    continue
+                name = prefix.rstrip('\\') + '\\' + parts[0]
+                aliases[parts[-1] if len(parts) == 3 else parts[0].split('\\')[-1]] = name
+        else:
+            aliases[alias or prefix.split('\\')[-1]] = prefix
+
+    counts: dict[str, int] = {}
+    for name in aliases.values():
+        if name.startswith('App\\'):
+            counts[name] = 0
+
+    if counts:
+        app_aliases = {short: name for short, name in aliases.items() if name in counts}
+        for identifier in IDENTIFIER.findall(source):
+            name = app_aliases.get(identifier)
+            if name:
+                # Includes the `use` line itself, so every import counts at least once
+                counts[name] += 1
+
+    body = NAMESPACE_STATEMENT.sub('', USE_STATEMENT.sub('', source))
+    for name in QUALIFIED_REFERENCE.findall(body):
+        counts[name] = counts.get(name, 0) + 1
+
+    return counts
+
+
+class TestIndex:
+    """Persistent app-class -> test-file index for one project."""
+
+    def __init__(self, project_dir: str):
+        self.project_dir = project_dir
+        self.path = os.path.join(project_dir, INDEX_FILE)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=5)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+        version = self._meta('version')
+        if version not in (None, str(INDEX_VERSION)):
+            # Built by another version: the table layout may differ too
+            self.db.executescript('DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS refs; DELETE FROM meta;')
+        self.db.executescript(SCHEMA)
+
+    def _meta(self, key: str) -> str | None:
+        row = self.db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    @property
+    def built(self) -> bool:
+        """Whether a full refresh has ever completed."""
+        return self._meta('built') is not None
+
+    def _walk(self, directory: str, suffix: str):
+        """Yield (relative path, stat) for matching files under `directory`."""
+        stack = [os.path.join(self.project_dir, directory)]
+        while stack:
+            try:
+                entries = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith(suffix):
+                        yield os.path.relpath(entry.path, self.project_dir), entry.stat()
+
+    def _index(self, relative: str, stat: os.stat_result, cached: tuple | None) -> None:
+        """Re-parse one file whose mtime/size differ from `cached` (mtime, size, hash). Call in a transaction."""
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return
+        try:
+            with open(os.path.join(self.project_dir, relative), 'rb') as f:
+                content = f.read()
+        except OSError:
+            return
+
+        digest = hashlib.sha1(content).hexdigest()
+        self.db.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)',
+                        (relative, stat.st_mtime_ns, stat.st_size, digest))
+        if cached and cached[2] == digest:
+            return
+        self.db.execute('DELETE FROM refs WHERE path = ?', (relative,))
+        self.db.executemany('INSERT INTO refs VALUES (?, ?, ?)',
+                            [(name, relative, count)
+                             for name, count in parse_references(content.decode('utf-8', 'replace')).items()])
+
+    def _forget(self, relative: str) -> None:
+        self.db.execute('DELETE FROM files WHERE path = ?', (relative,))
+        self.db.execute('DELETE FROM refs WHERE path = ?', (relative,))
+
+    def refresh(self) -> None:
+        """Bring the whole index up to date, re-parsing only files that changed."""
+        known = {path: (mtime, size, digest)
+                 for path, mtime, size, digest in self.db.execute('SELECT path, mtime, size, hash FROM files')}
+        with self.db:
+            for directory, suffix in SCAN_ROOTS:
+                for relative, stat in self._walk(directory, suffix):
+                    self._index(relative, stat, known.pop(relative, None))
+            for relative in known:
+                self._forget(relative)
+            self.db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', ('version', str(INDEX_VERSION)))
+            # Only a completed refresh counts as built (see affected_tests)
+            self.db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', ('built', str(time.time())))
+
+    def update(self, relative_path: str) -> None:
+        """Re-index one edited (or deleted) file."""
+        if not any(relative_path.startswith(directory + '/') and relative_path.endswith(suffix)
+                   for directory, suffix in SCAN_ROOTS):
+            return
+        cached = self.db.execute('SELECT mtime, size, hash FROM files WHERE path = ?', (relative_path,)).fetchone()
+        with self.db:
+            try:
+                stat = os.stat(os.path.join(self.project_dir, relative_path))
+            except OSError:
+                self._forget(relative_path)
+                return
+            self._index(relative_path, stat, cached)
+
+    def affected_tests(self, relative_path: str) -> list[tuple[str, float]]:
+        """
+        Rank the test files affected by an edit to an app/ file.
+
+        Returns:
+            [(test path relative to the project, score)], highest score first
+        """
+        edited_class = class_for_path(relative_path)
+        if not edited_class:
+            return []
+
+        # App classes that reference the edited class (one hop)
+        dependents = {edited_class: 1.0}
+        for (path,) in self.db.execute("SELECT path FROM refs WHERE class = ? AND path LIKE 'app/%'", (edited_class,)):
+            dependent = class_for_path(path)
+            if dependent and dependent != edited_class:
+                dependents[dependent] = TRANSITIVE_WEIGHT
+
+        scores: dict[str, float] = {}
+        placeholders = ','.join('?' * len(dependents))
+        for path, name, count in self.db.execute(
+                f"SELECT path, class, count FROM refs WHERE class IN ({placeholders}) AND path LIKE 'tests/%'",
+                list(dependents)):
+            scores[path] = scores.get(path, 0.0) + count * dependents[name]
+
+        return sorted(((path, score) for path, score in scores.items() if score),
+                      key=lambda item: (-item[1], item[0]))
+
+
+def refresh(project_dir: str) -> None:
+    """Bring the project's index up to date (at session start)."""
+    TestIndex(project_dir).refresh()
+
+
+def update(project_dir: str, relative_path: str) -> None:
+    """Re-index one edited file, if the index exists yet. Never raises."""
+    try:
+        index = TestIndex(project_dir)
+        if index.built:
+            index.update(relative_path)
+    except (OSError, sqlite3.Error):
+        pass
+
+
+def affected_tests(project_dir: str, relative_path: str) -> list[tuple[str, float]]:
+    """Re-index the edited file and rank the tests affected by editing `relative_path`."""
+    try:
+        index = TestIndex(project_dir)
+        if index.built:
+            index.update(relative_path)
+        else:
+            # No SessionStart build yet (first run after install): build it once
+            index.refresh()
+        return index.affected_tests(relative_path)
+    except sqlite3.Error:
+        # Unusable index (e.g. read-only checkout) - the convention-named tests still run
+        return []
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("Usage: python3 -m hooklib.testindex <project_dir> <app file> | --refresh", file=sys.stderr)
+        sys.exit(1)
+    if sys.argv[2] == '--refresh':
+        refresh(sys.argv[1])
+        sys.exit(0)
+    for test_path, score in affected_tests(sys.argv[1], sys.argv[2]):
+        print(f"{score:8.1f}  {test_path}")
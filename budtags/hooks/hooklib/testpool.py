@@ -0,0 +1,333 @@
+"""
+Warm PHPUnit worker pool for post-edit-tests.
+
+`php artisan test <file>` boots the Laravel console application and then
+launches PHPUnit in a second PHP process, on every edit. The pool keeps a
+few single-use PHP workers (php/phpunit-worker.php) already started with
+the Composer autoloader and test base classes loaded, and hands each test
+run to one of them over a per-project Unix socket.
+
+- One pool server per project, started on demand by the hook and exiting
+  after IDLE_TIMEOUT without requests.
+- Workers are single-use; a replacement is booted as soon as one is taken.
+- Idle workers are recycled after WORKER_MAX_AGE, and all of them when
+  composer.lock or the Composer autoloader changes. A worker is also
+  retired when a project file it preloaded (tests/TestCase.php and what
+  that pulls in) changes, since it would otherwise run the old code.
+- Anything unexpected makes run_tests() return None so the hook falls back
+  to the cold `php artisan test` path.
+
+Usage (normally spawned by the hook):
+
+    python3 -m hooklib.testpool <project_dir>
+"""
+
+import fcntl
+import json
+import os
+import queue
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+
+from hooklib import HOOKS_DIR, client, streaming, trace
+
+# Booted workers kept waiting for a test run
+POOL_SIZE = 2
+
+# Recycle a waiting worker after this many seconds
+WORKER_MAX_AGE = 10 * 60
+
+# How long a request waits for a worker to finish booting
+WORKER_BOOT_TIMEOUT = 30
+
+# Shut the pool down after this many seconds without a request
+IDLE_TIMEOUT = 30 * 60
+
+# Seconds between recycling passes
+MAINTENANCE_INTERVAL = 30
+
+# Set BUDTAGS_TEST_POOL=0 to always use the cold path
+POOL_ENV_FLAG = 'BUDTAGS_TEST_POOL'
+
+WORKER_SCRIPT = os.path.join(HOOKS_DIR, 'php', 'phpunit-worker.php')
+
+# Files whose change invalidates every booted worker
+AUTOLOAD_FILES = ['composer.lock', 'vendor/composer/autoload_classmap.php', 'vendor/composer/autoload_static.php']
+
+
+def autoload_fingerprint(project_dir: str, preloaded: tuple[str, ...] = ()) -> tuple:
+    """mtimes of the files a worker's preloaded code depends on: the autoloader and `preloaded` project files."""
+    fingerprint = []
+    for name in (*AUTOLOAD_FILES, *preloaded):
+        try:
+            fingerprint.append(os.stat(os.path.join(project_dir, name)).st_mtime_ns)
+        except OSError:
+            fingerprint.append(None)
+    return tuple(fingerprint)
+
+
+class Worker:
+    """One pre-booted, single-use PHPUnit process."""
+
+    def __init__(self, project_dir: str):
+        self.started = time.monotonic()
+        booted = time.time_ns()
+        self.preloaded: tuple[str, ...] = ()
+        self.fingerprint = autoload_fingerprint(project_dir)
+        self.process = subprocess.Popen(
+            ['php', WORKER_SCRIPT],
+            cwd=project_dir,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        status = self.process.stdout.readline().decode('utf-8', 'replace').strip()
+        word, _, detail = status.partition(' ')
+        self.ready = word == 'READY'
+        self.error = None if self.ready else (status or 'worker exited during boot')
+        if self.ready:
+            try:
+                self.preloaded = tuple(json.loads(detail or '[]'))
+            except ValueError:
+                self.preloaded = ()
+            preloaded = autoload_fingerprint(project_dir, self.preloaded)[len(AUTOLOAD_FILES):]
+            # A file edited while the worker was loading it may already be stale
+            if any(mtime is None or mtime >= booted for mtime in preloaded):
+                self.started = float('-inf')
+            self.fingerprint += preloaded
+
+    def run(self, args: list[str], timeout: float, env: dict[str, str] | None = None) -> tuple[int, str]:
+        """Hand the worker its test run (plus extra environment) and wait for it to finish."""
+        self.process.stdin.write(json.dumps({'args': args, 'env': env or {}}).encode() + b"\n")
+        self.process.stdin.close()
+
+        timer = threading.Timer(timeout, self.process.kill)
+        timer.start()
+        output = streaming.PhpUnitOutput()
+        try:
+            for line in streaming.read_lines(self.process.stdout):
+                if not output.feed(line):
+                    # Clearly failed; don't wait for the rest of the suite
+                    self.process.kill()
+                    break
+            return_code = self.process.wait()
+        finally:
+            timer.cancel()
+
+        if output.stopped_early:
+            return 1, output.text()
+        if return_code < 0:
+            return 1, output.text() + f"\nTest execution timed out ({int(timeout)}s limit)"
+        return return_code, output.text()
+
+    def retire(self) -> None:
+        """Stop an unused worker (EOF on stdin makes it exit cleanly)."""
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+
+
+class WorkerPool:
+    def __init__(self, project_dir: str):
+        self.project_dir = project_dir
+        self.ready: queue.Queue[Worker] = queue.Queue()
+        self.error = None
+        for _ in range(POOL_SIZE):
+            self.spawn()
+
+    def spawn(self) -> None:
+        """Boot a worker in the background and add it to the pool once ready."""
+        def boot():
+            worker = Worker(self.project_dir)
+            if worker.ready:
+                self.error = None
+                self.ready.put(worker)
+            else:
+                self.error = worker.error
+                worker.process.wait()
+
+        threading.Thread(target=boot, daemon=True).start()
+
+    def is_stale(self, worker: Worker) -> bool:
+        return (time.monotonic() - worker.started > WORKER_MAX_AGE
+                or worker.fingerprint != autoload_fingerprint(self.project_dir, worker.preloaded))
+
+    def acquire(self) -> Worker | None:
+        """Take a fresh worker (booting a replacement), or None if none can boot."""
+        deadline = time.monotonic() + WORKER_BOOT_TIMEOUT
+        while time.monotonic() < deadline:
+            try:
+                worker = self.ready.get(timeout=0.5)
+            except queue.Empty:
+                if self.error:
+                    # Try again for the next request (e.g. after composer install)
+                    self.error = None
+                    self.spawn()
+                    return None
+                continue
+
+            self.spawn()
+            if self.is_stale(worker):
+                worker.retire()
+                continue
+            return worker
+
+        return None
+
+    def recycle(self) -> None:
+        """Replace waiting workers that are too old or have stale preloaded code."""
+        waiting = []
+        while True:
+            try:
+                waiting.append(self.ready.get_nowait())
+            except queue.Empty:
+                break
+
+        for worker in waiting:
+            if self.is_stale(worker):
+                worker.retire()
+                self.spawn()
+            else:
+                self.ready.put(worker)
+
+
+class PoolRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.last_request = time.monotonic()
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            return
+
+        wait_start = time.monotonic()
+        worker = self.server.pool.acquire()
+        if worker is None:
+            reply = {'error': self.server.pool.error or 'no worker available'}
+        else:
+            run_start = time.monotonic()
+            return_code, output = worker.run(request['tests'], request.get('timeout', 120), request.get('env'))
+            reply = {
+                'returncode': return_code,
+                'output': output,
+                'wait': run_start - wait_start,
+                'elapsed': time.monotonic() - run_start,
+            }
+
+        self.wfile.write(json.dumps(reply).encode() + b"\n")
+        self.server.last_request = time.monotonic()
+
+
+class PoolServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    # handle_request() poll interval, so maintenance runs regularly
+    timeout = 1.0
+
+    def __init__(self, project_dir: str):
+        self.pool = WorkerPool(project_dir)
+        self.last_request = time.monotonic()
+        super().__init__(client.socket_path(project_dir, 'testpool'), PoolRequestHandler)
+
+
+def serve(project_dir: str) -> None:
+    project_dir = os.path.realpath(project_dir)
+    # Before anything (the socket, its lock file) is created
+    os.umask(0o077)
+    try:
+        path = client.socket_path(project_dir, 'testpool')
+    except OSError:
+        # The runtime dir can't be trusted (see client.runtime_dir)
+        return
+
+    # Only one pool per project; concurrent spawns lose the race and exit
+    lock_file = open(path + '.lock', 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return
+
+    if os.path.exists(path):
+        os.unlink(path)
+
+    server = PoolServer(project_dir)
+    last_maintenance = time.monotonic()
+
+    try:
+        while time.monotonic() - server.last_request < IDLE_TIMEOUT:
+            server.handle_request()
+            if time.monotonic() - last_maintenance > MAINTENANCE_INTERVAL:
+                server.pool.recycle()
+                last_maintenance = time.monotonic()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+        while not server.pool.ready.empty():
+            server.pool.ready.get_nowait().retire()
+
+
+def start_pool(project_dir: str) -> None:
+    """Spawn a detached pool server for the project (no-op if PHP deps are missing)."""
+    if not os.path.exists(os.path.join(project_dir, 'vendor', 'autoload.php')):
+        return
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = HOOKS_DIR
+    try:
+        subprocess.Popen(
+            [sys.executable, '-m', 'hooklib.testpool', project_dir],
+            cwd=HOOKS_DIR,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        pass
+
+
+def run_tests(project_dir: str, test_paths: list[str], timeout: float,
+              env: dict[str, str] | None = None) -> dict | None:
+    """
+    Run tests on a warm worker, with `env` added to its environment.
+
+    Returns:
+        {"returncode", "output", "wait", "elapsed"}, or None if the pool is
+        unavailable (it is started for next time) and the caller should use
+        the cold path
+    """
+    if os.environ.get(POOL_ENV_FLAG) == '0':
+        return None
+
+    project_dir = os.path.realpath(project_dir)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(sock, client.socket_path(project_dir, 'testpool'))
+    except OSError:
+        sock.close()
+        start_pool(project_dir)
+        return None
+
+    # Boot wait + run + slack; the run itself is killed at `timeout`
+    sock.settimeout(WORKER_BOOT_TIMEOUT + timeout + 10)
+    try:
+        with sock, sock.makefile('rwb') as stream, trace.subprocess_timer():
+            stream.write(json.dumps({'tests': test_paths, 'timeout': timeout, 'env': env}).encode() + b"\n")
+            stream.flush()
+            reply = json.loads(stream.readline())
+    except (OSError, ValueError):
+        return None
+
+    if 'error' in reply:
+        return None
+    return reply
+
+
+if __name__ == '__main__':
+    serve(sys.argv[1] if len(sys.argv) > 1 else os.getcwd())
@@ -0,0 +1,316 @@
+"""
+Hook latency tracing.
+
+Every hook run through hook-client.py (in the daemon or in-process) is
+timed and appended as one JSON line to .claude/logs/hook-trace.jsonl in the
+project:
+
+    {"ts": 1760000000.123, "hook": "post-edit-tests.py", "event": "PostToolUse",
+     "tool": "Edit", "mode": "daemon", "ms": 8412.5, "exit": 0, "decision": "block",
+     "subprocess_ms": 8101.2, "cache": {"resultcache": [0, 1]},
+     "handlers": [{"hook": "file-protection.py", "matcher": "Edit|Write", "ms": 0.4, "decision": "ask"}]}
+
+`decision` is read from the hook's output (permissionDecision, decision,
+exit code 2 as "block", plain text as "output"). `subprocess_ms` is the
+time spent waiting on commands, the test pool and tsc, summed over
+concurrent shards, so it can exceed `ms`. `cache` holds [hits, misses] per
+cache. `handlers` times each check dispatch.py ran.
+
+Hook code reports into the current span through subprocess_timer() and
+cache(); both are no-ops outside a traced run. The log is capped at
+MAX_BYTES and rotated once to hook-trace.jsonl.1. Set BUDTAGS_HOOK_TRACE=0
+to turn tracing off.
+
+    python3 -m hooklib.trace <project_dir> stats [--hook NAME] [--tool NAME] [--since HOURS]
+    python3 -m hooklib.trace <project_dir> tail [-n 20]
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import time
+
+TRACE_FILE = os.path.join('.claude', 'logs', 'hook-trace.jsonl')
+
+# Rotate past this size, keeping one old file
+MAX_BYTES = 1 << 20
+
+# Set BUDTAGS_HOOK_TRACE=0 to disable tracing
+TRACE_ENV_FLAG = 'BUDTAGS_HOOK_TRACE'
+
+# Top-level fields worth reading from the payload without a full json parse
+PAYLOAD_FIELD = re.compile(rb'"(hook_event_name|tool_name)"\s*:\s*"([^"\\]*)"')
+DECISION_FIELD = re.compile(r'"(?:permissionDecision|decision)"\s*:\s*"(\w+)"')
+
+_current = None
+
+
+class Span:
+    """One hook run being timed."""
+
+    def __init__(self, hook: str, payload: bytes, mode: str):
+        self.hook = hook
+        self.mode = mode
+        self.started = time.time()
+        self.clock = time.perf_counter()
+        self.fields = {name.decode(): value.decode('utf-8', 'replace')
+                       for name, value in PAYLOAD_FIELD.findall(payload[:4096])}
+        self.subprocess: list[float] = []
+        self.caches: dict[str, list[int]] = {}
+        self.handlers: list[dict] = []
+
+    def record(self, exit_code: int, stdout: str) -> dict:
+        """The trace record for this span once the hook has finished."""
+        record = {
+            'ts': round(self.started, 3),
+            'hook': os.path.basename(self.hook),
+            'event': self.fields.get('hook_event_name'),
+            'tool': self.fields.get('tool_name'),
+            'mode': self.mode,
+            'ms': round((time.perf_counter() - self.clock) * 1000, 2),
+            'exit': exit_code,
+            'decision': decision_of(exit_code, stdout),
+        }
+        if self.subprocess:
+            record['subprocess_ms'] = round(sum(self.subprocess) * 1000, 2)
+        if self.caches:
+            record['cache'] = self.caches
+        if self.handlers:
+            record['handlers'] = self.handlers
+        return record
+
+
+class _SubprocessTimer:
+    def __enter__(self):
+        self.began = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        subprocess_time(time.perf_counter() - self.began)
+        return False
+
+
+def decision_of(exit_code: int, stdout: str) -> str | None:
+    """What a hook decided, judged from its exit code and output."""
+    if stdout.lstrip().startswith('{'):
+        match = DECISION_FIELD.search(stdout)
+        if match:
+            return match.group(1)
+    if exit_code == 2:
+        return 'block'
+    if stdout.strip():
+        return 'output'
+    return None
+
+
+def enabled() -> bool:
+    return os.environ.get(TRACE_ENV_FLAG) != '0'
+
+
+def begin(hook: str, payload: bytes, mode: str) -> Span | None:
+    """Start timing a hook run (None when tracing is off)."""
+    global _current
+    _current = Span(hook, payload, mode) if enabled() else None
+    return _current
+
+
+def finish(span: Span | None, exit_code: int, stdout: str) -> None:
+    """Log a finished hook run. Never raises."""
+    global _current
+    _current = None
+    if span is None:
+        return
+    try:
+        project_dir = os.environ.get('CLAUDE_PROJECT_DIR', os.getcwd())
+        append(os.path.join(project_dir, TRACE_FILE), span.record(exit_code, stdout))
+    except (OSError, ValueError, TypeError):
+        pass
+
+
+def append(path: str, record: dict, max_bytes: int = MAX_BYTES) -> None:
+    """Append one record in a single write, rotating the file once it passes `max_bytes`."""
+    line = (json.dumps(record, separators=(',', ':')) + '\n').encode()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+        size = os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+    if size > max_bytes:
+        os.replace(path, path + '.1')
+
+
+def subprocess_time(seconds: float) -> None:
+    """Add time spent waiting on a command (or a worker running one) to the current span."""
+    span = _current
+    if span is not None:
+        span.subprocess.append(seconds)
+
+
+def subprocess_timer() -> _SubprocessTimer:
+    """Context manager adding the block's wall time to the current span's subprocess time."""
+    return _SubprocessTimer()
+
+
+def cache(name: str, hit: bool) -> None:
+    """Count a cache hit or miss against the current span."""
+    span = _current
+    if span is not None:
+        counts = span.caches.setdefault(name, [0, 0])
+        counts[0 if hit else 1] += 1
+
+
+def subprocess_mark() -> int:
+    """A marker for handler(), so a check is charged only the subprocess time it spent itself."""
+    span = _current
+    return len(span.subprocess) if span is not None else 0
+
+
+def handler(hook: str, matcher: str, seconds: float, result: dict | None, mark: int = 0) -> None:
+    """Record one dispatched check's time, decision and subprocess time since `mark` against the current span."""
+    span = _current
+    if span is None:
+        return
+    entry = {'hook': hook, 'matcher': matcher, 'ms': round(seconds * 1000, 3),
+             'decision': ((result or {}).get('hookSpecificOutput') or {}).get('permissionDecision')}
+    if len(span.subprocess) > mark:
+        entry['subprocess_ms'] = round(sum(span.subprocess[mark:]) * 1000, 3)
+    span.handlers.append(entry)
+
+
+def read_records(project_dir: str) -> list[dict]:
+    """Every logged record, oldest first (the rotated file, then the current one)."""
+    path = os.path.join(project_dir, TRACE_FILE)
+    records = []
+    for name in (path + '.1', path):
+        try:
+            with open(name, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # A line cut short by a crash or a concurrent rotation
+                        continue
+        except OSError:
+            continue
+    return records
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return 0.0
+    return ordered[max(1, math.ceil(len(ordered) * fraction)) - 1]
+
+
+def samples(records: list[dict]) -> list[tuple[str, str, dict]]:
+    """(hook, tool, record) for every run, dispatched checks included as their own hooks."""
+    rows = []
+    for record in records:
+        # Prompt and session hooks have no tool; group them by event
+        tool = record.get('tool') or record.get('event') or '-'
+        rows.append((record.get('hook', '?'), tool, record))
+        for entry in record.get('handlers', ()):
+            rows.append((f"{record.get('hook', '?')} > {entry.get('hook', '?')}", tool, entry))
+    return rows
+
+
+def summarize(rows: list[dict]) -> dict:
+    """Latency percentiles, decisions, subprocess share and cache hit rate for a group of runs."""
+    latencies = sorted(row.get('ms', 0.0) for row in rows)
+    decisions: dict[str, int] = {}
+    for row in rows:
+        decision = row.get('decision') or 'none'
+        decisions[decision] = decisions.get(decision, 0) + 1
+    hits = misses = 0
+    for row in rows:
+        for counts in row.get('cache', {}).values():
+            hits += counts[0]
+            misses += counts[1]
+    return {
+        'runs': len(rows),
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'max': latencies[-1] if latencies else 0.0,
+        'total': sum(latencies),
+        'subprocess': sum(row.get('subprocess_ms', 0.0) for row in rows),
+        'decisions': decisions,
+        'cache': (hits, misses),
+    }
+
+
+def format_ms(ms: float) -> str:
+    if ms >= 10000:
+        return f"{ms / 1000:.1f}s"
+    return f"{ms:.1f}ms" if ms >= 1 else f"{ms:.3f}ms"
+
+
+def print_table(title: str, groups: dict, key_width: int) -> None:
+    print(f"\n{title}")
+    print(f"  {'':<{key_width}} {'runs':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9} {'in subproc':>10}  "
+          f"{'cache':>9}  decisions")
+    for key, rows in sorted(groups.items(), key=lambda item: -summarize(item[1])['total']):
+        stats = summarize(rows)
+        share = f"{stats['subprocess'] / stats['total']:.0%}" if stats['subprocess'] and stats['total'] else '-'
+        hits, misses = stats['cache']
+        cache_rate = f"{hits}/{hits + misses}" if hits + misses else '-'
+        decisions = ', '.join(f"{name} {count}" for name, count in sorted(stats['decisions'].items()))
+        print(f"  {key:<{key_width}} {stats['runs']:>6} {format_ms(stats['p50']):>9} {format_ms(stats['p95']):>9} "
+              f"{format_ms(stats['p99']):>9} {format_ms(stats['max']):>9} {share:>10}  {cache_rate:>9}  {decisions}")
+
+
+def report(project_dir: str, hook: str | None = None, tool: str | None = None, since_hours: float | None = None) -> int:
+    """Print latency per hook and per hook and tool. Returns the number of runs reported."""
+    records = read_records(project_dir)
+    if since_hours is not None:
+        cutoff = time.time() - since_hours * 3600
+        records = [record for record in records if record.get('ts', 0) >= cutoff]
+    rows = [(name, tool_name, row) for name, tool_name, row in samples(records)
+            if (hook is None or hook in name) and (tool is None or tool_name == tool)]
+    if not rows:
+        print(f"No hook runs traced in {os.path.join(project_dir, TRACE_FILE)}")
+        return 0
+
+    first = min(record.get('ts', 0) for record in records)
+    print(f"{len(records)} hook runs since {time.strftime('%Y-%m-%d %H:%M', time.localtime(first))}")
+    by_hook: dict[str, list] = {}
+    by_tool: dict[str, list] = {}
+    for name, tool_name, row in rows:
+        by_hook.setdefault(name, []).append(row)
+        by_tool.setdefault(f"{name} [{tool_name}]", []).append(row)
+    width = max(len(key) for key in by_tool)
+    print_table('Per hook', by_hook, width)
+    print_table('Per hook and tool', by_tool, width)
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python3 -m hooklib.trace', description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('project_dir')
+    commands = parser.add_subparsers(dest='command', required=True)
+    stats = commands.add_parser('stats', help='p50/p95/p99 latency per hook and per tool')
+    stats.add_argument('--hook', help='only hooks whose name contains this')
+    stats.add_argument('--tool', help='only this tool (Read, Bash, Edit, ...)')
+    stats.add_argument('--since', type=float, metavar='HOURS', help='only the last HOURS hours')
+    tail = commands.add_parser('tail', help='the most recent runs')
+    tail.add_argument('-n', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == 'stats':
+        report(args.project_dir, args.hook, args.tool, args.since)
+    elif args.command == 'tail':
+        for record in read_records(args.project_dir)[-args.n:]:
+            when = time.strftime('%H:%M:%S', time.localtime(record.get('ts', 0)))
+            extra = f" subprocess {format_ms(record['subprocess_ms'])}" if 'subprocess_ms' in record else ''
+            print(f"{when}  {record.get('hook', '?'):<26} {record.get('tool') or record.get('event') or '-':<16} "
+                  f"{format_ms(record.get('ms', 0.0)):>9}  exit {record.get('exit')}  "
+                  f"{record.get('decision') or '-'}{extra}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
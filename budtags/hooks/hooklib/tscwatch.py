@@ -0,0 +1,344 @@
+"""
+Persistent TypeScript type-checker for post-edit-tests.
+
+A cold `npx tsc --noEmit` re-checks the whole frontend on every .ts/.tsx
+edit. This module keeps one `tsc --watch` process per project instead:
+tsc recompiles incrementally when a file changes, and a small Unix-socket
+server records the diagnostics of each compile cycle so the hook only has
+to wait for the cycle that picked up its edit.
+
+- The watcher is started on demand by the hook and exits after
+  IDLE_TIMEOUT without requests (or when tsc itself exits).
+- Diagnostics are only reported from a compile cycle that started after
+  the edit (the file's mtime): the edited file's errors, plus any error in
+  another file that is new since the last cycle that started before the
+  edit, i.e. the importers the edit broke. Errors that already existed
+  elsewhere are left alone, like the cold path does. If no cycle picks the
+  edit up within CHANGE_GRACE of tsc going idle, the hook uses the cold
+  path rather than report an older cycle.
+- Both the watcher and the cold path write .claude/cache/tsconfig.tsbuildinfo
+  so a restarted watcher (or a cold run) starts from the last build.
+- Anything unexpected makes check() return None so the hook falls back to a
+  cold `npx tsc`.
+
+Usage (normally spawned by the hook):
+
+    python3 -m hooklib.tscwatch <project_dir>
+"""
+
+import fcntl
+import json
+import os
+import re
+import signal
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+from hooklib import HOOKS_DIR, client, streaming, trace
+
+# Shut the watcher down after this many seconds without a request
+IDLE_TIMEOUT = 30 * 60
+
+# tsc --watch debounces change events (~250ms); if no compile has started
+# this long after an edit (or after the compile running at the time), the
+# edit didn't change the program
+CHANGE_GRACE = 2.0
+
+# Finished compile cycles kept, to find the one before an edit
+CYCLE_HISTORY = 8
+
+# Diagnostics kept per file per cycle, and lines kept per diagnostic
+MAX_DIAGNOSTICS_PER_FILE = 30
+MAX_DIAGNOSTIC_LINES = 20
+
+# How long the hook waits for a freshly spawned watcher to accept connections
+STARTUP_WAIT = 5.0
+
+# Set BUDTAGS_TSC_WATCH=0 to always use the cold path
+WATCH_ENV_FLAG = 'BUDTAGS_TSC_WATCH'
+
+BUILD_INFO_FILE = os.path.join('.claude', 'cache', 'tsconfig.tsbuildinfo')
+
+TSC_COMMAND = [
+    'npx', 'tsc', '--noEmit', '--skipLibCheck', '--pretty', 'false',
+    '--incremental', '--tsBuildInfoFile', BUILD_INFO_FILE,
+]
+
+# Watch status lines look like "10:41:07 AM - Found 2 errors. Watching for file changes."
+CYCLE_START = re.compile(r' - (?:Starting compilation in watch mode|File change detected)')
+CYCLE_END = re.compile(r' - Found \d+ errors?\. Watching for file changes')
+# "resources/js/Pages/Foo.tsx(12,5): error TS2322: ..." or "error TS5023: ..." (no file)
+DIAGNOSTIC = re.compile(r'^(?:(.+?)\(\d+,\d+\): )?error TS\d+:')
+
+
+class TscWatcher:
+    """A `tsc --watch` process and the diagnostics of its recent compile cycles."""
+
+    def __init__(self, project_dir: str):
+        self.project_dir = project_dir
+        self.condition = threading.Condition()
+        self.compiling = False
+        self.cycle_started = 0.0
+        self.cycle_finished = 0.0
+        # Finished cycles, oldest first: (started, diagnostics), where
+        # diagnostics maps a file relative to the project ('' for global
+        # errors) to its diagnostics
+        self.cycles: deque[tuple[float, dict[str, list[str]]]] = deque(maxlen=CYCLE_HISTORY)
+        self.exited = False
+
+        os.makedirs(os.path.join(project_dir, os.path.dirname(BUILD_INFO_FILE)), exist_ok=True)
+        self.process = subprocess.Popen(
+            TSC_COMMAND + ['--watch', '--preserveWatchOutput'],
+            cwd=project_dir,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            # npx runs tsc as a child; a session lets stop() signal both
+            start_new_session=True,
+        )
+        threading.Thread(target=self.read_output, daemon=True).start()
+
+    def read_output(self) -> None:
+        pending: dict[str, list[str]] = {}
+        current = None
+
+        for line in streaming.read_lines(self.process.stdout):
+            if CYCLE_START.search(line):
+                pending, current = {}, None
+                with self.condition:
+                    self.compiling = True
+                    self.cycle_started = time.time()
+            elif CYCLE_END.search(line):
+                with self.condition:
+                    diagnostics = {path: ['\n'.join(d) for d in entries] for path, entries in pending.items()}
+                    self.cycles.append((self.cycle_started, diagnostics))
+                    self.compiling = False
+                    self.cycle_finished = time.time()
+                    self.condition.notify_all()
+            elif (match := DIAGNOSTIC.match(line)):
+                entries = pending.setdefault(match.group(1) or '', [])
+                # Bounded even in an error storm: later diagnostics are dropped
+                current = [line] if len(entries) < MAX_DIAGNOSTICS_PER_FILE else None
+                if current is not None:
+                    entries.append(current)
+            elif current is not None and line.startswith(' '):
+                # Continuation of a multi-line message
+                if len(current) < MAX_DIAGNOSTIC_LINES:
+                    current.append(line)
+
+        with self.condition:
+            self.exited = True
+            self.condition.notify_all()
+
+    def wait_for_edit(self, since: float, timeout: float) -> str | None:
+        """
+        Wait for a compile cycle that started after a file was modified at `since` (epoch seconds).
+
+        Returns:
+            None once one has finished, else why not: a timeout, tsc
+            exiting, or no cycle picking the edit up
+        """
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while not self.exited:
+                # Before the first cycle finishes, tsc is still doing its initial build
+                if self.cycles and not self.compiling:
+                    if self.cycles[-1][0] >= since:
+                        return None
+                    # The grace runs from the edit, or from the end of the
+                    # compile that was running when it happened
+                    if time.time() - max(since, self.cycle_finished) > CHANGE_GRACE:
+                        return 'no tsc compile picked up the edit'
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return 'timed out waiting for tsc'
+                self.condition.wait(min(remaining, 0.1))
+        return 'tsc exited'
+
+    def errors_for(self, relative_path: str, since: float) -> list[str]:
+        """
+        Errors in the edited file, then errors new elsewhere since the edit.
+
+        Read from the latest cycle (one that started after `since`, see
+        wait_for_edit), compared with the last cycle that started before it.
+        """
+        with self.condition:
+            diagnostics = self.cycles[-1][1]
+            baseline = next((cycle for started, cycle in reversed(self.cycles) if started < since), None)
+            errors = list(diagnostics.get(relative_path, []))
+            if baseline is None:
+                return errors
+            for path, entries in diagnostics.items():
+                if path == relative_path:
+                    continue
+                before = set(baseline.get(path, ()))
+                errors.extend(entry for entry in entries if entry not in before)
+            return errors
+
+    def stop(self) -> None:
+        try:
+            os.killpg(self.process.pid, signal.SIGTERM)
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+
+
+class CheckRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.last_request = time.monotonic()
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            return
+
+        start = time.monotonic()
+        watcher = self.server.watcher
+        failure = watcher.wait_for_edit(request['since'], request.get('timeout', 120))
+        if failure is None:
+            reply = {'errors': watcher.errors_for(request['file'], request['since']),
+                     'elapsed': time.monotonic() - start}
+        else:
+            reply = {'error': failure}
+
+        self.wfile.write(json.dumps(reply).encode() + b"\n")
+        self.server.last_request = time.monotonic()
+
+
+class WatchServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    # handle_request() poll interval, so the idle/exit checks run regularly
+    timeout = 1.0
+
+    def __init__(self, project_dir: str):
+        self.watcher = TscWatcher(project_dir)
+        self.last_request = time.monotonic()
+        super().__init__(client.socket_path(project_dir, 'tscwatch'), CheckRequestHandler)
+
+
+def serve(project_dir: str) -> None:
+    project_dir = os.path.realpath(project_dir)
+    # Before anything (the socket, its lock file) is created
+    os.umask(0o077)
+    try:
+        path = client.socket_path(project_dir, 'tscwatch')
+    except OSError:
+        # The runtime dir can't be trusted (see client.runtime_dir)
+        return
+
+    # Only one watcher per project; concurrent spawns lose the race and exit
+    lock_file = open(path + '.lock', 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return
+
+    if os.path.exists(path):
+        os.unlink(path)
+
+    # Make `kill` run the cleanup below so tsc doesn't outlive the server
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    server = WatchServer(project_dir)
+
+    try:
+        while (time.monotonic() - server.last_request < IDLE_TIMEOUT
+               and not server.watcher.exited):
+            server.handle_request()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+        server.watcher.stop()
+
+
+def start_watcher(project_dir: str) -> bool:
+    """Spawn a detached watcher for the project. Returns False if it can't run here."""
+    if not os.path.exists(os.path.join(project_dir, 'tsconfig.json')):
+        return False
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = HOOKS_DIR
+    try:
+        subprocess.Popen(
+            [sys.executable, '-m', 'hooklib.tscwatch', project_dir],
+            cwd=HOOKS_DIR,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        return False
+    return True
+
+
+def connect(project_dir: str) -> socket.socket | None:
+    """Connect to the project's watcher, starting it if needed."""
+    try:
+        path = client.socket_path(project_dir, 'tscwatch')
+    except OSError:
+        return None
+    deadline = None
+    while True:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            client.connect(sock, path)
+            return sock
+        except PermissionError:
+            # Someone else's socket: never talk to it
+            sock.close()
+            return None
+        except OSError:
+            sock.close()
+
+        if deadline is None:
+            if not start_watcher(project_dir):
+                return None
+            deadline = time.monotonic() + STARTUP_WAIT
+        elif time.monotonic() > deadline:
+            return None
+        time.sleep(0.05)
+
+
+def check(project_dir: str, relative_path: str, since: float, timeout: float) -> dict | None:
+    """
+    Get type errors for an edited file from the watcher.
+
+    The first call for a project starts the watcher and waits for its
+    initial build (about as long as one cold run); later calls return as
+    soon as tsc's incremental recompile finishes.
+
+    Returns:
+        {"errors": [diagnostic, ...], "elapsed": seconds waited}, or None if
+        the watcher is unavailable and the caller should use the cold path
+    """
+    if os.environ.get(WATCH_ENV_FLAG) == '0':
+        return None
+
+    project_dir = os.path.realpath(project_dir)
+    sock = connect(project_dir)
+    if sock is None:
+        return None
+
+    sock.settimeout(timeout + 10)
+    try:
+        with sock, sock.makefile('rwb') as stream, trace.subprocess_timer():
+            request = {'file': relative_path, 'since': since, 'timeout': timeout}
+            stream.write(json.dumps(request).encode() + b"\n")
+            stream.flush()
+            reply = json.loads(stream.readline())
+    except (OSError, ValueError):
+        return None
+
+    if 'error' in reply:
+        return None
+    return reply
+
+
+if __name__ == '__main__':
+    serve(sys.argv[1] if len(sys.argv) > 1 else os.getcwd())
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+SessionStart Hook: Path Index
+
+Classifies every tracked and untracked project path once for the Read and
+Edit/Write checks (auto-approve-reads.py, file-protection.py) so they
+answer with a single lookup (hooklib/pathindex.py). Refreshes only what
+changed since the last session; prints nothing.
+"""
+
+import json
+import os
+import sys
+
+from hooklib import get_project_dir, pathindex
+
+
+def main():
+    try:
+        json.load(sys.stdin)
+    except json.JSONDecodeError:
+        pass
+
+    if os.environ.get(pathindex.INDEX_ENV_FLAG) == '0':
+        return
+
+    pathindex.refresh(get_project_dir(), os.path.dirname(os.path.realpath(__file__)))
+
+
+if __name__ == "__main__":
+    main()
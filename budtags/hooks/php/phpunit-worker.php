@@ -0,0 +1,75 @@
+<?php
+
+/**
+ * Pre-booted PHPUnit worker for the post-edit-tests pool (hooklib/testpool.py).
+ *
+ * Started with the project root as cwd. Loads the Composer autoloader and
+ * the test base classes up front, prints READY followed by the project files
+ * it loaded (JSON; the pool retires the worker when one changes), then
+ * blocks until the pool
+ * sends one JSON line: {"args": ["tests/Unit/FooTest.php", ...], "env": {...}}.
+ * It runs PHPUnit in-process with those arguments and exits with PHPUnit's
+ * status. Workers are single-use so no state leaks between runs; the pool
+ * keeps spares booted ahead of time.
+ *
+ * The Laravel application is deliberately NOT bootstrapped here: doing so
+ * would load .env into the process environment before phpunit.xml gets a
+ * chance to set APP_ENV/DB_* for testing.
+ */
+
+$autoload = getcwd() . '/vendor/autoload.php';
+if (!file_exists($autoload)) {
+    fwrite(STDOUT, "UNAVAILABLE vendor/autoload.php not found\n");
+    exit(1);
+}
+
+require $autoload;
+
+// Warm the class loader with what every test run needs anyway
+foreach ([
+    'PHPUnit\\TextUI\\Application',
+    'PHPUnit\\TextUI\\Command',
+    'PHPUnit\\Framework\\TestCase',
+    'Illuminate\\Foundation\\Application',
+    'Illuminate\\Foundation\\Testing\\TestCase',
+    'Tests\\TestCase',
+] as $class) {
+    class_exists($class);
+}
+
+// Project files now baked into this worker (tests/TestCase.php, ...)
+$root = (realpath(getcwd()) ?: getcwd()) . '/';
+$preloaded = [];
+foreach (get_included_files() as $file) {
+    if (str_starts_with($file, $root) && !str_starts_with($file, $root . 'vendor/')) {
+        $preloaded[] = substr($file, strlen($root));
+    }
+}
+
+fwrite(STDOUT, 'READY ' . json_encode($preloaded, JSON_UNESCAPED_SLASHES) . "\n");
+fflush(STDOUT);
+
+$line = fgets(STDIN);
+if ($line === false) {
+    // Pool recycled this worker before using it
+    exit(0);
+}
+
+$request = json_decode($line, true);
+
+// e.g. LARAVEL_PARALLEL_TESTING/TEST_TOKEN for a parallel shard
+foreach ($request['env'] ?? [] as $name => $value) {
+    putenv("{$name}={$value}");
+    $_ENV[$name] = $_SERVER[$name] = $value;
+}
+$argv = array_merge(['phpunit'], $request['args'] ?? []);
+$_SERVER['argv'] = $argv;
+$_SERVER['argc'] = count($argv);
+
+if (class_exists('PHPUnit\\TextUI\\Application')) {
+    // PHPUnit 10+
+    exit((new PHPUnit\TextUI\Application)->run($argv));
+}
+
+// PHPUnit 9
+exit((new PHPUnit\TextUI\Command)->run($argv, false));
@@ -3,15 +3,37 @@
 PostToolUse Hook: Auto-Run Related Tests
 
 After editing files, automatically runs the corresponding validation:
-- app/**/*.php       → runs matching PHPUnit test in tests/Unit or tests/Feature
+- app/**/*.php       → runs matching PHPUnit tests in tests/Unit or tests/Feature,
+                       plus every test the dependency index (hooklib/testindex.py)
+                       says references the edited class
 - tests/**/*Test.php → re-runs the edited test file itself
-- resources/js/**/*.tsx|ts → runs TypeScript type-check (npx tsc --noEmit)
+- resources/js/**/*.tsx|ts → runs TypeScript type-check (persistent tsc --watch, or npx tsc --noEmit)
+
+Selected test files run as concurrent shards, one per CPU (hooklib/parallel.py),
+and concurrent edits that need the same validation share one run
+(hooklib/coalesce.py). Test and cold tsc runs from every session on the
+project queue for one shared process budget (hooklib/broker.py). Passing
+results are cached by content hash (hooklib/resultcache.py) so unchanged
+code isn't re-validated.
 """
 
 import json
 import os
 import subprocess
 import sys
+import threading
+import time
+
+from hooklib import broker, coalesce, parallel, resultcache, streaming, testindex, testpool, tscwatch
+
+# Most test files run for one edit (highest-ranked first)
+MAX_AFFECTED_TESTS = 10
+
+# Seconds before a test run is killed
+TEST_TIMEOUT = 120
+
+# Seconds to wait for a type-check
+TYPECHECK_TIMEOUT = 120
 
 
 def get_test_paths(file_path: str, project_dir: str) -> list[str]:
@@ -51,68 +73,185 @@ def get_test_paths(file_path: str, project_dir: str) -> list[str]:
     return test_paths
 
 
-def run_tests(test_path: str, project_dir: str) -> tuple[int, str]:
+def find_affected_tests(file_path: str, project_dir: str) -> list[str]:
     """
-    Run PHPUnit tests for the given test file.
+    Rank the test files to run after editing an app/ file.
 
-    Returns (return_code, output)
+    Convention-named tests (get_test_paths) come first, followed by every
+    other test the dependency index says references the edited class or a
+    class that uses it.
     """
+    ranked = []
+    for test_path in get_test_paths(file_path, project_dir):
+        if os.path.exists(test_path) and test_path not in ranked:
+            ranked.append(test_path)
+
+    relative_path = file_path
+    if file_path.startswith(project_dir):
+        relative_path = file_path[len(project_dir):].lstrip('/')
+
     try:
-        result = subprocess.run(
-            ['php', 'artisan', 'test', test_path, '--compact'],
-            cwd=project_dir,
-            capture_output=True,
-            text=True,
-            timeout=120  # 2 minute timeout
+        for test, _score in testindex.affected_tests(project_dir, relative_path):
+            test_path = os.path.join(project_dir, test)
+            if test_path not in ranked:
+                ranked.append(test_path)
+    except OSError:
+        # Index unavailable - the convention-named tests still run
+        pass
+
+    return ranked
+
+
+def run_tests(test_paths: list[str], project_dir: str, cancelled: threading.Event | None = None,
+              env: dict[str, str] | None = None) -> tuple[int, str, str]:
+    """
+    Run PHPUnit tests for the given test files in one invocation.
+
+    Uses a pre-booted worker from the test pool (hooklib/testpool.py) when
+    one is available, otherwise a cold `php artisan test`, which is killed
+    if `cancelled` is set (raising coalesce.Cancelled). `env` is added to
+    the test process environment. Output is streamed and trimmed to the
+    failures and summary (hooklib/streaming.py).
+
+    Returns (return_code, output, timing) where timing names the runner
+    and its latency, e.g. "warm pool, 0.84s"
+    """
+    start = time.monotonic()
+
+    pooled = testpool.run_tests(project_dir, test_paths, TEST_TIMEOUT, env)
+    if pooled is not None:
+        return pooled['returncode'], pooled['output'], f"warm pool, {time.monotonic() - start:.2f}s"
+
+    try:
+        output = streaming.PhpUnitOutput()
+        return_code = streaming.run_command(
+            ['php', 'artisan', 'test', *test_paths, '--compact'],
+            project_dir,
+            TEST_TIMEOUT,
+            output,
+            cancelled,
+            env
         )
-        output = result.stdout + result.stderr
-        return result.returncode, output
+        return return_code, output.text(), f"cold, {time.monotonic() - start:.2f}s"
+    except coalesce.Cancelled:
+        raise
     except subprocess.TimeoutExpired:
-        return 1, "Test execution timed out (120s limit)"
+        return 1, f"Test execution timed out ({TEST_TIMEOUT}s limit)", f"cold, {time.monotonic() - start:.2f}s"
     except Exception as e:
-        return 1, f"Error running tests: {e}"
+        return 1, f"Error running tests: {e}", f"cold, {time.monotonic() - start:.2f}s"
+
 
+def run_test_shards(test_paths: list[str], project_dir: str, cancelled: threading.Event) -> dict:
+    """
+    Split the test files into shards and run them concurrently.
+
+    The run is a job of the project's job broker (hooklib/broker.py): it
+    waits for its turn in the budget shared by every session, and gets one
+    shard per slot the broker grants, at most one per CPU. Each shard's
+    TEST_TOKEN is one of the job's slots, so no concurrent run shares its
+    test database.
 
-def run_typecheck(file_path: str, project_dir: str) -> tuple[int, str]:
+    Returns the aggregated parallel.run_tasks() result.
     """
-    Run TypeScript type-check and filter to errors in the edited file only.
+    def run(tokens: list[int]) -> dict:
+        shards = parallel.shard(test_paths, len(tokens))
+        tasks = []
+        for token, shard in zip(tokens, shards):
+            name = ', '.join(p.replace(project_dir + '/', '') for p in shard)
+            env = parallel.test_env(token)
+            tasks.append((name, lambda shard=shard, env=env: run_tests(shard, project_dir, cancelled, env)))
+        return parallel.run_tasks(tasks)
+
+    key = 'tests:' + '\n'.join(sorted(test_paths))
+    return broker.run(project_dir, key, run, cancelled, want=min(len(test_paths), parallel.max_jobs()))
+
+
+def run_coalesced_tests(test_paths: list[str], project_dir: str, edit: str) -> tuple[int, str, str, list[str]]:
+    """
+    Run tests once for every concurrent edit that selected the same test files.
+
+    Returns (return_code, output, timing, edits) where output holds the
+    failing shards' output, timing the wall-clock and per-shard timings,
+    and edits the project-relative files whose edits this run covered
+    (including `edit`).
+    """
+    key = 'tests:' + '\n'.join(sorted(test_paths))
+    result, edits = coalesce.Coalescer(project_dir, key).run(
+        edit, lambda cancelled: run_test_shards(test_paths, project_dir, cancelled))
+    return result['returncode'], parallel.failure_output(result), parallel.describe_timing(result), edits
+
+
+def coalesced_note(edits: list[str], edit: str) -> str:
+    """Mention the other edits a shared run covered, e.g. "; also covered app/Models/Item.php"."""
+    others = sorted(set(edits) - {edit})
+    if not others:
+        return ""
+    return f"; also covered {', '.join(others)}"
+
 
+def run_cold_typecheck(project_dir: str, cancelled: threading.Event) -> tuple[int, dict[str, list[str]]]:
+    """
+    Run a full (incremental) `npx tsc` as a job of the project's job broker.
+
+    Returns (return_code, {file: diagnostic lines}).
+    """
+    def run(_tokens: list[int]) -> tuple[int, dict[str, list[str]]]:
+        output = streaming.TscOutput()
+        return_code = streaming.run_command(tscwatch.TSC_COMMAND, project_dir, TYPECHECK_TIMEOUT, output, cancelled)
+        return return_code, output.errors_by_file()
+
+    return broker.run(project_dir, 'tsc', run, cancelled)
+
+
+def run_typecheck(file_path: str, project_dir: str) -> tuple[int, str, str]:
+    """
+    Run TypeScript type-check and filter to errors caused by the edited file.
+
+    Asks the project's persistent `tsc --watch` (hooklib/tscwatch.py) first,
+    which also reports errors the edit introduced in importing files. Falls
+    back to a cold, incremental `npx tsc` that only reports the edited file.
     Uses --skipLibCheck to ignore node_modules declaration errors.
-    Returns (return_code, output) where output only contains errors
-    from the edited file.
+
+    Returns (return_code, output, timing) where output only contains the
+    relevant errors and timing names the checker and its latency.
     """
+    relative = file_path
+    if file_path.startswith(project_dir):
+        relative = file_path[len(project_dir):].lstrip('/')
+
+    start = time.monotonic()
+
     try:
-        result = subprocess.run(
-            ['npx', 'tsc', '--noEmit', '--skipLibCheck', '--pretty', 'false'],
-            cwd=project_dir,
-            capture_output=True,
-            text=True,
-            timeout=120
-        )
+        since = os.path.getmtime(file_path)
+    except OSError:
+        since = time.time()
+    watched = tscwatch.check(project_dir, relative, since, TYPECHECK_TIMEOUT)
+    if watched is not None:
+        errors = watched['errors']
+        return (1 if errors else 0), '\n'.join(errors), f"tsc watch, {time.monotonic() - start:.2f}s"
 
-        if result.returncode == 0:
-            return 0, ""
+    try:
+        # Concurrent edits share one full run; each filters its own errors
+        (return_code, errors), _edits = coalesce.Coalescer(project_dir, 'tsc').run(
+            relative, lambda cancelled: run_cold_typecheck(project_dir, cancelled))
+        timing = f"cold, {time.monotonic() - start:.2f}s"
 
-        # Filter output to only errors in the edited file
-        relative = file_path
-        if file_path.startswith(project_dir):
-            relative = file_path[len(project_dir):].lstrip('/')
+        if return_code == 0:
+            return 0, "", timing
 
-        relevant_lines = []
-        for line in result.stdout.split('\n'):
-            if line.startswith(relative):
-                relevant_lines.append(line)
+        # Only errors in the edited file
+        relevant_lines = errors.get(relative, [])
 
         if not relevant_lines:
             # Errors exist but not in the edited file — don't block
-            return 0, ""
+            return 0, "", timing
 
-        return 1, '\n'.join(relevant_lines)
+        return 1, '\n'.join(relevant_lines), timing
 
     except subprocess.TimeoutExpired:
-        return 1, "TypeScript type-check timed out (120s limit)"
+        return 1, f"TypeScript type-check timed out ({TYPECHECK_TIMEOUT}s limit)", f"cold, {time.monotonic() - start:.2f}s"
     except Exception as e:
-        return 1, f"Error running type-check: {e}"
+        return 1, f"Error running type-check: {e}", f"cold, {time.monotonic() - start:.2f}s"
 
 
 def is_typescript_file(file_path: str, project_dir: str) -> bool:
@@ -141,70 +280,94 @@ def is_test_file(file_path: str, project_dir: str) -> str | None:
 
 
 def handle_php_source(file_path: str, project_dir: str) -> None:
-    """Handle editing an app/ PHP source file — find and run matching tests."""
+    """Handle editing an app/ PHP source file — find and run affected tests."""
     test_paths = get_test_paths(file_path, project_dir)
 
     if not test_paths:
         return
 
-    # Find the first existing test file
-    existing_test = None
-    for test_path in test_paths:
-        if os.path.exists(test_path):
-            existing_test = test_path
-            break
+    affected_tests = find_affected_tests(file_path, project_dir)
 
-    if not existing_test:
-        relative_path = file_path
-        if file_path.startswith(project_dir):
-            relative_path = file_path[len(project_dir):].lstrip('/')
+    relative_path = file_path
+    if file_path.startswith(project_dir):
+        relative_path = file_path[len(project_dir):].lstrip('/')
 
+    if not affected_tests:
         print(f"ℹ️ No test file found for {relative_path}")
         print(f"   Checked: {', '.join([p.replace(project_dir + '/', '') for p in test_paths[:2]])}")
         return
 
-    return_code, output = run_tests(existing_test, project_dir)
+    selected = affected_tests[:MAX_AFFECTED_TESTS]
+    selected_relative = [p.replace(project_dir + '/', '') for p in selected]
+    relative_tests = ', '.join(selected_relative)
+    skipped = len(affected_tests) - len(selected)
+
+    cache = resultcache.open_cache(project_dir)
+    hit, cache_key = resultcache.cached_pass(cache, resultcache.PHP_TESTS, selected_relative)
+    if hit:
+        print(f"✅ Tests passed: {relative_tests} (cached, no changes since they last passed)")
+        if skipped:
+            print(f"ℹ️ {skipped} more affected test file(s) not run (limit {MAX_AFFECTED_TESTS})")
+        return
 
-    relative_test = existing_test
-    if existing_test.startswith(project_dir):
-        relative_test = existing_test[len(project_dir):].lstrip('/')
+    return_code, output, timing, edits = run_coalesced_tests(selected, project_dir, relative_path)
 
     if return_code != 0:
         result = {
             "decision": "block",
-            "reason": f"Tests failed in {relative_test}:\n\n{output}\n\nPlease fix the failing tests before continuing."
+            "reason": f"Tests failed in {relative_tests} after editing {relative_path} ({timing}{coalesced_note(edits, relative_path)}):\n\n{output}\n\nPlease fix the failing tests before continuing."
         }
         print(json.dumps(result))
     else:
-        print(f"✅ Tests passed: {relative_test}")
+        print(f"✅ Tests passed: {relative_tests} ({timing}{coalesced_note(edits, relative_path)})")
+        resultcache.remember_pass(cache, resultcache.PHP_TESTS, selected_relative, cache_key, relative_tests)
+
+    if skipped:
+        print(f"ℹ️ {skipped} more affected test file(s) not run (limit {MAX_AFFECTED_TESTS})")
 
 
 def handle_test_file(test_path: str, project_dir: str) -> None:
     """Handle editing a test file — re-run it to verify it passes."""
-    return_code, output = run_tests(test_path, project_dir)
-
     relative_test = test_path
     if test_path.startswith(project_dir):
         relative_test = test_path[len(project_dir):].lstrip('/')
 
+    # So the next edit of a class this test uses selects it
+    testindex.update(project_dir, relative_test)
+
+    cache = resultcache.open_cache(project_dir)
+    hit, cache_key = resultcache.cached_pass(cache, resultcache.PHP_TESTS, [relative_test])
+    if hit:
+        print(f"✅ Tests passed: {relative_test} (cached, no changes since it last passed)")
+        return
+
+    return_code, output, timing, edits = run_coalesced_tests([test_path], project_dir, relative_test)
+
     if return_code != 0:
         result = {
             "decision": "block",
-            "reason": f"Edited test is failing in {relative_test}:\n\n{output}\n\nPlease fix the test before continuing."
+            "reason": f"Edited test is failing in {relative_test} ({timing}{coalesced_note(edits, relative_test)}):\n\n{output}\n\nPlease fix the test before continuing."
         }
         print(json.dumps(result))
     else:
-        print(f"✅ Tests passed: {relative_test}")
+        print(f"✅ Tests passed: {relative_test} ({timing}{coalesced_note(edits, relative_test)})")
+        resultcache.remember_pass(cache, resultcache.PHP_TESTS, [relative_test], cache_key, relative_test)
 
 
 def handle_typescript(file_path: str, project_dir: str) -> None:
     """Handle editing a TypeScript file — run type-check."""
-    return_code, output = run_typecheck(file_path, project_dir)
-
     relative_path = file_path
     if file_path.startswith(project_dir):
         relative_path = file_path[len(project_dir):].lstrip('/')
 
+    cache = resultcache.open_cache(project_dir)
+    hit, cache_key = resultcache.cached_pass(cache, resultcache.TYPECHECK, [relative_path])
+    if hit:
+        print(f"✅ Type-check passed: {relative_path} (cached, no changes since it last passed)")
+        return
+
+    return_code, output, timing = run_typecheck(file_path, project_dir)
+
     if return_code != 0:
         # Trim output to relevant errors (tsc can be verbose)
         lines = output.strip().split('\n')
@@ -213,11 +376,12 @@ def handle_typescript(file_path: str, project_dir: str) -> None:
 
         result = {
             "decision": "block",
-            "reason": f"TypeScript errors after editing {relative_path}:\n\n{output}\n\nPlease fix the type errors before continuing."
+            "reason": f"TypeScript errors after editing {relative_path} ({timing}):\n\n{output}\n\nPlease fix the type errors before continuing."
         }
         print(json.dumps(result))
     else:
-        print(f"✅ Type-check passed: {relative_path}")
+        print(f"✅ Type-check passed: {relative_path} ({timing})")
+        resultcache.remember_pass(cache, resultcache.TYPECHECK, [relative_path], cache_key, relative_path)
 
 
 def main():
@@ -2,68 +2,128 @@
 """
 PreToolUse Hook: Block Git Commit Without Validation
 
-Blocks `git commit` commands unless /pre-commit has been run recently.
-Checks for .claude/.pre-commit-passed state file with a 2-minute validity window.
+Blocks `git commit` commands unless /pre-commit has validated every staged
+code file. /pre-commit records the git blob hash of each file it checks in a
+manifest (hooklib/precommit.py); a commit is allowed when every staged
+.php/.ts/.tsx blob is in it, no matter how long ago it was validated.
 """
 
 import json
 import os
-import re
 import sys
-import time
 
+from hooklib import precommit, shell
 
-# How long the pre-commit pass is valid (in seconds)
-VALIDITY_WINDOW = 120  # 2 minutes
+# How many unvalidated files to name in the deny message
+MAX_LISTED_FILES = 10
 
-STATE_FILE = ".claude/.pre-commit-passed"
+# git commit options that take a value (-ma is -m with the message "a")
+COMMIT_VALUE_OPTIONS = {'-m', '-F', '-c', '-C', '-t', '--message', '--file', '--reuse-message',
+                        '--reedit-message', '--template', '--author', '--date', '--fixup', '--squash',
+                        '--trailer', '--cleanup'}
 
 
 def is_git_commit_command(command: str) -> bool:
-    """Check if the command is a git commit."""
-    # Match various git commit patterns
-    patterns = [
-        r'\bgit\s+commit\b',           # git commit
-        r'\bgit\s+.*\s+commit\b',      # git -c ... commit
-    ]
-
-    for pattern in patterns:
-        if re.search(pattern, command, re.IGNORECASE):
+    """Check if the command runs a git commit (see hooklib/shell.py)."""
+    for argv in shell.commands(command):
+        git = shell.git_subcommand(argv)
+        if git and git[0] == 'commit':
             return True
 
     return False
 
 
-def check_pre_commit_state() -> tuple[bool, str]:
+def stages_before_commit(command: str) -> str:
     """
-    Check if pre-commit has been run recently.
+    Whether the command stages more files as part of committing.
+
+    Returns:
+        "all" for `git add ... && git commit`, "tracked" for `git commit -a`, "" otherwise
+    """
+    added = False
+    for argv in shell.commands(command):
+        git = shell.git_subcommand(argv)
+        if git is None:
+            continue
+        subcommand, args = git
+        if subcommand == 'add':
+            added = True
+        elif subcommand == 'commit':
+            if added:
+                return "all"
+            if shell.options(args, COMMIT_VALUE_OPTIONS) & {'-a', '--all'}:
+                return "tracked"
+            return ""
+
+    return ""
+
+
+def check_pre_commit_state(command: str) -> tuple[bool, str]:
+    """
+    Check that /pre-commit validated everything the commit will contain.
 
     Returns:
         (is_valid, message)
     """
     project_dir = os.environ.get('CLAUDE_PROJECT_DIR', os.getcwd())
-    state_path = os.path.join(project_dir, STATE_FILE)
-
-    if not os.path.exists(state_path):
-        return False, "Run /pre-commit first. Modified files need PHPStan/Pint validation."
 
+    staging = stages_before_commit(command)
     try:
-        # Check file modification time
-        mtime = os.path.getmtime(state_path)
-        age = time.time() - mtime
+        if staging == "all":
+            worktree_paths = precommit.changed_files(project_dir)
+        elif staging == "tracked":
+            worktree_paths = precommit.modified_tracked(project_dir)
+        else:
+            worktree_paths = []
+        unvalidated = precommit.unvalidated_staged(project_dir, worktree_paths)
+    except precommit.GitError as e:
+        # Without the staged blobs nothing can be vouched for
+        return False, f"Could not check the staged files against /pre-commit ({e}). Commit blocked."
+
+    if not unvalidated:
+        return True, "Pre-commit passed for every staged file"
+
+    listed = ', '.join(unvalidated[:MAX_LISTED_FILES])
+    if len(unvalidated) > MAX_LISTED_FILES:
+        listed += f" (+{len(unvalidated) - MAX_LISTED_FILES} more)"
+    message = (f"Run /pre-commit first. {len(unvalidated)} staged file(s) changed since they were "
+               f"last validated and need PHPStan/Pint validation: {listed}")
+    failure = precommit.last_run_failure(project_dir)
+    if failure:
+        message += f". The last /pre-commit run failed ({failure})"
+    return False, message
+
+
+def evaluate(input_data: dict) -> dict | None:
+    """
+    Decide on a Bash tool call.
+
+    Returns:
+        A deny decision for unvalidated commits, None otherwise
+    """
+    tool_input = input_data.get('tool_input', {})
+    command = tool_input.get('command', '')
 
-        if age > VALIDITY_WINDOW:
-            minutes_ago = int(age / 60)
-            return False, f"Pre-commit validation expired ({minutes_ago} min ago). Run /pre-commit again."
+    if not command:
+        return None
+
+    # Only check git commit commands
+    if not is_git_commit_command(command):
+        return None
 
-        # Read the state file for additional context
-        with open(state_path, 'r') as f:
-            content = f.read().strip()
+    is_valid, message = check_pre_commit_state(command)
 
-        return True, f"Pre-commit passed: {content}"
+    if is_valid:
+        # Output nothing to allow the command to proceed
+        return None
 
-    except (IOError, OSError) as e:
-        return False, f"Error checking pre-commit state: {e}"
+    return {
+        "hookSpecificOutput": {
+            "hookEventName": "PreToolUse",
+            "permissionDecision": "deny",
+            "permissionDecisionReason": message
+        }
+    }
 
 
 def main():
@@ -73,28 +133,9 @@ def main():
     except json.JSONDecodeError:
         return
 
-    tool_input = input_data.get('tool_input', {})
-    command = tool_input.get('command', '')
-
-    if not command:
-        return
-
-    # Only check git commit commands
-    if not is_git_commit_command(command):
-        return
-
-    is_valid, message = check_pre_commit_state()
-
-    if not is_valid:
-        result = {
-            "hookSpecificOutput": {
-                "hookEventName": "PreToolUse",
-                "permissionDecision": "deny",
-                "permissionDecisionReason": message
-            }
-        }
+    result = evaluate(input_data)
+    if result:
         print(json.dumps(result))
-    # If valid, output nothing to allow the command to proceed
 
 
 if __name__ == "__main__":
@@ -7,28 +7,39 @@ while blocking sensitive files like .env and lock files.
 """
 
 import json
+import os
 import re
 import sys
 
+# hooklib lives in the parent hooks/ directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
 
-# Patterns that are safe to auto-approve
+from hooklib import get_project_dir, pathindex  # noqa: E402
+from hooklib.patterns import PatternTable  # noqa: E402
+
+DOCUMENTATION = "Safe read: documentation file"
+CONFIGURATION = "Safe read: configuration file"
+CLAUDE_CONFIG = "Safe read: Claude configuration"
+SAFE_FILE = "Safe read: safe file pattern"
+
+# Patterns that are safe to auto-approve, with the reason reported
 SAFE_PATTERNS = [
-    r'\.md$',                    # Markdown docs
-    r'\.txt$',                   # Text files
-    r'\.json$',                  # JSON configs (filtered below)
-    r'\.ya?ml$',                 # YAML configs
-    r'\.claude/',                # Claude config directory
-    r'CLAUDE\.md$',              # Project instructions
-    r'README',                   # README files
-    r'/docs?/',                  # Documentation directories
-    r'\.gitignore$',             # Git ignore
-    r'\.editorconfig$',          # Editor config
-    r'tsconfig.*\.json$',        # TypeScript configs
-    r'phpunit\.xml$',            # PHPUnit config
-    r'phpstan.*\.neon$',         # PHPStan config
-    r'vite\.config\.',           # Vite config
-    r'tailwind\.config\.',       # Tailwind config
-    r'eslint\.config\.',         # ESLint config
+    {"pattern": r'\.md$', "reason": DOCUMENTATION},                # Markdown docs
+    {"pattern": r'\.txt$', "reason": SAFE_FILE},                   # Text files
+    {"pattern": r'\.json$', "reason": CONFIGURATION},              # JSON configs (filtered below)
+    {"pattern": r'\.ya?ml$', "reason": SAFE_FILE},                 # YAML configs
+    {"pattern": r'\.claude/', "reason": CLAUDE_CONFIG},            # Claude config directory
+    {"pattern": r'CLAUDE\.md$', "reason": DOCUMENTATION},          # Project instructions
+    {"pattern": r'README', "reason": DOCUMENTATION},               # README files
+    {"pattern": r'/docs?/', "reason": SAFE_FILE},                  # Documentation directories
+    {"pattern": r'\.gitignore$', "reason": SAFE_FILE},             # Git ignore
+    {"pattern": r'\.editorconfig$', "reason": SAFE_FILE},          # Editor config
+    {"pattern": r'tsconfig.*\.json$', "reason": CONFIGURATION},    # TypeScript configs
+    {"pattern": r'phpunit\.xml$', "reason": SAFE_FILE},            # PHPUnit config
+    {"pattern": r'phpstan.*\.neon$', "reason": SAFE_FILE},         # PHPStan config
+    {"pattern": r'vite\.config\.', "reason": SAFE_FILE},           # Vite config
+    {"pattern": r'tailwind\.config\.', "reason": SAFE_FILE},       # Tailwind config
+    {"pattern": r'eslint\.config\.', "reason": SAFE_FILE},         # ESLint config
 ]
 
 # Patterns to never auto-approve (require confirmation)
@@ -47,6 +58,34 @@ BLOCK_PATTERNS = [
     r'secrets?\.json$',          # Secret files
 ]
 
+BLOCK_TABLE = PatternTable([{"pattern": p} for p in BLOCK_PATTERNS], re.IGNORECASE)
+SAFE_TABLE = PatternTable(SAFE_PATTERNS, re.IGNORECASE)
+
+# Path index column (hooklib/pathindex.py): 0 = no match, 1 + i = BLOCK_PATTERNS[i],
+# SAFE_CODE + j = SAFE_PATTERNS[j]
+PATH_INDEX_COLUMN = 'read'
+PATH_INDEX_RULES = pathindex.rules_signature(__file__)
+PATH_INDEX_HOOKS_DIR = os.path.dirname(os.path.realpath(__file__))
+SAFE_CODE = 1 + len(BLOCK_PATTERNS)
+
+
+def classify_path(file_path: str) -> int:
+    """Classify a path against the block and safe tables as a path index code."""
+    blocked = BLOCK_TABLE.index(file_path)
+    if blocked >= 0:
+        return 1 + blocked
+    safe = SAFE_TABLE.index(file_path)
+    if safe >= 0:
+        return SAFE_CODE + safe
+    return 0
+
+
+def warm() -> None:
+    """Compile the tables and map the path index; the daemon calls this before forking."""
+    BLOCK_TABLE.compile()
+    SAFE_TABLE.compile()
+    pathindex.open_index(get_project_dir(), PATH_INDEX_HOOKS_DIR)
+
 
 def is_safe_read(file_path: str) -> tuple[bool, str]:
     """
@@ -55,55 +94,63 @@ def is_safe_read(file_path: str) -> tuple[bool, str]:
     Returns:
         (should_approve, reason)
     """
-    # First check block patterns - these are never auto-approved
-    for pattern in BLOCK_PATTERNS:
-        if re.search(pattern, file_path, re.IGNORECASE):
-            return False, f"Sensitive file pattern: {pattern}"
-
-    # Then check safe patterns
-    for pattern in SAFE_PATTERNS:
-        if re.search(pattern, file_path, re.IGNORECASE):
-            # Determine a friendly reason
-            if '.md' in pattern or 'README' in pattern:
-                reason = "Safe read: documentation file"
-            elif '.json' in pattern or '.yaml' in pattern or '.yml' in pattern:
-                reason = "Safe read: configuration file"
-            elif '.claude' in pattern or 'CLAUDE' in pattern:
-                reason = "Safe read: Claude configuration"
-            else:
-                reason = "Safe read: safe file pattern"
-            return True, reason
+    # Paths pre-classified at session start need a single lookup
+    code = pathindex.lookup(get_project_dir(), PATH_INDEX_HOOKS_DIR, PATH_INDEX_COLUMN, PATH_INDEX_RULES,
+                            file_path)
+    if code is None:
+        code = classify_path(file_path)
+
+    # Block patterns come first - these are never auto-approved
+    if 0 < code < SAFE_CODE:
+        return False, f"Sensitive file pattern: {BLOCK_PATTERNS[code - 1]}"
+
+    # Then safe patterns
+    if code >= SAFE_CODE:
+        return True, SAFE_PATTERNS[code - SAFE_CODE]["reason"]
 
     # Not matched by any pattern - let Claude Code handle normally
     return False, "No safe pattern match"
 
 
-def main():
-    # Read tool input from stdin
-    try:
-        input_data = json.load(sys.stdin)
-    except json.JSONDecodeError:
-        # If we can't parse input, don't interfere
-        return
+def evaluate(input_data: dict) -> dict | None:
+    """
+    Decide on a Read tool call.
 
+    Returns:
+        The hook output to emit, or None to leave the call alone
+    """
     tool_input = input_data.get('tool_input', {})
     file_path = tool_input.get('file_path', '')
 
     if not file_path:
         # No file path provided, don't interfere
-        return
+        return None
 
     should_approve, reason = is_safe_read(file_path)
 
-    if should_approve:
-        # Output the permission decision to auto-approve
-        result = {
-            "hookSpecificOutput": {
-                "hookEventName": "PreToolUse",
-                "permissionDecision": "allow",
-                "permissionDecisionReason": reason
-            }
+    if not should_approve:
+        return None
+
+    # Output the permission decision to auto-approve
+    return {
+        "hookSpecificOutput": {
+            "hookEventName": "PreToolUse",
+            "permissionDecision": "allow",
+            "permissionDecisionReason": reason
         }
+    }
+
+
+def main():
+    # Read tool input from stdin
+    try:
+        input_data = json.load(sys.stdin)
+    except json.JSONDecodeError:
+        # If we can't parse input, don't interfere
+        return
+
+    result = evaluate(input_data)
+    if result:
         print(json.dumps(result))
 
 
@@ -7,9 +7,16 @@ like .env, config files, migrations, routes, and service providers.
 """
 
 import json
+import os
 import re
 import sys
 
+# hooklib lives in the parent hooks/ directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from hooklib import get_project_dir, pathindex  # noqa: E402
+from hooklib.patterns import PatternTable  # noqa: E402
+
 
 # Protected file patterns with their context messages
 PROTECTED_PATTERNS = [
@@ -92,6 +99,24 @@ PROTECTED_PATTERNS = [
     },
 ]
 
+PROTECTED_TABLE = PatternTable(PROTECTED_PATTERNS, re.IGNORECASE)
+
+# Path index column (hooklib/pathindex.py): 0 = not protected, 1 + i = PROTECTED_PATTERNS[i]
+PATH_INDEX_COLUMN = 'edit'
+PATH_INDEX_RULES = pathindex.rules_signature(__file__)
+PATH_INDEX_HOOKS_DIR = os.path.dirname(os.path.realpath(__file__))
+
+
+def classify_path(file_path: str) -> int:
+    """Classify a path against the protected table as a path index code."""
+    return 1 + PROTECTED_TABLE.index(file_path)
+
+
+def warm() -> None:
+    """Compile the tables and map the path index; the daemon calls this before forking."""
+    PROTECTED_TABLE.compile()
+    pathindex.open_index(get_project_dir(), PATH_INDEX_HOOKS_DIR)
+
 
 def check_protected_file(file_path: str) -> tuple[bool, str, str]:
     """
@@ -100,40 +125,59 @@ def check_protected_file(file_path: str) -> tuple[bool, str, str]:
     Returns:
         (is_protected, message, context)
     """
-    for entry in PROTECTED_PATTERNS:
-        if re.search(entry["pattern"], file_path, re.IGNORECASE):
-            return True, entry["message"], entry["context"]
+    # Paths pre-classified at session start need a single lookup
+    code = pathindex.lookup(get_project_dir(), PATH_INDEX_HOOKS_DIR, PATH_INDEX_COLUMN, PATH_INDEX_RULES,
+                            file_path)
+    if code is None:
+        code = classify_path(file_path)
+
+    if code:
+        entry = PROTECTED_PATTERNS[code - 1]
+        return True, entry["message"], entry["context"]
 
     return False, "", ""
 
 
-def main():
-    # Read tool input from stdin
-    try:
-        input_data = json.load(sys.stdin)
-    except json.JSONDecodeError:
-        return
+def evaluate(input_data: dict) -> dict | None:
+    """
+    Decide on an Edit/Write tool call.
 
+    Returns:
+        The hook output to emit, or None to leave the call alone
+    """
     tool_input = input_data.get('tool_input', {})
     file_path = tool_input.get('file_path', '')
 
     if not file_path:
-        return
+        return None
 
     is_protected, message, context = check_protected_file(file_path)
 
-    if is_protected:
-        # Extract just the filename for the message
-        filename = file_path.split('/')[-1] if '/' in file_path else file_path
-
-        result = {
-            "hookSpecificOutput": {
-                "hookEventName": "PreToolUse",
-                "permissionDecision": "ask",
-                "permissionDecisionReason": f"{message}: {filename}",
-                "additionalContext": context
-            }
+    if not is_protected:
+        return None
+
+    # Extract just the filename for the message
+    filename = file_path.split('/')[-1] if '/' in file_path else file_path
+
+    return {
+        "hookSpecificOutput": {
+            "hookEventName": "PreToolUse",
+            "permissionDecision": "ask",
+            "permissionDecisionReason": f"{message}: {filename}",
+            "additionalContext": context
         }
+    }
+
+
+def main():
+    # Read tool input from stdin
+    try:
+        input_data = json.load(sys.stdin)
+    except json.JSONDecodeError:
+        return
+
+    result = evaluate(input_data)
+    if result:
         print(json.dumps(result))
 
 
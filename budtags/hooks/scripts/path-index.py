@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+SessionStart Hook: Path Index
+
+Classifies every tracked and untracked project path once for the Read and
+Edit/Write checks (auto-approve-reads.py, file-protection.py) so they
+answer with a single lookup (hooklib/pathindex.py). Refreshes only what
+changed since the last session; prints nothing.
+"""
+
+import json
+import os
+import sys
+
+# hooklib lives in the parent hooks/ directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from hooklib import get_project_dir, pathindex  # noqa: E402
+
+
+def main():
+    try:
+        json.load(sys.stdin)
+    except json.JSONDecodeError:
+        pass
+
+    if os.environ.get(pathindex.INDEX_ENV_FLAG) == '0':
+        return
+
+    pathindex.refresh(get_project_dir(), os.path.dirname(os.path.realpath(__file__)))
+
+
+if __name__ == "__main__":
+    main()
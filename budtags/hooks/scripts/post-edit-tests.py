@@ -2,15 +2,33 @@
 """
 PostToolUse Hook: Auto-Run Related Tests
 
-After editing PHP files in app/, automatically runs the corresponding test file.
+After editing PHP files in app/, automatically runs the corresponding test files.
 Maps app/Services/MetrcApi.php → tests/Unit/Services/MetrcApiTest.php
-Also checks tests/Feature/ for matching tests.
+Also checks tests/Feature/ for matching tests, plus every test the dependency
+index (hooklib/testindex.py) says references the edited class.
+Selected test files run as concurrent shards, one per CPU (hooklib/parallel.py),
+and concurrent edits that select the same tests share one run (hooklib/coalesce.py).
+Test runs from every session queue for one shared process budget (hooklib/broker.py).
+Passing results are cached by content hash (hooklib/resultcache.py).
 """
 
 import json
 import os
 import subprocess
 import sys
+import threading
+import time
+
+# hooklib lives in the parent hooks/ directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from hooklib import broker, coalesce, parallel, resultcache, streaming, testindex, testpool  # noqa: E402
+
+# Most test files run for one edit (highest-ranked first)
+MAX_AFFECTED_TESTS = 10
+
+# Seconds before a test run is killed
+TEST_TIMEOUT = 120
 
 
 def get_test_paths(file_path: str, project_dir: str) -> list[str]:
@@ -50,26 +68,120 @@ def get_test_paths(file_path: str, project_dir: str) -> list[str]:
     return test_paths
 
 
-def run_tests(test_path: str, project_dir: str) -> tuple[int, str]:
+def find_affected_tests(file_path: str, project_dir: str) -> list[str]:
     """
-    Run PHPUnit tests for the given test file.
+    Rank the test files to run after editing an app/ file.
 
-    Returns (return_code, output)
+    Convention-named tests (get_test_paths) come first, followed by every
+    other test the dependency index says references the edited class or a
+    class that uses it.
     """
+    ranked = []
+    for test_path in get_test_paths(file_path, project_dir):
+        if os.path.exists(test_path) and test_path not in ranked:
+            ranked.append(test_path)
+
+    relative_path = file_path
+    if file_path.startswith(project_dir):
+        relative_path = file_path[len(project_dir):].lstrip('/')
+
     try:
-        result = subprocess.run(
-            ['php', 'artisan', 'test', test_path, '--compact'],
-            cwd=project_dir,
-            capture_output=True,
-            text=True,
-            timeout=120  # 2 minute timeout
+        for test, _score in testindex.affected_tests(project_dir, relative_path):
+            test_path = os.path.join(project_dir, test)
+            if test_path not in ranked:
+                ranked.append(test_path)
+    except OSError:
+        # Index unavailable - the convention-named tests still run
+        pass
+
+    return ranked
+
+
+def run_tests(test_paths: list[str], project_dir: str, cancelled: threading.Event | None = None,
+              env: dict[str, str] | None = None) -> tuple[int, str, str]:
+    """
+    Run PHPUnit tests for the given test files in one invocation.
+
+    Uses a pre-booted worker from the test pool (hooklib/testpool.py) when
+    one is available, otherwise a cold `php artisan test`, which is killed
+    if `cancelled` is set (raising coalesce.Cancelled). `env` is added to
+    the test process environment. Output is streamed and trimmed to the
+    failures and summary (hooklib/streaming.py).
+
+    Returns (return_code, output, timing) where timing names the runner
+    and its latency, e.g. "warm pool, 0.84s"
+    """
+    start = time.monotonic()
+
+    pooled = testpool.run_tests(project_dir, test_paths, TEST_TIMEOUT, env)
+    if pooled is not None:
+        return pooled['returncode'], pooled['output'], f"warm pool, {time.monotonic() - start:.2f}s"
+
+    try:
+        output = streaming.PhpUnitOutput()
+        return_code = streaming.run_command(
+            ['php', 'artisan', 'test', *test_paths, '--compact'],
+            project_dir,
+            TEST_TIMEOUT,
+            output,
+            cancelled,
+            env
         )
-        output = result.stdout + result.stderr
-        return result.returncode, output
+        return return_code, output.text(), f"cold, {time.monotonic() - start:.2f}s"
+    except coalesce.Cancelled:
+        raise
     except subprocess.TimeoutExpired:
-        return 1, "Test execution timed out (120s limit)"
+        return 1, f"Test execution timed out ({TEST_TIMEOUT}s limit)", f"cold, {time.monotonic() - start:.2f}s"
     except Exception as e:
-        return 1, f"Error running tests: {e}"
+        return 1, f"Error running tests: {e}", f"cold, {time.monotonic() - start:.2f}s"
+
+
+def run_test_shards(test_paths: list[str], project_dir: str, cancelled: threading.Event) -> dict:
+    """
+    Split the test files into shards and run them concurrently.
+
+    The run is a job of the project's job broker (hooklib/broker.py): it
+    waits for its turn in the budget shared by every session, and gets one
+    shard per slot the broker grants, at most one per CPU. Each shard's
+    TEST_TOKEN is one of the job's slots, so no concurrent run shares its
+    test database.
+
+    Returns the aggregated parallel.run_tasks() result.
+    """
+    def run(tokens: list[int]) -> dict:
+        shards = parallel.shard(test_paths, len(tokens))
+        tasks = []
+        for token, shard in zip(tokens, shards):
+            name = ', '.join(p.replace(project_dir + '/', '') for p in shard)
+            env = parallel.test_env(token)
+            tasks.append((name, lambda shard=shard, env=env: run_tests(shard, project_dir, cancelled, env)))
+        return parallel.run_tasks(tasks)
+
+    key = 'tests:' + '\n'.join(sorted(test_paths))
+    return broker.run(project_dir, key, run, cancelled, want=min(len(test_paths), parallel.max_jobs()))
+
+
+def run_coalesced_tests(test_paths: list[str], project_dir: str, edit: str) -> tuple[int, str, str, list[str]]:
+    """
+    Run tests once for every concurrent edit that selected the same test files.
+
+    Returns (return_code, output, timing, edits) where output holds the
+    failing shards' output, timing the wall-clock and per-shard timings,
+    and edits the project-relative files whose edits this run covered
+    (including `edit`).
+    """
+    key = 'tests:' + '\n'.join(sorted(test_paths))
+    result, edits = coalesce.Coalescer(project_dir, key).run(
+        edit, lambda cancelled: run_test_shards(test_paths, project_dir, cancelled))
+    return result['returncode'], parallel.failure_output(result), parallel.describe_timing(result), edits
+
+
+def coalesced_note(edits: list[str], edit: str) -> str:
+    """Mention the other edits a shared run covered, e.g. "; also covered app/Models/Item.php"."""
+    others = sorted(set(edits) - {edit})
+    if not others:
+        return ""
+    return f"; also covered {', '.join(others)}"
 
 
 def main():
@@ -95,42 +207,51 @@ def main():
     if not test_paths:
         return
 
-    # Find the first existing test file
-    existing_test = None
-    for test_path in test_paths:
-        if os.path.exists(test_path):
-            existing_test = test_path
-            break
+    # Find every existing test file affected by the edit
+    affected_tests = find_affected_tests(file_path, project_dir)
 
-    if not existing_test:
-        # No test file found - output informational message but don't block
-        relative_path = file_path
-        if file_path.startswith(project_dir):
-            relative_path = file_path[len(project_dir):].lstrip('/')
+    relative_path = file_path
+    if file_path.startswith(project_dir):
+        relative_path = file_path[len(project_dir):].lstrip('/')
 
+    if not affected_tests:
+        # No test file found - output informational message but don't block
         # Output as plain text (not JSON) so it shows in conversation
         print(f"ℹ️ No test file found for {relative_path}")
         print(f"   Checked: {', '.join([p.replace(project_dir + '/', '') for p in test_paths[:2]])}")
         return
 
-    # Run the tests
-    return_code, output = run_tests(existing_test, project_dir)
+    # Run the highest-ranked tests
+    selected = affected_tests[:MAX_AFFECTED_TESTS]
+    selected_relative = [p.replace(project_dir + '/', '') for p in selected]
+    # Get relative test paths for display
+    relative_tests = ', '.join(selected_relative)
+    skipped = len(affected_tests) - len(selected)
+
+    cache = resultcache.open_cache(project_dir)
+    hit, cache_key = resultcache.cached_pass(cache, resultcache.PHP_TESTS, selected_relative)
+    if hit:
+        print(f"✅ Tests passed: {relative_tests} (cached, no changes since they last passed)")
+        if skipped:
+            print(f"ℹ️ {skipped} more affected test file(s) not run (limit {MAX_AFFECTED_TESTS})")
+        return
 
-    # Get relative test path for display
-    relative_test = existing_test
-    if existing_test.startswith(project_dir):
-        relative_test = existing_test[len(project_dir):].lstrip('/')
+    return_code, output, timing, edits = run_coalesced_tests(selected, project_dir, relative_path)
 
     if return_code != 0:
         # Tests failed - output decision to block with test output
         result = {
             "decision": "block",
-            "reason": f"Tests failed in {relative_test}:\n\n{output}\n\nPlease fix the failing tests before continuing."
+            "reason": f"Tests failed in {relative_tests} after editing {relative_path} ({timing}{coalesced_note(edits, relative_path)}):\n\n{output}\n\nPlease fix the failing tests before continuing."
         }
         print(json.dumps(result))
     else:
-        # Tests passed - output success message
-        print(f"✅ Tests passed: {relative_test}")
+        # Tests passed - output success message and remember it
+        print(f"✅ Tests passed: {relative_tests} ({timing}{coalesced_note(edits, relative_path)})")
+        resultcache.remember_pass(cache, resultcache.PHP_TESTS, selected_relative, cache_key, relative_tests)
+
+    if skipped:
+        print(f"ℹ️ {skipped} more affected test file(s) not run (limit {MAX_AFFECTED_TESTS})")
 
 
 if __name__ == "__main__":
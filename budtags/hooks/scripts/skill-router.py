@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+UserPromptSubmit Hook: Skill Router
+
+Replaces skill-forced-eval-hook.sh (the full routing table on every
+prompt) and ui-scope-reminder.sh (a grep alternation over UI phrases).
+Matches the prompt against the keywords every SKILL.md declares, in one
+pass (hooklib/skillrouter.py), and prints only the one or two matching
+agent/skill recommendations, plus the UI scope reminder for styling
+prompts. Prints nothing when no keyword matches.
+"""
+
+import json
+import os
+import sys
+
+# hooklib lives in the parent hooks/ directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from hooklib import skillrouter  # noqa: E402
+
+
+def main():
+    try:
+        input_data = json.load(sys.stdin)
+    except json.JSONDecodeError:
+        return
+
+    prompt = input_data.get('prompt', '')
+    if not isinstance(prompt, str) or not prompt:
+        return
+
+    project_dir = os.environ.get('CLAUDE_PROJECT_DIR', os.getcwd())
+    context = skillrouter.route_prompt(prompt, project_dir)
+    if context:
+        # Plain text output is injected directly into Claude's context
+        print(context)
+
+
+if __name__ == "__main__":
+    main()
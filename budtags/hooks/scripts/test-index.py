@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+SessionStart Hook: Test Index
+
+Brings the post-edit-tests dependency index (hooklib/testindex.py) up to
+date once per session, re-parsing only PHP files that changed since the
+last one, so each edit only has to re-index the edited file. Prints
+nothing.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+
+# hooklib lives in the parent hooks/ directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from hooklib import get_project_dir, testindex  # noqa: E402
+
+
+def main():
+    try:
+        json.load(sys.stdin)
+    except json.JSONDecodeError:
+        pass
+
+    try:
+        testindex.refresh(get_project_dir())
+    except (OSError, sqlite3.Error):
+        # post-edit-tests builds it on first use instead
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+SubagentStop Hook: Subagent Completion Check
+
+Replaces the prompt-type completion check, which asked an LLM about every
+subagent stop. Reads the subagent's transcript first (hooklib/
+subagentcheck.py): clear completions stop at once, clear give-ups are sent
+back with a reason, and only the ambiguous stops go to the evaluator prompt.
+"""
+
+import json
+import sys
+
+from hooklib import get_project_dir, subagentcheck
+
+
+def main():
+    try:
+        input_data = json.load(sys.stdin)
+    except json.JSONDecodeError:
+        return
+    if not isinstance(input_data, dict) or not subagentcheck.enabled():
+        return
+
+    decision = subagentcheck.evaluate(input_data, get_project_dir())
+    if decision:
+        print(json.dumps(decision))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Tests for hooklib.pathindex.
+
+    python3 -m unittest discover -s budtags/hooks/tests
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+HOOKS_DIR = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, HOOKS_DIR)
+
+from hooklib import pathindex  # noqa: E402
+from hooklib.loader import HookModuleCache  # noqa: E402
+
+PATHS = ['README.md', '.env', 'config/app.php', 'routes/web.php', 'app/Models/Package.php', 'composer.lock']
+
+
+class PathIndexTest(unittest.TestCase):
+    def setUp(self):
+        project = tempfile.TemporaryDirectory()
+        self.addCleanup(project.cleanup)
+        self.project = os.path.realpath(project.name)
+        subprocess.run(['git', 'init', '-q', self.project], check=True)
+        for relative in PATHS:
+            path = os.path.join(self.project, relative)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, 'w').close()
+
+        patcher = mock.patch.dict(os.environ, {'CLAUDE_PROJECT_DIR': self.project})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        modules = HookModuleCache(HOOKS_DIR)
+        self.reads = modules.get('auto-approve-reads.py')
+        self.protection = modules.get('file-protection.py')
+        self.checks = [self.reads, self.protection]
+        pathindex.refresh(self.project, HOOKS_DIR, self.checks)
+
+    def test_index_answers_like_the_tables(self):
+        for relative in PATHS + ['docs/new-file.md']:
+            path = os.path.join(self.project, relative)
+            for check in self.checks:
+                indexed = pathindex.lookup(self.project, HOOKS_DIR, check.PATH_INDEX_COLUMN,
+                                           check.PATH_INDEX_RULES, path)
+                if relative in PATHS:
+                    self.assertEqual(indexed, check.classify_path(path), (check.PATH_INDEX_COLUMN, relative))
+                else:
+                    self.assertIsNone(indexed)
+
+    def test_hit_does_not_compile_the_tables(self):
+        modules = HookModuleCache(HOOKS_DIR)
+        reads = modules.get('auto-approve-reads.py')
+        self.assertEqual(reads.is_safe_read(os.path.join(self.project, 'README.md')),
+                         (True, 'Safe read: documentation file'))
+        self.assertIsNone(reads.SAFE_TABLE._compiled)
+
+
+if __name__ == '__main__':
+    unittest.main()
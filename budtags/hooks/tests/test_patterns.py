@@ -0,0 +1,46 @@
+"""
+Tests for hooklib.patterns literal extraction.
+
+    python3 -m unittest discover -s budtags/hooks/tests
+"""
+
+import os
+import re
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from hooklib.patterns import PatternTable, required_literal  # noqa: E402
+
+
+class RequiredLiteralTest(unittest.TestCase):
+    def test_quantifier_bodies_are_not_literals(self):
+        self.assertEqual(required_literal('x{10}'), '')
+        self.assertEqual(required_literal('ab{2,3}c'), 'a')
+        self.assertEqual(required_literal('foo{2}bar'), 'bar')
+        self.assertEqual(required_literal(r'\.env{1,2}x'), '.en')
+
+    def test_literal_runs(self):
+        self.assertEqual(required_literal(r'composer\.lock$'), 'composer.lock')
+        self.assertEqual(required_literal(r'app/Providers/'), 'app/Providers/')
+        self.assertEqual(required_literal(r'\.env|secrets'), '')
+
+    def test_literal_is_in_every_match(self):
+        cases = {
+            'x{10}': 'xxxxxxxxxx',
+            'ab{2,3}c': 'abbc',
+            'foo{2}bar': 'fooobar',
+            'id-[0-9]{4}': 'id-2024',
+            '{abc': '{abc',
+        }
+        for pattern, text in cases.items():
+            with self.subTest(pattern=pattern):
+                self.assertIsNotNone(re.search(pattern, text))
+                self.assertIn(required_literal(pattern), text)
+                table = PatternTable([{'pattern': pattern}])
+                self.assertEqual(table.index(f"prefix {text} suffix"), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Tests for hooklib.testindex.
+
+    python3 -m unittest discover -s budtags/hooks/tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from hooklib import testindex  # noqa: E402
+
+SERVICE = """<?php
+
+namespace App\\Services;
+
+class MetrcApi
+{
+}
+"""
+
+TEST = """<?php
+
+namespace Tests\\Unit;
+
+use App\\Services\\MetrcApi;
+
+class PackageSyncTest extends TestCase
+{
+    public function test_sync(): void
+    {
+        $api = new MetrcApi();
+    }
+}
+"""
+
+
+class AffectedTestsTest(unittest.TestCase):
+    def setUp(self):
+        self.project = tempfile.TemporaryDirectory()
+        self.addCleanup(self.project.cleanup)
+        self.write('app/Services/MetrcApi.php', SERVICE)
+        self.write('tests/Unit/PackageSyncTest.php', TEST)
+
+    def write(self, relative: str, content: str) -> None:
+        path = os.path.join(self.project.name, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def test_never_refreshed_index_is_built_on_first_use(self):
+        # Opening the index (as update() does) must not mark it built
+        testindex.update(self.project.name, 'app/Services/MetrcApi.php')
+        self.assertFalse(testindex.TestIndex(self.project.name).built)
+
+        tests = testindex.affected_tests(self.project.name, 'app/Services/MetrcApi.php')
+        self.assertEqual([path for path, _score in tests], ['tests/Unit/PackageSyncTest.php'])
+        self.assertTrue(testindex.TestIndex(self.project.name).built)
+
+    def test_edited_test_is_reindexed(self):
+        testindex.refresh(self.project.name)
+        self.write('tests/Unit/PackageSyncTest.php', TEST.replace('MetrcApi', 'LeafLinkApi'))
+        testindex.update(self.project.name, 'tests/Unit/PackageSyncTest.php')
+        self.assertEqual(testindex.affected_tests(self.project.name, 'app/Services/MetrcApi.php'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Stub and Wrong Pattern Detection (single pass)
+
+The Python engine behind detect-stubs.sh and detect-wrong-patterns.sh. The
+shell versions run one grep per rule per file, which is thousands of
+processes on a --dir run over resources/js. This one reads each file once
+(mmap above MMAP_THRESHOLD), rejects clean files with one combined regex,
+runs the rules from a single compiled table only on files that hit, and
+spreads large file lists over a process pool.
+
+The report is byte-for-byte what the shell scripts print: same file order
+(find's traversal order for --dir), same grep -n lines, same colours, and
+the same echo -e escape handling. Exit codes match too:
+    0 = nothing found
+    1 = stubs / violations found
+    2 = usage error (no files)
+
+Usage (normally via the .sh wrappers):
+    python3 detect-patterns.py stubs|wrong-patterns [--prog NAME] [--jobs N] [--dir <directory>] [files...]
+
+Set BUDTAGS_DETECT_PYTHON=0 to make the wrappers use their grep
+implementation instead.
+"""
+
+import mmap
+import os
+import re
+import sys
+
+MMAP_THRESHOLD = 1 << 20
+# Below this many files a process pool costs more than it saves
+POOL_MIN_FILES = 64
+
+RED = r'\033[0;31m'
+GREEN = r'\033[0;32m'
+YELLOW = r'\033[1;33m'
+NC = r'\033[0m'
+
+# grep matches line by line, so nothing here may cross a newline: \s
+# becomes [^\S\n] and negated classes exclude \n.
+S = rb'[^\S\n]'
+
+PLACEHOLDER = rb'(//|/\*|\*).*\b(placeholder|stub|temporary|implement later|add logic here|needs implementation)\b'
+TODO = rb'//' + S + rb'*(TODO|FIXME|IMPLEMENT)'
+
+
+class Rule:
+    """One grep: lines matching `pattern` (minus `exclude`), reported under `label`."""
+
+    def __init__(self, pattern: bytes, label: str = '', exclude: bytes | None = None, gate: bytes | None = None):
+        self.source = pattern
+        self.pattern = re.compile(pattern)
+        self.label = label
+        self.exclude = re.compile(exclude) if exclude else None
+        self.gate = re.compile(gate) if gate else None
+
+
+class RuleSet:
+    """The rules for one set of extensions, with a combined pre-filter."""
+
+    def __init__(self, extensions: tuple[str, ...], rules: list[Rule], gate: bytes | None = None):
+        self.extensions = extensions
+        self.rules = rules
+        self.gate = re.compile(gate) if gate else None
+        self.any = re.compile(b'|'.join(b'(?:' + rule.source + b')' for rule in rules))
+
+
+STUB_RULES = [
+    RuleSet(('php',), [
+        Rule(TODO),
+        Rule(rb"throw new \\?(Runtime)?Exception\(['\"]Not implemented"),
+        Rule(rb'function \w+\([^)\n]*\)(' + S + rb'*:' + S + rb'*\w+)?' + S + rb'*\{' + S + rb'*\}'),
+        Rule(PLACEHOLDER),
+        Rule(rb'//' + S + rb'*\.\.\.'),
+    ]),
+    RuleSet(('ts', 'tsx', 'js', 'jsx'), [
+        Rule(TODO),
+        Rule(rb"throw new Error\(['\"]Not implemented"),
+        Rule(rb'\(\)' + S + rb'*=>' + S + rb'*\{' + S + rb'*\}'),
+        Rule(rb'function' + S + rb'*\w*' + S + rb'*\([^)\n]*\)' + S + rb'*\{' + S + rb'*\}'),
+        Rule(rb'\{/\*' + S + rb'*TODO'),
+        # Lazy `: any`, except catch(e: any), event handlers and the like
+        # (a backslash is literal inside a POSIX bracket, so [;,\)] also takes \\)
+        Rule(rb':' + S + rb'*any' + S + rb'*[;,\\)]', label='[any type] ',
+             exclude=rb'(catch|error|err|event|e|evt).*:' + S + rb'*any'),
+        Rule(PLACEHOLDER),
+    ]),
+]
+
+WRONG_PATTERN_RULES = [
+    # Only files with forms/modals are checked
+    RuleSet(('ts', 'tsx'), [
+        Rule(rb"from 'react-hook-form'", label='[WRONG IMPORT] react-hook-form (use Inertia useForm):'),
+        Rule(rb'axios\.(post|put|delete|patch)\(', label='[WRONG PATTERN] axios for mutations (use useForm methods):',
+             gate=rb'Modal|Form|submit|handleSubmit'),
+        Rule(rb'<Button.*type=', label='[WRONG PATTERN] Button with type attribute:'),
+        Rule(rb'Modal.*formData=|Modal.*setFormData=', label='[WRONG PATTERN] Form state passed to modal:'),
+    ], gate=rb'(useForm|Modal|form|submit|onChange)'),
+]
+
+MODES = {
+    'stubs': {
+        'rules': STUB_RULES,
+        'find': ('.php', '.ts', '.tsx', '.js', '.jsx'),
+        'help': ['Usage: {prog} <file1> <file2> ... OR {prog} --dir <directory>', '',
+                 'Scans files for stub patterns (TODO, FIXME, empty methods, etc.)',
+                 'Exit code 0 = clean, 1 = stubs found, 2 = usage error'],
+    },
+    'wrong-patterns': {
+        'rules': WRONG_PATTERN_RULES,
+        'find': ('.ts', '.tsx'),
+        'help': ['Usage: {prog} [--dir <dir>] [files...]'],
+    },
+}
+
+ESCAPES = {
+    ord('\\'): b'\\', ord('a'): b'\a', ord('b'): b'\b', ord('e'): b'\x1b', ord('E'): b'\x1b',
+    ord('f'): b'\f', ord('n'): b'\n', ord('r'): b'\r', ord('t'): b'\t', ord('v'): b'\v',
+}
+ESCAPE = re.compile(rb'\\(0[0-7]{0,3}|x[0-9a-fA-F]{1,2}|u[0-9a-fA-F]{1,4}|U[0-9a-fA-F]{1,8}|c|[\\abeEfnrtv])')
+
+
+def _utf8_locale() -> bool:
+    for name in ('LC_ALL', 'LC_CTYPE', 'LANG'):
+        value = os.environ.get(name)
+        if value:
+            return value.lower().replace('-', '').endswith('utf8')
+    return False
+
+
+UTF8_LOCALE = _utf8_locale()
+
+
+def unicode_escape(kind: int, code: int) -> bytes:
+    """bash's \\u / \\U: the character in a UTF-8 locale (or if ASCII), else the escape, normalised."""
+    if code < 0x80:
+        return bytes([code])
+    if UTF8_LOCALE and code <= 0x10FFFF:
+        return chr(code).encode('utf-8', 'surrogatepass')
+    return (b'\\u%04X' if kind == ord('u') else b'\\U%08X') % code
+
+
+def echo_e(text: bytes) -> bytes:
+    """What bash's `echo -e` writes for `text`, newline included (`\\c` stops output)."""
+    out = []
+    position = 0
+    for match in ESCAPE.finditer(text):
+        out.append(text[position:match.start()])
+        code = match.group(1)
+        if code == b'c':
+            return b''.join(out)
+        if code[0] == ord('0'):
+            out.append(bytes([int(code[1:] or b'0', 8) & 0xFF]))
+        elif code[0] == ord('x'):
+            out.append(bytes([int(code[1:], 16)]))
+        elif code[0] in (ord('u'), ord('U')):
+            out.append(unicode_escape(code[0], int(code[1:], 16)))
+        else:
+            out.append(ESCAPES[code[0]])
+        position = match.end()
+    out.append(text[position:])
+    return b''.join(out) + b'\n'
+
+
+def read(path: str):
+    """The file's bytes, mmapped when large. None if unreadable."""
+    try:
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size >= MMAP_THRESHOLD:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return f.read()
+    except (OSError, ValueError):
+        return None
+
+
+def grep_n(pattern: re.Pattern, data) -> list[bytes]:
+    """`grep -n` output lines (`N:line`) for `pattern` over `data`."""
+    lines = []
+    last_start = -1
+    line_number = 1
+    counted_to = 0
+    for match in pattern.finditer(data):
+        start = data.rfind(b'\n', 0, match.start()) + 1
+        if start == last_start:
+            continue
+        line_number += data.count(b'\n', counted_to, start)
+        counted_to = start
+        end = data.find(b'\n', match.start())
+        lines.append(b'%d:%s' % (line_number, data[start:end if end >= 0 else len(data)]))
+        last_start = start
+    return lines
+
+
+def check_file(path: str, mode: str) -> list[tuple[str, list[bytes]]] | None:
+    """The (label, grep -n lines) findings for one file, in report order, or None if clean."""
+    if not os.path.isfile(path):
+        return None
+    extension = path.rsplit('.', 1)[-1]
+    rule_set = next((rules for rules in MODES[mode]['rules'] if extension in rules.extensions), None)
+    if rule_set is None:
+        return None
+    data = read(path)
+    if data is None:
+        return None
+    try:
+        if rule_set.gate and not rule_set.gate.search(data):
+            return None
+        if not rule_set.any.search(data):
+            return None
+        findings = []
+        for rule in rule_set.rules:
+            if rule.gate and not rule.gate.search(data):
+                continue
+            lines = grep_n(rule.pattern, data)
+            if rule.exclude:
+                lines = [line for line in lines if not rule.exclude.search(line)]
+            if lines:
+                findings.append((rule.label, lines))
+        return findings or None
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+
+def _check(job: tuple[str, str]):
+    return check_file(*job)
+
+
+def find_files(directory: str, suffixes: tuple[str, ...]) -> list[str]:
+    """`find <directory> -type f -name ...` in find's (readdir, depth-first) order."""
+    files = []
+
+    def walk(path: str) -> None:
+        try:
+            entries = os.scandir(path)
+        except OSError:
+            return
+        with entries:
+            for entry in entries:
+                child = path + entry.name if path.endswith('/') else f"{path}/{entry.name}"
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        if entry.name.endswith(suffixes):
+                            files.append(child)
+                    elif entry.is_dir(follow_symlinks=False):
+                        walk(child)
+                except OSError:
+                    continue
+
+    if os.path.isdir(directory):
+        walk(directory)
+    return files
+
+
+def scan(files: list[str], mode: str, jobs: int) -> list[tuple[str, list]]:
+    """(file, findings) for every file with findings, in input order."""
+    if jobs > 1 and len(files) >= POOL_MIN_FILES:
+        from multiprocessing import Pool
+
+        with Pool(jobs) as pool:
+            results = pool.map(_check, [(path, mode) for path in files], chunksize=max(1, len(files) // (jobs * 8)))
+    else:
+        results = [check_file(path, mode) for path in files]
+    return [(path, findings) for path, findings in zip(files, results) if findings]
+
+
+def report_stubs(found: list[tuple[str, list]]) -> bytes:
+    report = b''
+    for path, findings in found:
+        file_stubs = b''
+        for label, lines in findings:
+            file_stubs += label.encode() + b'\n'.join(lines) + b'\n'
+        report += f"{YELLOW}{path}:{NC}".encode('utf-8', 'surrogateescape') + b'\n' + file_stubs + b'\n'
+    return (echo_e(f"{RED}╔══════════════════════════════════════════════════════════════════╗{NC}".encode())
+            + echo_e(f"{RED}║  STUBS DETECTED - INCOMPLETE IMPLEMENTATIONS FOUND               ║{NC}".encode())
+            + echo_e(f"{RED}╚══════════════════════════════════════════════════════════════════╝{NC}".encode())
+            + b'\n'
+            + echo_e(report)
+            + echo_e(f"{RED}All stubs must be replaced with complete implementations.{NC}".encode()))
+
+
+def report_wrong_patterns(found: list[tuple[str, list]]) -> bytes:
+    report = b''
+    for path, findings in found:
+        file_violations = b''
+        for label, lines in findings:
+            file_violations += label.encode() + rb'\n' + b'\n'.join(lines) + rb'\n'
+        report += f"{YELLOW}{path}:{NC}".encode('utf-8', 'surrogateescape') + rb'\n' + file_violations + rb'\n'
+    return (echo_e(f"{RED}╔══════════════════════════════════════════════════════════════════╗{NC}".encode())
+            + echo_e(f"{RED}║  PATTERN VIOLATIONS DETECTED                                      ║{NC}".encode())
+            + echo_e(f"{RED}╚══════════════════════════════════════════════════════════════════╝{NC}".encode())
+            + echo_e(report)
+            + echo_e(b'Reference: budtags/skills/verify-alignment/patterns/frontend-critical.md'))
+
+
+REPORTS = {'stubs': report_stubs, 'wrong-patterns': report_wrong_patterns}
+CLEAN = {'stubs': 'No stubs detected', 'wrong-patterns': 'No pattern violations detected'}
+
+
+def main(argv: list[str]) -> int:
+    if not argv or argv[0] not in MODES:
+        print(f"Usage: {sys.argv[0]} stubs|wrong-patterns [--dir <directory>] [files...]", file=sys.stderr)
+        return 2
+    mode, args = argv[0], argv[1:]
+    prog = sys.argv[0]
+    jobs = os.cpu_count() or 1
+    files: list[str] = []
+    directory = ''
+    while args:
+        arg = args.pop(0)
+        if arg == '--prog' and args:
+            prog = args.pop(0)
+        elif arg == '--jobs' and args:
+            jobs = int(args.pop(0))
+        elif arg in ('--dir', '-d'):
+            if not args:
+                # `shift 2` with one argument left fails under set -e
+                return 1
+            directory = args.pop(0)
+        elif arg in ('--help', '-h'):
+            print('\n'.join(MODES[mode]['help']).format(prog=prog))
+            return 0
+        else:
+            files.append(arg)
+
+    if directory:
+        files += find_files(directory, MODES[mode]['find'])
+    if not files:
+        print('No files to check')
+        return 2
+
+    found = scan(files, mode, jobs)
+    out = sys.stdout.buffer
+    if found:
+        out.write(REPORTS[mode](found))
+        out.flush()
+        return 1
+    out.write(echo_e(f"{GREEN}✓ {CLEAN[mode]}{NC}".encode()))
+    out.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
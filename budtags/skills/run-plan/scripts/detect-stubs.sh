@@ -11,6 +11,13 @@
 
 set -e
 
+# detect-patterns.py produces the same report and exit code in one pass per
+# file instead of one grep per rule per file. The grep implementation below
+# is the fallback when python3 is missing or BUDTAGS_DETECT_PYTHON=0.
+if [[ "${BUDTAGS_DETECT_PYTHON:-1}" != "0" ]] && command -v python3 >/dev/null 2>&1; then
+    PYTHONCOERCECLOCALE=0 exec python3 "$(dirname "${BASH_SOURCE[0]}")/detect-patterns.py" stubs --prog "$0" "$@"
+fi
+
 RED='\033[0;31m'
 GREEN='\033[0;32m'
 YELLOW='\033[1;33m'
@@ -13,6 +13,13 @@
 
 set -e
 
+# detect-patterns.py produces the same report and exit code in one pass per
+# file instead of one grep per rule per file. The grep implementation below
+# is the fallback when python3 is missing or BUDTAGS_DETECT_PYTHON=0.
+if [[ "${BUDTAGS_DETECT_PYTHON:-1}" != "0" ]] && command -v python3 >/dev/null 2>&1; then
+    PYTHONCOERCECLOCALE=0 exec python3 "$(dirname "${BASH_SOURCE[0]}")/detect-patterns.py" wrong-patterns --prog "$0" "$@"
+fi
+
 RED='\033[0;31m'
 GREEN='\033[0;32m'
 YELLOW='\033[1;33m'
@@ -30,7 +37,7 @@ check_file() {
     [[ "$ext" != "ts" && "$ext" != "tsx" ]] && return
 
     # Only check files with forms/modals
-    grep -q -E "(useForm|Modal|form|submit|onChange)" "$file" 2>/dev/null || return
+    grep -q -E "(useForm|Modal|form|submit|onChange)" "$file" 2>/dev/null || return 0
 
     # Check for react-hook-form
     matches=$(grep -n "from 'react-hook-form'" "$file" 2>/dev/null || true)